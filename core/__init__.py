@@ -0,0 +1,40 @@
+"""
+Pacote core - Serviços de domínio sem interface gráfica.
+
+Este pacote contém os componentes de infraestrutura utilizados
+pelas telas do sistema de patologia digital.
+
+Módulos:
+    config: Caminhos e parâmetros de configuração
+    metrics: Registro de métricas (contadores, medidores e histogramas)
+    records: Modelo tipado de paciente e amostra
+    validation: Regras de validação do formulário e dígito verificador do código da amostra
+    report_store: Armazenamento persistente de laudos (SQLite)
+    archive: Arquivo de laudos assinados em segmentos imutáveis (mmap)
+    versions: Versões dos laudos guardadas como diferenças
+    signing: Selo de integridade dos laudos assinados (SHA-256, HMAC, Merkle diário)
+    deidentify: Exportação anonimizada para pesquisa (pseudônimos, datas deslocadas)
+    case_index: Índice colunar de casos para estatísticas
+    exporter: Exportação de laudos para CSV/Excel em fluxo
+    fhir_export: Exportação incremental FHIR NDJSON para o data warehouse
+    backup: Backup incremental com blocos definidos pelo conteúdo
+    audit: Trilha de auditoria append-only em segmentos indexados
+    users: Cadastro de usuários, perfis e verificação de senhas
+    worklist: Fila de trabalho do usuário
+    images: Imagens das amostras, nomeadas pelo conteúdo
+    disk_cache: Cache LRU genérico em disco
+    analysis_cache: Cache dos resultados das etapas de análise
+    imaging: Operações de imagem (deconvolução e normalização de cor, máscaras, limiares)
+    pipeline: Motor de pipeline de análise em grafo de etapas
+    analysis: Etapas padrão da análise da amostra
+    plugins: Plugins de análise carregados sob demanda
+    inference: Classificador de tiles e sugestão diagnóstica (CPU)
+    macroscopy: Medição da peça pela foto da macroscopia e peso da balança
+    annotations: Anotações da lâmina e índice espacial com níveis de detalhe
+    previews: Miniaturas das lâminas e prévias dos laudos (cache em disco)
+    terminology: Índice de busca da terminologia para codificar o diagnóstico
+    requisitions: Ingestão de requisições HL7 v2 / CSV
+    synthetic: Casos e lâminas sintéticos para testes de carga
+    loadtest: Teste de carga do armazenamento de laudos (vazão e percentis)
+    workers: Tarefas em segundo plano no pool de threads do Qt
+"""
@@ -0,0 +1,310 @@
+"""
+Módulo das etapas de análise da amostra.
+
+Este módulo define o pipeline padrão de análise, com as cinco etapas
+exibidas na tela de carregamento:
+
+    preparacao ──┬── estimativa_corantes ──┬── estrutura_celular ─┬── relatorio_preliminar ── finalizacao
+                 │                         └── sugestao_diagnostica ──── anotacoes
+                 └── processamento_imagens ─────────────────────────┘
+
+    macroscopia (foto da macroscopia)      pesagem (arquivo da balança)
+
+Os vetores de cor dos corantes de cada lâmina são estimados uma vez e
+guardados junto com a imagem. A estrutura celular usa esses vetores
+na separação dos corantes, e a sugestão diagnóstica normaliza a cor de
+cada lote de tiles antes de pontuá-lo. As anotações exibidas sobre a
+lâmina reúnem os núcleos detectados e os tiles classificados. Etapas sem dependência entre
+si (ex.: processamento de imagens e estimativa dos corantes) rodam em
+paralelo. Sem imagem da lâmina,
+as etapas de imagem são puladas e o relatório preliminar fica vazio.
+
+As medidas da peça e o peso preenchem os campos da macroscopia que não
+foram digitados no formulário (fill_macroscopy).
+
+Etapas adicionais podem ser registradas com register_stage, e passam a
+fazer parte de todo pipeline criado depois, ou vir de plugins
+(core.plugins), incluídos apenas nas amostras compatíveis.
+
+Funções:
+    register_stage: Registra uma etapa adicional (plugin).
+    build_pipeline: Cria o pipeline padrão com as etapas registradas.
+    run_analysis: Executa o pipeline para um registro de paciente e amostra.
+    fill_macroscopy: Preenche as medidas e o peso do registro com os valores medidos.
+"""
+
+import numpy as np
+
+from .annotations import AnnotationSet
+from .images import image_path, image_digest, load_stain_profile, save_stain_profile
+from .config import SCALE_REFERENCE_MM
+from .inference import get_engine, model_digest
+from .macroscopy import measure_photo, read_weight
+from .imaging import (HE_REFERENCE, REFERENCE_PROFILE, load_rgb, tissue_mask, stain_concentrations,
+                      otsu_threshold, estimate_stain_profile, detect_nuclei)
+from .pipeline import Pipeline, Stage
+
+# Etapas adicionais registradas por plugins
+_EXTRA_STAGES = []
+
+
+def prepare_image(slide_image, max_size):
+    """Lê a imagem da lâmina, reduzida a max_size pixels na maior dimensão."""
+    return load_rgb(image_path(slide_image), max_size)
+
+
+def stain_profile(slide_image, image):
+    """
+    Retorna o perfil de coloração da lâmina, estimando-o apenas na primeira análise.
+
+    Returns:
+        StainProfile | None: Perfil, ou None se houver pouco tecido para estimá-lo
+    """
+    profile = load_stain_profile(slide_image)
+    if profile is None:
+        profile = estimate_stain_profile(image)
+        if profile is not None:
+            save_stain_profile(slide_image, profile)
+    return profile
+
+
+def cell_structure(image, stain_profile, background_level):
+    """
+    Mede a celularidade pela hematoxilina (corante nuclear).
+
+    Os corantes são separados com os vetores de cor da própria lâmina,
+    e as concentrações, ajustadas à escala do perfil de referência. O
+    limiar de Otsu sobre a concentração de hematoxilina nas regiões
+    com tecido separa os núcleos do restante do tecido.
+
+    Returns:
+        dict: nuclear_fraction (fração do tecido ocupada por núcleos),
+            hematoxylin_mean e eosin_mean (concentrações médias no tecido)
+    """
+    mask = tissue_mask(image, background_level)
+    if not mask.any():
+        return {"nuclear_fraction": 0.0, "hematoxylin_mean": 0.0, "eosin_mean": 0.0}
+    if stain_profile is None:
+        concentrations = stain_concentrations(image)[mask]
+    else:
+        scale = REFERENCE_PROFILE.max_concentrations / stain_profile.max_concentrations
+        concentrations = stain_concentrations(image, stain_profile.matrix)[mask] * scale.astype(np.float32)
+    hematoxylin, eosin = concentrations[:, 0], concentrations[:, 1]
+    threshold = otsu_threshold(hematoxylin)
+    return {
+        "nuclear_fraction": float(np.mean(hematoxylin > threshold)),
+        "hematoxylin_mean": float(hematoxylin.mean()),
+        "eosin_mean": float(eosin.mean()),
+    }
+
+
+def image_statistics(image, background_level):
+    """
+    Calcula a área de tecido e a cor média da lâmina.
+
+    Returns:
+        dict: tissue_fraction (fração da imagem com tecido), mean_rgb
+            (cor média do tecido) e size (largura, altura)
+    """
+    mask = tissue_mask(image, background_level)
+    mean_rgb = image[mask].mean(axis=0) if mask.any() else np.zeros(3)
+    return {
+        "tissue_fraction": float(mask.mean()),
+        "mean_rgb": tuple(round(float(value), 1) for value in mean_rgb),
+        "size": (image.shape[1], image.shape[0]),
+    }
+
+
+def suggest_diagnosis(image, stain_profile, model):
+    """
+    Calcula a sugestão diagnóstica com o classificador de tiles, normalizando a cor da lâmina.
+
+    O parâmetro model (identificação do modelo) não é usado no cálculo:
+    faz parte da chave do cache, para que a troca do modelo invalide as
+    sugestões já calculadas.
+
+    Returns:
+        DiagnosisSuggestion | None: Sugestão, ou None se não houver tecido
+    """
+    return get_engine().suggest(image, stain_profile)
+
+
+def annotate(image, stain_profile, diagnosis_suggestion, background_level):
+    """
+    Reúne as anotações da lâmina: núcleos (pontos) e tiles classificados (polígonos).
+
+    Returns:
+        AnnotationSet: Anotações, em pixels da imagem preparada
+    """
+    annotations = AnnotationSet((image.shape[1], image.shape[0]))
+    matrix = stain_profile.matrix if stain_profile is not None else HE_REFERENCE
+    annotations.add_points(detect_nuclei(image, matrix, background_level), "núcleo")
+    if diagnosis_suggestion is not None:
+        for code, name in enumerate(diagnosis_suggestion.probabilities):
+            annotations.add_rectangles(
+                diagnosis_suggestion.regions[diagnosis_suggestion.region_classes == code], name)
+    return annotations
+
+
+def measure_gross(gross_image, reference_mm, max_size):
+    """
+    Mede a peça na foto da macroscopia.
+
+    Returns:
+        GrossMeasurement | None: Medidas, ou None se a foto não puder ser
+            medida (ex.: sem referência de escala); as medidas ficam para
+            preenchimento manual
+    """
+    try:
+        return measure_photo(image_path(gross_image), reference_mm, max_size)
+    except ValueError:
+        return None
+
+
+def weigh(sample_code):
+    """Lê o peso da amostra no arquivo da balança (sempre relido: pode haver nova pesagem)."""
+    return read_weight(sample_code)
+
+
+def preliminary_report(cell_features, tissue_features, tissue_type):
+    """
+    Redige os achados automáticos a partir das medidas das etapas anteriores.
+
+    Returns:
+        list[str]: Frases dos achados (vazia sem medidas de imagem)
+    """
+    findings = []
+    if tissue_features:
+        sample = f"Amostra de {tissue_type.lower()}: o" if tissue_type else "O"
+        findings.append(f"{sample} tecido ocupa {tissue_features['tissue_fraction']:.0%} "
+                        f"da lâmina digitalizada.")
+    if cell_features:
+        fraction = cell_features["nuclear_fraction"]
+        if fraction >= 0.5:
+            level = "elevada"
+        elif fraction >= 0.2:
+            level = "moderada"
+        else:
+            level = "baixa"
+        findings.append(f"Celularidade estimada {level} (núcleos em {fraction:.0%} da área de tecido).")
+    return findings
+
+
+def finalize(findings):
+    """Reúne os achados automáticos em um parágrafo para o laudo."""
+    if not findings:
+        return ""
+    return "Análise automatizada da imagem: " + " ".join(findings)
+
+
+def register_stage(stage):
+    """
+    Registra uma etapa adicional no pipeline padrão.
+
+    A etapa pode consumir as entradas do registro (slide_image,
+    tissue_type, material_type) e as saídas das etapas padrão.
+
+    Args:
+        stage (Stage): Etapa
+    """
+    _EXTRA_STAGES.append(stage)
+
+
+def build_pipeline(extra_stages=()):
+    """
+    Cria o pipeline padrão de análise, incluindo as etapas registradas.
+
+    Args:
+        extra_stages (Iterable[Stage], optional): Etapas adicionais (ex.: de plugins)
+
+    Returns:
+        Pipeline: Pipeline de análise
+    """
+    return Pipeline([
+        Stage("preparacao", prepare_image, inputs=("slide_image",), outputs=("image",),
+              params={"max_size": 2048}, label="Preparando amostra..."),
+        Stage("estimativa_corantes", stain_profile, inputs=("slide_image", "image"),
+              outputs=("stain_profile",), label="Estimando a coloração da lâmina...",
+              cacheable=False),
+        Stage("estrutura_celular", cell_structure, inputs=("image", "stain_profile"),
+              optional=("stain_profile",), outputs=("cell_features",), version=2,
+              params={"background_level": 220}, label="Analisando estrutura celular..."),
+        Stage("processamento_imagens", image_statistics, inputs=("image",),
+              outputs=("tissue_features",), params={"background_level": 220},
+              label="Processando imagens microscópicas..."),
+        Stage("sugestao_diagnostica", suggest_diagnosis, inputs=("image", "stain_profile"),
+              optional=("stain_profile",), outputs=("diagnosis_suggestion",), version=3,
+              params={"model": model_digest()},
+              label="Calculando sugestão diagnóstica..."),
+        Stage("anotacoes", annotate, inputs=("image", "stain_profile", "diagnosis_suggestion"),
+              optional=("stain_profile", "diagnosis_suggestion"), outputs=("annotations",),
+              params={"background_level": 220}, label="Marcando núcleos e regiões..."),
+        Stage("macroscopia", measure_gross, inputs=("gross_image",), outputs=("gross_measurement",),
+              params={"reference_mm": SCALE_REFERENCE_MM, "max_size": 1024},
+              label="Medindo a peça na foto da macroscopia..."),
+        Stage("pesagem", weigh, inputs=("sample_code",), outputs=("weight_grams",),
+              label="Lendo o peso da balança...", cacheable=False),
+        Stage("relatorio_preliminar", preliminary_report,
+              inputs=("cell_features", "tissue_features", "tissue_type"),
+              optional=("cell_features", "tissue_features", "tissue_type"),
+              outputs=("findings",), label="Gerando relatório preliminar..."),
+        Stage("finalizacao", finalize, inputs=("findings",), outputs=("analysis_summary",),
+              label="Finalizando análise...", cacheable=False),
+    ] + _EXTRA_STAGES + list(extra_stages))
+
+
+def run_analysis(record, cache=None, plugins=None, progress=None, cancelled=None, on_event=None,
+                 executor=None):
+    """
+    Executa o pipeline de análise para um registro de paciente e amostra.
+
+    Args:
+        record (PatientRecord): Dados do paciente e amostra
+        cache (AnalysisCache, optional): Cache dos resultados das etapas
+        plugins (PluginRegistry, optional): Plugins; os compatíveis com a amostra
+            são carregados na primeira análise
+        progress (callable, optional): Recebe (etapas concluídas, total)
+        cancelled (callable, optional): Retorna True para interromper
+        on_event (callable, optional): Eventos das etapas (ver Pipeline.run)
+        executor (Executor, optional): Pool das etapas, compartilhado entre análises simultâneas
+
+    Returns:
+        PipelineResult | None: Resultado, ou None se interrompido
+
+    Raises:
+        PluginError: Se um plugin compatível não puder ser carregado
+    """
+    extra_stages = plugins.stages_for(record) if plugins else ()
+    sources = {
+        "slide_image": record.slide_image or None,
+        "gross_image": record.gross_image or None,
+        "sample_code": record.sample_code or None,
+        "tissue_type": record.tissue_type or None,
+        "material_type": record.material_type,
+    }
+    digests = {}
+    # O nome das imagens importadas já é o hash do seu conteúdo
+    if record.slide_image:
+        digests["slide_image"] = image_digest(record.slide_image)
+    if record.gross_image:
+        digests["gross_image"] = image_digest(record.gross_image)
+    return build_pipeline(extra_stages).run(sources, digests, cache=cache, progress=progress,
+                                cancelled=cancelled, on_event=on_event, executor=executor)
+
+
+def fill_macroscopy(record, result):
+    """
+    Preenche as medidas e o peso do registro com os valores medidos.
+
+    Valores digitados no formulário têm precedência.
+
+    Args:
+        record (PatientRecord): Dados do paciente e amostra
+        result (PipelineResult): Resultado da análise
+    """
+    measurement = result.get("gross_measurement")
+    if measurement and not record.tissue_measurement:
+        record.tissue_measurement = measurement.label()
+    weight = result.get("weight_grams")
+    if weight is not None and not record.tissue_weight:
+        record.tissue_weight = f"{weight:.2f} g"
@@ -0,0 +1,123 @@
+"""
+Módulo de cache de análise.
+
+Este módulo contém o cache dos resultados das etapas de análise de
+imagem. A chave de cada resultado combina o nome e a versão da etapa,
+os seus parâmetros e os hashes das suas entradas (a imagem da amostra
+ou os resultados de etapas anteriores). Refazer a análise da mesma
+amostra, por exemplo após corrigir um erro de digitação no formulário,
+reaproveita todos os resultados; alterar um parâmetro ou a imagem
+recalcula apenas as etapas afetadas.
+
+Os resultados são serializados com pickle e guardados no cache LRU em
+disco (DiskLRUCache). O cache é local e gravado apenas pela própria
+aplicação.
+
+Classes:
+    AnalysisCache: Cache de resultados das etapas de análise.
+"""
+
+import hashlib
+import json
+import pickle
+import threading
+
+from .disk_cache import DiskLRUCache
+from .metrics import REGISTRY, ANALYSIS_CACHE_HITS_TOTAL, ANALYSIS_CACHE_MISSES_TOTAL
+
+
+class AnalysisCache:
+    """
+    Cache de resultados das etapas de análise, em disco.
+
+    Attributes:
+        disk_cache (DiskLRUCache): Armazenamento dos resultados
+    """
+
+    def __init__(self, directory, max_bytes):
+        """
+        Abre o cache.
+
+        Args:
+            directory (str): Diretório do cache
+            max_bytes (int): Tamanho máximo, em bytes
+        """
+        self.disk_cache = DiskLRUCache(directory, max_bytes)
+        self._stage_stats = {}  # etapa -> [acertos, faltas]
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def stage_key(stage, version, params, input_digests):
+        """
+        Calcula a chave de um resultado.
+
+        Args:
+            stage (str): Nome da etapa
+            version (str | int): Versão da implementação da etapa
+            params (dict): Parâmetros da etapa (serializáveis em JSON)
+            input_digests (Sequence[str]): Hashes das entradas, na ordem declarada
+
+        Returns:
+            str: Chave hexadecimal (SHA-256)
+        """
+        canonical = json.dumps([stage, str(version), params, list(input_digests)],
+                               sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def run(self, stage, version, params, input_digests, compute):
+        """
+        Retorna o resultado de uma etapa, calculando-o apenas se não estiver no cache.
+
+        Args:
+            stage (str): Nome da etapa
+            version (str | int): Versão da etapa
+            params (dict): Parâmetros da etapa
+            input_digests (Sequence[str]): Hashes das entradas
+            compute (callable): Função sem argumentos que calcula o resultado
+
+        Returns:
+            tuple: (resultado, hash do resultado, True se veio do cache)
+        """
+        key = self.stage_key(stage, version, params, input_digests)
+        data = self.disk_cache.get(key)
+        hit = data is not None
+        if hit:
+            try:
+                value = pickle.loads(data)
+            except Exception:
+                # Item ilegível (ex.: classe alterada): recalcula
+                self.disk_cache.delete(key)
+                hit = False
+        if not hit:
+            value = compute()
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            self.disk_cache.put(key, data)
+        self._record(stage, hit)
+        return value, hashlib.sha256(data).hexdigest(), hit
+
+    def _record(self, stage, hit):
+        """Contabiliza um acerto ou falta da etapa."""
+        with self._lock:
+            counts = self._stage_stats.setdefault(stage, [0, 0])
+            counts[0 if hit else 1] += 1
+        name, help_text = ((ANALYSIS_CACHE_HITS_TOTAL, "Resultados de análise reaproveitados do cache")
+                           if hit else
+                           (ANALYSIS_CACHE_MISSES_TOTAL, "Resultados de análise calculados"))
+        REGISTRY.counter(name, help_text, stage=stage).inc()
+
+    def stats(self):
+        """
+        Retorna as estatísticas do cache.
+
+        Returns:
+            dict: Estatísticas do cache em disco e, em "stages", acertos e faltas por etapa
+        """
+        stats = self.disk_cache.stats()
+        with self._lock:
+            stats["stages"] = {stage: {"hits": hits, "misses": misses}
+                               for stage, (hits, misses) in self._stage_stats.items()}
+        return stats
+
+    def clear(self):
+        """Remove todos os resultados."""
+        self.disk_cache.clear()
@@ -0,0 +1,377 @@
+"""
+Módulo de anotações da lâmina.
+
+Este módulo contém as anotações exibidas sobre a imagem da lâmina
+(núcleos detectados como pontos, regiões classificadas como
+polígonos) e o índice espacial usado para desenhá-las. As anotações
+ficam em colunas NumPy: uma lâmina pode ter centenas de milhares
+delas, e objetos Python individuais tornariam a consulta e o
+armazenamento lentos demais.
+
+O índice é uma quadtree sobre o centro das anotações. As anotações de
+cada nó ocupam um trecho contíguo da ordem do índice, e cada nó guarda
+o retângulo que envolve as suas anotações, a quantidade, o centro
+médio e o rótulo predominante. A consulta de uma área visível desce a
+árvore nível a nível, com operações vetorizadas sobre todos os nós do
+nível; nós menores que o tamanho mínimo pedido (poucos pixels na tela,
+com a imagem afastada) não são abertos e voltam como agrupamentos.
+
+Para medir o desempenho:
+
+    python -m core.annotations --benchmark
+
+Classes:
+    AnnotationSet: Anotações de uma lâmina, em colunas.
+    AnnotationIndex: Índice espacial (quadtree) com níveis de detalhe.
+
+Funções:
+    benchmark: Mede o tempo das consultas sobre anotações sintéticas.
+"""
+
+import argparse
+import io
+import json
+import time
+
+import numpy as np
+
+# Tipos de anotação
+POINT = 0
+POLYGON = 1
+
+# Anotações por folha da quadtree e profundidade máxima
+LEAF_SIZE = 64
+MAX_DEPTH = 16
+
+
+class AnnotationSet:
+    """
+    Anotações de uma lâmina, em colunas.
+
+    As coordenadas estão em pixels da imagem analisada (image_size);
+    quem exibe a lâmina em outra resolução aplica a escala.
+
+    Attributes:
+        labels (list[str]): Rótulos (ex.: "núcleo", "maligno"), indexados por label_codes
+        image_size (tuple[int, int]): Largura e altura do sistema de coordenadas
+        kinds (numpy.ndarray): Tipo de cada anotação (POINT ou POLYGON), uint8
+        label_codes (numpy.ndarray): Índice do rótulo de cada anotação, uint16
+        bounds (numpy.ndarray): Retângulo envolvente (x0, y0, x1, y1), float32 (n, 4)
+        offsets (numpy.ndarray): Início dos vértices de cada anotação em vertices, int64 (n + 1)
+        vertices (numpy.ndarray): Vértices de todas as anotações, float32 (m, 2)
+    """
+
+    __slots__ = ("labels", "image_size", "kinds", "label_codes", "bounds", "offsets", "vertices")
+
+    def __init__(self, image_size=(0, 0), labels=()):
+        self.labels = list(labels)
+        self.image_size = tuple(int(v) for v in image_size)
+        self.kinds = np.zeros(0, dtype=np.uint8)
+        self.label_codes = np.zeros(0, dtype=np.uint16)
+        self.bounds = np.zeros((0, 4), dtype=np.float32)
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.vertices = np.zeros((0, 2), dtype=np.float32)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __repr__(self):
+        return f"AnnotationSet({len(self)} anotações, {self.image_size[0]}x{self.image_size[1]})"
+
+    def label_code(self, label):
+        """Retorna o código de um rótulo, incluindo-o se necessário."""
+        if label not in self.labels:
+            self.labels.append(label)
+        return self.labels.index(label)
+
+    def _append(self, kind, label, vertices, counts, bounds):
+        """Acrescenta anotações já convertidas em colunas."""
+        self.kinds = np.concatenate([self.kinds, np.full(len(counts), kind, dtype=np.uint8)])
+        self.label_codes = np.concatenate([self.label_codes,
+                                           np.full(len(counts), self.label_code(label), dtype=np.uint16)])
+        self.bounds = np.concatenate([self.bounds, bounds.astype(np.float32)])
+        self.offsets = np.concatenate([self.offsets, self.offsets[-1] + np.cumsum(counts, dtype=np.int64)])
+        self.vertices = np.concatenate([self.vertices, vertices.astype(np.float32)])
+
+    def add_points(self, points, label):
+        """
+        Acrescenta pontos (ex.: núcleos).
+
+        Args:
+            points (numpy.ndarray): Coordenadas (n, 2) em x, y
+            label (str): Rótulo dos pontos
+        """
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 2)
+        self._append(POINT, label, points, np.ones(len(points), dtype=np.int64),
+                     np.concatenate([points, points], axis=1))
+
+    def add_polygons(self, polygons, label):
+        """
+        Acrescenta polígonos (ex.: regiões classificadas).
+
+        Args:
+            polygons (Iterable[numpy.ndarray]): Vértices (k, 2) de cada polígono,
+                ou uma matriz (n, k, 2) de polígonos com o mesmo número de vértices
+            label (str): Rótulo dos polígonos
+        """
+        polygons = [np.asarray(polygon, dtype=np.float32).reshape(-1, 2) for polygon in polygons]
+        if not polygons:
+            return
+        bounds = np.array([np.concatenate([p.min(axis=0), p.max(axis=0)]) for p in polygons])
+        self._append(POLYGON, label, np.concatenate(polygons),
+                     np.array([len(p) for p in polygons], dtype=np.int64), bounds)
+
+    def add_rectangles(self, rectangles, label):
+        """
+        Acrescenta retângulos como polígonos de quatro vértices.
+
+        Args:
+            rectangles (numpy.ndarray): Retângulos (n, 4) em x0, y0, x1, y1
+            label (str): Rótulo dos retângulos
+        """
+        r = np.asarray(rectangles, dtype=np.float32).reshape(-1, 4)
+        corners = np.stack([r[:, [0, 1]], r[:, [2, 1]], r[:, [2, 3]], r[:, [0, 3]]], axis=1)
+        bounds = np.concatenate([np.minimum(r[:, :2], r[:, 2:]), np.maximum(r[:, :2], r[:, 2:])], axis=1)
+        self._append(POLYGON, label, corners.reshape(-1, 2), np.full(len(r), 4, dtype=np.int64), bounds)
+
+    def polygon(self, index):
+        """Retorna os vértices de uma anotação (um único vértice para pontos)."""
+        return self.vertices[self.offsets[index]:self.offsets[index + 1]]
+
+    def counts(self):
+        """Retorna a quantidade de anotações de cada rótulo (rótulo -> quantidade)."""
+        totals = np.bincount(self.label_codes, minlength=len(self.labels))
+        return {label: int(total) for label, total in zip(self.labels, totals)}
+
+    def to_bytes(self):
+        """Serializa as anotações (arquivo .npz compactado)."""
+        buffer = io.BytesIO()
+        header = json.dumps({"labels": self.labels, "image_size": self.image_size})
+        np.savez_compressed(buffer, header=np.frombuffer(header.encode("utf-8"), dtype=np.uint8),
+                            kinds=self.kinds, label_codes=self.label_codes, bounds=self.bounds,
+                            offsets=self.offsets, vertices=self.vertices)
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Lê anotações serializadas com to_bytes.
+
+        Raises:
+            ValueError: Se os dados estiverem corrompidos
+        """
+        try:
+            with np.load(io.BytesIO(data)) as arrays:
+                header = json.loads(arrays["header"].tobytes().decode("utf-8"))
+                annotations = cls(header["image_size"], header["labels"])
+                for name in ("kinds", "label_codes", "bounds", "offsets", "vertices"):
+                    setattr(annotations, name, arrays[name])
+        except (OSError, KeyError, ValueError) as exc:
+            raise ValueError(f"Anotações corrompidas: {exc}") from exc
+        return annotations
+
+
+class AnnotationIndex:
+    """
+    Índice espacial (quadtree) das anotações de uma lâmina, com níveis de detalhe.
+
+    Os nós estão em colunas (node_*); o nó 0 é a raiz. As anotações do
+    nó i são order[node_start[i]:node_end[i]].
+
+    Attributes:
+        annotations (AnnotationSet): Anotações indexadas
+        order (numpy.ndarray): Índices das anotações na ordem da árvore
+        node_bounds (numpy.ndarray): Retângulo que envolve as anotações de cada nó (k, 4)
+        node_children (numpy.ndarray): Filhos de cada nó (k, 4), -1 se ausente
+        node_start (numpy.ndarray): Início do trecho de order de cada nó
+        node_end (numpy.ndarray): Fim do trecho de order de cada nó
+        node_count (numpy.ndarray): Quantidade de anotações de cada nó
+        node_center (numpy.ndarray): Centro médio das anotações de cada nó (k, 2)
+        node_label (numpy.ndarray): Rótulo predominante de cada nó
+        build_seconds (float): Duração da construção
+    """
+
+    def __init__(self, annotations, leaf_size=LEAF_SIZE, max_depth=MAX_DEPTH):
+        """
+        Constrói o índice.
+
+        Args:
+            annotations (AnnotationSet): Anotações
+            leaf_size (int, optional): Anotações por folha. Defaults to LEAF_SIZE.
+            max_depth (int, optional): Profundidade máxima. Defaults to MAX_DEPTH.
+        """
+        start = time.perf_counter()
+        self.annotations = annotations
+        self._leaf_size = leaf_size
+        self._max_depth = max_depth
+        bounds = annotations.bounds
+        self._centers = np.stack([(bounds[:, 0] + bounds[:, 2]) / 2, (bounds[:, 1] + bounds[:, 3]) / 2],
+                                 axis=1)
+        self._nodes = []
+        self._order = []
+        self._position = 0
+        if len(annotations):
+            x0, y0 = self._centers.min(axis=0)
+            x1, y1 = self._centers.max(axis=0)
+            side = max(x1 - x0, y1 - y0, 1.0)
+            self._build(np.arange(len(annotations)), x0, y0, side, 0)
+        else:
+            self._nodes.append((np.zeros(4, dtype=np.float32), [-1] * 4, 0, 0, (0.0, 0.0), 0))
+
+        self.order = np.concatenate(self._order) if self._order else np.zeros(0, dtype=np.int64)
+        self.node_bounds = np.array([node[0] for node in self._nodes], dtype=np.float32)
+        self.node_children = np.array([node[1] for node in self._nodes], dtype=np.int64)
+        self.node_start = np.array([node[2] for node in self._nodes], dtype=np.int64)
+        self.node_end = np.array([node[3] for node in self._nodes], dtype=np.int64)
+        self.node_count = self.node_end - self.node_start
+        self.node_center = np.array([node[4] for node in self._nodes], dtype=np.float32)
+        self.node_label = np.array([node[5] for node in self._nodes], dtype=np.uint16)
+        self._is_leaf = (self.node_children < 0).all(axis=1)
+        # Colunas contíguas dos retângulos dos nós, para os testes de interseção
+        self._node_x0, self._node_y0, self._node_x1, self._node_y1 = self.node_bounds.T.copy()
+        # Extensão usada no nível de detalhe (nós de uma anotação nunca são agrupados)
+        extent = (self.node_bounds[:, 2:] - self.node_bounds[:, :2]).max(axis=1)
+        self._lod_size = np.where(self.node_count > 1, extent, np.inf)
+        del self._nodes, self._order, self._centers
+        self.build_seconds = time.perf_counter() - start
+
+    def __len__(self):
+        return len(self.node_start)
+
+    def _build(self, items, x, y, side, depth):
+        """Cria o nó da região quadrada (x, y, side) com as anotações items, em profundidade."""
+        node = len(self._nodes)
+        self._nodes.append(None)
+        start = self._position
+        children = [-1] * 4
+        if len(items) <= self._leaf_size or depth >= self._max_depth:
+            self._order.append(items)
+            self._position += len(items)
+        else:
+            half = side / 2
+            centers = self._centers[items]
+            quadrant = (centers[:, 0] >= x + half).astype(np.int8) + 2 * (centers[:, 1] >= y + half)
+            for q in range(4):
+                selected = items[quadrant == q]
+                if len(selected):
+                    children[q] = self._build(selected, x + half * (q & 1), y + half * (q >> 1),
+                                              half, depth + 1)
+        bounds = self.annotations.bounds[items]
+        labels = np.bincount(self.annotations.label_codes[items])
+        self._nodes[node] = (np.concatenate([bounds[:, :2].min(axis=0), bounds[:, 2:].max(axis=0)]),
+                             children, start, self._position,
+                             tuple(self._centers[items].mean(axis=0)), int(labels.argmax()))
+        return node
+
+    def query(self, x0, y0, x1, y1, min_size=0.0):
+        """
+        Retorna as anotações e os agrupamentos que cruzam um retângulo.
+
+        Args:
+            x0, y0, x1, y1 (float): Retângulo consultado (ex.: área visível)
+            min_size (float, optional): Nós com extensão menor que esta (e mais
+                de uma anotação) voltam como agrupamentos, sem ser abertos.
+                Defaults to 0.0 (todas as anotações).
+
+        Returns:
+            tuple: (índices das anotações, nós agrupados), int64
+        """
+        x0, y0, x1, y1 = (np.float32(v) for v in (x0, y0, x1, y1))
+        frontier = np.zeros(1, dtype=np.int64)
+        leaves, clusters = [], []
+        while len(frontier):
+            hit = self._node_x0[frontier] <= x1
+            hit &= self._node_x1[frontier] >= x0
+            hit &= self._node_y0[frontier] <= y1
+            hit &= self._node_y1[frontier] >= y0
+            frontier = frontier[hit]
+            collapse = self._lod_size[frontier] < min_size
+            clusters.append(frontier[collapse])
+            frontier = frontier[~collapse]
+            leaf = self._is_leaf[frontier]
+            leaves.append(frontier[leaf])
+            children = self.node_children[frontier[~leaf]].ravel()
+            frontier = children[children >= 0]
+
+        leaves = np.concatenate(leaves)
+        starts, ends = self.node_start[leaves], self.node_end[leaves]
+        lengths = ends - starts
+        total = int(lengths.sum())
+        # Expansão vetorizada dos trechos [start, end) das folhas em posições de order
+        positions = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(total)
+        items = self.order[positions]
+        b = self.annotations.bounds[items]
+        inside = (b[:, 0] <= x1) & (b[:, 2] >= x0) & (b[:, 1] <= y1) & (b[:, 3] >= y0)
+        return items[inside], np.concatenate(clusters)
+
+
+def _synthetic_annotations(count, size, seed):
+    """Gera anotações sintéticas (núcleos agrupados e regiões) para o benchmark."""
+    rng = np.random.default_rng(seed)
+    annotations = AnnotationSet((size, size))
+    clusters = rng.uniform(0, size, size=(max(1, count // 2000), 2))
+    nuclei = clusters[rng.integers(0, len(clusters), count)] + rng.normal(0, size / 100, (count, 2))
+    annotations.add_points(np.clip(nuclei, 0, size), "núcleo")
+    tile = size // 64
+    grid = np.stack(np.meshgrid(np.arange(64), np.arange(64)), axis=-1).reshape(-1, 2) * tile
+    annotations.add_rectangles(np.concatenate([grid, grid + tile], axis=1), "região")
+    return annotations
+
+
+def benchmark(count=500000, size=100000, queries=200, seed=0):
+    """
+    Mede a construção do índice e o tempo das consultas de área visível.
+
+    As consultas simulam uma tela de 1600x1000 pixels em várias
+    ampliações, com agrupamento dos nós menores que 32 pixels na tela.
+
+    Args:
+        count (int, optional): Núcleos sintéticos. Defaults to 500000.
+        size (int, optional): Lado da lâmina sintética em pixels. Defaults to 100000.
+        queries (int, optional): Consultas por ampliação. Defaults to 200.
+        seed (int, optional): Semente dos dados. Defaults to 0.
+
+    Returns:
+        dict: annotations, nodes, build_seconds e, por ampliação,
+            (p50, p95, máximo) do tempo das consultas em segundos e a média de itens retornados
+    """
+    rng = np.random.default_rng(seed)
+    annotations = _synthetic_annotations(count, size, seed)
+    index = AnnotationIndex(annotations)
+    result = {"annotations": len(annotations), "nodes": len(index),
+              "build_seconds": index.build_seconds, "zoom": {}}
+    for zoom in (size / 1600, 16.0, 4.0, 1.0, 0.25):
+        width, height = 1600 * zoom, 1000 * zoom
+        latencies, returned = [], 0
+        for x, y in rng.uniform(0, size, size=(queries, 2)):
+            start = time.perf_counter()
+            items, clusters = index.query(x - width / 2, y - height / 2, x + width / 2, y + height / 2,
+                                          min_size=32 * zoom)
+            latencies.append(time.perf_counter() - start)
+            returned += len(items) + len(clusters)
+        result["zoom"][zoom] = (float(np.percentile(latencies, 50)), float(np.percentile(latencies, 95)),
+                                float(max(latencies)), returned / queries)
+    return result
+
+
+def main(argv=None):
+    """Ponto de entrada da linha de comando."""
+    parser = argparse.ArgumentParser(description="Mede o desempenho do índice de anotações.")
+    parser.add_argument("--benchmark", action="store_true", help="Executa o benchmark")
+    parser.add_argument("--count", type=int, default=500000, help="Núcleos sintéticos")
+    parser.add_argument("--queries", type=int, default=200, help="Consultas por ampliação")
+    args = parser.parse_args(argv)
+    if not args.benchmark:
+        parser.print_help()
+        return
+
+    result = benchmark(args.count, queries=args.queries)
+    print(f"{result['annotations']} anotações, {result['nodes']} nós, "
+          f"construção em {result['build_seconds']:.2f} s")
+    for zoom, (p50, p95, worst, returned) in result["zoom"].items():
+        print(f"{zoom:8.2f} px da lâmina por px da tela: p50 {p50 * 1000:.3f} ms, "
+              f"p95 {p95 * 1000:.3f} ms, máx. {worst * 1000:.3f} ms, {returned:.0f} itens")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,604 @@
+"""
+Módulo do arquivo de laudos assinados.
+
+Este módulo contém o arquivo imutável dos laudos assinados. Depois da
+assinatura, um laudo só muda por retificação; ele sai do banco de
+laudos em uso (que permanece pequeno) e é anexado a um segmento do
+arquivo, junto com as anotações da lâmina.
+
+Cada registro do segmento é comprimido (zlib) e precedido do seu
+tamanho e CRC-32. Ao atingir o tamanho máximo, o segmento é encerrado
+e ganha dois índices ordenados (arrays NumPy): por código da amostra e
+por número de prontuário. Segmentos encerrados nunca mais são
+alterados, de modo que podem ser copiados para backup a qualquer
+momento. As leituras usam mmap: acessar um laudo arquivado custa uma
+busca binária no índice e uma descompressão.
+
+Uma retificação anexa uma nova versão do laudo; vale sempre a versão
+mais recente (segmento e posição maiores).
+
+Estrutura do diretório:
+    arquivo-000001.seg        Segmento (registros comprimidos)
+    arquivo-000001.idx.npy    Entradas ordenadas por código da amostra
+    arquivo-000001.rec.npy    Posições das entradas ordenadas por prontuário
+
+Classes:
+    ReportArchive: Arquivo de laudos em segmentos imutáveis.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+
+import numpy as np
+
+_SEGMENT_PREFIX = "arquivo-"
+_SEGMENT_SUFFIX = ".seg"
+_INDEX_SUFFIX = ".idx.npy"
+_RECORD_INDEX_SUFFIX = ".rec.npy"
+
+# Cabeçalho de cada registro: tamanho do conteúdo comprimido e CRC-32
+_HEADER = struct.Struct("<II")
+
+# Bytes das chaves nos índices: textos com KEY_BYTES bytes ou mais são guardados
+# como _HASHED_KEY seguido do hash do texto completo (0xFF nunca ocorre em UTF-8)
+KEY_BYTES = 32
+_HASHED_KEY = b"\xff"
+
+# Entrada do índice de um registro
+ENTRY_DTYPE = np.dtype([
+    ("sample_code", f"S{KEY_BYTES}"),
+    ("record_number", f"S{KEY_BYTES}"),
+    ("pathologist", f"S{KEY_BYTES}"),
+    ("id", "<i8"),
+    ("created_at", "<f8"),
+    ("updated_at", "<f8"),
+    ("sequence", "<u4"),
+    ("offset", "<u8"),
+    ("length", "<u4"),
+])
+
+
+def _key(value):
+    """Chave de índice de um texto (o próprio texto ou, se longo, o seu hash)."""
+    data = str(value).encode("utf-8")
+    if len(data) < KEY_BYTES:
+        return data
+    digest = hashlib.sha256(data).hexdigest().encode("ascii")
+    return _HASHED_KEY + digest[:KEY_BYTES - len(_HASHED_KEY)]
+
+
+def _has_legacy_keys(entries):
+    """Indica se um índice tem chaves truncadas (gravadas antes das chaves com hash)."""
+    for name in ("sample_code", "record_number", "pathologist"):
+        keys = entries[name]
+        long_keys = keys[np.char.str_len(keys) >= KEY_BYTES]
+        if len(long_keys) and not np.char.startswith(long_keys, _HASHED_KEY).all():
+            return True
+    return False
+
+
+def _encode(fields, annotations):
+    """Codifica um registro: JSON dos campos seguido das anotações, comprimidos."""
+    data = json.dumps(fields, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return zlib.compress(struct.pack("<I", len(data)) + data + (annotations or b""))
+
+
+def _decode(payload):
+    """Decodifica um registro em (campos, anotações ou None)."""
+    data = zlib.decompress(payload)
+    (size,) = struct.unpack_from("<I", data)
+    fields = json.loads(data[4:4 + size].decode("utf-8"))
+    return fields, (data[4 + size:] or None)
+
+
+class _Segment:
+    """
+    Segmento do arquivo: arquivo mapeado em memória e índices.
+
+    Os dois índices são trocados juntos, em uma única atribuição de
+    indexes; quem lê sem a trava do arquivo deve copiar a tupla uma vez
+    (entries, by_record = segment.indexes) e usar só essa cópia.
+    """
+
+    __slots__ = ("number", "path", "indexes", "map", "lock")
+
+    def __init__(self, number, path, entries, by_record):
+        self.number = number
+        self.path = path
+        # entries: ENTRY_DTYPE, ordenado por (sample_code, sequence)
+        # by_record: posições em entries, ordenadas por (record_number, sequence)
+        self.indexes = (entries, by_record)
+        self.map = None
+        self.lock = threading.Lock()
+
+    def read(self, offset, length):
+        """Lê o conteúdo de um registro pelo mmap do segmento."""
+        end = offset + _HEADER.size + length
+        with self.lock:
+            # O segmento ativo cresce: remapeia quando o registro passa do fim mapeado
+            if self.map is None or end > len(self.map):
+                if self.map is not None:
+                    self.map.close()
+                with open(self.path, "rb") as f:
+                    self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            size, crc = _HEADER.unpack_from(self.map, offset)
+            payload = self.map[offset + _HEADER.size:end]
+        if size != length or zlib.crc32(payload) != crc:
+            raise ValueError(f"Registro corrompido em {self.path}, posição {offset}")
+        return payload
+
+    def close(self):
+        with self.lock:
+            if self.map is not None:
+                self.map.close()
+                self.map = None
+
+
+def _sorted_indexes(entries):
+    """Ordena as entradas por amostra e calcula a ordem por prontuário."""
+    entries = entries[np.lexsort((entries["sequence"], entries["sample_code"]))]
+    by_record = np.lexsort((entries["sequence"], entries["record_number"])).astype(np.int32)
+    return entries, by_record
+
+
+def _insert_entry(entries, by_record, entry):
+    """
+    Insere nos índices ordenados a entrada mais recente do segmento (maior sequência).
+
+    Returns:
+        tuple: Novos (entries, by_record); os arrays recebidos não são alterados
+    """
+    entry = np.array([entry], dtype=ENTRY_DTYPE)
+    position = int(np.searchsorted(entries["sample_code"], entry["sample_code"][0], side="right"))
+    entries = np.insert(entries, position, entry)
+    by_record = np.where(by_record >= position, by_record + 1, by_record)
+    record_position = np.searchsorted(entries["record_number"][by_record], entry["record_number"][0],
+                                      side="right")
+    return entries, np.insert(by_record, record_position, position).astype(np.int32)
+
+
+class ReportArchive:
+    """
+    Arquivo de laudos assinados em segmentos imutáveis.
+
+    Os laudos são guardados como dicionários de campos (coluna -> valor
+    do banco de laudos); a conversão para Report fica com o ReportStore.
+
+    Attributes:
+        directory (str): Diretório dos segmentos
+        segment_size (int): Tamanho máximo de um segmento, em bytes
+    """
+
+    def __init__(self, directory, segment_size=64 * 1024 * 1024):
+        """
+        Abre o arquivo, retomando o último segmento.
+
+        Args:
+            directory (str): Diretório dos segmentos
+            segment_size (int, optional): Bytes por segmento. Defaults to 64 MiB.
+        """
+        self.directory = directory
+        self.segment_size = segment_size
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._segments = []
+        self._current = None  # entradas das versões vigentes (cache)
+
+        numbers = self.segment_numbers()
+        for number in numbers[:-1]:
+            self._segments.append(self._load_sealed(number))
+        self._active_number = numbers[-1] if numbers else 1
+        self._active_entries = []
+        self._file = None
+        self._open_active()
+
+    # ===== SEGMENTOS =====
+
+    def _segment_path(self, number, suffix=_SEGMENT_SUFFIX):
+        """Caminho de um segmento (ou de um dos seus índices)."""
+        return os.path.join(self.directory, f"{_SEGMENT_PREFIX}{number:06d}{suffix}")
+
+    def segment_numbers(self):
+        """Retorna os números dos segmentos existentes, em ordem."""
+        return sorted(int(name[len(_SEGMENT_PREFIX):-len(_SEGMENT_SUFFIX)])
+                      for name in os.listdir(self.directory)
+                      if name.startswith(_SEGMENT_PREFIX) and name.endswith(_SEGMENT_SUFFIX))
+
+    def _scan(self, path):
+        """
+        Lê as entradas de um segmento percorrendo os registros.
+
+        Returns:
+            tuple: (lista de entradas, posição do fim do último registro válido)
+        """
+        entries = []
+        offset = 0
+        with open(path, "rb") as f:
+            while True:
+                header = f.read(_HEADER.size)
+                if len(header) < _HEADER.size:
+                    break
+                size, crc = _HEADER.unpack(header)
+                payload = f.read(size)
+                if len(payload) < size or zlib.crc32(payload) != crc:
+                    break
+                fields, _ = _decode(payload)
+                entries.append(self._entry(fields, len(entries), offset, size))
+                offset += _HEADER.size + size
+        return entries, offset
+
+    @staticmethod
+    def _entry(fields, sequence, offset, length):
+        """Monta a entrada de índice de um registro."""
+        return (_key(fields["sample_code"]), _key(fields["record_number"]), _key(fields["pathologist"]),
+                fields["id"], fields["created_at"], fields["updated_at"], sequence, offset, length)
+
+    def _load_sealed(self, number):
+        """
+        Abre um segmento encerrado, mapeando os índices em memória.
+
+        Segmentos sem índice (gravação interrompida durante o
+        encerramento) ou com índice de chaves truncadas têm o índice
+        reconstruído e gravado.
+        """
+        path = self._segment_path(number)
+        try:
+            entries = np.load(self._segment_path(number, _INDEX_SUFFIX), mmap_mode="r")
+            by_record = np.load(self._segment_path(number, _RECORD_INDEX_SUFFIX), mmap_mode="r")
+            if _has_legacy_keys(entries):
+                raise ValueError("índice com chaves truncadas")
+        except (OSError, ValueError):
+            entries, by_record = _sorted_indexes(np.array(self._scan(path)[0], dtype=ENTRY_DTYPE))
+            self._write_indexes(number, entries, by_record)
+        return _Segment(number, path, entries, by_record)
+
+    def _write_indexes(self, number, entries, by_record):
+        """Grava os índices de um segmento (de forma atômica)."""
+        for suffix, array in ((_INDEX_SUFFIX, entries), (_RECORD_INDEX_SUFFIX, by_record)):
+            path = self._segment_path(number, suffix)
+            with open(f"{path}.tmp", "wb") as f:
+                np.save(f, array)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(f"{path}.tmp", path)
+
+    def _open_active(self):
+        """
+        Abre o segmento ativo para anexação, reconstruindo as suas entradas.
+
+        Um registro incompleto no final (gravação interrompida) é descartado.
+        """
+        path = self._segment_path(self._active_number)
+        entries, valid_end = self._scan(path) if os.path.exists(path) else ([], 0)
+        self._file = open(path, "ab")
+        if self._file.tell() != valid_end:
+            self._file.truncate(valid_end)
+            self._file.seek(valid_end)
+        self._active_entries = entries
+        self._active = _Segment(self._active_number, path, *_sorted_indexes(np.array(entries, dtype=ENTRY_DTYPE)))
+
+    def _seal(self):
+        """Encerra o segmento ativo, grava os seus índices e abre o próximo."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._write_indexes(self._active_number, *self._active.indexes)
+        self._segments.append(self._load_sealed(self._active_number))
+        self._active.close()
+        self._active_number += 1
+        self._open_active()
+
+    def close(self):
+        """Fecha o segmento ativo e os mapeamentos."""
+        with self._lock:
+            self._file.close()
+            for segment in self._all_segments():
+                segment.close()
+
+    def _all_segments(self):
+        """Segmentos encerrados e o ativo, do mais antigo ao mais recente."""
+        return self._segments + [self._active]
+
+    # ===== GRAVAÇÃO =====
+
+    def append(self, fields, annotations=None):
+        """
+        Anexa um laudo ao arquivo (com fsync).
+
+        Args:
+            fields (dict): Campos do laudo (coluna -> valor); exige sample_code,
+                record_number, pathologist, id, created_at e updated_at
+            annotations (bytes, optional): Anotações da lâmina serializadas
+        """
+        payload = _encode(fields, annotations)
+        with self._lock:
+            if self._file.tell() >= self.segment_size:
+                self._seal()
+            offset = self._file.tell()
+            self._file.write(_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            entry = self._entry(fields, len(self._active_entries), offset, len(payload))
+            self._active_entries.append(entry)
+            # Inserção nos índices já ordenados, publicados juntos em uma só atribuição
+            self._active.indexes = _insert_entry(*self._active.indexes, entry)
+            if self._current is not None:
+                self._current = self._with_current(self._current, entry)
+
+    def _with_current(self, current, entry):
+        """
+        Atualiza as versões vigentes com a entrada recém-anexada ao segmento ativo.
+
+        Returns:
+            np.ndarray: Novo array de versões vigentes (o recebido não é alterado)
+        """
+        row = np.zeros(1, dtype=current.dtype)
+        for name, value in zip(ENTRY_DTYPE.names, entry):
+            row[name] = value
+        row["segment"] = self._active_number
+        keys = current["sample_code"]
+        i = int(np.searchsorted(keys, row["sample_code"][0]))
+        if i < len(keys) and keys[i] == row["sample_code"][0]:
+            current = current.copy()
+            current[i] = row[0]
+            return current
+        return np.insert(current, i, row)
+
+    # ===== CONSULTA =====
+
+    def _read(self, segment, entry):
+        """Lê e decodifica o registro de uma entrada."""
+        return _decode(segment.read(int(entry["offset"]), int(entry["length"])))
+
+    def _find(self, sample_code):
+        """
+        Localiza a versão vigente de um laudo.
+
+        Returns:
+            tuple | None: (segmento, entrada), ou None se não arquivado
+        """
+        key = _key(sample_code)
+        with self._lock:
+            segments = self._all_segments()
+        for segment in reversed(segments):
+            entries = segment.indexes[0]
+            keys = entries["sample_code"]
+            low = np.searchsorted(keys, key, side="left")
+            high = np.searchsorted(keys, key, side="right")
+            if high > low:
+                if not key.startswith(_HASHED_KEY):
+                    return segment, entries[high - 1]
+                # Chave com hash: confere o código completo, da versão mais recente para a mais antiga
+                for i in range(high - 1, low - 1, -1):
+                    if self._read(segment, entries[i])[0]["sample_code"] == sample_code:
+                        return segment, entries[i]
+        return None
+
+    def get(self, sample_code):
+        """
+        Busca a versão vigente de um laudo arquivado.
+
+        Args:
+            sample_code (str): Código da amostra
+
+        Returns:
+            dict | None: Campos do laudo, ou None se não arquivado
+        """
+        found = self._find(sample_code)
+        return self._read(*found)[0] if found else None
+
+    def get_annotations(self, sample_code):
+        """
+        Busca as anotações da lâmina da versão vigente de um laudo arquivado.
+
+        Returns:
+            bytes | None: Anotações serializadas, ou None se não houver
+        """
+        found = self._find(sample_code)
+        return self._read(*found)[1] if found else None
+
+    def __contains__(self, sample_code):
+        return self._find(sample_code) is not None
+
+    def find_by_record_number(self, record_number):
+        """
+        Lista as versões vigentes dos laudos arquivados de um prontuário.
+
+        Args:
+            record_number (str): Número de prontuário
+
+        Returns:
+            list[dict]: Campos dos laudos
+        """
+        key = _key(record_number)
+        current = self.current_entries()
+        found = []
+        with self._lock:
+            segments = self._all_segments()
+        for segment in segments:
+            entries, by_record = segment.indexes
+            keys = entries["record_number"][by_record]
+            low = np.searchsorted(keys, key, side="left")
+            high = np.searchsorted(keys, key, side="right")
+            for position in by_record[low:high]:
+                entry = entries[position]
+                if self._is_current(current, segment.number, entry):
+                    fields = self._read(segment, entry)[0]
+                    if fields["record_number"] == record_number:
+                        found.append(fields)
+        return found
+
+    @staticmethod
+    def _is_current(current, segment_number, entry):
+        """Indica se uma entrada é a versão vigente do seu laudo."""
+        keys = current["sample_code"]
+        i = np.searchsorted(keys, entry["sample_code"])
+        return (i < len(keys) and current["segment"][i] == segment_number
+                and current["sequence"][i] == entry["sequence"])
+
+    def current_entries(self):
+        """
+        Retorna as entradas das versões vigentes de todos os laudos arquivados.
+
+        Returns:
+            np.ndarray: Entradas (ENTRY_DTYPE com o campo adicional segment),
+                ordenadas por código da amostra
+        """
+        with self._lock:
+            if self._current is not None:
+                return self._current
+            segments = self._all_segments()
+            dtype = np.dtype(ENTRY_DTYPE.descr + [("segment", "<u4")])
+            parts = []
+            for segment in segments:
+                entries = segment.indexes[0]
+                part = np.empty(len(entries), dtype=dtype)
+                for name in ENTRY_DTYPE.names:
+                    part[name] = entries[name]
+                part["segment"] = segment.number
+                parts.append(part)
+            entries = np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+            # Última versão de cada amostra: maior (segmento, posição)
+            entries = entries[np.lexsort((entries["sequence"], entries["segment"], entries["sample_code"]))]
+            last = np.ones(len(entries), dtype=bool)
+            last[:-1] = entries["sample_code"][1:] != entries["sample_code"][:-1]
+            self._current = entries[last]
+            return self._current
+
+    def __len__(self):
+        return len(self.current_entries())
+
+    def select(self, since=None, until=None, date_column="updated_at", pathologist=None, exclude=()):
+        """
+        Seleciona as versões vigentes por período e patologista.
+
+        Args:
+            since (float, optional): Início do período (timestamp, inclusivo)
+            until (float, optional): Fim do período (timestamp, exclusivo)
+            date_column (str, optional): "updated_at" ou "created_at". Defaults to "updated_at".
+            pathologist (str, optional): Apenas laudos deste usuário
+            exclude (Iterable[str], optional): Códigos de amostra ignorados
+
+        Returns:
+            np.ndarray: Entradas (ver current_entries) em ordem crescente de (date_column, id)
+        """
+        entries = self.current_entries()
+        mask = np.ones(len(entries), dtype=bool)
+        if since is not None:
+            mask &= entries[date_column] >= since
+        if until is not None:
+            mask &= entries[date_column] < until
+        if pathologist is not None:
+            mask &= entries["pathologist"] == _key(pathologist)
+        exclude = [_key(code) for code in exclude]
+        if exclude:
+            mask &= ~np.isin(entries["sample_code"], np.array(exclude, dtype=f"S{KEY_BYTES}"))
+        entries = entries[mask]
+        return entries[np.lexsort((entries["id"], entries[date_column]))]
+
+    def contains_many(self, sample_codes):
+        """
+        Retorna, dentre os códigos informados, os arquivados.
+
+        Args:
+            sample_codes (Iterable[str]): Códigos de amostra
+
+        Returns:
+            set[str]: Códigos com laudo arquivado
+        """
+        codes = list(sample_codes)
+        if not codes:
+            return set()
+        keys = np.array([_key(code) for code in codes], dtype=f"S{KEY_BYTES}")
+        found = np.isin(keys, self.current_entries()["sample_code"])
+        return {code for code, hit in zip(codes, found) if hit}
+
+    @property
+    def max_id(self):
+        """Maior id de laudo arquivado (0 se vazio)."""
+        entries = self.current_entries()
+        return int(entries["id"].max()) if len(entries) else 0
+
+    def read_entries(self, entries):
+        """
+        Lê os campos dos laudos de uma seleção de current_entries, na ordem dada.
+
+        Yields:
+            dict: Campos de cada laudo
+        """
+        with self._lock:
+            segments = {segment.number: segment for segment in self._all_segments()}
+        for entry in entries:
+            yield self._read(segments[int(entry["segment"])], entry)[0]
+
+    def iter_records(self, after=None):
+        """
+        Percorre todos os registros (inclusive versões substituídas) na ordem de gravação.
+
+        Args:
+            after (tuple, optional): Posição (segmento, sequência); apenas
+                registros gravados depois dela
+
+        Yields:
+            tuple: ((segmento, sequência), campos do laudo)
+        """
+        with self._lock:
+            segments = list(self._all_segments())
+        for segment in segments:
+            if after is not None and segment.number < after[0]:
+                continue
+            entries = segment.indexes[0]
+            entries = entries[np.argsort(entries["sequence"])]
+            if after is not None and segment.number == after[0]:
+                entries = entries[entries["sequence"] > after[1]]
+            for entry in entries:
+                yield (segment.number, int(entry["sequence"])), self._read(segment, entry)[0]
+
+    def read_locations(self, locations):
+        """
+        Lê os registros das posições informadas (ver iter_records), na ordem dada.
+
+        Args:
+            locations (Iterable[tuple]): Posições (segmento, sequência)
+
+        Yields:
+            dict | None: Campos de cada laudo (None se a posição não existe)
+        """
+        with self._lock:
+            segments = {segment.number: segment for segment in self._all_segments()}
+        by_sequence = {}
+        for number, sequence in locations:
+            segment = segments.get(number)
+            if segment is None:
+                yield None
+                continue
+            if number not in by_sequence:
+                entries = segment.indexes[0]
+                by_sequence[number] = entries, np.argsort(entries["sequence"])
+            entries, order = by_sequence[number]
+            i = np.searchsorted(entries["sequence"][order], sequence)
+            if i == len(order) or entries["sequence"][order[i]] != sequence:
+                yield None
+                continue
+            yield self._read(segment, entries[order[i]])[0]
+
+    def stats(self):
+        """
+        Retorna o tamanho do arquivo.
+
+        Returns:
+            dict: segments, reports (versões vigentes), versions e bytes
+        """
+        with self._lock:
+            segments = self._all_segments()
+        return {
+            "segments": len(segments),
+            "reports": len(self.current_entries()),
+            "versions": sum(len(segment.indexes[0]) for segment in segments),
+            "bytes": sum(os.path.getsize(segment.path) for segment in segments),
+        }
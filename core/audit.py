@@ -0,0 +1,372 @@
+"""
+Módulo de trilha de auditoria.
+
+Este módulo contém o registro das ações dos usuários sobre os laudos
+(login, visualização, gravação, retificação, assinatura e impressão), exigido em
+sistemas clínicos.
+
+O registro é apenas anexado (append-only) em segmentos JSON Lines. As
+chamadas de registro apenas enfileiram o evento; uma thread grava os
+eventos em lotes e executa um único fsync por lote (group commit), de
+modo que as ações do usuário não esperam pelo disco. Se a gravação
+falha, o lote é mantido e gravado de novo após uma espera crescente;
+nenhum evento é dado como gravado antes do fsync.
+
+Cada segmento é encerrado ao atingir o tamanho máximo e ganha um
+índice (código da amostra -> posições no arquivo), permitindo listar
+as ações sobre uma amostra sem percorrer o registro inteiro.
+
+Estrutura do diretório:
+    audit-000001.jsonl      Segmento (um evento JSON por linha)
+    audit-000001.idx.json   Índice do segmento encerrado
+
+Classes:
+    AuditLog: Registro de auditoria em segmentos.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+import traceback
+
+from .metrics import REGISTRY, AUDIT_COMMIT_SECONDS, AUDIT_WRITE_FAILURES_TOTAL
+
+# Ações registradas
+ACTION_LOGIN = "login"
+ACTION_LOGIN_FAILED = "login_failed"
+ACTION_VIEW = "view"
+ACTION_SAVE = "save"
+ACTION_AMEND = "amend"
+ACTION_SIGN = "sign"
+ACTION_PRINT = "print"
+
+_SEGMENT_PREFIX = "audit-"
+_SEGMENT_SUFFIX = ".jsonl"
+_INDEX_SUFFIX = ".idx.json"
+
+# Espera antes de gravar de novo um lote com falha: dobra a cada falha, até o máximo
+RETRY_DELAY = 0.5
+MAX_RETRY_DELAY = 30.0
+# Tentativas de gravar os eventos pendentes ao encerrar o registro
+CLOSE_RETRIES = 3
+
+
+class AuditLog:
+    """
+    Registro de auditoria append-only em segmentos com índice por amostra.
+
+    Attributes:
+        directory (str): Diretório dos segmentos
+        segment_size (int): Tamanho máximo de um segmento, em bytes
+        flush_interval (float): Espera máxima de um evento antes da gravação, em segundos
+        last_error (str): Erro da última gravação, se ela falhou (None após uma gravação bem-sucedida)
+    """
+
+    def __init__(self, directory, segment_size=8 * 1024 * 1024, flush_interval=0.2):
+        """
+        Abre o registro, retomando o último segmento, e inicia a thread de gravação.
+
+        Args:
+            directory (str): Diretório dos segmentos
+            segment_size (int, optional): Bytes por segmento. Defaults to 8 MiB.
+            flush_interval (float, optional): Espera máxima em segundos. Defaults to 0.2.
+        """
+        self.directory = directory
+        self.segment_size = segment_size
+        self.flush_interval = flush_interval
+        self.last_error = None
+        os.makedirs(directory, exist_ok=True)
+
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()  # protege o segmento ativo e os índices
+        self._indexes = {}  # índices dos segmentos encerrados já carregados
+        self._closed = False
+        self._flushed = threading.Condition()
+        self._enqueued = 0
+        self._committed = 0
+
+        segments = self.segments()
+        self._segment = segments[-1] if segments else 1
+        self._active_index = {}
+        self._file = None
+        self._durable_end = 0  # fim do trecho do segmento ativo já gravado com fsync
+        self._open_active()
+
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    # ===== REGISTRO =====
+
+    def log(self, action, user, sample_code="", **details):
+        """
+        Registra uma ação sem bloquear (o evento é gravado em segundo plano).
+
+        Args:
+            action (str): Ação (ACTION_LOGIN, ACTION_VIEW, ...)
+            user (str): Usuário que executou a ação
+            sample_code (str, optional): Amostra afetada
+            **details: Informações adicionais serializáveis em JSON
+        """
+        event = {"ts": time.time(), "action": action, "user": user, "sample_code": sample_code}
+        if details:
+            event["details"] = details
+        with self._flushed:
+            self._enqueued += 1
+        self._queue.put(event)
+
+    def flush(self, timeout=5.0):
+        """
+        Aguarda a gravação (com fsync) dos eventos registrados até agora.
+
+        Returns:
+            bool: True se todos os eventos foram gravados dentro do prazo
+                (False também enquanto as gravações falham)
+        """
+        with self._flushed:
+            target = self._enqueued
+            return self._flushed.wait_for(lambda: self._committed >= target, timeout)
+
+    def close(self):
+        """
+        Grava os eventos pendentes e encerra a thread de gravação.
+
+        Se a gravação continuar falhando após CLOSE_RETRIES tentativas,
+        os eventos pendentes são descartados (e a falha, relatada).
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        with self._lock:
+            if self._file:
+                self._file.close()
+
+    def _run(self):
+        """
+        Laço da thread de gravação: agrupa os eventos e grava em lotes.
+
+        Os eventos de um lote com falha continuam pendentes e são
+        gravados, com os que chegarem nesse meio-tempo, após a espera.
+        """
+        events = []  # eventos ainda não gravados
+        failures = 0  # falhas seguidas
+        stop = False
+        while True:
+            delay = min(RETRY_DELAY * 2 ** (failures - 1), MAX_RETRY_DELAY) if failures else 0.0
+            if not stop:
+                stop = self._collect(events, delay or self.flush_interval)
+            elif delay:
+                time.sleep(delay)
+            if events:
+                count = len(events)
+                try:
+                    self._commit(events)
+                except OSError as exc:
+                    failures += 1
+                    self.last_error = str(exc)
+                    REGISTRY.counter(AUDIT_WRITE_FAILURES_TOTAL,
+                                     "Falhas de gravação de lotes de auditoria").inc()
+                    traceback.print_exc()
+                else:
+                    failures = 0
+                    self.last_error = None
+                if len(events) < count:
+                    with self._flushed:
+                        self._committed += count - len(events)
+                        self._flushed.notify_all()
+            if stop and (not events or failures >= CLOSE_RETRIES):
+                return
+
+    def _collect(self, events, window):
+        """
+        Acrescenta a events os eventos que chegarem durante a janela de gravação.
+
+        Sem eventos pendentes, aguarda o primeiro antes de abrir a janela.
+
+        Args:
+            events (list[dict]): Eventos pendentes
+            window (float): Duração da janela, em segundos
+
+        Returns:
+            bool: True se o registro foi encerrado (close)
+        """
+        if not events:
+            event = self._queue.get()
+            if event is None:
+                return True
+            events.append(event)
+        deadline = time.monotonic() + window
+        while True:
+            try:
+                event = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                return False
+            if event is None:
+                return True
+            events.append(event)
+
+    def _commit(self, events):
+        """
+        Grava um lote de eventos com um único fsync.
+
+        Os eventos gravados são retirados de events. Em caso de erro, o
+        que foi escrito sem fsync é descartado do segmento ativo e os
+        eventos restantes ficam em events para uma nova tentativa.
+
+        Raises:
+            OSError: Se a gravação falhar
+        """
+        start = time.perf_counter()
+        with self._lock:
+            done = 0
+            try:
+                if self._file is None:
+                    self._reopen()
+                for i, event in enumerate(events):
+                    if self._file.tell() >= self.segment_size:
+                        # A rotação grava com fsync os eventos anteriores do lote
+                        self._rotate()
+                        done = i
+                    line = (json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+                    offset = self._file.tell()
+                    self._file.write(line)
+                    if event["sample_code"]:
+                        self._active_index.setdefault(event["sample_code"], []).append(offset)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._durable_end = self._file.tell()
+                done = len(events)
+            except OSError:
+                try:
+                    self._reopen()
+                except OSError:
+                    pass  # nova tentativa na próxima gravação
+                raise
+            finally:
+                del events[:done]
+        REGISTRY.histogram(AUDIT_COMMIT_SECONDS, "Duração da gravação de um lote de auditoria").observe(
+            time.perf_counter() - start)
+
+    # ===== SEGMENTOS =====
+
+    def _segment_path(self, number, suffix=_SEGMENT_SUFFIX):
+        """Caminho de um segmento (ou do seu índice)."""
+        return os.path.join(self.directory, f"{_SEGMENT_PREFIX}{number:06d}{suffix}")
+
+    def segments(self):
+        """Retorna os números dos segmentos existentes, em ordem."""
+        return sorted(int(name[len(_SEGMENT_PREFIX):-len(_SEGMENT_SUFFIX)])
+                      for name in os.listdir(self.directory)
+                      if name.startswith(_SEGMENT_PREFIX) and name.endswith(_SEGMENT_SUFFIX))
+
+    def _open_active(self):
+        """
+        Abre o segmento ativo para anexação, reconstruindo o seu índice.
+
+        Uma linha incompleta no final (gravação interrompida) é descartada.
+        """
+        path = self._segment_path(self._segment)
+        index = {}
+        valid_end = 0
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                offset = 0
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        sample_code = json.loads(line).get("sample_code")
+                    except ValueError:
+                        break
+                    if sample_code:
+                        index.setdefault(sample_code, []).append(offset)
+                    offset += len(line)
+                valid_end = offset
+        self._file = open(path, "ab")
+        if self._file.tell() != valid_end:
+            self._file.truncate(valid_end)
+            self._file.seek(valid_end)
+        self._active_index = index
+        self._durable_end = valid_end
+
+    def _reopen(self):
+        """Descarta o que foi escrito sem fsync no segmento ativo e o reabre."""
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+        os.truncate(self._segment_path(self._segment), self._durable_end)
+        self._open_active()
+
+    def _rotate(self):
+        """Encerra o segmento ativo, grava o seu índice e abre o próximo."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        index_path = self._segment_path(self._segment, _INDEX_SUFFIX)
+        with open(f"{index_path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(self._active_index, f, separators=(",", ":"))
+        os.replace(f"{index_path}.tmp", index_path)
+        self._indexes[self._segment] = self._active_index
+        self._segment += 1
+        self._open_active()
+
+    def _segment_index(self, number):
+        """
+        Retorna o índice de um segmento encerrado (carregado sob demanda).
+
+        Segmentos sem índice (ex.: gravação interrompida durante a
+        rotação) têm o índice reconstruído a partir do arquivo.
+        """
+        index = self._indexes.get(number)
+        if index is None:
+            try:
+                with open(self._segment_path(number, _INDEX_SUFFIX), encoding="utf-8") as f:
+                    index = json.load(f)
+            except (OSError, ValueError):
+                index = {}
+                with open(self._segment_path(number), "rb") as f:
+                    offset = 0
+                    for line in f:
+                        sample_code = json.loads(line).get("sample_code")
+                        if sample_code:
+                            index.setdefault(sample_code, []).append(offset)
+                        offset += len(line)
+            self._indexes[number] = index
+        return index
+
+    # ===== CONSULTA =====
+
+    def events_for_sample(self, sample_code):
+        """
+        Lista as ações registradas sobre uma amostra, em ordem cronológica.
+
+        Apenas as linhas apontadas pelos índices dos segmentos são lidas.
+        Eventos ainda na fila de gravação não são incluídos (ver flush).
+
+        Args:
+            sample_code (str): Código da amostra
+
+        Returns:
+            list[dict]: Eventos com ts, action, user, sample_code e details
+        """
+        events = []
+        with self._lock:
+            active = self._segment
+            self._file.flush()
+            locations = [(number, self._segment_index(number).get(sample_code, ()))
+                         for number in self.segments() if number != active]
+            locations.append((active, list(self._active_index.get(sample_code, ()))))
+        for number, offsets in locations:
+            if not offsets:
+                continue
+            with open(self._segment_path(number), "rb") as f:
+                for offset in offsets:
+                    f.seek(offset)
+                    events.append(json.loads(f.readline()))
+        return events
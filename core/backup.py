@@ -0,0 +1,505 @@
+"""
+Módulo de backup automático.
+
+Este módulo contém o backup incremental do banco de laudos, do
+arquivo de laudos assinados e das imagens anexadas. Os arquivos são divididos em blocos definidos pelo
+conteúdo (gear hash), e cada bloco é gravado uma única vez, comprimido,
+com o SHA-256 como nome. Assim, uma inserção no meio de um arquivo
+altera apenas os blocos vizinhos, e um backup noturno grava somente o
+que mudou desde o anterior.
+
+Cada execução gera um manifesto (snapshot) com a lista de blocos de
+cada arquivo. A restauração confere o hash de cada bloco e de cada
+arquivo reconstruído.
+
+Estrutura do diretório de backup:
+    blocos/ab/abcdef...     Blocos comprimidos (zlib), nomeados pelo SHA-256
+    snapshots/AAAAMMDDTHHMMSS.json  Manifestos
+
+Classes:
+    BackupError: Erro de verificação ou restauração.
+    BackupRepository: Repositório de blocos e manifestos.
+    BackupScheduler: Thread que executa o backup periodicamente.
+
+Funções:
+    iter_chunks: Divide um fluxo de bytes em blocos definidos pelo conteúdo.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
+import zlib
+
+import numpy as np
+
+from .metrics import REGISTRY, BACKUP_SECONDS, BACKUP_BYTES_WRITTEN_TOTAL, BACKUP_FAILURES_TOTAL
+
+# Tamanhos dos blocos: mínimo, médio (pela máscara) e máximo
+MIN_CHUNK_SIZE = 16 * 1024
+MAX_CHUNK_SIZE = 256 * 1024
+_CUT_LIMIT = 1 << 16  # 16 bits mais altos zerados: média de ~64 KiB após o mínimo
+
+# Bytes lidos por vez e tamanho das fatias do cálculo vetorizado (cabem no cache)
+READ_SIZE = 4 * 1024 * 1024
+_HASH_SLICE = 256 * 1024
+
+# Tabela do gear hash: um valor pseudoaleatório fixo de 32 bits por byte, derivado
+# do SHA-256 para não mudar entre versões (mudá-la invalidaria a deduplicação)
+_GEAR = np.frombuffer(b"".join(hashlib.sha256(bytes([i])).digest()[:4] for i in range(256)),
+                      dtype="<u4").astype(np.uint32)
+_WINDOW = 32
+
+
+class BackupError(Exception):
+    """Erro de verificação ou restauração de um snapshot."""
+
+
+def _gear_hashes(data):
+    """
+    Calcula o gear hash de 32 bits em todas as posições de um buffer.
+
+    O gear hash sequencial (h = (h << 1) + G[b]) depende apenas dos
+    últimos 32 bytes: h_i = soma de G[b_{i-k}] << k para k < 32. Essa
+    soma é calculada com NumPy por duplicação da janela (1, 2, 4, ...,
+    32 bytes) em cinco passos vetorizados, em vez de um laço por byte,
+    em fatias que cabem no cache do processador.
+
+    Args:
+        data (bytes): Buffer de entrada
+
+    Returns:
+        numpy.ndarray: Hash (uint32) terminado em cada posição
+    """
+    codes = np.frombuffer(data, dtype=np.uint8)
+    result = np.empty(len(codes), dtype=np.uint32)
+    for start in range(0, len(codes), _HASH_SLICE):
+        # Cada fatia inclui os bytes anteriores que ainda entram na janela
+        context = min(start, _WINDOW - 1)
+        h = _GEAR[codes[start - context:start + _HASH_SLICE]]
+        width = 1
+        while width < _WINDOW:
+            h[width:] += h[:-width] << np.uint32(width)
+            width *= 2
+        result[start:start + _HASH_SLICE] = h[context:]
+    return result
+
+
+def iter_chunks(f, throttle=None):
+    """
+    Divide um arquivo em blocos definidos pelo conteúdo.
+
+    Um bloco termina na primeira posição (após o tamanho mínimo) em
+    que os bits altos do gear hash são zero, ou no tamanho máximo.
+
+    Args:
+        f (BinaryIO): Arquivo aberto em modo binário
+        throttle (_Throttle, optional): Limitador de E/S
+
+    Yields:
+        bytes: Blocos consecutivos do arquivo
+    """
+    buffer = b""
+    eof = False
+    while not eof:
+        data = f.read(READ_SIZE)
+        if throttle:
+            throttle.consume(len(data))
+        eof = not data
+        buffer += data
+        if not buffer:
+            break
+        cuts = np.flatnonzero(_gear_hashes(buffer) < _CUT_LIMIT) + 1
+        start = 0
+        while True:
+            i = np.searchsorted(cuts, start + MIN_CHUNK_SIZE)
+            end = int(cuts[i]) if i < len(cuts) else None
+            if end is None or end - start > MAX_CHUNK_SIZE:
+                end = start + MAX_CHUNK_SIZE
+            if end > len(buffer):
+                if not eof:
+                    break
+                end = len(buffer)
+            if end <= start:
+                break
+            yield buffer[start:end]
+            start = end
+        buffer = buffer[start:]
+
+
+class _Throttle:
+    """
+    Limitador de taxa de E/S (balde de fichas).
+
+    Attributes:
+        rate (float): Bytes por segundo permitidos (0 = sem limite)
+    """
+
+    def __init__(self, rate):
+        self.rate = rate
+        self._allowance = rate
+        self._last = time.monotonic()
+
+    def consume(self, size):
+        """Registra size bytes de E/S, aguardando se a taxa foi excedida."""
+        if not self.rate:
+            return
+        now = time.monotonic()
+        self._allowance = min(self.rate, self._allowance + (now - self._last) * self.rate)
+        self._last = now
+        self._allowance -= size
+        if self._allowance < 0:
+            time.sleep(-self._allowance / self.rate)
+
+
+class BackupRepository:
+    """
+    Repositório de blocos deduplicados e manifestos de snapshot.
+
+    Attributes:
+        directory (str): Diretório do backup
+        throttle (_Throttle): Limitador de E/S compartilhado por leitura e escrita
+    """
+
+    CHUNKS_DIR = "blocos"
+    SNAPSHOTS_DIR = "snapshots"
+
+    def __init__(self, directory, io_limit=0):
+        """
+        Inicializa o repositório.
+
+        Args:
+            directory (str): Diretório do backup
+            io_limit (float, optional): Limite de E/S em bytes/s (0 = sem limite). Defaults to 0.
+        """
+        self.directory = directory
+        self.throttle = _Throttle(io_limit)
+        os.makedirs(os.path.join(directory, self.CHUNKS_DIR), exist_ok=True)
+        os.makedirs(os.path.join(directory, self.SNAPSHOTS_DIR), exist_ok=True)
+
+    def _chunk_path(self, digest):
+        """Caminho de um bloco a partir do hash hexadecimal."""
+        return os.path.join(self.directory, self.CHUNKS_DIR, digest[:2], digest)
+
+    def _write_chunk(self, chunk):
+        """
+        Grava um bloco se ele ainda não existir.
+
+        Returns:
+            tuple[str, int]: (hash do bloco, bytes gravados no disco)
+        """
+        digest = hashlib.sha256(chunk).hexdigest()
+        path = self._chunk_path(digest)
+        if os.path.exists(path):
+            return digest, 0
+        data = zlib.compress(chunk, 6)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self.throttle.consume(len(data))
+        return digest, len(data)
+
+    def _read_chunk(self, digest):
+        """
+        Lê e confere um bloco.
+
+        Raises:
+            BackupError: Se o bloco estiver ausente ou corrompido
+        """
+        try:
+            with open(self._chunk_path(digest), "rb") as f:
+                data = f.read()
+            self.throttle.consume(len(data))
+            chunk = zlib.decompress(data)
+        except (OSError, zlib.error) as e:
+            raise BackupError(f"Bloco {digest} ilegível: {e}") from None
+        if hashlib.sha256(chunk).hexdigest() != digest:
+            raise BackupError(f"Bloco {digest} corrompido")
+        return chunk
+
+    def _backup_file(self, path, name, previous=None):
+        """
+        Divide um arquivo em blocos e grava os novos.
+
+        Arquivos com tamanho e data de modificação iguais aos do
+        snapshot anterior reaproveitam a lista de blocos sem releitura.
+
+        Returns:
+            tuple[dict, int]: (entrada do manifesto, bytes gravados)
+        """
+        stat = os.stat(path)
+        if (previous and previous["size"] == stat.st_size
+                and previous.get("mtime") == stat.st_mtime_ns):
+            return dict(previous, path=name), 0
+
+        file_hash = hashlib.sha256()
+        chunks = []
+        written = 0
+        with open(path, "rb") as f:
+            for chunk in iter_chunks(f, self.throttle):
+                file_hash.update(chunk)
+                digest, size = self._write_chunk(chunk)
+                chunks.append(digest)
+                written += size
+        entry = {"path": name, "size": stat.st_size, "mtime": stat.st_mtime_ns,
+                 "sha256": file_hash.hexdigest(), "chunks": chunks}
+        return entry, written
+
+    def create_snapshot(self, db_path=None, images_dir=None, archive_dir=None):
+        """
+        Cria um snapshot do banco de laudos, das imagens anexadas e do arquivo de laudos assinados.
+
+        O banco é copiado com a API de backup do SQLite (cópia
+        consistente mesmo com a aplicação gravando) antes da divisão.
+
+        Args:
+            db_path (str, optional): Banco de laudos (SQLite)
+            images_dir (str, optional): Diretório de imagens anexadas
+            archive_dir (str, optional): Diretório do arquivo de laudos assinados
+
+        Returns:
+            str: Nome do snapshot criado
+        """
+        start = time.perf_counter()
+        previous = {}
+        latest = self.latest_snapshot()
+        if latest:
+            previous = {entry["path"]: entry for entry in self.load_manifest(latest)["files"]}
+
+        files = []
+        written = 0
+        if db_path and os.path.exists(db_path):
+            copy_path = os.path.join(self.directory, "reports.db.copia")
+            try:
+                self._copy_database(db_path, copy_path)
+                # A cópia é sempre nova: a deduplicação por blocos evita regravar o banco
+                entry, size = self._backup_file(copy_path, "reports.db")
+                entry.pop("mtime")
+                files.append(entry)
+                written += size
+            finally:
+                if os.path.exists(copy_path):
+                    os.remove(copy_path)
+
+        # Imagens e segmentos do arquivo não mudam depois de gravados (o segmento
+        # ativo apenas cresce): arquivos inalterados reaproveitam a entrada anterior
+        for prefix, directory in (("imagens", images_dir), ("arquivo", archive_dir)):
+            if not directory or not os.path.isdir(directory):
+                continue
+            for root, _, names in os.walk(directory):
+                for filename in sorted(names):
+                    if filename.endswith(".tmp"):
+                        continue
+                    path = os.path.join(root, filename)
+                    name = os.path.join(prefix, os.path.relpath(path, directory)).replace(os.sep, "/")
+                    entry, size = self._backup_file(path, name, previous.get(name))
+                    files.append(entry)
+                    written += size
+
+        name = time.strftime("%Y%m%dT%H%M%S")
+        suffix = 1
+        while os.path.exists(self._manifest_path(name)):
+            suffix += 1
+            name = time.strftime("%Y%m%dT%H%M%S") + f"-{suffix}"
+        manifest = {
+            "created_at": time.time(),
+            "files": files,
+            "size": sum(entry["size"] for entry in files),
+            "bytes_written": written,
+        }
+        tmp_path = f"{self._manifest_path(name)}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self._manifest_path(name))
+
+        REGISTRY.histogram(BACKUP_SECONDS, "Duração do backup incremental").observe(
+            time.perf_counter() - start)
+        REGISTRY.counter(BACKUP_BYTES_WRITTEN_TOTAL, "Bytes gravados pelo backup").inc(written)
+        return name
+
+    def _copy_database(self, db_path, copy_path):
+        """Copia o banco aos poucos, liberando o acesso da aplicação entre as etapas."""
+        source = sqlite3.connect(db_path)
+        target = sqlite3.connect(copy_path)
+        try:
+            source.backup(target, pages=256, sleep=0.005,
+                          progress=lambda status, remaining, total: self.throttle.consume(256 * 4096))
+        finally:
+            target.close()
+            source.close()
+
+    def _manifest_path(self, name):
+        """Caminho do manifesto de um snapshot."""
+        return os.path.join(self.directory, self.SNAPSHOTS_DIR, f"{name}.json")
+
+    def snapshots(self):
+        """Retorna os nomes dos snapshots, do mais antigo ao mais recente."""
+        return sorted(name[:-5] for name in os.listdir(os.path.join(self.directory, self.SNAPSHOTS_DIR))
+                      if name.endswith(".json"))
+
+    def latest_snapshot(self):
+        """Retorna o nome do snapshot mais recente, ou None."""
+        snapshots = self.snapshots()
+        return snapshots[-1] if snapshots else None
+
+    def load_manifest(self, name):
+        """Lê o manifesto de um snapshot."""
+        with open(self._manifest_path(name), encoding="utf-8") as f:
+            return json.load(f)
+
+    def restore(self, name, target_dir=None):
+        """
+        Restaura (ou apenas verifica) um snapshot.
+
+        Cada bloco é conferido pelo seu hash e cada arquivo reconstruído
+        pelo hash completo. Sem target_dir, nada é gravado: o snapshot
+        é apenas verificado.
+
+        Args:
+            name (str): Nome do snapshot
+            target_dir (str, optional): Diretório de destino
+
+        Returns:
+            int: Número de arquivos restaurados ou verificados
+
+        Raises:
+            BackupError: Se algum bloco ou arquivo não conferir
+        """
+        manifest = self.load_manifest(name)
+        for entry in manifest["files"]:
+            file_hash = hashlib.sha256()
+            out = None
+            if target_dir:
+                path = os.path.join(target_dir, *entry["path"].split("/"))
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                out = open(f"{path}.part", "wb")
+            try:
+                for digest in entry["chunks"]:
+                    chunk = self._read_chunk(digest)
+                    file_hash.update(chunk)
+                    if out:
+                        out.write(chunk)
+            finally:
+                if out:
+                    out.close()
+            if file_hash.hexdigest() != entry["sha256"]:
+                if out:
+                    os.remove(f"{path}.part")
+                raise BackupError(f"Arquivo {entry['path']} não confere com o snapshot {name}")
+            if out:
+                os.replace(f"{path}.part", path)
+        return len(manifest["files"])
+
+    def verify(self, name):
+        """
+        Verifica um snapshot sem gravar arquivos.
+
+        Returns:
+            int: Número de arquivos verificados
+
+        Raises:
+            BackupError: Se algum bloco ou arquivo não conferir
+        """
+        return self.restore(name)
+
+    def prune(self, keep):
+        """
+        Remove os snapshots mais antigos e os blocos que ficaram sem uso.
+
+        Args:
+            keep (int): Quantidade de snapshots mantidos
+
+        Returns:
+            int: Número de blocos removidos
+        """
+        snapshots = self.snapshots()
+        for name in snapshots[:-keep] if keep else snapshots:
+            os.remove(self._manifest_path(name))
+        used = set()
+        for name in self.snapshots():
+            for entry in self.load_manifest(name)["files"]:
+                used.update(entry["chunks"])
+        removed = 0
+        chunks_dir = os.path.join(self.directory, self.CHUNKS_DIR)
+        for prefix in os.listdir(chunks_dir):
+            for digest in os.listdir(os.path.join(chunks_dir, prefix)):
+                if digest not in used:
+                    os.remove(os.path.join(chunks_dir, prefix, digest))
+                    removed += 1
+        return removed
+
+
+class BackupScheduler(threading.Thread):
+    """
+    Thread que executa o backup quando o último snapshot ficou antigo.
+
+    Attributes:
+        repository (BackupRepository): Repositório de destino
+        db_path (str): Banco de laudos
+        images_dir (str): Diretório de imagens anexadas
+        archive_dir (str): Diretório do arquivo de laudos assinados
+        interval (float): Intervalo mínimo entre snapshots, em segundos
+        keep (int): Snapshots mantidos (0 = todos)
+        last_error (str): Último erro ocorrido, se houver
+    """
+
+    # Intervalo entre verificações, em segundos
+    CHECK_INTERVAL = 60.0
+
+    def __init__(self, repository, db_path, images_dir=None, interval=86400.0, keep=30, archive_dir=None):
+        """
+        Inicializa o agendador.
+
+        Args:
+            repository (BackupRepository): Repositório de destino
+            db_path (str): Banco de laudos
+            images_dir (str, optional): Diretório de imagens anexadas
+            interval (float, optional): Segundos entre snapshots. Defaults to 86400 (diário).
+            keep (int, optional): Snapshots mantidos. Defaults to 30.
+            archive_dir (str, optional): Diretório do arquivo de laudos assinados
+        """
+        super().__init__(name="backup-scheduler", daemon=True)
+        self.repository = repository
+        self.db_path = db_path
+        self.images_dir = images_dir
+        self.archive_dir = archive_dir
+        self.interval = interval
+        self.keep = keep
+        self.last_error = None
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        """Interrompe o agendamento (o snapshot em andamento é concluído)."""
+        self._stop_event.set()
+
+    def is_due(self):
+        """Indica se o último snapshot é mais antigo que o intervalo."""
+        latest = self.repository.latest_snapshot()
+        if not latest:
+            return True
+        return time.time() - self.repository.load_manifest(latest)["created_at"] >= self.interval
+
+    def run(self):
+        """
+        Verifica periodicamente e cria um snapshot quando necessário.
+
+        Qualquer erro é registrado e contado, sem encerrar a thread: a
+        próxima verificação tenta de novo.
+        """
+        while not self._stop_event.is_set():
+            try:
+                if self.is_due():
+                    self.repository.create_snapshot(self.db_path, self.images_dir, self.archive_dir)
+                    if self.keep:
+                        self.repository.prune(self.keep)
+                self.last_error = None
+            except Exception as exc:
+                self.last_error = str(exc)
+                REGISTRY.counter(BACKUP_FAILURES_TOTAL, "Falhas do backup agendado").inc()
+                traceback.print_exc()
+            self._stop_event.wait(self.CHECK_INTERVAL)
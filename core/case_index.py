@@ -0,0 +1,319 @@
+"""
+Módulo do índice colunar de casos.
+
+Este módulo contém um cache em memória, organizado em colunas NumPy,
+com os campos usados nas estatísticas do laboratório. Os campos
+categóricos são codificados em inteiros (dicionário de valores), de
+modo que agrupamentos sobre milhões de casos se reduzem a operações
+vetorizadas (np.bincount).
+
+O índice é carregado uma vez do armazenamento de laudos e atualizado
+incrementalmente a cada laudo salvo (ver ReportStore.add_listener).
+
+Classes:
+    CaseIndex: Índice colunar de casos.
+"""
+
+import threading
+from datetime import datetime
+
+import numpy as np
+
+from .records import ProcedureType, MaterialType
+
+# Dimensões disponíveis para agrupamento
+DIMENSIONS = ("tissue_type", "procedure_type", "material_type", "month")
+
+# Colunas lidas do armazenamento ao carregar o índice
+_LOAD_COLUMNS = ("id", "tissue_type", "procedure_type", "material_type",
+                 "collection_datetime", "created_at")
+
+_INITIAL_CAPACITY = 1024
+
+
+class _Dictionary:
+    """
+    Codificação de valores de texto em inteiros sequenciais.
+
+    A comparação ignora maiúsculas e espaços nas extremidades; o
+    rótulo exibido é o primeiro valor visto para cada código.
+    """
+
+    def __init__(self):
+        self.labels = []
+        self._codes = {}
+
+    def encode(self, value):
+        """Retorna o código do valor, criando um novo se necessário."""
+        key = value.strip().casefold()
+        code = self._codes.get(key)
+        if code is None:
+            code = len(self.labels)
+            self._codes[key] = code
+            self.labels.append(value.strip() or "N/A")
+        return code
+
+
+class CaseIndex:
+    """
+    Índice colunar de casos para estatísticas.
+
+    As colunas são arrays NumPy com capacidade crescente (dobrada
+    quando cheia), e cada laudo ocupa uma linha identificada pelo id
+    do armazenamento; regravar um laudo atualiza a linha existente.
+
+    Attributes:
+        size (int): Número de casos indexados
+        loaded (bool): Indica se o índice já foi carregado do armazenamento
+    """
+
+    def __init__(self):
+        """Inicializa um índice vazio."""
+        self.size = 0
+        self.loaded = False
+        self._lock = threading.Lock()
+        self._rows = {}
+        # Ids gravados por add_report durante um load() em andamento
+        self._fresh = None
+        self._tissues = _Dictionary()
+        self._allocate(_INITIAL_CAPACITY)
+
+    def _allocate(self, capacity):
+        """Cria (ou amplia) as colunas para a capacidade informada."""
+        columns = {
+            "tissue_type": np.zeros(capacity, dtype=np.int32),
+            "procedure_type": np.zeros(capacity, dtype=np.int8),
+            "material_type": np.zeros(capacity, dtype=np.int8),
+            # Meses desde 01/1970 (datetime64[M]) da emissão do laudo
+            "month": np.zeros(capacity, dtype=np.int32),
+            # Tempo entre a coleta e a emissão, em horas (NaN se desconhecido)
+            "turnaround": np.full(capacity, np.nan, dtype=np.float64),
+        }
+        if self.size:
+            for name, column in columns.items():
+                column[:self.size] = self._columns[name][:self.size]
+        self._columns = columns
+        self._capacity = capacity
+
+    def load(self, store, batch_size=50000):
+        """
+        Carrega (ou recarrega) o índice a partir do armazenamento.
+
+        Os lotes são lidos fora do bloqueio; laudos gravados por
+        add_report durante a carga já estão atualizados no índice e são
+        ignorados nos lotes, que podem ter sido lidos antes da gravação.
+
+        Args:
+            store (ReportStore): Armazenamento de laudos
+            batch_size (int, optional): Linhas lidas por vez. Defaults to 50000.
+        """
+        with self._lock:
+            self._fresh = set()
+        try:
+            for rows in store.iter_batches(_LOAD_COLUMNS, batch_size=batch_size):
+                with self._lock:
+                    rows = [row for row in rows if row[0] not in self._fresh]
+                    if not rows:
+                        continue
+                    ids, tissues, procedures, materials, collected, created = zip(*rows)
+                    positions = self._positions(ids)
+                    self._set_columns(positions, tissues, procedures, materials, collected, created)
+        finally:
+            with self._lock:
+                self._fresh = None
+        self.loaded = True
+
+    def add_report(self, report):
+        """
+        Inclui ou atualiza um laudo no índice.
+
+        Pode ser registrado diretamente como ouvinte do armazenamento.
+
+        Args:
+            report (Report): Laudo salvo
+        """
+        record = report.record
+        with self._lock:
+            if self._fresh is not None:
+                self._fresh.add(report.id)
+            positions = self._positions((report.id,))
+            self._set_columns(positions, (record.tissue_type,), (int(record.procedure_type),),
+                              (int(record.material_type),), (record.collection_datetime,),
+                              (report.created_at,))
+
+    def _positions(self, ids):
+        """Retorna as linhas dos ids informados, reservando linhas para ids novos."""
+        positions = np.empty(len(ids), dtype=np.int64)
+        for i, report_id in enumerate(ids):
+            row = self._rows.get(report_id)
+            if row is None:
+                if self.size == self._capacity:
+                    self._allocate(self._capacity * 2)
+                row = self.size
+                self._rows[report_id] = row
+                self.size += 1
+            positions[i] = row
+        return positions
+
+    def _set_columns(self, positions, tissues, procedures, materials, collected, created):
+        """Grava um lote de valores nas linhas informadas."""
+        created = np.asarray(created, dtype=np.float64)
+        columns = self._columns
+        columns["tissue_type"][positions] = [self._tissues.encode(t) for t in tissues]
+        columns["procedure_type"][positions] = procedures
+        columns["material_type"][positions] = materials
+        columns["month"][positions] = created.astype("datetime64[s]").astype("datetime64[M]").astype(np.int32)
+        collected_at = np.fromiter((_parse_collection(c) for c in collected),
+                                   dtype=np.float64, count=len(collected))
+        columns["turnaround"][positions] = (created - collected_at) / 3600.0
+
+    def _labels(self, dimension):
+        """Retorna os rótulos de exibição dos códigos de uma dimensão."""
+        if dimension == "tissue_type":
+            return self._tissues.labels
+        if dimension == "procedure_type":
+            return ProcedureType.labels()
+        if dimension == "material_type":
+            return MaterialType.labels()
+        raise ValueError(f"Dimensão sem rótulos fixos: {dimension}")
+
+    def _label(self, dimension, code):
+        """Converte um código em rótulo de exibição."""
+        if dimension == "month":
+            return str(np.datetime64(int(code), "M"))
+        return self._labels(dimension)[code]
+
+    def _view(self, name):
+        """Retorna a parte preenchida de uma coluna."""
+        return self._columns[name][:self.size]
+
+    def group_counts(self, dimensions, months=None):
+        """
+        Conta os casos agrupados por uma ou mais dimensões.
+
+        Args:
+            dimensions (Sequence[str]): Dimensões do agrupamento (ver DIMENSIONS)
+            months (tuple, optional): Intervalo (início, fim) inclusivo no formato "AAAA-MM"
+
+        Returns:
+            list[tuple]: Linhas (rótulos..., contagem) em ordem decrescente de contagem
+        """
+        with self._lock:
+            keys, mask = self._group_keys(dimensions, months)
+            if keys is None:
+                return []
+            codes, offsets = keys
+            counts = np.bincount(codes[mask] if mask is not None else codes)
+        groups = np.flatnonzero(counts)
+        groups = groups[np.argsort(-counts[groups], kind="stable")]
+        return [self._decode(dimensions, offsets, g) + (int(counts[g]),) for g in groups]
+
+    def turnaround_percentiles(self, dimensions=(), percentiles=(50, 90, 95), months=None):
+        """
+        Calcula percentis do tempo de liberação (coleta até emissão), em horas.
+
+        Args:
+            dimensions (Sequence[str], optional): Dimensões do agrupamento. Defaults to ().
+            percentiles (Sequence[float], optional): Percentis. Defaults to (50, 90, 95).
+            months (tuple, optional): Intervalo (início, fim) inclusivo no formato "AAAA-MM"
+
+        Returns:
+            list[tuple]: Linhas (rótulos..., contagem, percentis...) por grupo
+        """
+        with self._lock:
+            turnaround = self._view("turnaround")
+            if not dimensions:
+                mask = self._month_mask(months)
+                values = turnaround if mask is None else turnaround[mask]
+                values = values[~np.isnan(values)]
+                if not values.size:
+                    return []
+                return [(int(values.size),) + tuple(float(p) for p in np.percentile(values, percentiles))]
+            keys, mask = self._group_keys(dimensions, months)
+            if keys is None:
+                return []
+            codes, offsets = keys
+            valid = ~np.isnan(turnaround)
+            if mask is not None:
+                valid &= mask
+            codes = codes[valid]
+            values = turnaround[valid]
+        # Ordena apenas pelos códigos do grupo (inteiros pequenos permitem
+        # ordenação radix) e calcula os percentis de cada fatia contígua
+        order = np.argsort(_narrow(codes), kind="stable")
+        codes = codes[order]
+        values = values[order]
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(codes)) + 1))
+        result = []
+        for group, chunk in zip(codes[starts], np.split(values, starts[1:])):
+            result.append(self._decode(dimensions, offsets, group) + (int(chunk.size),)
+                          + tuple(float(p) for p in np.percentile(chunk, percentiles)))
+        return result
+
+    def _month_mask(self, months):
+        """Retorna a máscara do intervalo de meses, ou None se não houver filtro."""
+        if not months:
+            return None
+        month = self._view("month")
+        start, end = (np.datetime64(m, "M").astype(np.int32) for m in months)
+        return (month >= start) & (month <= end)
+
+    def _group_keys(self, dimensions, months):
+        """
+        Combina os códigos das dimensões em uma chave única por linha.
+
+        Returns:
+            tuple: ((chaves, (base, tamanho) de cada dimensão), máscara) ou (None, None)
+        """
+        if not self.size:
+            return None, None
+        unknown = set(dimensions) - set(DIMENSIONS)
+        if unknown:
+            raise ValueError(f"Dimensões desconhecidas: {', '.join(sorted(unknown))}")
+        offsets = []
+        for dimension in dimensions:
+            if dimension == "month":
+                column = self._view(dimension)
+                base = int(column.min())
+                size = int(column.max()) - base + 1
+            else:
+                base, size = 0, len(self._labels(dimension))
+            offsets.append((base, size))
+        # Chaves em 32 bits sempre que o número de combinações permitir
+        dtype = np.int32 if np.prod([size for _, size in offsets], dtype=np.float64) < 2 ** 31 else np.int64
+        keys = np.zeros(self.size, dtype=dtype)
+        for dimension, (base, size) in zip(dimensions, offsets):
+            keys *= size
+            keys += self._view(dimension)
+            if base:
+                keys -= base
+        return (keys, offsets), self._month_mask(months)
+
+    def _decode(self, dimensions, offsets, key):
+        """Converte uma chave combinada nos rótulos de cada dimensão."""
+        key = int(key)
+        labels = []
+        for dimension, (base, size) in reversed(list(zip(dimensions, offsets))):
+            key, code = divmod(key, size)
+            labels.append(self._label(dimension, code + base))
+        return tuple(reversed(labels))
+
+
+def _narrow(codes):
+    """Converte os códigos para o menor tipo inteiro que os comporta."""
+    if codes.size and codes.max() < 2 ** 15:
+        return codes.astype(np.int16)
+    return codes
+
+
+def _parse_collection(value):
+    """
+    Converte a data/hora de coleta ("dd/mm/aaaa hh:mm") em timestamp.
+
+    Returns:
+        float: Timestamp Unix, ou NaN se o texto não estiver no formato esperado
+    """
+    try:
+        return datetime.strptime(value.strip(), "%d/%m/%Y %H:%M").timestamp()
+    except ValueError:
+        return float("nan")
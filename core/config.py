@@ -0,0 +1,117 @@
+"""
+Módulo de configuração do sistema.
+
+Centraliza os caminhos de arquivos e os parâmetros ajustáveis por
+variáveis de ambiente, para que os demais módulos não dependam
+de caminhos fixos.
+
+Funções:
+    data_path: Monta um caminho dentro do diretório de dados.
+"""
+
+import os
+
+# Diretório base de dados da aplicação (pode ser alterado por variável de ambiente)
+DATA_DIR = os.environ.get("PATOLOGIA_DATA_DIR",
+                          os.path.join(os.path.expanduser("~"), ".patologia"))
+
+# Arquivo de exportação de métricas (.prom para Prometheus, .jsonl para JSON Lines)
+METRICS_PATH = os.environ.get("PATOLOGIA_METRICS_PATH",
+                              os.path.join(DATA_DIR, "metrics.prom"))
+
+# Intervalo de exportação das métricas, em segundos
+METRICS_INTERVAL = float(os.environ.get("PATOLOGIA_METRICS_INTERVAL", "15"))
+
+# Diretório de entrada das requisições (HL7 v2 ou CSV) enviadas pelo sistema hospitalar
+REQUISITIONS_DIR = os.environ.get("PATOLOGIA_REQUISITIONS_DIR",
+                                  os.path.join(DATA_DIR, "requisicoes"))
+
+# Diretório das imagens anexadas às amostras
+IMAGES_DIR = os.environ.get("PATOLOGIA_IMAGES_DIR", os.path.join(DATA_DIR, "imagens"))
+
+# Diretório do backup incremental (de preferência em outro disco)
+BACKUP_DIR = os.environ.get("PATOLOGIA_BACKUP_DIR", os.path.join(DATA_DIR, "backup"))
+
+# Intervalo entre backups automáticos, em horas
+BACKUP_INTERVAL_HOURS = float(os.environ.get("PATOLOGIA_BACKUP_INTERVAL_HOURS", "24"))
+
+# Limite de leitura/escrita do backup, em MB/s (0 = sem limite), para não travar a interface
+BACKUP_IO_LIMIT_MB = float(os.environ.get("PATOLOGIA_BACKUP_IO_LIMIT_MB", "20"))
+
+# Arquivo dos laudos assinados (segmentos imutáveis) e o tamanho máximo de cada segmento, em MB
+ARCHIVE_DIR = os.environ.get("PATOLOGIA_ARCHIVE_DIR", os.path.join(DATA_DIR, "arquivo"))
+ARCHIVE_SEGMENT_MB = float(os.environ.get("PATOLOGIA_ARCHIVE_SEGMENT_MB", "64"))
+
+# Chave local (HMAC-SHA256) dos selos de integridade dos laudos assinados;
+# guarde uma cópia fora do computador, pois sem ela os selos não podem ser conferidos
+SIGNING_KEY_PATH = os.environ.get("PATOLOGIA_SIGNING_KEY_PATH",
+                                  os.path.join(DATA_DIR, "chaves", "assinatura.key"))
+
+# Chave local dos pseudônimos da exportação anonimizada (cada projeto deriva a sua)
+# e dicionário de nomes removidos dos textos livres (um por linha, opcional)
+DEIDENTIFY_KEY_PATH = os.environ.get("PATOLOGIA_DEIDENTIFY_KEY_PATH",
+                                     os.path.join(DATA_DIR, "chaves", "pesquisa.key"))
+DEIDENTIFY_NAMES_PATH = os.environ.get("PATOLOGIA_DEIDENTIFY_NAMES_PATH",
+                                       os.path.join(DATA_DIR, "pesquisa", "nomes.txt"))
+
+# Diretório da trilha de auditoria
+AUDIT_DIR = os.environ.get("PATOLOGIA_AUDIT_DIR", os.path.join(DATA_DIR, "auditoria"))
+
+# Cache dos resultados das etapas de análise de imagem e o seu tamanho máximo, em MB
+ANALYSIS_CACHE_DIR = os.environ.get("PATOLOGIA_ANALYSIS_CACHE_DIR",
+                                    os.path.join(DATA_DIR, "cache", "analise"))
+ANALYSIS_CACHE_MAX_MB = float(os.environ.get("PATOLOGIA_ANALYSIS_CACHE_MAX_MB", "2048"))
+
+# Etapas de análise simultâneas, somando as análises de todas as abas abertas
+ANALYSIS_STAGE_WORKERS = int(os.environ.get("PATOLOGIA_ANALYSIS_STAGE_WORKERS", "4"))
+
+# Mínimo de threads do pool de tarefas em segundo plano: cada análise em andamento
+# ocupa uma delas enquanto espera as suas etapas
+WORKER_THREADS = int(os.environ.get("PATOLOGIA_WORKER_THREADS", "8"))
+
+# Cache das miniaturas das lâminas e prévias dos laudos (histórico) e o seu tamanho máximo, em MB
+PREVIEW_CACHE_DIR = os.environ.get("PATOLOGIA_PREVIEW_CACHE_DIR",
+                                   os.path.join(DATA_DIR, "cache", "previas"))
+PREVIEW_CACHE_MAX_MB = float(os.environ.get("PATOLOGIA_PREVIEW_CACHE_MAX_MB", "256"))
+
+# Modelo do classificador da sugestão diagnóstica (sem arquivo, usa o modelo de referência)
+MODEL_PATH = os.environ.get("PATOLOGIA_MODEL_PATH", os.path.join(DATA_DIR, "modelos", "diagnostico.npz"))
+
+# Lado da referência de escala (quadrado preto) nas fotos da macroscopia, em mm
+SCALE_REFERENCE_MM = float(os.environ.get("PATOLOGIA_SCALE_REFERENCE_MM", "20"))
+
+# Arquivo de pesagens exportado pela balança da macroscopia
+SCALE_EXPORT_PATH = os.environ.get("PATOLOGIA_SCALE_EXPORT_PATH",
+                                   os.path.join(DATA_DIR, "balanca", "pesagens.csv"))
+
+# Terminologia para codificação do diagnóstico (TSV: sistema, código, descrição) e o
+# diretório dos índices de busca construídos a partir dela
+TERMINOLOGY_PATH = os.environ.get("PATOLOGIA_TERMINOLOGY_PATH",
+                                  os.path.join(DATA_DIR, "terminologia", "terminologia.tsv"))
+TERMINOLOGY_CACHE_DIR = os.environ.get("PATOLOGIA_TERMINOLOGY_CACHE_DIR",
+                                       os.path.join(DATA_DIR, "cache", "terminologia"))
+
+# Diretório dos plugins de análise (manifestos JSON e módulos)
+PLUGINS_DIR = os.environ.get("PATOLOGIA_PLUGINS_DIR", os.path.join(DATA_DIR, "plugins"))
+
+# Formatos do número de prontuário do hospital e do código da amostra (expressões
+# regulares) e se o código da amostra termina em um dígito verificador (Luhn).
+# Por padrão nenhum formato é conferido: cada hospital ativa os seus
+RECORD_NUMBER_PATTERN = os.environ.get("PATOLOGIA_RECORD_NUMBER_PATTERN", "")
+SAMPLE_CODE_PATTERN = os.environ.get("PATOLOGIA_SAMPLE_CODE_PATTERN", "")
+SAMPLE_CODE_CHECK_DIGIT = os.environ.get("PATOLOGIA_SAMPLE_CODE_CHECK_DIGIT", "0") != "0"
+
+
+def data_path(*parts):
+    """
+    Monta um caminho dentro do diretório de dados, criando as pastas necessárias.
+    
+    Args:
+        *parts (str): Componentes do caminho relativos a DATA_DIR
+        
+    Returns:
+        str: Caminho absoluto resultante
+    """
+    path = os.path.join(DATA_DIR, *parts)
+    os.makedirs(os.path.dirname(path) if parts else path, exist_ok=True)
+    return path
@@ -0,0 +1,502 @@
+"""
+Módulo de exportação de laudos anonimizados para pesquisa.
+
+Este módulo contém a exportação de um conjunto de dados sem
+identificação dos pacientes. Nome, prontuário e código da amostra são
+trocados por pseudônimos estáveis (HMAC-SHA256 com uma chave por
+projeto de pesquisa: o mesmo paciente recebe o mesmo pseudônimo dentro
+do projeto, mas não é possível cruzar projetos). As datas são
+deslocadas por um número de dias próprio de cada paciente, o que
+preserva idades e intervalos. Nos textos livres (suspeita clínica,
+história clínica e seções do laudo), expressões regulares pré-compiladas
+removem datas, CPF, telefones, e-mails, números longos e os nomes
+após pronomes de tratamento (Dr., Dra., Sr., Sra.), e um dicionário
+remove o nome do próprio paciente e nomes próprios comuns.
+
+Os laudos são lidos do armazenamento em lotes e anonimizados em vários
+processos, com no máximo dois lotes por processo em andamento; o
+arquivo (CSV ou Parquet) é escrito à medida que os lotes ficam prontos,
+com memória constante para qualquer volume.
+
+Parquet requer o pacote opcional pyarrow.
+
+Classes:
+    Deidentifier: Regras de anonimização de um projeto.
+
+Funções:
+    export_deidentified: Exporta os laudos anonimizados para CSV ou Parquet.
+"""
+
+import argparse
+import csv
+import hashlib
+import hmac
+import multiprocessing
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from .config import DEIDENTIFY_KEY_PATH, DEIDENTIFY_NAMES_PATH
+from .records import CATEGORICAL_FIELDS
+from .report_store import ReportStore
+from .signing import load_key
+from .terminology import normalize
+
+# Colunas do conjunto de dados, na ordem do arquivo: (coluna, cabeçalho)
+DEID_COLUMNS = (
+    ("patient_id", "paciente"),
+    ("sample_id", "amostra"),
+    ("birth_date", "data_nascimento"),
+    ("gender", "sexo"),
+    ("clinical_suspicion", "suspeita_clinica"),
+    ("collection_site", "local_coleta"),
+    ("procedure_type", "procedimento"),
+    ("clinical_history", "historia_clinica"),
+    ("material_type", "material"),
+    ("preservation_medium", "meio_conservacao"),
+    ("collection_datetime", "data_coleta"),
+    ("tissue_type", "tecido"),
+    ("tissue_measurement", "medidas"),
+    ("tissue_weight", "peso"),
+    ("macroscopy", "macroscopia"),
+    ("microscopy", "microscopia"),
+    ("diagnosis", "diagnostico"),
+    ("diagnosis_system", "sistema_codificacao"),
+    ("diagnosis_code", "codigo_diagnostico"),
+    ("created_at", "data_emissao"),
+)
+
+# Campos de texto livre que passam pela remoção de identificadores
+FREE_TEXT_FIELDS = ("clinical_suspicion", "clinical_history", "macroscopy", "microscopy", "diagnosis")
+
+# Colunas lidas do armazenamento
+_READ_COLUMNS = ("patient_name", "record_number", "sample_code", "pathologist", "birth_date", "gender",
+                 "clinical_suspicion", "collection_site", "procedure_type", "clinical_history",
+                 "material_type", "preservation_medium",
+                 "collection_datetime", "tissue_type", "tissue_measurement", "tissue_weight",
+                 "macroscopy", "microscopy", "diagnosis", "diagnosis_system", "diagnosis_code",
+                 "created_at")
+
+# Deslocamento máximo das datas, em dias (para mais ou para menos; nunca zero)
+MAX_SHIFT_DAYS = 365
+
+# Laudos por lote enviado aos processos
+BATCH_SIZE = 1000
+
+# Nomes e sobrenomes frequentes removidos dos textos, além do nome do próprio
+# paciente (completados pelo arquivo DEIDENTIFY_NAMES_PATH, um nome por linha)
+COMMON_NAMES = (
+    "maria", "jose", "joao", "ana", "antonio", "francisco", "carlos", "paulo", "pedro", "lucas",
+    "luiz", "marcos", "luis", "gabriel", "rafael", "francisca", "daniel", "marcelo", "bruno",
+    "eduardo", "felipe", "raimundo", "rodrigo", "antonia", "manoel", "mateus", "andre", "fernando",
+    "fabio", "leonardo", "gustavo", "guilherme", "leandro", "tiago", "adriana", "juliana", "marcia",
+    "fernanda", "patricia", "aline", "sandra", "camila", "amanda", "bruna", "jessica", "leticia",
+    "julia", "luciana", "vanessa", "mariana", "gabriela", "vera", "vitoria", "larissa", "claudia",
+    "beatriz", "rita", "luana", "sonia", "renata", "eliane", "josefa", "simone", "natalia",
+    "cristiane", "carla", "debora", "rosangela", "jaqueline", "rosa", "daniela", "aparecida",
+    "marlene", "terezinha", "raimunda", "andreia", "fabiana", "lucia", "raquel", "angela",
+    "anderson", "ricardo", "marcio", "jorge", "sebastiao", "alexandre", "roberto",
+    "silva", "santos", "oliveira", "souza", "sousa", "rodrigues", "ferreira", "alves", "pereira",
+    "lima", "gomes", "ribeiro", "carvalho", "almeida", "lopes", "soares", "fernandes", "vieira",
+    "barbosa", "rocha", "dias", "nascimento", "andrade", "moreira", "nunes", "marques", "machado",
+    "mendes", "freitas", "cardoso", "ramos", "goncalves", "santana", "teixeira", "araujo",
+    "cavalcanti", "cavalcante", "correia", "moura", "monteiro", "pinto", "batista", "campos",
+    "costa", "martins", "brito", "farias",
+)
+
+# E-mails: removidos antes dos identificadores do laudo, que podem aparecer no endereço
+_EMAIL = re.compile(r"\b[\w.+-]+@[\w-]+\.[\w.-]+\b")
+
+# Demais identificadores dos textos livres, em uma única expressão (uma passada por
+# texto); em uma mesma posição vale a primeira alternativa
+_PHI = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in (
+    ("record", r"(?i:\b(?:prontu[aá]rio|registro|rg|cns|matr[ií]cula)\s*(?:n[ºo°.]*\s*)?"
+               r"[:#]?\s*[\w./-]*\d[\w./-]*)"),
+    ("cpf", r"\b\d{3}\.?\d{3}\.?\d{3}-?\d{2}\b"),
+    ("date", r"\b(?P<day>\d{1,2})[/.-](?P<month>\d{1,2})[/.-](?P<year>\d{4}|\d{2})\b"),
+    ("iso_date", r"\b(?P<iso_year>\d{4})-(?P<iso_month>\d{2})-(?P<iso_day>\d{2})\b"),
+    ("phone", r"(?:\(\d{2}\)\s?|\b\d{2}\s)?\b9?\d{4}-?\d{4}\b"),
+    ("number", r"\b\d{5,}\b"),
+    # Palavras iniciadas por maiúscula após pronome de tratamento: sempre nome próprio
+    ("titled", r"\b(?P<title>[DdSs]ra?(?:\(as?\))?\.?\s+)"
+               r"[A-ZÀ-Ý][\w'-]*(?:[ \t]+(?:d[aeo]s?[ \t]+)?[A-ZÀ-Ý][\w'-]*)*"),
+    # Palavras iniciadas por maiúscula: candidatas a nome próprio
+    ("word", r"\b[A-ZÀ-Ý][a-zà-ÿ]+(?:-[A-ZÀ-Ý][a-zà-ÿ]+)?\b"),
+)))
+
+# Substituição de cada tipo de identificador
+_TAGS = {"record": "[ID]", "cpf": "[CPF]", "phone": "[TELEFONE]", "number": "[NÚMERO]", "word": "[NOME]"}
+
+
+def _read_names(path):
+    """Lê o dicionário de nomes (um por linha); arquivo ausente resulta em lista vazia."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def _parse_date(text):
+    """Interpreta uma data dd/mm/aaaa (com hora hh:mm opcional); None se inválida."""
+    text = text.strip()
+    for pattern in ("%d/%m/%Y %H:%M", "%d/%m/%Y", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(text, pattern), " " in text
+        except ValueError:
+            continue
+    return None, False
+
+
+class Deidentifier:
+    """
+    Regras de anonimização de um projeto de pesquisa.
+
+    Attributes:
+        key (bytes): Chave do projeto (derivada da chave local e do nome do projeto)
+        names (frozenset[str]): Nomes normalizados removidos dos textos
+    """
+
+    def __init__(self, key, names=()):
+        """
+        Inicializa as regras.
+
+        Args:
+            key (bytes): Chave do projeto
+            names (Iterable[str], optional): Nomes removidos dos textos, além do
+                nome do paciente de cada laudo
+        """
+        self.key = key
+        self.names = frozenset(normalize(name) for name in names if normalize(name))
+
+    @classmethod
+    def for_project(cls, project, key_path=DEIDENTIFY_KEY_PATH, names_path=DEIDENTIFY_NAMES_PATH):
+        """
+        Cria as regras de um projeto a partir da chave local e do dicionário de nomes.
+
+        Args:
+            project (str): Nome do projeto de pesquisa
+            key_path (str, optional): Chave local. Defaults to DEIDENTIFY_KEY_PATH.
+            names_path (str, optional): Dicionário de nomes. Defaults to DEIDENTIFY_NAMES_PATH.
+
+        Returns:
+            Deidentifier: Regras do projeto
+        """
+        key = hmac.new(load_key(key_path), f"projeto:{project}".encode("utf-8"), hashlib.sha256).digest()
+        return cls(key, COMMON_NAMES + tuple(_read_names(names_path)))
+
+    def _digest(self, kind, value):
+        return hmac.new(self.key, f"{kind}:{value}".encode("utf-8"), hashlib.sha256).digest()
+
+    def pseudonym(self, kind, value):
+        """
+        Pseudônimo estável de um identificador.
+
+        Args:
+            kind (str): Tipo do identificador ("paciente", "amostra")
+            value (str): Identificador original
+
+        Returns:
+            str: Pseudônimo (prefixo do tipo e 16 dígitos hexadecimais)
+        """
+        return f"{kind[0].upper()}{self._digest(kind, value.strip()).hex()[:16]}"
+
+    def shift_days(self, patient):
+        """
+        Deslocamento das datas de um paciente, em dias (nunca zero).
+
+        Args:
+            patient (str): Identificador do paciente (prontuário)
+
+        Returns:
+            int: Dias entre -MAX_SHIFT_DAYS e MAX_SHIFT_DAYS
+        """
+        value = int.from_bytes(self._digest("datas", patient.strip())[:4], "big") % (2 * MAX_SHIFT_DAYS)
+        return value - MAX_SHIFT_DAYS if value < MAX_SHIFT_DAYS else value - MAX_SHIFT_DAYS + 1
+
+    def shift_date(self, text, days):
+        """
+        Desloca uma data do formulário e a devolve em ISO 8601.
+
+        Args:
+            text (str): Data dd/mm/aaaa (com hora opcional)
+            days (int): Deslocamento em dias
+
+        Returns:
+            str: Data deslocada (AAAA-MM-DD ou AAAA-MM-DDTHH:MM); "" se inválida
+        """
+        value, has_time = _parse_date(text)
+        if value is None:
+            return ""
+        value += timedelta(days=days)
+        return value.strftime("%Y-%m-%dT%H:%M" if has_time else "%Y-%m-%d")
+
+    def scrub(self, text, days, known=()):
+        """
+        Remove identificadores de um texto livre.
+
+        Args:
+            text (str): Texto original
+            days (int): Deslocamento das datas do paciente
+            known (Iterable[str], optional): Identificadores do laudo (nome do
+                paciente, prontuário, código da amostra, patologista)
+
+        Returns:
+            str: Texto anonimizado
+        """
+        return self._scrub(text, days, *self._known(known))
+
+    @staticmethod
+    def _known(known):
+        """Identificadores do laudo (minúsculos, os mais longos primeiro) e as palavras do nome."""
+        values = sorted({value.strip().lower() for value in known if value and len(value.strip()) > 2},
+                        key=len, reverse=True)
+        words = {normalize(word) for value in values for word in value.split() if len(word) > 2}
+        return values, words
+
+    def _scrub(self, text, days, values, words):
+        """Remove os identificadores de um texto, com os identificadores do laudo já preparados."""
+        if not text:
+            return text
+        text = _replace_known(_EMAIL.sub("[EMAIL]", text), values)
+
+        def replace(match):
+            kind = match.lastgroup
+            if kind == "word":
+                parts = normalize(match.group()).split()
+                hit = any(part in self.names or part in words for part in parts)
+                return _TAGS[kind] if hit else match.group()
+            if kind == "titled":
+                return match.group("title") + _TAGS["word"]
+            if kind in ("date", "iso_date"):
+                return _shift_match(match, days, iso=kind == "iso_date")
+            return _TAGS[kind]
+        return _PHI.sub(replace, text)
+
+    def row(self, values):
+        """
+        Anonimiza uma linha lida do armazenamento.
+
+        Args:
+            values (Sequence): Valores na ordem de _READ_COLUMNS
+
+        Returns:
+            list: Valores na ordem de DEID_COLUMNS
+        """
+        fields = dict(zip(_READ_COLUMNS, values))
+        patient = fields["record_number"] or fields["patient_name"]
+        days = self.shift_days(patient)
+        known = self._known((fields["patient_name"], fields["record_number"],
+                             fields["sample_code"], fields["pathologist"]))
+        output = []
+        for name, _ in DEID_COLUMNS:
+            if name == "patient_id":
+                output.append(self.pseudonym("paciente", patient))
+            elif name == "sample_id":
+                output.append(self.pseudonym("amostra", fields["sample_code"]))
+            elif name in ("birth_date", "collection_datetime"):
+                output.append(self.shift_date(fields[name], days))
+            elif name == "created_at":
+                output.append((datetime.fromtimestamp(fields[name]) + timedelta(days=days)).strftime("%Y-%m-%d"))
+            elif name in CATEGORICAL_FIELDS:
+                output.append(_categorical_label(name, fields))
+            elif name in FREE_TEXT_FIELDS:
+                output.append(self._scrub(fields[name], days, *known))
+            else:
+                output.append(fields[name])
+        return output
+
+
+def _replace_known(text, values):
+    """
+    Troca por [ID] as ocorrências (palavras inteiras, sem diferenciar
+    maiúsculas) dos identificadores do laudo.
+    """
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        # Minúsculas com outro tamanho (caso raro): expressão regular
+        for value in values:
+            text = re.sub(r"(?<!\w)" + re.escape(value) + r"(?!\w)", "[ID]", text, flags=re.IGNORECASE)
+        return text
+    for value in values:
+        start = lowered.find(value)
+        while start != -1:
+            end = start + len(value)
+            if ((start == 0 or not lowered[start - 1].isalnum() and lowered[start - 1] != "_")
+                    and (end == len(lowered) or not lowered[end].isalnum() and lowered[end] != "_")):
+                text = f"{text[:start]}[ID]{text[end:]}"
+                lowered = f"{lowered[:start]}[id]{lowered[end:]}"
+                end = start + 4
+            start = lowered.find(value, end)
+    return text
+
+
+def _shift_match(match, days, iso=False):
+    """Desloca uma data encontrada no texto, mantendo o formato; inválidas viram [DATA]."""
+    if iso:
+        year, month, day = match.group("iso_year", "iso_month", "iso_day")
+    else:
+        day, month, year = match.group("day", "month", "year")
+        if len(year) == 2:
+            year = f"{'19' if int(year) > 30 else '20'}{year}"
+    try:
+        value = datetime(int(year), int(month), int(day)) + timedelta(days=days)
+    except ValueError:
+        return "[DATA]"
+    return value.strftime("%Y-%m-%d" if iso else "%d/%m/%Y")
+
+
+def _categorical_label(name, fields):
+    """Rótulo de um campo categórico (o texto livre da opção "Outro" não é exportado)."""
+    return CATEGORICAL_FIELDS[name].labels()[fields[name]]
+
+
+# Regras do processo de anonimização (definidas pelo inicializador do pool)
+_WORKER_RULES = None
+
+
+def _init_worker(key, names):
+    """Inicializa as regras uma única vez em cada processo."""
+    global _WORKER_RULES
+    _WORKER_RULES = Deidentifier(key, names)
+
+
+def _deidentify_batch(rows):
+    """Anonimiza um lote de linhas (executado nos processos)."""
+    return [_WORKER_RULES.row(row) for row in rows]
+
+
+def export_deidentified(store, path, project, since=None, until=None, workers=None,
+                        rules=None, progress=None, cancelled=None):
+    """
+    Exporta os laudos anonimizados para CSV ou Parquet, conforme a extensão.
+
+    O arquivo é escrito em um temporário e renomeado ao final, para
+    que uma exportação cancelada ou com erro não deixe arquivo parcial.
+
+    Args:
+        store (ReportStore): Armazenamento de laudos
+        path (str): Arquivo de destino (.csv ou .parquet)
+        project (str): Nome do projeto de pesquisa (define os pseudônimos e deslocamentos)
+        since (float, optional): Início do período de emissão (timestamp, inclusivo)
+        until (float, optional): Fim do período de emissão (timestamp, exclusivo)
+        workers (int, optional): Processos de anonimização. Defaults to os.cpu_count().
+        rules (Deidentifier, optional): Regras. Defaults to Deidentifier.for_project(project).
+        progress (callable, optional): Recebe (laudos exportados, total)
+        cancelled (callable, optional): Retorna True para interromper
+
+    Returns:
+        int: Laudos exportados (0 se cancelada)
+
+    Raises:
+        RuntimeError: Se o destino for Parquet e o pyarrow não estiver instalado
+    """
+    rules = rules or Deidentifier.for_project(project)
+    total = store.count(since, until, "created_at")
+    workers = workers or os.cpu_count() or 1
+    writer = _ParquetWriter if path.lower().endswith(".parquet") else _CsvWriter
+    tmp_path = f"{path}.part"
+    output = writer(tmp_path)
+    exported = 0
+    try:
+        # "spawn": a aplicação Qt tem threads ativas, o que torna o fork inseguro
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker, initargs=(rules.key, rules.names)) as executor:
+            # Mantém no máximo 2 lotes por processo em andamento (memória limitada)
+            pending = deque()
+            for rows in store.iter_batches(_READ_COLUMNS, since, until, BATCH_SIZE, "created_at"):
+                if cancelled and cancelled():
+                    raise _Cancelled()
+                pending.append(executor.submit(_deidentify_batch, rows))
+                while len(pending) >= workers * 2:
+                    exported += output.write(pending.popleft().result())
+                    if progress:
+                        progress(exported, total)
+            while pending:
+                exported += output.write(pending.popleft().result())
+                if progress:
+                    progress(exported, total)
+        output.close()
+        os.replace(tmp_path, path)
+        return exported
+    except _Cancelled:
+        output.close()
+        os.remove(tmp_path)
+        return 0
+    except BaseException:
+        output.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class _Cancelled(Exception):
+    """Interrupção solicitada pelo usuário."""
+
+
+class _CsvWriter:
+    """Escrita do conjunto de dados em CSV (UTF-8, separador ',')."""
+
+    def __init__(self, path):
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow([header for _, header in DEID_COLUMNS])
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+        return len(rows)
+
+    def close(self):
+        self._file.close()
+
+
+class _ParquetWriter:
+    """Escrita do conjunto de dados em Parquet, um grupo de linhas por lote."""
+
+    def __init__(self, path):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("Exportação para Parquet requer o pacote pyarrow "
+                               "(pip install pyarrow).") from None
+        self._pa = pyarrow
+        self._schema = pyarrow.schema([(header, pyarrow.string()) for _, header in DEID_COLUMNS])
+        self._writer = pyarrow.parquet.ParquetWriter(path, self._schema, compression="zstd")
+
+    def write(self, rows):
+        columns = [self._pa.array([row[i] for row in rows], type=self._pa.string())
+                   for i in range(len(DEID_COLUMNS))]
+        self._writer.write_table(self._pa.Table.from_arrays(columns, schema=self._schema))
+        return len(rows)
+
+    def close(self):
+        self._writer.close()
+
+
+def _timestamp(text):
+    """Converte uma data AAAA-MM-DD da linha de comando em timestamp."""
+    return time.mktime(time.strptime(text, "%Y-%m-%d")) if text else None
+
+
+def main(argv=None):
+    """Ponto de entrada da linha de comando."""
+    parser = argparse.ArgumentParser(description="Exporta laudos anonimizados para pesquisa (CSV ou Parquet).")
+    parser.add_argument("path", help="Arquivo de saída (.csv ou .parquet)")
+    parser.add_argument("--project", required=True, help="Nome do projeto de pesquisa")
+    parser.add_argument("--since", default=None, help="Emitidos a partir de (AAAA-MM-DD)")
+    parser.add_argument("--until", default=None, help="Emitidos antes de (AAAA-MM-DD)")
+    parser.add_argument("--workers", type=int, default=None, help="Processos de anonimização")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    count = export_deidentified(ReportStore(), args.path, args.project, _timestamp(args.since),
+                                _timestamp(args.until), args.workers)
+    print(f"{count} laudos anonimizados em {time.perf_counter() - start:.1f} s: {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Módulo de cache em disco.
+
+Este módulo contém um cache genérico de valores binários em disco,
+com limite de tamanho total e descarte dos itens usados há mais tempo
+(LRU). Cada item é um arquivo nomeado pelo SHA-256 da chave, gravado
+em um temporário e renomeado, de modo que uma interrupção nunca deixa
+um item pela metade.
+
+A ordem de uso é mantida em memória e reconstruída na abertura a
+partir da data de modificação dos arquivos (atualizada a cada acesso).
+
+Classes:
+    DiskLRUCache: Cache LRU em disco com limite de tamanho.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+
+class DiskLRUCache:
+    """
+    Cache LRU de valores binários em disco.
+
+    Attributes:
+        directory (str): Diretório dos itens
+        max_bytes (int): Tamanho total máximo dos itens
+        hits (int): Consultas atendidas pelo cache
+        misses (int): Consultas sem item no cache
+        evictions (int): Itens descartados para liberar espaço
+    """
+
+    _SUFFIX = ".bin"
+
+    def __init__(self, directory, max_bytes):
+        """
+        Abre o cache, indexando os itens já existentes.
+
+        Args:
+            directory (str): Diretório dos itens
+            max_bytes (int): Tamanho total máximo, em bytes
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # nome do arquivo -> tamanho, do menos ao mais recente
+        self._size = 0
+        os.makedirs(directory, exist_ok=True)
+
+        entries = []
+        for entry in os.scandir(directory):
+            if entry.name.endswith(".tmp"):
+                os.remove(entry.path)  # gravação interrompida
+            elif entry.name.endswith(self._SUFFIX):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self._entries[name] = size
+            self._size += size
+        with self._lock:
+            self._evict()
+
+    @staticmethod
+    def _file_name(key):
+        """Nome do arquivo de uma chave."""
+        return hashlib.sha256(key.encode("utf-8")).hexdigest() + DiskLRUCache._SUFFIX
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size(self):
+        """Tamanho total dos itens, em bytes."""
+        return self._size
+
+    def __contains__(self, key):
+        return self._file_name(key) in self._entries
+
+    def get(self, key):
+        """
+        Lê um item, marcando-o como usado recentemente.
+
+        Args:
+            key (str): Chave do item
+
+        Returns:
+            bytes | None: Valor armazenado, ou None se ausente
+        """
+        name = self._file_name(key)
+        path = os.path.join(self.directory, name)
+        with self._lock:
+            if name not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(name)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            # Item removido por fora do cache
+            with self._lock:
+                self._size -= self._entries.pop(name, 0)
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key, data):
+        """
+        Grava um item de forma atômica, descartando os mais antigos se necessário.
+
+        Itens maiores que o limite do cache não são gravados.
+
+        Args:
+            key (str): Chave do item
+            data (bytes): Valor
+        """
+        if len(data) > self.max_bytes:
+            return
+        name = self._file_name(key)
+        path = os.path.join(self.directory, name)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._size += len(data) - self._entries.pop(name, 0)
+            self._entries[name] = len(data)
+            self._evict()
+
+    def delete(self, key):
+        """Remove um item, se existir."""
+        name = self._file_name(key)
+        with self._lock:
+            if name not in self._entries:
+                return
+            self._size -= self._entries.pop(name)
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except OSError:
+            pass
+
+    def clear(self):
+        """Remove todos os itens."""
+        with self._lock:
+            names = list(self._entries)
+            self._entries.clear()
+            self._size = 0
+        for name in names:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def _evict(self):
+        """Descarta os itens menos usados até respeitar o limite (com o lock adquirido)."""
+        while self._size > self.max_bytes and self._entries:
+            name, size = self._entries.popitem(last=False)
+            self._size -= size
+            self.evictions += 1
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def stats(self):
+        """
+        Retorna as estatísticas de uso do cache.
+
+        Returns:
+            dict: hits, misses, evictions, hit_rate, entries e bytes
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._size,
+            }
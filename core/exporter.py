@@ -0,0 +1,251 @@
+"""
+Módulo de exportação do arquivo de laudos.
+
+Este módulo contém a exportação dos laudos armazenados para CSV ou
+Excel (XLSX). As linhas são lidas do armazenamento em lotes e escritas
+uma a uma no arquivo de destino por meio de geradores, de modo que o
+consumo de memória é o mesmo para mil ou cinco milhões de laudos.
+
+A exportação em XLSX usa o modo de memória constante do XlsxWriter,
+que grava cada linha no disco assim que a próxima começa e usa
+textos embutidos em vez da tabela de textos compartilhados; o pacote
+é opcional e só é necessário para esse formato.
+
+Funções:
+    iter_export_rows: Gera as linhas de exportação.
+    export_reports: Exporta os laudos para CSV ou XLSX.
+"""
+
+import csv
+import os
+import time
+
+from .records import CATEGORICAL_FIELDS, OTHER_FIELDS
+
+# Colunas exportáveis, na ordem do arquivo: (coluna, cabeçalho)
+EXPORT_COLUMNS = (
+    ("sample_code", "Código da amostra"),
+    ("record_number", "Nº de prontuário"),
+    ("patient_name", "Nome"),
+    ("birth_date", "Data de nascimento"),
+    ("gender", "Sexo"),
+    ("clinical_suspicion", "Suspeita clínica"),
+    ("collection_site", "Local da coleta"),
+    ("procedure_type", "Tipo de procedimento"),
+    ("clinical_history", "História clínica"),
+    ("material_type", "Tipo de material"),
+    ("sample_quantity", "Quantidade e integridade"),
+    ("preservation_medium", "Meio de conservação"),
+    ("collection_datetime", "Data/hora coleta"),
+    ("tissue_type", "Tipo de tecido"),
+    ("tissue_measurement", "Medidas do tecido"),
+    ("tissue_weight", "Peso do tecido"),
+    ("macroscopy", "Macroscopia"),
+    ("microscopy", "Microscopia"),
+    ("diagnosis", "Conclusão diagnóstica"),
+    ("diagnosis_system", "Sistema de codificação"),
+    ("diagnosis_code", "Código do diagnóstico"),
+    ("pathologist", "Patologista"),
+    ("created_at", "Emissão"),
+    ("updated_at", "Última alteração"),
+)
+
+_HEADERS = dict(EXPORT_COLUMNS)
+
+# Linhas processadas entre duas notificações de progresso
+PROGRESS_INTERVAL = 1000
+
+# Limite de linhas de uma planilha do Excel (incluindo o cabeçalho)
+XLSX_MAX_ROWS = 1048576
+
+
+def iter_export_rows(store, columns, since=None, until=None, batch_size=2000,
+                     date_column="created_at"):
+    """
+    Gera as linhas de exportação com os valores prontos para exibição.
+
+    Os campos categóricos são convertidos para rótulos (a opção
+    "Outro" usa o texto especificado) e as datas para dd/mm/aaaa hh:mm.
+
+    Args:
+        store (ReportStore): Armazenamento de laudos
+        columns (Sequence[str]): Colunas exportadas (ver EXPORT_COLUMNS)
+        since (float, optional): Início do período (timestamp, inclusivo)
+        until (float, optional): Fim do período (timestamp, exclusivo)
+        batch_size (int, optional): Linhas lidas por vez. Defaults to 2000.
+        date_column (str, optional): Coluna de data do período. Defaults to "created_at".
+
+    Yields:
+        list: Valores de uma linha, na ordem de columns
+    """
+    unknown = set(columns) - set(_HEADERS)
+    if unknown:
+        raise ValueError(f"Colunas desconhecidas: {', '.join(sorted(unknown))}")
+
+    # Colunas lidas: as pedidas mais o texto "Outro" dos categóricos exportados
+    read_columns = list(columns)
+    for field, other_field in OTHER_FIELDS.items():
+        if field in columns and other_field not in read_columns:
+            read_columns.append(other_field)
+    position = {name: i for i, name in enumerate(read_columns)}
+
+    # Um conversor por coluna, resolvido uma única vez antes do laço
+    converters = []
+    for name in columns:
+        i = position[name]
+        if name in CATEGORICAL_FIELDS:
+            labels = CATEGORICAL_FIELDS[name].labels()
+            other = position.get(OTHER_FIELDS.get(name))
+            converters.append(_categorical_converter(i, labels, other))
+        elif name in ("created_at", "updated_at"):
+            converters.append(lambda row, i=i: time.strftime("%d/%m/%Y %H:%M", time.localtime(row[i])))
+        else:
+            converters.append(lambda row, i=i: row[i])
+
+    for rows in store.iter_batches(read_columns, since, until, batch_size, date_column):
+        for row in rows:
+            yield [convert(row) for convert in converters]
+
+
+def _categorical_converter(index, labels, other_index):
+    """Cria o conversor de um campo categórico para o seu rótulo."""
+    other_code = labels.index("Outro") if "Outro" in labels else None
+
+    def convert(row):
+        code = row[index]
+        if code == other_code and other_index is not None and row[other_index]:
+            return row[other_index]
+        return labels[code]
+    return convert
+
+
+def export_reports(store, path, columns=None, since=None, until=None,
+                   progress=None, cancelled=None, date_column="created_at"):
+    """
+    Exporta os laudos para CSV ou XLSX, conforme a extensão do arquivo.
+
+    O arquivo é escrito em um temporário e renomeado ao final, para
+    que uma exportação cancelada ou com erro não deixe arquivo parcial.
+
+    Args:
+        store (ReportStore): Armazenamento de laudos
+        path (str): Arquivo de destino (.csv ou .xlsx)
+        columns (Sequence[str], optional): Colunas exportadas. Defaults to todas.
+        since (float, optional): Início do período (timestamp, inclusivo)
+        until (float, optional): Fim do período (timestamp, exclusivo)
+        progress (callable, optional): Recebe (linhas exportadas, total)
+        cancelled (callable, optional): Retorna True para interromper a exportação
+        date_column (str, optional): Coluna de data do período. Defaults to "created_at".
+
+    Returns:
+        int: Número de linhas exportadas (0 se cancelada)
+    """
+    columns = list(columns or [name for name, _ in EXPORT_COLUMNS])
+    headers = [_HEADERS[name] for name in columns]
+    total = store.count(since, until, date_column)
+    rows = iter_export_rows(store, columns, since, until, date_column=date_column)
+
+    if path.lower().endswith(".xlsx"):
+        writer = _write_xlsx
+    else:
+        writer = _write_csv
+
+    tmp_path = f"{path}.part"
+    try:
+        written = writer(tmp_path, headers, rows, total, progress, cancelled)
+        if written is None:
+            os.remove(tmp_path)
+            return 0
+        os.replace(tmp_path, path)
+        return written
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        rows.close()
+
+
+def _counted(rows, total, progress, cancelled):
+    """
+    Repassa as linhas notificando o progresso e verificando o cancelamento.
+
+    Yields:
+        list: As mesmas linhas recebidas
+    """
+    count = 0
+    for row in rows:
+        yield row
+        count += 1
+        if count % PROGRESS_INTERVAL == 0:
+            if cancelled and cancelled():
+                raise _Cancelled()
+            if progress:
+                progress(count, total)
+    if progress:
+        progress(count, total)
+
+
+class _Cancelled(Exception):
+    """Interrupção solicitada pelo usuário."""
+
+
+def _write_csv(path, headers, rows, total, progress, cancelled):
+    """
+    Escreve as linhas em CSV (UTF-8 com BOM, separador ';', compatível com o Excel).
+
+    Returns:
+        int | None: Linhas escritas, ou None se cancelada
+    """
+    count = 0
+    try:
+        with open(path, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f, delimiter=";")
+            writer.writerow(headers)
+            for row in _counted(rows, total, progress, cancelled):
+                writer.writerow(row)
+                count += 1
+    except _Cancelled:
+        return None
+    return count
+
+
+def _write_xlsx(path, headers, rows, total, progress, cancelled):
+    """
+    Escreve as linhas em XLSX no modo de memória constante do XlsxWriter.
+
+    Quando uma planilha atinge o limite de linhas do Excel, a
+    exportação continua em uma nova planilha com o mesmo cabeçalho.
+
+    Returns:
+        int | None: Linhas escritas, ou None se cancelada
+
+    Raises:
+        RuntimeError: Se o XlsxWriter não estiver instalado
+    """
+    try:
+        import xlsxwriter
+    except ImportError:
+        raise RuntimeError("Exportação para Excel requer o pacote XlsxWriter "
+                           "(pip install XlsxWriter).") from None
+
+    workbook = xlsxwriter.Workbook(path, {"constant_memory": True, "strings_to_numbers": False,
+                                          "strings_to_formulas": False, "strings_to_urls": False})
+    count = 0
+    sheet = None
+    sheet_row = XLSX_MAX_ROWS
+    try:
+        for row in _counted(rows, total, progress, cancelled):
+            if sheet_row == XLSX_MAX_ROWS:
+                sheet = workbook.add_worksheet(f"Laudos {len(workbook.worksheets()) + 1}")
+                sheet.write_row(0, 0, headers)
+                sheet_row = 1
+            sheet.write_row(sheet_row, 0, row)
+            sheet_row += 1
+            count += 1
+        if sheet is None:
+            workbook.add_worksheet("Laudos 1").write_row(0, 0, headers)
+    except _Cancelled:
+        count = None
+    workbook.close()
+    return count
@@ -0,0 +1,393 @@
+"""
+Módulo de exportação FHIR em massa.
+
+Este módulo contém a exportação dos laudos emitidos para o data
+warehouse de pesquisa, no formato NDJSON do FHIR Bulk Data. Cada laudo
+gera os recursos Patient, Specimen e DiagnosticReport (FHIR R4).
+
+A exportação é incremental: uma marca d'água (data de alteração e id
+do último laudo exportado e data da última assinatura) é gravada ao
+final de cada execução, e a próxima exporta apenas laudos novos,
+alterados ou assinados depois dela. A serialização dos lotes é
+distribuída entre processos.
+
+O status do DiagnosticReport vem das assinaturas: rascunhos são
+"preliminary", laudos assinados são "final" e os assinados mais de uma
+vez (retificados após a emissão) são "amended". Retificações ainda não
+assinadas não são exportadas: vale a versão assinada anterior.
+
+Uso pela linha de comando (ex.: agendamento noturno):
+    python -m core.fhir_export /caminho/de/saida
+
+Funções:
+    report_to_resources: Converte um laudo nos recursos FHIR.
+    export_fhir: Exporta os laudos novos ou alterados para NDJSON.
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .config import data_path
+from .records import Gender
+from .report_store import Report, ReportStore, _ALL_COLUMNS
+from .terminology import SYSTEM_URIS
+
+RESOURCE_TYPES = ("Patient", "Specimen", "DiagnosticReport")
+
+# Sistemas de identificadores locais
+PATIENT_ID_SYSTEM = "urn:patologia:prontuario"
+SAMPLE_ID_SYSTEM = "urn:patologia:amostra"
+
+# Código LOINC do laudo anatomopatológico
+_REPORT_CODE = {
+    "coding": [{"system": "http://loinc.org", "code": "60567-5",
+                "display": "Comprehensive pathology report panel"}],
+    "text": "Laudo anatomopatológico",
+}
+
+# Posição das colunas da marca d'água nas linhas completas
+_ID = _ALL_COLUMNS.index("id")
+_UPDATED_AT = _ALL_COLUMNS.index("updated_at")
+_SAMPLE_CODE = _ALL_COLUMNS.index("sample_code")
+_SIGNED_AT = _ALL_COLUMNS.index("signed_at")
+
+_FHIR_GENDER = {Gender.MASCULINO: "male", Gender.FEMININO: "female", Gender.OUTRO: "other"}
+
+
+def _resource_id(prefix, value):
+    """Gera um id FHIR estável (até 64 caracteres [A-Za-z0-9-.]) a partir de um valor."""
+    return f"{prefix}-{hashlib.sha256(value.encode('utf-8')).hexdigest()[:40]}"
+
+
+def _fhir_date(value):
+    """Converte dd/mm/aaaa em AAAA-MM-DD (ou None)."""
+    parts = value.strip().split("/")
+    if len(parts) == 3 and all(p.isdigit() for p in parts) and len(parts[2]) == 4:
+        return f"{parts[2]}-{int(parts[1]):02d}-{int(parts[0]):02d}"
+    return None
+
+
+def _fhir_datetime(value):
+    """Converte dd/mm/aaaa hh:mm em data/hora FHIR com fuso local (ou None)."""
+    try:
+        parsed = time.strptime(value.strip(), "%d/%m/%Y %H:%M")
+    except ValueError:
+        return _fhir_date(value)
+    return _fhir_instant(time.mktime(parsed))
+
+
+def _fhir_instant(timestamp):
+    """Converte um timestamp Unix em instante FHIR com fuso local."""
+    offset = time.strftime("%z", time.localtime(timestamp))
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(timestamp)) + f"{offset[:3]}:{offset[3:]}"
+
+
+def _text_attachment(title, text):
+    """Cria um Attachment de texto simples."""
+    return {
+        "contentType": "text/plain; charset=utf-8",
+        "title": title,
+        "data": base64.b64encode(text.encode("utf-8")).decode("ascii"),
+    }
+
+
+def report_to_resources(report, amended=False):
+    """
+    Converte um laudo nos recursos FHIR Patient, Specimen e DiagnosticReport.
+
+    Args:
+        report (Report): Laudo armazenado
+        amended (bool, optional): Se o laudo assinado substitui uma versão
+            assinada anterior. Defaults to False.
+
+    Returns:
+        tuple[dict, dict, dict]: (Patient, Specimen, DiagnosticReport)
+    """
+    record = report.record
+    patient_id = _resource_id("pat", record.record_number or record.sample_code)
+    specimen_id = _resource_id("spm", record.sample_code)
+
+    patient = {
+        "resourceType": "Patient",
+        "id": patient_id,
+        "identifier": [{"system": PATIENT_ID_SYSTEM, "value": record.record_number}],
+        "name": [{"text": record.patient_name}],
+        "gender": _FHIR_GENDER[record.gender],
+    }
+    birth_date = _fhir_date(record.birth_date)
+    if birth_date:
+        patient["birthDate"] = birth_date
+
+    collection = {"method": {"text": record.label("procedure_type")}}
+    if record.collection_site:
+        collection["bodySite"] = {"text": record.collection_site}
+    collected = _fhir_datetime(record.collection_datetime)
+    if collected:
+        collection["collectedDateTime"] = collected
+
+    notes = [f"{label}: {record.label(field)}" for field, label in (
+        ("tissue_type", "Tipo de tecido"),
+        ("tissue_measurement", "Medidas do tecido"),
+        ("tissue_weight", "Peso do tecido"),
+        ("sample_quantity", "Quantidade e integridade"),
+        ("preservation_medium", "Meio de conservação"),
+    ) if getattr(record, field) != ""]
+
+    specimen = {
+        "resourceType": "Specimen",
+        "id": specimen_id,
+        "accessionIdentifier": {"system": SAMPLE_ID_SYSTEM, "value": record.sample_code},
+        "type": {"text": record.label("material_type")},
+        "subject": {"reference": f"Patient/{patient_id}"},
+        "collection": collection,
+        "note": [{"text": note} for note in notes],
+    }
+
+    if not report.signed:
+        status = "preliminary"
+    else:
+        status = "amended" if amended else "final"
+    diagnostic_report = {
+        "resourceType": "DiagnosticReport",
+        "id": _resource_id("dr", record.sample_code),
+        "identifier": [{"system": SAMPLE_ID_SYSTEM, "value": record.sample_code}],
+        "status": status,
+        "category": [{"coding": [{"system": "http://terminology.hl7.org/CodeSystem/v2-0074",
+                                  "code": "SP", "display": "Surgical Pathology"}]}],
+        "code": _REPORT_CODE,
+        "subject": {"reference": f"Patient/{patient_id}"},
+        "specimen": [{"reference": f"Specimen/{specimen_id}"}],
+        "issued": _fhir_instant(report.signed_at or report.updated_at),
+        "performer": [{"display": report.pathologist}],
+        "conclusion": report.diagnosis,
+        "presentedForm": [
+            _text_attachment("Macroscopia", report.macroscopy),
+            _text_attachment("Microscopia", report.microscopy),
+            _text_attachment("Conclusão diagnóstica", report.diagnosis),
+        ],
+    }
+    if collected:
+        diagnostic_report["effectiveDateTime"] = collected
+    if report.diagnosis_code:
+        coding = {"code": report.diagnosis_code}
+        if report.diagnosis_system in SYSTEM_URIS:
+            coding["system"] = SYSTEM_URIS[report.diagnosis_system]
+        diagnostic_report["conclusionCode"] = [{"coding": [coding], "text": report.diagnosis_system}]
+    if record.clinical_suspicion:
+        diagnostic_report["extension"] = [{
+            "url": "urn:patologia:suspeita-clinica",
+            "valueString": record.clinical_suspicion,
+        }]
+
+    return patient, specimen, diagnostic_report
+
+
+def _serialize_batch(rows, amended=frozenset()):
+    """
+    Serializa um lote de linhas do armazenamento (executado nos processos).
+
+    Args:
+        rows (list[tuple]): Linhas com todas as colunas da tabela de laudos
+        amended (set[str], optional): Códigos dos laudos retificados após a emissão
+
+    Returns:
+        tuple[list, list[str], list[str]]: Pacientes como (id, (updated_at, id
+            do laudo), linha NDJSON) e linhas NDJSON de Specimen e DiagnosticReport
+    """
+    patients, specimens, reports = [], [], []
+    for row in rows:
+        patient, specimen, report = report_to_resources(Report.from_row(row),
+                                                        row[_SAMPLE_CODE] in amended)
+        patients.append((patient["id"], (row[_UPDATED_AT], row[_ID]), _to_json(patient)))
+        specimens.append(_to_json(specimen))
+        reports.append(_to_json(report))
+    return patients, specimens, reports
+
+
+def _to_json(resource):
+    """Serializa um recurso em uma linha NDJSON."""
+    return json.dumps(resource, ensure_ascii=False, separators=(",", ":"))
+
+
+def load_watermark(path):
+    """
+    Lê a marca d'água da última exportação.
+
+    Returns:
+        tuple: (updated_at, id) do último laudo exportado e data da última
+            assinatura considerada, ou (None, 0, 0)
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        # Marcas anteriores à data de assinatura: assinaturas desde a última alteração
+        return data["updated_at"], data["id"], data.get("signed_at", data["updated_at"])
+    except (OSError, ValueError, KeyError):
+        return None, 0, 0
+
+
+def save_watermark(path, updated_at, report_id, signed_at):
+    """Grava a marca d'água de forma atômica."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"updated_at": updated_at, "id": report_id, "signed_at": signed_at,
+                   "exported_at": time.time()}, f)
+    os.replace(tmp_path, path)
+
+
+def export_fhir(store, out_dir, watermark_path=None, workers=None, batch_size=500,
+                progress=None, cancelled=None):
+    """
+    Exporta os laudos novos, alterados ou assinados desde a última execução.
+
+    A assinatura não altera a data de alteração do laudo: os laudos
+    assinados depois da última execução, mas alterados antes da marca
+    d'água, são exportados de novo com o status atualizado.
+
+    Cria em out_dir uma pasta por execução com os arquivos
+    Patient.ndjson, Specimen.ndjson e DiagnosticReport.ndjson. Cada
+    paciente aparece uma única vez, com os dados do laudo alterado mais
+    recentemente; os pacientes ficam em memória e o Patient.ndjson é
+    gravado ao final. A pasta
+    só aparece com o nome final (e a marca d'água só avança) quando a
+    exportação termina sem erros.
+
+    Args:
+        store (ReportStore): Armazenamento de laudos
+        out_dir (str): Diretório de saída
+        watermark_path (str, optional): Arquivo da marca d'água. Defaults to data_path("fhir_watermark.json").
+        workers (int, optional): Processos de serialização. Defaults to os.cpu_count().
+        batch_size (int, optional): Laudos por lote. Defaults to 500.
+        progress (callable, optional): Recebe (laudos exportados, total)
+        cancelled (callable, optional): Retorna True para interromper
+
+    Returns:
+        str | None: Pasta criada, ou None se não houve laudos novos ou foi cancelada
+    """
+    watermark_path = watermark_path or data_path("fhir_watermark.json")
+    since, last_id, signed_since = load_watermark(watermark_path)
+    signed_until = store.versions.last_signed_at()
+    resigned = []
+    if since is not None:
+        resigned = [row for row in store.signed_rows(signed_since)
+                    if (row[_UPDATED_AT], row[_ID]) <= (since, last_id)]
+    total = store.count(since=since) + len(resigned)
+    if not total:
+        return None
+
+    run_dir = os.path.join(out_dir, time.strftime("%Y%m%dT%H%M%S"))
+    suffix = 1
+    while os.path.exists(run_dir) or os.path.exists(f"{run_dir}.part"):
+        suffix += 1
+        run_dir = os.path.join(out_dir, time.strftime("%Y%m%dT%H%M%S") + f"-{suffix}")
+    tmp_dir = f"{run_dir}.part"
+    os.makedirs(tmp_dir, exist_ok=True)
+    files = [open(os.path.join(tmp_dir, f"{name}.ndjson"), "w", encoding="utf-8")
+             for name in RESOURCE_TYPES]
+    # id do Patient -> ((updated_at, id) do laudo de origem, linha NDJSON)
+    patients = {}
+    exported = 0
+    watermark = (since, last_id)
+    workers = workers or os.cpu_count() or 1
+
+    def submit(rows, batch_watermark):
+        counts = store.versions.signed_counts(row[_SAMPLE_CODE] for row in rows)
+        # Retificação ainda não assinada: continua valendo a versão assinada anterior
+        rows = [row for row in rows if row[_SIGNED_AT] or not counts.get(row[_SAMPLE_CODE])]
+        amended = {code for code, count in counts.items() if count > 1}
+        pending.append((executor.submit(_serialize_batch, rows, amended), len(rows), batch_watermark))
+
+    def write(lines):
+        batch_patients, specimens, reports = lines
+        # Um mesmo paciente pode ter vários laudos no período, com dados
+        # cadastrais diferentes: vale o laudo alterado mais recentemente
+        for patient_id, version, line in batch_patients:
+            current = patients.get(patient_id)
+            if current is None or version > current[0]:
+                patients[patient_id] = (version, line)
+        files[1].writelines(line + "\n" for line in specimens)
+        files[2].writelines(line + "\n" for line in reports)
+
+    try:
+        # "spawn": a aplicação Qt tem threads ativas, o que torna o fork inseguro
+        with ProcessPoolExecutor(max_workers=workers,
+                                 mp_context=multiprocessing.get_context("spawn")) as executor:
+            # Mantém no máximo 2 lotes por processo em andamento (memória limitada)
+            pending = deque()
+            for i in range(0, len(resigned), batch_size):
+                submit(resigned[i:i + batch_size], watermark)
+            for rows in store.iter_batches(_ALL_COLUMNS, since=since, batch_size=batch_size):
+                if since is not None:
+                    # Laudos com a mesma data da marca d'água já exportados
+                    rows = [r for r in rows if (r[_UPDATED_AT], r[_ID]) > (since, last_id)]
+                if not rows:
+                    continue
+                if cancelled and cancelled():
+                    raise _Cancelled()
+                submit(rows, (rows[-1][_UPDATED_AT], rows[-1][_ID]))
+                while len(pending) >= workers * 2:
+                    exported, watermark = _drain_one(pending, write, exported, watermark)
+                    if progress:
+                        progress(exported, total)
+            while pending:
+                exported, watermark = _drain_one(pending, write, exported, watermark)
+                if progress:
+                    progress(exported, total)
+        files[0].writelines(line + "\n" for _, line in patients.values())
+        for f in files:
+            f.close()
+        if not exported:
+            shutil.rmtree(tmp_dir)
+            return None
+        os.replace(tmp_dir, run_dir)
+        save_watermark(watermark_path, *watermark, signed_until)
+        return run_dir
+    except _Cancelled:
+        for f in files:
+            f.close()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return None
+    except BaseException:
+        for f in files:
+            f.close()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+
+def _drain_one(pending, write, exported, watermark):
+    """Aguarda o lote mais antigo, grava as linhas e avança a marca d'água."""
+    future, count, batch_watermark = pending.popleft()
+    write(future.result())
+    return exported + count, batch_watermark
+
+
+class _Cancelled(Exception):
+    """Interrupção solicitada pelo usuário."""
+
+
+def main(argv=None):
+    """Ponto de entrada da linha de comando."""
+    parser = argparse.ArgumentParser(description="Exporta laudos novos ou alterados em FHIR NDJSON.")
+    parser.add_argument("out_dir", help="Diretório de saída")
+    parser.add_argument("--workers", type=int, default=None, help="Processos de serialização")
+    parser.add_argument("--watermark", default=None, help="Arquivo da marca d'água")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    run_dir = export_fhir(ReportStore(), args.out_dir, args.watermark, args.workers)
+    if run_dir:
+        print(f"Exportação concluída em {time.perf_counter() - start:.1f} s: {run_dir}")
+    else:
+        print("Nenhum laudo novo ou alterado desde a última exportação.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Módulo de imagens das amostras.
+
+Este módulo contém o armazenamento das imagens anexadas às amostras
+(lâminas digitalizadas e fotos da macroscopia). As imagens são
+copiadas para o diretório de imagens com o SHA-256 do conteúdo como
+nome: a mesma imagem anexada duas vezes ocupa espaço uma única vez,
+e o nome já serve de chave para o cache de análise.
+
+Funções:
+    import_image: Copia uma imagem para o diretório de imagens.
+    image_path: Caminho de uma imagem importada.
+    image_digest: Hash do conteúdo de uma imagem importada.
+    load_stain_profile: Perfil de coloração salvo de uma imagem.
+    save_stain_profile: Salva o perfil de coloração de uma imagem.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+from .config import IMAGES_DIR
+from .imaging import StainProfile
+
+# Extensões aceitas e filtro do diálogo de seleção de arquivos
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp")
+IMAGE_FILTER = "Imagens (*.png *.jpg *.jpeg *.tif *.tiff *.bmp)"
+
+_READ_SIZE = 1024 * 1024
+
+
+def import_image(path, progress=None, cancelled=None):
+    """
+    Copia uma imagem para o diretório de imagens, nomeada pelo seu conteúdo.
+
+    Args:
+        path (str): Arquivo de origem
+        progress (callable, optional): Recebe (bytes lidos, total)
+        cancelled (callable, optional): Retorna True para interromper
+
+    Returns:
+        str | None: Nome da imagem importada ("<sha256>.<ext>"), ou None se cancelada
+
+    Raises:
+        ValueError: Se a extensão não for de imagem
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in IMAGE_EXTENSIONS:
+        raise ValueError(f"Formato de imagem não suportado: {extension or os.path.basename(path)}")
+
+    total = os.path.getsize(path)
+    digest = hashlib.sha256()
+    done = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_READ_SIZE), b""):
+            digest.update(block)
+            done += len(block)
+            if cancelled and cancelled():
+                return None
+            if progress:
+                progress(done, total)
+
+    name = f"{digest.hexdigest()}{extension}"
+    target = image_path(name)
+    if not os.path.exists(target):
+        os.makedirs(IMAGES_DIR, exist_ok=True)
+        tmp_path = f"{target}.part"
+        shutil.copyfile(path, tmp_path)
+        os.replace(tmp_path, target)
+    return name
+
+
+def image_path(name):
+    """Caminho de uma imagem importada."""
+    return os.path.join(IMAGES_DIR, name)
+
+
+def image_digest(name):
+    """Hash SHA-256 do conteúdo de uma imagem importada (parte do nome)."""
+    return os.path.splitext(name)[0]
+
+
+def _stain_profile_path(name):
+    """Arquivo do perfil de coloração de uma imagem, ao lado da imagem."""
+    return os.path.join(IMAGES_DIR, f"{image_digest(name)}.corantes.json")
+
+
+def load_stain_profile(name):
+    """
+    Lê o perfil de coloração salvo de uma imagem.
+
+    Args:
+        name (str): Nome da imagem importada
+
+    Returns:
+        StainProfile | None: Perfil, ou None se ainda não foi estimado
+    """
+    try:
+        with open(_stain_profile_path(name), encoding="utf-8") as f:
+            return StainProfile.from_dict(json.load(f))
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def save_stain_profile(name, profile):
+    """
+    Salva o perfil de coloração de uma imagem (gravação atômica).
+
+    Args:
+        name (str): Nome da imagem importada
+        profile (StainProfile): Perfil estimado
+    """
+    path = _stain_profile_path(name)
+    tmp_path = f"{path}.part"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(profile.to_dict(), f)
+    os.replace(tmp_path, path)
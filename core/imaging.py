@@ -0,0 +1,347 @@
+"""
+Módulo de processamento de imagens.
+
+Este módulo contém as operações de imagem usadas nas etapas de
+análise, implementadas com NumPy sobre matrizes RGB (altura x largura
+x 3, uint8). A leitura dos arquivos usa o QImage do Qt, já presente
+na aplicação, e pode ser feita fora da thread da interface.
+
+A normalização de coloração segue o método de Macenko: os vetores de
+cor da hematoxilina e da eosina de cada lâmina são estimados uma vez
+(StainProfile) e combinados com os da referência em uma única matriz
+3x3 sobre a densidade óptica, aplicada bloco a bloco junto com a
+conversão de e para RGB.
+
+Classes:
+    StainProfile: Vetores de cor e concentrações máximas dos corantes de uma lâmina.
+
+Funções:
+    load_rgb: Lê uma imagem como matriz RGB, reduzida a um tamanho máximo.
+    tissue_mask: Máscara das regiões com tecido (fundo claro excluído).
+    optical_density: Converte RGB em densidade óptica.
+    stain_concentrations: Separa as concentrações de hematoxilina e eosina.
+    otsu_threshold: Limiar de Otsu de um conjunto de valores.
+    detect_nuclei: Posições dos núcleos (máximos locais de hematoxilina).
+    estimate_stain_profile: Estima os vetores de cor dos corantes de uma lâmina (Macenko).
+    normalization_transform: Matriz de normalização de uma lâmina para a referência.
+    normalize_stains: Aplica a normalização de coloração a imagens ou lotes de tiles.
+"""
+
+import numpy as np
+from PyQt5.QtGui import QImage
+
+# Vetores de cor (densidade óptica) de referência da hematoxilina, eosina e
+# resíduo (Ruifrok & Johnston), usados quando não há estimativa da lâmina
+HE_REFERENCE = np.array([
+    [0.650, 0.704, 0.286],
+    [0.072, 0.990, 0.105],
+    [0.268, 0.570, 0.776],
+])
+
+# Pixels processados por bloco na normalização (cabem no cache do processador)
+_NORMALIZE_BLOCK = 16384
+
+# Intensidade de fundo (luz transmitida) e limite de brilho do fundo
+BACKGROUND_INTENSITY = 255.0
+BACKGROUND_LEVEL = 220
+
+
+def load_rgb(path, max_size=2048):
+    """
+    Lê uma imagem como matriz RGB.
+
+    Os pixels decodificados pelo QImage são convertidos com NumPy, e a
+    redução é feita pela média de blocos de pixels. As conversões e o
+    redimensionamento do próprio Qt dividem imagens grandes em tarefas
+    no pool global de threads, que pode estar ocupado pela própria
+    análise (um único thread em máquinas de um núcleo).
+
+    Args:
+        path (str): Arquivo de imagem
+        max_size (int, optional): Maior dimensão máxima após a redução. Defaults to 2048.
+
+    Returns:
+        numpy.ndarray: Matriz (altura, largura, 3) uint8
+
+    Raises:
+        ValueError: Se o arquivo não puder ser lido como imagem
+    """
+    image = QImage(path)
+    if image.isNull():
+        raise ValueError(f"Não foi possível ler a imagem: {path}")
+    rgb = _image_to_rgb(image)
+    factor = -(-max(rgb.shape[:2]) // max_size)
+    if factor > 1:
+        height, width = rgb.shape[0] // factor, rgb.shape[1] // factor
+        blocks = rgb[:height * factor, :width * factor].reshape(height, factor, width, factor, 3)
+        rgb = blocks.mean(axis=(1, 3)).round().astype(np.uint8)
+    return rgb
+
+
+def _image_to_rgb(image):
+    """Converte os pixels de um QImage em matriz RGB uint8."""
+    width, height, stride = image.width(), image.height(), image.bytesPerLine()
+    image_format = image.format()
+    bits = image.constBits()
+    bits.setsize(stride * height)
+    # Cada linha pode ter bytes de alinhamento após os pixels
+    rows = np.frombuffer(bits, dtype=np.uint8).reshape(height, stride)
+
+    if image_format in (QImage.Format_RGB32, QImage.Format_ARGB32, QImage.Format_ARGB32_Premultiplied):
+        # Pixels 0xAARRGGBB na ordem de bytes da máquina
+        pixels = rows[:, :width * 4].copy().view(np.uint32)
+        rgb = np.stack([(pixels >> 16) & 0xFF, (pixels >> 8) & 0xFF, pixels & 0xFF], axis=2)
+        return rgb.astype(np.uint8)
+    if image_format == QImage.Format_RGB888:
+        return rows[:, :width * 3].reshape(height, width, 3).copy()
+    if image_format == QImage.Format_Grayscale8:
+        return np.repeat(rows[:, :width, np.newaxis], 3, axis=2)
+    if image_format == QImage.Format_Grayscale16:
+        gray = (rows[:, :width * 2].copy().view(np.uint16) >> 8).astype(np.uint8)
+        return np.repeat(gray[:, :, np.newaxis], 3, axis=2)
+    if image_format in (QImage.Format_RGBX64, QImage.Format_RGBA64, QImage.Format_RGBA64_Premultiplied):
+        pixels = rows[:, :width * 8].copy().view(np.uint16).reshape(height, width, 4)
+        return (pixels[:, :, :3] >> 8).astype(np.uint8)
+    if image_format == QImage.Format_Indexed8:
+        table = np.array(image.colorTable(), dtype=np.uint32)
+        pixels = table[rows[:, :width]]
+        rgb = np.stack([(pixels >> 16) & 0xFF, (pixels >> 8) & 0xFF, pixels & 0xFF], axis=2)
+        return rgb.astype(np.uint8)
+    # Formatos raros (ex.: monocromático): conversão pelo Qt
+    return _image_to_rgb(image.convertToFormat(QImage.Format_RGB32))
+
+
+def tissue_mask(rgb, level=BACKGROUND_LEVEL):
+    """
+    Máscara das regiões com tecido: pixels mais escuros que o fundo claro.
+
+    Args:
+        rgb (numpy.ndarray): Imagem RGB
+        level (int, optional): Brilho mínimo do fundo. Defaults to BACKGROUND_LEVEL.
+
+    Returns:
+        numpy.ndarray: Máscara booleana (altura, largura)
+    """
+    return rgb.min(axis=2) < level
+
+
+def optical_density(rgb):
+    """
+    Converte RGB em densidade óptica (lei de Beer-Lambert).
+
+    Args:
+        rgb (numpy.ndarray): Imagem RGB (... x 3)
+
+    Returns:
+        numpy.ndarray: Densidade óptica float32 com a mesma forma
+    """
+    return -np.log((rgb.astype(np.float32) + 1.0) / (BACKGROUND_INTENSITY + 1.0))
+
+
+def stain_concentrations(rgb, stain_matrix=HE_REFERENCE):
+    """
+    Separa as concentrações dos corantes por deconvolução de cor.
+
+    Args:
+        rgb (numpy.ndarray): Imagem RGB (altura, largura, 3)
+        stain_matrix (numpy.ndarray, optional): Vetores de cor dos corantes, um por linha
+            (hematoxilina, eosina[, resíduo]). Defaults to HE_REFERENCE.
+
+    Returns:
+        numpy.ndarray: Concentrações float32 (altura, largura, nº de corantes)
+    """
+    vectors = stain_matrix / np.linalg.norm(stain_matrix, axis=1, keepdims=True)
+    od = optical_density(rgb).reshape(-1, 3)
+    concentrations = od @ np.linalg.pinv(vectors).astype(np.float32)
+    return concentrations.reshape(rgb.shape[0], rgb.shape[1], len(vectors))
+
+
+def otsu_threshold(values, bins=256):
+    """
+    Calcula o limiar de Otsu (máxima variância entre classes).
+
+    Args:
+        values (numpy.ndarray): Valores (qualquer forma)
+        bins (int, optional): Número de faixas do histograma. Defaults to 256.
+
+    Returns:
+        float: Limiar
+    """
+    values = np.asarray(values, dtype=np.float64).ravel()
+    if values.size == 0:
+        return 0.0
+    counts, edges = np.histogram(values, bins=bins)
+    centers = (edges[:-1] + edges[1:]) / 2
+    weight_low = np.cumsum(counts)
+    weight_high = weight_low[-1] - weight_low
+    sum_low = np.cumsum(counts * centers)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_low = sum_low / weight_low
+        mean_high = (sum_low[-1] - sum_low) / weight_high
+        variance = weight_low * weight_high * (mean_low - mean_high) ** 2
+    return float(centers[np.nanargmax(variance)])
+
+
+def detect_nuclei(rgb, stain_matrix=HE_REFERENCE, level=BACKGROUND_LEVEL, block=4):
+    """
+    Localiza os núcleos como máximos locais da concentração de hematoxilina.
+
+    A concentração é reduzida à média de blocos de block x block pixels
+    (da ordem do raio de um núcleo na imagem preparada); um bloco é um
+    núcleo quando supera o limiar de Otsu dos blocos com tecido e é
+    máximo entre os oito vizinhos.
+
+    Args:
+        rgb (numpy.ndarray): Imagem RGB
+        stain_matrix (numpy.ndarray, optional): Vetores de cor dos corantes. Defaults to HE_REFERENCE.
+        level (int, optional): Brilho mínimo do fundo. Defaults to BACKGROUND_LEVEL.
+        block (int, optional): Lado dos blocos em pixels. Defaults to 4.
+
+    Returns:
+        numpy.ndarray: Centros dos núcleos (n, 2) em x, y, float32
+    """
+    rows, columns = rgb.shape[0] // block, rgb.shape[1] // block
+    if not rows or not columns:
+        return np.zeros((0, 2), dtype=np.float32)
+    rgb = rgb[:rows * block, :columns * block]
+    hematoxylin = stain_concentrations(rgb, stain_matrix)[..., 0]
+    hematoxylin = hematoxylin.reshape(rows, block, columns, block).mean(axis=(1, 3))
+    tissue = tissue_mask(rgb, level).reshape(rows, block, columns, block).any(axis=(1, 3))
+    if not tissue.any():
+        return np.zeros((0, 2), dtype=np.float32)
+
+    padded = np.pad(hematoxylin, 1, constant_values=-np.inf)
+    peaks = tissue & (hematoxylin > otsu_threshold(hematoxylin[tissue]))
+    for dy in (0, 1, 2):
+        for dx in (0, 1, 2):
+            if dy != 1 or dx != 1:
+                neighbour = padded[dy:dy + rows, dx:dx + columns]
+                # Empates: vence o bloco mais acima/à esquerda
+                peaks &= hematoxylin > neighbour if (dy, dx) < (1, 1) else hematoxylin >= neighbour
+    ys, xs = np.nonzero(peaks)
+    return ((np.stack([xs, ys], axis=1) + 0.5) * block).astype(np.float32)
+
+
+class StainProfile:
+    """
+    Vetores de cor e concentrações máximas da hematoxilina e da eosina de uma lâmina.
+
+    Attributes:
+        matrix (numpy.ndarray): Vetores de cor unitários (2, 3), hematoxilina primeiro
+        max_concentrations (numpy.ndarray): Percentil 99 das concentrações (2,)
+    """
+
+    __slots__ = ("matrix", "max_concentrations")
+
+    def __init__(self, matrix, max_concentrations):
+        self.matrix = np.asarray(matrix, dtype=np.float64)
+        self.max_concentrations = np.asarray(max_concentrations, dtype=np.float64)
+
+    def __repr__(self):
+        return f"StainProfile({self.matrix.round(3).tolist()}, {self.max_concentrations.round(3).tolist()})"
+
+    def to_dict(self):
+        """Converte o perfil em dicionário serializável em JSON."""
+        return {"matrix": self.matrix.tolist(), "max_concentrations": self.max_concentrations.tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Cria o perfil a partir de to_dict()."""
+        return cls(data["matrix"], data["max_concentrations"])
+
+
+# Perfil de referência da normalização (valores de referência de Macenko et al.)
+REFERENCE_PROFILE = StainProfile([[0.5626, 0.7201, 0.4062], [0.2159, 0.8012, 0.5581]], [1.9705, 1.0308])
+
+
+def estimate_stain_profile(rgb, sample_size=100000, beta=0.15, alpha=1.0):
+    """
+    Estima os vetores de cor dos corantes de uma lâmina (método de Macenko).
+
+    Usa uma amostra regular de até sample_size pixels com tecido: os
+    vetores são os extremos (percentis alpha e 100 - alpha) do ângulo
+    dos pixels no plano dos dois maiores autovetores da densidade óptica.
+
+    Args:
+        rgb (numpy.ndarray): Imagem RGB da lâmina
+        sample_size (int, optional): Máximo de pixels amostrados. Defaults to 100000.
+        beta (float, optional): Densidade óptica mínima em cada canal. Defaults to 0.15.
+        alpha (float, optional): Percentil dos ângulos extremos. Defaults to 1.0.
+
+    Returns:
+        StainProfile | None: Perfil da lâmina, ou None se houver pouco tecido
+    """
+    pixels = rgb.reshape(-1, 3)
+    step = max(1, len(pixels) // (sample_size * 4))
+    od = optical_density(pixels[::step])
+    od = od[(od > beta).all(axis=1)]
+    if len(od) > sample_size:
+        od = od[::len(od) // sample_size]
+    if len(od) < 100:
+        return None
+
+    _, vectors = np.linalg.eigh(np.cov(od, rowvar=False))
+    plane = vectors[:, 1:3]  # dois maiores autovalores
+    projected = od @ plane
+    angles = np.arctan2(projected[:, 1], projected[:, 0])
+    low, high = np.percentile(angles, (alpha, 100 - alpha))
+    stains = np.array([plane @ (np.cos(low), np.sin(low)), plane @ (np.cos(high), np.sin(high))])
+    stains *= np.sign(stains.sum(axis=1, keepdims=True))  # densidades ópticas positivas
+    # A hematoxilina absorve mais o vermelho que a eosina
+    if stains[0, 0] < stains[1, 0]:
+        stains = stains[::-1]
+    stains /= np.linalg.norm(stains, axis=1, keepdims=True)
+
+    concentrations = od @ np.linalg.pinv(stains)
+    return StainProfile(stains, np.percentile(concentrations, 99, axis=0))
+
+
+def normalization_transform(source, target=REFERENCE_PROFILE):
+    """
+    Calcula a matriz de normalização de uma lâmina para a referência.
+
+    A separação dos corantes da lâmina, o ajuste das concentrações e a
+    recombinação com os vetores de referência são lineares na densidade
+    óptica e se reduzem a uma única matriz 3x3.
+
+    Args:
+        source (StainProfile): Perfil da lâmina
+        target (StainProfile, optional): Perfil de referência. Defaults to REFERENCE_PROFILE.
+
+    Returns:
+        numpy.ndarray: Matriz float32 (3, 3) aplicada a vetores-linha de densidade óptica
+    """
+    scale = target.max_concentrations / source.max_concentrations
+    return (np.linalg.pinv(source.matrix) @ np.diag(scale) @ target.matrix).astype(np.float32)
+
+
+# Densidade óptica de cada valor de intensidade (0 a 255)
+_OD_TABLE = -np.log((np.arange(256, dtype=np.float32) + 1.0) / (BACKGROUND_INTENSITY + 1.0))
+
+
+def normalize_stains(pixels, transform):
+    """
+    Aplica a normalização de coloração.
+
+    A conversão para densidade óptica (por tabela), a transformação e o
+    retorno para RGB são feitos em blocos de pixels, sem matrizes
+    intermediárias do tamanho da imagem.
+
+    Args:
+        pixels (numpy.ndarray): Imagem ou lote de tiles uint8 (..., 3)
+        transform (numpy.ndarray): Matriz de normalization_transform
+
+    Returns:
+        numpy.ndarray: Pixels normalizados uint8, com a mesma forma
+    """
+    flat = pixels.reshape(-1, 3)
+    result = np.empty_like(flat)
+    for start in range(0, len(flat), _NORMALIZE_BLOCK):
+        block = _OD_TABLE[flat[start:start + _NORMALIZE_BLOCK]] @ transform
+        np.negative(block, out=block)
+        np.exp(block, out=block)
+        block *= BACKGROUND_INTENSITY + 1.0
+        block -= 0.5  # -1 da conversão, +0.5 para arredondar
+        np.clip(block, 0, 255, out=block)
+        result[start:start + _NORMALIZE_BLOCK] = block
+    return result.reshape(pixels.shape)
@@ -0,0 +1,475 @@
+"""
+Módulo de inferência da sugestão diagnóstica.
+
+Este módulo contém o classificador de regiões (tiles) da lâmina, que
+roda em CPU com NumPy. A imagem é dividida em tiles quadrados; os
+tiles com tecido são pontuados em lotes dimensionados para caber no
+cache L2 do processador, distribuídos em um pool de threads (as
+operações do NumPy liberam o GIL). As probabilidades dos tiles,
+ponderadas pela área de tecido, formam a sugestão da lâmina.
+
+Com o perfil de coloração da lâmina, a cor de cada lote de tiles é
+normalizada para a referência imediatamente antes do cálculo das
+características, enquanto o lote ainda está no cache.
+
+O modelo é lido de um arquivo .npz (MODEL_PATH) com as matrizes de uma
+rede densa (w1/b1 opcionais, w2/b2), a normalização das
+características (mean/scale), as classes e o texto do diagnóstico de
+cada classe. Sem arquivo, usa-se um modelo linear de referência, de
+demonstração e sem validação clínica. O modelo é carregado uma vez e
+mantido em memória durante a sessão.
+
+Para medir o desempenho:
+
+    python -m core.inference --benchmark [imagem ...]
+
+Classes:
+    DiagnosisSuggestion: Sugestão diagnóstica de uma lâmina.
+    TileClassifier: Classificador de tiles (rede densa em NumPy).
+    InferenceEngine: Pontuação em lotes e agregação por lâmina.
+
+Funções:
+    l2_cache_size: Tamanho do cache L2 do processador.
+    extract_tiles: Divide uma imagem em tiles.
+    tile_features: Características de cor e de núcleos de um lote de tiles.
+    model_digest: Identificação do modelo configurado.
+    get_engine: Motor de inferência do modelo configurado (mantido em memória).
+"""
+
+import argparse
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .config import MODEL_PATH
+from .imaging import (HE_REFERENCE, BACKGROUND_LEVEL, optical_density, normalization_transform,
+                      normalize_stains)
+
+# Lado dos tiles, em pixels da imagem preparada (até 2048 px)
+TILE_SIZE = 64
+
+# Fração mínima de tecido para um tile ser pontuado
+MIN_TISSUE_FRACTION = 0.25
+
+# Concentração de hematoxilina acima da qual um pixel é considerado nuclear
+NUCLEAR_LEVEL = 0.6
+
+# Nomes das características calculadas por tile_features
+FEATURE_NAMES = ("tissue_fraction", "hematoxylin_mean", "hematoxylin_std", "eosin_mean",
+                 "eosin_std", "nuclear_fraction", "density_mean", "density_std")
+
+# Identificação do modelo de referência (usada na chave do cache de análise)
+REFERENCE_MODEL = "referencia-v1"
+
+_DEFAULT_L2_BYTES = 1024 * 1024
+
+# Matriz de separação de corantes (hematoxilina, eosina, resíduo)
+_UNMIX = np.linalg.pinv(HE_REFERENCE / np.linalg.norm(HE_REFERENCE, axis=1, keepdims=True)).astype(np.float32)
+
+
+def l2_cache_size():
+    """
+    Retorna o tamanho do cache L2 do processador.
+
+    Returns:
+        int: Tamanho em bytes (1 MiB quando não for possível detectar)
+    """
+    try:
+        with open("/sys/devices/system/cpu/cpu0/cache/index2/size") as f:
+            text = f.read().strip().upper()
+        units = {"K": 1024, "M": 1024 * 1024}
+        return int(text[:-1]) * units[text[-1]] if text[-1] in units else int(text)
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        return os.sysconf("SC_LEVEL2_CACHE_SIZE") or _DEFAULT_L2_BYTES
+    except (ValueError, OSError, AttributeError):
+        return _DEFAULT_L2_BYTES
+
+
+def extract_tiles(rgb, tile_size=TILE_SIZE):
+    """
+    Divide uma imagem em tiles quadrados (as bordas incompletas são descartadas).
+
+    Args:
+        rgb (numpy.ndarray): Imagem RGB (altura, largura, 3)
+        tile_size (int, optional): Lado dos tiles. Defaults to TILE_SIZE.
+
+    Returns:
+        numpy.ndarray: Tiles (n, tile_size, tile_size, 3)
+    """
+    rows, columns = rgb.shape[0] // tile_size, rgb.shape[1] // tile_size
+    tiles = rgb[:rows * tile_size, :columns * tile_size].reshape(rows, tile_size, columns, tile_size, 3)
+    return tiles.swapaxes(1, 2).reshape(rows * columns, tile_size, tile_size, 3)
+
+
+def tile_features(tiles):
+    """
+    Calcula as características de um lote de tiles.
+
+    Args:
+        tiles (numpy.ndarray): Tiles (n, lado, lado, 3) uint8
+
+    Returns:
+        numpy.ndarray: Características float32 (n, len(FEATURE_NAMES))
+    """
+    count = len(tiles)
+    pixels = tiles.reshape(count, -1, 3)
+    od = optical_density(pixels)
+    concentrations = od @ _UNMIX
+    hematoxylin, eosin = concentrations[..., 0], concentrations[..., 1]
+    density = od.sum(axis=2)
+    return np.stack([
+        (pixels.min(axis=2) < BACKGROUND_LEVEL).mean(axis=1),
+        hematoxylin.mean(axis=1),
+        hematoxylin.std(axis=1),
+        eosin.mean(axis=1),
+        eosin.std(axis=1),
+        (hematoxylin > NUCLEAR_LEVEL).mean(axis=1),
+        density.mean(axis=1),
+        density.std(axis=1),
+    ], axis=1).astype(np.float32)
+
+
+class DiagnosisSuggestion:
+    """
+    Sugestão diagnóstica de uma lâmina.
+
+    Attributes:
+        label (str): Classe sugerida
+        diagnosis (str): Texto do diagnóstico sugerido
+        confidence (float): Probabilidade da classe sugerida (0 a 1)
+        probabilities (dict): Classe -> probabilidade
+        tiles (int): Tiles com tecido pontuados
+        seconds (float): Duração da inferência
+        regions (numpy.ndarray): Retângulos dos tiles pontuados (x0, y0, x1, y1), int32 (tiles, 4)
+        region_classes (numpy.ndarray): Classe mais provável de cada tile (índice em probabilities)
+    """
+
+    __slots__ = ("label", "diagnosis", "confidence", "probabilities", "tiles", "seconds",
+                 "regions", "region_classes")
+
+    def __init__(self, label, diagnosis, confidence, probabilities, tiles, seconds,
+                 regions=None, region_classes=None):
+        self.label = label
+        self.diagnosis = diagnosis
+        self.confidence = confidence
+        self.probabilities = probabilities
+        self.tiles = tiles
+        self.seconds = seconds
+        self.regions = np.zeros((0, 4), dtype=np.int32) if regions is None else regions
+        self.region_classes = np.zeros(0, dtype=np.uint8) if region_classes is None else region_classes
+
+    def __repr__(self):
+        return f"DiagnosisSuggestion({self.label!r}, confidence={self.confidence:.2f}, tiles={self.tiles})"
+
+
+class TileClassifier:
+    """
+    Classificador de tiles: rede densa sobre as características normalizadas.
+
+    Attributes:
+        classes (tuple[str]): Nomes das classes
+        diagnoses (tuple[str]): Texto do diagnóstico de cada classe
+        digest (str): Identificação do modelo
+    """
+
+    def __init__(self, layers, mean, scale, classes, diagnoses, digest):
+        """
+        Cria o classificador.
+
+        Args:
+            layers (list[tuple]): Pares (pesos, viés) das camadas; ReLU entre elas
+            mean (numpy.ndarray): Média das características
+            scale (numpy.ndarray): Desvio das características
+            classes (Sequence[str]): Nomes das classes
+            diagnoses (Sequence[str]): Texto do diagnóstico de cada classe
+            digest (str): Identificação do modelo
+        """
+        self.layers = [(np.asarray(w, dtype=np.float32), np.asarray(b, dtype=np.float32))
+                       for w, b in layers]
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.scale = np.asarray(scale, dtype=np.float32)
+        self.classes = tuple(classes)
+        self.diagnoses = tuple(diagnoses)
+        self.digest = digest
+
+    @classmethod
+    def load(cls, path):
+        """
+        Lê um modelo de um arquivo .npz.
+
+        Args:
+            path (str): Arquivo do modelo
+
+        Returns:
+            TileClassifier: Classificador
+
+        Raises:
+            ValueError: Se o arquivo não tiver as matrizes esperadas
+        """
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        with np.load(path, allow_pickle=False) as data:
+            try:
+                layers = [(data["w1"], data["b1"])] if "w1" in data else []
+                layers.append((data["w2"], data["b2"]))
+                return cls(layers, data["mean"], data["scale"], [str(c) for c in data["classes"]],
+                           [str(d) for d in data["diagnoses"]], digest)
+            except KeyError as exc:
+                raise ValueError(f"Modelo incompleto {os.path.basename(path)}: falta {exc}") from None
+
+    @classmethod
+    def reference(cls):
+        """
+        Modelo linear de referência (demonstração, sem validação clínica).
+
+        Favorece as classes atípica e maligna conforme aumentam a
+        fração nuclear e a variação da hematoxilina no tile.
+        """
+        mean = [0.8, 0.35, 0.2, 0.3, 0.12, 0.15, 1.0, 0.35]
+        scale = [0.2, 0.15, 0.1, 0.15, 0.06, 0.12, 0.4, 0.15]
+        weights = np.zeros((len(FEATURE_NAMES), 3), dtype=np.float32)
+        weights[FEATURE_NAMES.index("nuclear_fraction")] = (-1.5, 0.3, 1.5)
+        weights[FEATURE_NAMES.index("hematoxylin_std")] = (-0.8, 0.4, 0.6)
+        weights[FEATURE_NAMES.index("hematoxylin_mean")] = (-0.5, 0.2, 0.5)
+        bias = np.array([1.0, 0.0, -1.2], dtype=np.float32)
+        return cls([(weights, bias)], mean, scale, ("benigno", "atipico", "maligno"), (
+            "Fragmentos de tecido compatíveis com lesão benigna.\n"
+            "Sugere-se acompanhamento clínico conforme orientação médica.",
+            "Fragmentos de tecido com atipias celulares de significado indeterminado.\n"
+            "Sugere-se correlação clínica e, se indicado, nova amostragem.",
+            "Fragmentos de tecido com alterações suspeitas para neoplasia maligna.\n"
+            "Sugere-se estudo imuno-histoquímico complementar.",
+        ), REFERENCE_MODEL)
+
+    def save(self, path):
+        """Grava o modelo em um arquivo .npz."""
+        arrays = {"w2": self.layers[-1][0], "b2": self.layers[-1][1]}
+        if len(self.layers) > 1:
+            arrays.update(w1=self.layers[0][0], b1=self.layers[0][1])
+        np.savez(path, mean=self.mean, scale=self.scale, classes=np.array(self.classes),
+                 diagnoses=np.array(self.diagnoses), **arrays)
+
+    def predict(self, features):
+        """
+        Calcula as probabilidades das classes.
+
+        Args:
+            features (numpy.ndarray): Características (n, len(FEATURE_NAMES))
+
+        Returns:
+            numpy.ndarray: Probabilidades (n, nº de classes)
+        """
+        x = (features - self.mean) / self.scale
+        for index, (weights, bias) in enumerate(self.layers):
+            x = x @ weights + bias
+            if index < len(self.layers) - 1:
+                np.maximum(x, 0, out=x)
+        x -= x.max(axis=1, keepdims=True)
+        np.exp(x, out=x)
+        return x / x.sum(axis=1, keepdims=True)
+
+
+class InferenceEngine:
+    """
+    Pontua os tiles de uma lâmina em lotes paralelos e agrega a sugestão.
+
+    Attributes:
+        classifier (TileClassifier): Modelo
+        tile_size (int): Lado dos tiles
+        batch_size (int): Tiles por lote
+        workers (int): Threads de pontuação
+    """
+
+    def __init__(self, classifier, tile_size=TILE_SIZE, batch_size=None, workers=None):
+        """
+        Cria o motor de inferência.
+
+        Args:
+            classifier (TileClassifier): Modelo
+            tile_size (int, optional): Lado dos tiles. Defaults to TILE_SIZE.
+            batch_size (int, optional): Tiles por lote; por padrão, quantos
+                cabem no cache L2 (considerando as matrizes float32 intermediárias)
+            workers (int, optional): Threads de pontuação. Defaults to os.cpu_count().
+        """
+        self.classifier = classifier
+        self.tile_size = tile_size
+        # Densidade óptica, concentrações e densidade total: ~7 floats por pixel
+        working_set = tile_size * tile_size * 7 * 4
+        self.batch_size = batch_size or max(1, l2_cache_size() // working_set)
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="inferencia")
+
+    def _score_batch(self, tiles, transform=None):
+        """Pontua um lote de tiles, normalizando antes a sua cor."""
+        if transform is not None:
+            tiles = normalize_stains(tiles, transform)
+        return self.classifier.predict(tile_features(tiles))
+
+    def score_tiles(self, tiles, transform=None):
+        """
+        Calcula as probabilidades de cada tile, em lotes paralelos.
+
+        Args:
+            tiles (numpy.ndarray): Tiles (n, lado, lado, 3)
+            transform (numpy.ndarray, optional): Matriz de normalização de coloração
+
+        Returns:
+            numpy.ndarray: Probabilidades (n, nº de classes)
+        """
+        if not len(tiles):
+            return np.zeros((0, len(self.classifier.classes)), dtype=np.float32)
+        batches = [tiles[i:i + self.batch_size] for i in range(0, len(tiles), self.batch_size)]
+        return np.concatenate(list(self._executor.map(self._score_batch, batches,
+                                                      [transform] * len(batches))))
+
+    def suggest(self, rgb, stain_profile=None):
+        """
+        Calcula a sugestão diagnóstica de uma lâmina.
+
+        Args:
+            rgb (numpy.ndarray): Imagem RGB da lâmina
+            stain_profile (StainProfile, optional): Perfil de coloração da lâmina, para normalização
+
+        Returns:
+            DiagnosisSuggestion | None: Sugestão, ou None se não houver tecido
+        """
+        start = time.perf_counter()
+        tiles = extract_tiles(rgb, self.tile_size)
+        tissue = (tiles.min(axis=3) < BACKGROUND_LEVEL).mean(axis=(1, 2))
+        selected = tissue >= MIN_TISSUE_FRACTION
+        if not selected.any():
+            return None
+        transform = normalization_transform(stain_profile) if stain_profile is not None else None
+        probabilities = self.score_tiles(tiles[selected], transform)
+        slide = np.average(probabilities, axis=0, weights=tissue[selected])
+        best = int(slide.argmax())
+        # Posição dos tiles pontuados (extract_tiles percorre a imagem linha a linha)
+        rows, columns = np.divmod(np.nonzero(selected)[0], rgb.shape[1] // self.tile_size)
+        regions = np.stack([columns, rows, columns + 1, rows + 1], axis=1).astype(np.int32) * self.tile_size
+        return DiagnosisSuggestion(
+            self.classifier.classes[best], self.classifier.diagnoses[best], float(slide[best]),
+            {name: float(p) for name, p in zip(self.classifier.classes, slide)},
+            int(selected.sum()), time.perf_counter() - start,
+            regions, probabilities.argmax(axis=1).astype(np.uint8))
+
+
+_engine = None
+_engine_key = None
+_engine_lock = threading.Lock()
+
+
+def model_digest(path=MODEL_PATH):
+    """
+    Identificação do modelo configurado, para a chave do cache de análise.
+
+    Returns:
+        str: Tamanho e data do arquivo do modelo, ou REFERENCE_MODEL sem arquivo
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return REFERENCE_MODEL
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def get_engine(path=MODEL_PATH):
+    """
+    Retorna o motor de inferência do modelo configurado.
+
+    O modelo é lido na primeira chamada e mantido em memória; é relido
+    apenas se o arquivo mudar.
+
+    Args:
+        path (str, optional): Arquivo do modelo. Defaults to MODEL_PATH.
+
+    Returns:
+        InferenceEngine: Motor de inferência
+    """
+    global _engine, _engine_key
+    key = (path, model_digest(path))
+    with _engine_lock:
+        if _engine is None or _engine_key != key:
+            classifier = (TileClassifier.reference() if key[1] == REFERENCE_MODEL
+                          else TileClassifier.load(path))
+            _engine, _engine_key = InferenceEngine(classifier), key
+        return _engine
+
+
+def _synthetic_slide(size, seed):
+    """Gera uma lâmina sintética (fundo claro, tecido rosado e núcleos) para o benchmark."""
+    rng = np.random.default_rng(seed)
+    rgb = np.full((size, size, 3), 240, dtype=np.uint8)
+    margin = size // 8
+    rgb[margin:-margin, margin:-margin] = (230, 150, 200)
+    nuclei = rng.integers(margin, size - margin - 6, size=(size * size // 400, 2))
+    for y, x in nuclei:
+        rgb[y:y + 6, x:x + 6] = (80, 60, 150)
+    noise = rng.integers(-12, 12, size=rgb.shape)
+    return np.clip(rgb.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+
+def benchmark(slides, repeat=5, engine=None):
+    """
+    Mede a vazão (tiles/s) e a latência por lâmina do motor de inferência.
+
+    Args:
+        slides (list[numpy.ndarray]): Imagens RGB das lâminas
+        repeat (int, optional): Repetições por lâmina. Defaults to 5.
+        engine (InferenceEngine, optional): Motor; por padrão, get_engine()
+
+    Returns:
+        dict: tiles_per_second, latency_p50, latency_p95 (segundos), tiles,
+            batch_size e workers
+    """
+    engine = engine or get_engine()
+    engine.suggest(slides[0])  # aquecimento
+    latencies, tiles = [], 0
+    for _ in range(repeat):
+        for rgb in slides:
+            suggestion = engine.suggest(rgb)
+            latencies.append(suggestion.seconds if suggestion else 0.0)
+            tiles += suggestion.tiles if suggestion else 0
+    total = sum(latencies)
+    return {
+        "tiles_per_second": tiles / total if total else 0.0,
+        "latency_p50": float(np.percentile(latencies, 50)),
+        "latency_p95": float(np.percentile(latencies, 95)),
+        "tiles": tiles,
+        "batch_size": engine.batch_size,
+        "workers": engine.workers,
+    }
+
+
+def main(argv=None):
+    """Ponto de entrada da linha de comando."""
+    parser = argparse.ArgumentParser(description="Mede o desempenho da inferência da sugestão diagnóstica.")
+    parser.add_argument("--benchmark", action="store_true", help="Executa o benchmark")
+    parser.add_argument("images", nargs="*", help="Imagens de lâminas (padrão: lâminas sintéticas)")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetições por lâmina")
+    parser.add_argument("--size", type=int, default=2048, help="Lado das lâminas sintéticas")
+    args = parser.parse_args(argv)
+    if not args.benchmark:
+        parser.print_help()
+        return
+
+    if args.images:
+        from .imaging import load_rgb
+        slides = [load_rgb(path) for path in args.images]
+    else:
+        slides = [_synthetic_slide(args.size, seed) for seed in range(3)]
+    result = benchmark(slides, args.repeat)
+    print(f"Lote: {result['batch_size']} tiles ({l2_cache_size() // 1024} KiB de L2), "
+          f"{result['workers']} threads")
+    print(f"{result['tiles']} tiles: {result['tiles_per_second']:.0f} tiles/s, "
+          f"latência por lâmina p50 {result['latency_p50'] * 1000:.1f} ms, "
+          f"p95 {result['latency_p95'] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
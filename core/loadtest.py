@@ -0,0 +1,407 @@
+"""
+Módulo de teste de carga.
+
+Este módulo reproduz, a uma taxa configurável, as operações que a
+interface faz no armazenamento de laudos, com casos sintéticos
+(core.synthetic):
+
+- save: grava um laudo novo (como o botão "Salvar" da tela de
+  resultados), às vezes assinado em seguida, ou retifica um laudo
+  já gravado, gerando uma nova versão;
+- search: busca os laudos de um prontuário e abre um laudo pelo
+  código da amostra;
+- history: monta a tela de histórico (laudos recentes do patologista,
+  miniaturas das linhas visíveis, prévia e versões do laudo
+  selecionado);
+- export: exporta para CSV os laudos emitidos no período recente.
+
+As chegadas seguem um processo de Poisson (carga aberta): cada
+operação tem um horário previsto, e a latência é medida a partir
+dele, de modo que o tempo na fila entra na conta quando o sistema não
+acompanha a taxa pedida. O relatório traz a vazão obtida e os
+percentis da latência e do tempo de serviço de cada operação.
+
+Uso: PATOLOGIA_DATA_DIR=/tmp/carga python -m core.loadtest --populate 50000 --rate 20 --duration 60
+
+Classes:
+    OperationStats: Latências e erros de um tipo de operação.
+    LoadResult: Resultado de um teste de carga.
+    LoadHarness: Reprodução das operações sobre um armazenamento de laudos.
+"""
+
+import argparse
+import os
+import queue
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from .exporter import export_reports
+from .synthetic import CaseGenerator
+
+# Operações reproduzidas e a proporção padrão de cada uma
+OPERATIONS = ("save", "search", "history", "export")
+DEFAULT_MIX = {"save": 50, "search": 30, "history": 15, "export": 5}
+
+# Percentis do relatório
+PERCENTILES = (50, 90, 95, 99)
+
+# Laudos listados na tela de histórico e linhas visíveis (miniaturas geradas)
+HISTORY_LIMIT = 500
+VISIBLE_ROWS = 8
+
+# Período exportado pela operação export, em segundos (os laudos emitidos na última hora)
+EXPORT_WINDOW = 3600.0
+
+
+class OperationStats:
+    """
+    Latências e erros de um tipo de operação.
+
+    Attributes:
+        name (str): Operação
+        latencies (list[float]): Do horário previsto ao fim, em segundos
+        service_times (list[float]): Do início ao fim, em segundos
+        errors (int): Operações que terminaram com erro
+        first_error (str): Mensagem do primeiro erro ("" se nenhum)
+    """
+
+    __slots__ = ("name", "latencies", "service_times", "errors", "first_error")
+
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.service_times = []
+        self.errors = 0
+        self.first_error = ""
+
+    @property
+    def count(self):
+        """Operações concluídas (com ou sem erro)."""
+        return len(self.latencies)
+
+    def percentiles(self, service=False):
+        """
+        Calcula os percentis da latência (ou do tempo de serviço).
+
+        Args:
+            service (bool, optional): Usa o tempo de serviço. Defaults to False.
+
+        Returns:
+            dict: Percentil (int) -> segundos, mais "max"; vazio se não houve operações
+        """
+        values = self.service_times if service else self.latencies
+        if not values:
+            return {}
+        result = dict(zip(PERCENTILES, np.percentile(values, PERCENTILES).tolist()))
+        result["max"] = max(values)
+        return result
+
+
+class LoadResult:
+    """
+    Resultado de um teste de carga.
+
+    Attributes:
+        rate (float): Taxa pedida, em operações por segundo (0 = sem limite)
+        seconds (float): Duração, em segundos
+        workers (int): Threads que executaram as operações
+        operations (dict): Operação -> OperationStats
+    """
+
+    __slots__ = ("rate", "seconds", "workers", "operations")
+
+    def __init__(self, rate, seconds, workers, operations):
+        self.rate = rate
+        self.seconds = seconds
+        self.workers = workers
+        self.operations = operations
+
+    @property
+    def count(self):
+        """Total de operações concluídas."""
+        return sum(stats.count for stats in self.operations.values())
+
+    @property
+    def throughput(self):
+        """Vazão obtida, em operações por segundo."""
+        return self.count / self.seconds if self.seconds else 0.0
+
+    def report(self):
+        """
+        Formata o relatório do teste.
+
+        Returns:
+            str: Vazão e uma linha por operação com os percentis em milissegundos
+        """
+        target = f"{self.rate:.1f} op/s pedidas" if self.rate else "sem limite de taxa"
+        lines = [f"{self.count} operações em {self.seconds:.1f} s: {self.throughput:.1f} op/s "
+                 f"({target}, {self.workers} threads)",
+                 f"{'operação':<10}{'n':>8}{'erros':>7}" + "".join(f"{f'p{p}':>10}" for p in PERCENTILES)
+                 + f"{'máx.':>10}{'serviço p50':>13}"]
+        for name, stats in self.operations.items():
+            if not stats.count:
+                continue
+            latency = stats.percentiles()
+            service = stats.percentiles(service=True)
+            lines.append(f"{name:<10}{stats.count:>8}{stats.errors:>7}"
+                         + "".join(f"{latency[p] * 1000:>10.1f}" for p in PERCENTILES)
+                         + f"{latency['max'] * 1000:>10.1f}{service[50] * 1000:>13.1f}")
+        lines.append("Latências em ms, a partir do horário previsto de cada operação.")
+        for stats in self.operations.values():
+            if stats.first_error:
+                lines.append(f"Primeiro erro em {stats.name}: {stats.first_error}")
+        return "\n".join(lines)
+
+
+class LoadHarness:
+    """
+    Reprodução das operações da interface sobre um armazenamento de laudos.
+
+    Os casos gravados ficam guardados (código da amostra, prontuário e
+    patologista) para que as buscas, o histórico e as retificações
+    usem laudos existentes.
+
+    Attributes:
+        store (ReportStore): Armazenamento de laudos
+        generator (CaseGenerator): Gerador dos casos sintéticos
+        preview_cache (PreviewCache): Cache das miniaturas e prévias (None = sem imagens)
+        sign_fraction (float): Proporção dos laudos novos assinados logo após a gravação
+        amend_fraction (float): Proporção das gravações que retificam um laudo existente
+    """
+
+    def __init__(self, store, generator=None, preview_cache=None, sign_fraction=0.3, amend_fraction=0.15):
+        """
+        Inicializa a reprodução.
+
+        Args:
+            store (ReportStore): Armazenamento de laudos (de preferência um banco de teste)
+            generator (CaseGenerator, optional): Gerador dos casos. Defaults to CaseGenerator().
+            preview_cache (PreviewCache, optional): Cache de imagens do histórico; sem ele, a
+                operação history não gera miniaturas nem prévias (exigem um QGuiApplication)
+            sign_fraction (float, optional): Laudos novos assinados. Defaults to 0.3.
+            amend_fraction (float, optional): Gravações que são retificações. Defaults to 0.15.
+        """
+        self.store = store
+        self.generator = generator or CaseGenerator()
+        self.preview_cache = preview_cache
+        self.sign_fraction = sign_fraction
+        self.amend_fraction = amend_fraction
+        self._lock = threading.Lock()
+        self._random = random.Random(self.generator.seed)
+        self._cases = []
+        self._export_dir = None
+
+    def _next_case(self):
+        """Próximo caso a gravar: novo ou retificação de um existente, e se deve ser assinado."""
+        with self._lock:
+            if self._cases and self._random.random() < self.amend_fraction:
+                return self.generator.amend(self._random.choice(self._cases)), False
+            return self.generator.case(), self._random.random() < self.sign_fraction
+
+    def _pick(self):
+        """Sorteia um caso já gravado (None se ainda não há casos)."""
+        with self._lock:
+            return self._random.choice(self._cases) if self._cases else None
+
+    def populate(self, count, progress=None):
+        """
+        Grava laudos sintéticos antes do teste, para que ele parta de um volume realista.
+
+        Args:
+            count (int): Laudos gravados
+            progress (callable, optional): Recebe (laudos gravados, total)
+
+        Returns:
+            float: Tempo gasto, em segundos
+        """
+        start = time.perf_counter()
+        for done in range(1, count + 1):
+            self.save()
+            if progress and (done % 1000 == 0 or done == count):
+                progress(done, count)
+        return time.perf_counter() - start
+
+    def save(self):
+        """Grava um laudo novo (às vezes assinado em seguida) ou retifica um existente."""
+        case, sign = self._next_case()
+        case.save(self.store)
+        if sign:
+            self.store.sign_report(case.record.sample_code, case.pathologist)
+        with self._lock:
+            self._cases.append(case)
+
+    def search(self):
+        """Busca os laudos de um prontuário e abre um laudo pelo código da amostra."""
+        case = self._pick()
+        if case is None:
+            return
+        self.store.find_by_record_number(case.record.record_number)
+        if self.store.get_report(case.record.sample_code) is None:
+            raise LookupError(f"Laudo {case.record.sample_code} não encontrado")
+
+    def history(self):
+        """Monta a tela de histórico do patologista de um caso e abre um laudo da lista."""
+        case = self._pick()
+        if case is None:
+            return
+        reports = self.store.recent_reports(case.pathologist, HISTORY_LIMIT)
+        if not reports:
+            return
+        if self.preview_cache is not None:
+            for report in reports[:VISIBLE_ROWS]:
+                if report.record.slide_image:
+                    self.preview_cache.thumbnail(report.record.sample_code, report.record.slide_image)
+        with self._lock:
+            selected = reports[self._random.randrange(min(len(reports), VISIBLE_ROWS))]
+        if self.preview_cache is not None:
+            self.preview_cache.report_preview(selected)
+        self.store.versions.history(selected.record.sample_code)
+
+    def export(self):
+        """Exporta para CSV os laudos emitidos em EXPORT_WINDOW."""
+        path = os.path.join(self._export_dir, f"exportacao-{threading.get_ident()}.csv")
+        export_reports(self.store, path, since=time.time() - EXPORT_WINDOW)
+
+    def run(self, rate=10.0, duration=30.0, mix=None, workers=2, seed=0):
+        """
+        Reproduz as operações durante um período.
+
+        Com rate > 0, as operações chegam como um processo de Poisson com
+        essa taxa média e esperam na fila quando todas as threads estão
+        ocupadas. Com rate = 0, cada thread executa operações sem pausa
+        (vazão máxima).
+
+        Args:
+            rate (float, optional): Operações por segundo (0 = sem limite). Defaults to 10.
+            duration (float, optional): Duração, em segundos. Defaults to 30.
+            mix (dict, optional): Operação -> peso. Defaults to DEFAULT_MIX.
+            workers (int, optional): Threads que executam as operações. Defaults to 2.
+            seed (int, optional): Semente das chegadas e do sorteio das operações. Defaults to 0.
+
+        Returns:
+            LoadResult: Resultado do teste
+
+        Raises:
+            ValueError: Se o mix tiver operações desconhecidas ou nenhum peso positivo
+        """
+        mix = dict(DEFAULT_MIX if mix is None else mix)
+        unknown = set(mix) - set(OPERATIONS)
+        if unknown:
+            raise ValueError(f"Operações desconhecidas: {', '.join(sorted(unknown))}")
+        names = [name for name in OPERATIONS if mix.get(name, 0) > 0]
+        if not names:
+            raise ValueError("O mix não tem operações com peso positivo")
+        weights = [mix[name] for name in names]
+        stats = {name: OperationStats(name) for name in names}
+        rng = random.Random(seed)
+        pending = queue.Queue()
+        start = time.perf_counter()
+        deadline = start + duration
+
+        def execute(name, scheduled):
+            began = time.perf_counter()
+            error = None
+            try:
+                getattr(self, name)()
+            except Exception as e:  # o teste continua; o erro entra no relatório
+                error = f"{type(e).__name__}: {e}"
+            finished = time.perf_counter()
+            with self._lock:
+                operation = stats[name]
+                operation.latencies.append(finished - scheduled)
+                operation.service_times.append(finished - began)
+                if error:
+                    operation.errors += 1
+                    operation.first_error = operation.first_error or error
+
+        def work(worker_seed):
+            local = random.Random(worker_seed)
+            try:
+                if rate > 0:
+                    for name, scheduled in iter(pending.get, None):
+                        execute(name, scheduled)
+                else:
+                    while time.perf_counter() < deadline:
+                        execute(local.choices(names, weights)[0], time.perf_counter())
+            finally:
+                self.store.close()
+
+        self._export_dir = tempfile.mkdtemp(prefix="patologia-carga-")
+        threads = [threading.Thread(target=work, args=(seed + 1 + i,), daemon=True) for i in range(workers)]
+        try:
+            for thread in threads:
+                thread.start()
+            if rate > 0:
+                scheduled = start
+                while True:
+                    scheduled += rng.expovariate(rate)
+                    if scheduled >= deadline:
+                        break
+                    delay = scheduled - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    pending.put((rng.choices(names, weights)[0], scheduled))
+                for _ in threads:
+                    pending.put(None)
+            for thread in threads:
+                thread.join()
+        finally:
+            shutil.rmtree(self._export_dir, ignore_errors=True)
+        return LoadResult(rate, time.perf_counter() - start, workers, stats)
+
+
+def _parse_mix(text):
+    """Converte "save=50,search=30" no dicionário de pesos."""
+    mix = {}
+    for part in filter(None, (item.strip() for item in text.split(","))):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+def main(argv=None):
+    """Ponto de entrada da linha de comando."""
+    parser = argparse.ArgumentParser(description="Teste de carga do armazenamento de laudos com casos sintéticos.")
+    parser.add_argument("--populate", type=int, default=0, help="Laudos gravados antes do teste")
+    parser.add_argument("--rate", type=float, default=10.0, help="Operações por segundo (0 = sem limite)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Duração do teste, em segundos")
+    parser.add_argument("--workers", type=int, default=2, help="Threads que executam as operações")
+    parser.add_argument("--mix", default="", help="Pesos das operações (ex.: save=50,search=30,history=15,export=5)")
+    parser.add_argument("--slides", type=int, default=4, help="Lâminas sintéticas (0 = sem imagens)")
+    parser.add_argument("--seed", type=int, default=0, help="Semente dos dados e das chegadas")
+    args = parser.parse_args(argv)
+    if not os.environ.get("PATOLOGIA_DATA_DIR"):
+        parser.error("defina PATOLOGIA_DATA_DIR com um diretório de teste: "
+                     "o teste grava laudos fictícios no banco de laudos")
+
+    # As miniaturas e prévias usam QPainter, que exige um QGuiApplication (mantido até o fim)
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtGui import QGuiApplication
+    from .config import PREVIEW_CACHE_DIR, PREVIEW_CACHE_MAX_MB
+    from .previews import PreviewCache
+    from .report_store import ReportStore
+    from .synthetic import write_slide_tiles
+
+    app = QGuiApplication.instance() or QGuiApplication([])
+    slides = write_slide_tiles(args.slides, seed=args.seed) if args.slides else ()
+    store = ReportStore()
+    # Continua a numeração das amostras de um banco já povoado por execuções anteriores
+    generator = CaseGenerator(args.seed, slide_images=slides, first_sequence=store.count() + 1)
+    harness = LoadHarness(store, generator,
+                          PreviewCache(PREVIEW_CACHE_DIR, int(PREVIEW_CACHE_MAX_MB * 1024 * 1024)))
+    if args.populate:
+        seconds = harness.populate(args.populate, lambda done, total: print(
+            f"\rgravando laudos: {done}/{total}", end="", flush=True))
+        print(f"\n{args.populate} laudos gravados em {seconds:.1f} s "
+              f"({args.populate / seconds:.0f} laudos/s)")
+    result = harness.run(args.rate, args.duration, _parse_mix(args.mix) or None, args.workers, args.seed)
+    print(result.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Módulo de medição macroscópica.
+
+Este módulo contém a medição automática da peça a partir da foto da
+bancada de macroscopia e a leitura do peso exportado pela balança.
+
+A foto deve incluir a referência de escala: um quadrado preto de lado
+conhecido (SCALE_REFERENCE_MM). O fundo é estimado pela cor da borda
+da foto; a peça é a região que se afasta dessa cor e não pertence à
+referência. As dimensões são os extremos da peça nos seus eixos
+principais (PCA das coordenadas dos pixels), e a escala vem da área
+da referência. Todas as operações são vetorizadas com NumPy.
+
+A balança exporta um CSV (separado por ";" ou ","), uma pesagem por
+linha: data/hora, código da amostra, peso e unidade (opcional, "g"
+por padrão). Vale a pesagem mais recente da amostra.
+
+Classes:
+    GrossMeasurement: Medidas da peça.
+
+Funções:
+    segment_specimen: Separa a peça e a referência de escala na foto.
+    measure_specimen: Mede a peça em uma foto já carregada.
+    measure_photo: Lê e mede a foto da macroscopia.
+    read_weight: Peso mais recente da amostra no arquivo da balança.
+"""
+
+import csv
+import io
+import os
+
+import numpy as np
+
+from .config import SCALE_REFERENCE_MM, SCALE_EXPORT_PATH
+from .imaging import load_rgb, otsu_threshold
+
+# Brilho máximo dos pixels da referência de escala (quadrado preto)
+REFERENCE_LEVEL = 60
+
+# Diferença mínima de cor entre a peça e o fundo
+MIN_CONTRAST = 40.0
+
+# Pixels mínimos da referência e da peça para a medição ser confiável
+MIN_PIXELS = 50
+
+# Fator de conversão das unidades aceitas no arquivo da balança para gramas
+_WEIGHT_UNITS = {"g": 1.0, "mg": 0.001, "kg": 1000.0}
+
+_READ_BLOCK = 64 * 1024
+
+
+class GrossMeasurement:
+    """
+    Medidas da peça.
+
+    Attributes:
+        length_mm (float): Maior dimensão
+        width_mm (float): Dimensão perpendicular à maior
+        area_mm2 (float): Área na foto
+        mm_per_pixel (float): Escala da foto
+    """
+
+    __slots__ = ("length_mm", "width_mm", "area_mm2", "mm_per_pixel")
+
+    def __init__(self, length_mm, width_mm, area_mm2, mm_per_pixel):
+        self.length_mm = length_mm
+        self.width_mm = width_mm
+        self.area_mm2 = area_mm2
+        self.mm_per_pixel = mm_per_pixel
+
+    def __repr__(self):
+        return f"GrossMeasurement({self.label()!r})"
+
+    def label(self):
+        """Texto das medidas para o laudo (ex.: "2.5 x 1.8 cm (área 3.6 cm²)")."""
+        return (f"{self.length_mm / 10:.1f} x {self.width_mm / 10:.1f} cm "
+                f"(área {self.area_mm2 / 100:.1f} cm²)")
+
+
+def _dilate(mask):
+    """Dilatação com vizinhança em cruz (3x3)."""
+    result = mask.copy()
+    result[1:] |= mask[:-1]
+    result[:-1] |= mask[1:]
+    result[:, 1:] |= mask[:, :-1]
+    result[:, :-1] |= mask[:, 1:]
+    return result
+
+
+def _erode(mask):
+    """Erosão com vizinhança em cruz (3x3)."""
+    return ~_dilate(~mask)
+
+
+def _open(mask, iterations=2):
+    """Abertura morfológica: remove ruído e estruturas finas."""
+    for _ in range(iterations):
+        mask = _erode(mask)
+    for _ in range(iterations):
+        mask = _dilate(mask)
+    return mask
+
+
+def segment_specimen(rgb):
+    """
+    Separa a peça e a referência de escala na foto.
+
+    Args:
+        rgb (numpy.ndarray): Foto RGB
+
+    Returns:
+        tuple: (máscara da peça, máscara da referência), booleanas (altura, largura)
+    """
+    height, width = rgb.shape[:2]
+    border = max(1, min(height, width) // 20)
+    frame = np.concatenate([rgb[:border].reshape(-1, 3), rgb[-border:].reshape(-1, 3),
+                            rgb[:, :border].reshape(-1, 3), rgb[:, -border:].reshape(-1, 3)])
+    background = np.median(frame, axis=0).astype(np.float32)
+
+    reference = _open(rgb.max(axis=2) < REFERENCE_LEVEL)
+    distance = np.linalg.norm(rgb.astype(np.float32) - background, axis=2)
+    threshold = max(otsu_threshold(distance), MIN_CONTRAST)
+    # A borda da referência (transição para o fundo) não faz parte da peça
+    excluded = _dilate(_dilate(reference))
+    specimen = _open((distance > threshold) & ~excluded)
+    return specimen, reference
+
+
+def measure_specimen(rgb, reference_mm=SCALE_REFERENCE_MM):
+    """
+    Mede a peça em uma foto já carregada.
+
+    Args:
+        rgb (numpy.ndarray): Foto RGB
+        reference_mm (float, optional): Lado da referência de escala. Defaults to SCALE_REFERENCE_MM.
+
+    Returns:
+        GrossMeasurement: Medidas da peça
+
+    Raises:
+        ValueError: Se a referência de escala ou a peça não forem encontradas
+    """
+    specimen, reference = segment_specimen(rgb)
+    reference_pixels = int(reference.sum())
+    if reference_pixels < MIN_PIXELS:
+        raise ValueError("Referência de escala não encontrada na foto.")
+    ys, xs = np.nonzero(specimen)
+    if len(ys) < MIN_PIXELS:
+        raise ValueError("Peça não encontrada na foto.")
+
+    mm_per_pixel = reference_mm / np.sqrt(reference_pixels)
+    coords = np.stack([xs, ys], axis=1).astype(np.float32)
+    coords -= coords.mean(axis=0)
+    _, axes = np.linalg.eigh(np.cov(coords, rowvar=False))
+    projected = coords @ axes[:, ::-1]  # maior eixo primeiro
+    # A abertura já removeu o ruído isolado; +1: a extensão inclui o último pixel
+    length, width = (projected.max(axis=0) - projected.min(axis=0) + 1) * mm_per_pixel
+    return GrossMeasurement(float(length), float(width), float(len(ys) * mm_per_pixel ** 2),
+                            float(mm_per_pixel))
+
+
+def measure_photo(path, reference_mm=SCALE_REFERENCE_MM, max_size=1024):
+    """
+    Lê e mede a foto da macroscopia.
+
+    Args:
+        path (str): Arquivo da foto
+        reference_mm (float, optional): Lado da referência de escala. Defaults to SCALE_REFERENCE_MM.
+        max_size (int, optional): Maior dimensão da foto após a redução. Defaults to 1024.
+
+    Returns:
+        GrossMeasurement: Medidas da peça
+
+    Raises:
+        ValueError: Se a foto não puder ser lida ou medida
+    """
+    return measure_specimen(load_rgb(path, max_size), reference_mm)
+
+
+def _reversed_lines(f):
+    """Percorre as linhas de um arquivo binário da última para a primeira."""
+    f.seek(0, os.SEEK_END)
+    position = f.tell()
+    remainder = b""
+    while position > 0:
+        size = min(_READ_BLOCK, position)
+        position -= size
+        f.seek(position)
+        lines = (f.read(size) + remainder).split(b"\n")
+        remainder = lines.pop(0)
+        for line in reversed(lines):
+            yield line
+    yield remainder
+
+
+def read_weight(sample_code, path=SCALE_EXPORT_PATH):
+    """
+    Retorna o peso mais recente da amostra no arquivo exportado pela balança.
+
+    O arquivo é lido a partir do fim, de modo que pesagens recentes
+    são encontradas sem percorrer o histórico inteiro.
+
+    Args:
+        sample_code (str): Código da amostra
+        path (str, optional): Arquivo da balança. Defaults to SCALE_EXPORT_PATH.
+
+    Returns:
+        float | None: Peso em gramas, ou None se não houver pesagem da amostra
+    """
+    if not sample_code:
+        return None
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return None
+    with f:
+        encoded = sample_code.encode("utf-8")
+        for line in _reversed_lines(f):
+            if encoded not in line:
+                continue
+            text = line.decode("utf-8", errors="replace").strip()
+            delimiter = ";" if ";" in text else ","
+            fields = [field.strip() for field in next(csv.reader(io.StringIO(text), delimiter=delimiter))]
+            if len(fields) < 3 or fields[1] != sample_code:
+                continue
+            unit = fields[3].lower() if len(fields) > 3 and fields[3] else "g"
+            try:
+                return float(fields[2].replace(",", ".")) * _WEIGHT_UNITS[unit]
+            except (ValueError, KeyError):
+                continue
+    return None
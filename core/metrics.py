@@ -0,0 +1,450 @@
+"""
+Módulo de métricas de desempenho.
+
+Este módulo contém um registro de métricas com contadores, medidores
+(gauges) e histogramas de faixas fixas, além de um exportador
+periódico para arquivo no formato texto do Prometheus ou JSON Lines.
+
+A gravação é feita em células por thread: cada thread escreve apenas
+na sua própria célula, sem bloqueio, e as células são somadas somente
+no momento da exportação. Assim os workers de análise podem registrar
+métricas dentro de laços internos com custo mínimo.
+
+Classes:
+    Counter: Contador monotônico.
+    Gauge: Medidor de valor instantâneo.
+    Histogram: Histograma com faixas fixas.
+    MetricsRegistry: Registro que agrupa e exporta as métricas.
+    MetricsExporter: Thread que exporta o registro periodicamente.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Faixas padrão (em segundos) para histogramas de latência
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class _Metric:
+    """
+    Base das métricas com células de gravação por thread.
+
+    Attributes:
+        name (str): Nome da métrica
+        help_text (str): Descrição exibida na exportação
+        labels (tuple): Pares (rótulo, valor) que identificam a série
+    """
+
+    kind = ""
+
+    def __init__(self, name, help_text="", labels=()):
+        """
+        Inicializa a métrica.
+
+        Args:
+            name (str): Nome da métrica
+            help_text (str, optional): Descrição da métrica. Defaults to "".
+            labels (tuple, optional): Pares (rótulo, valor). Defaults to ().
+        """
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._cells = []
+        self._cells_lock = threading.Lock()
+        self._local = threading.local()
+
+    def _new_cell(self):
+        """Cria uma célula vazia para uma nova thread."""
+        raise NotImplementedError
+
+    def _cell(self):
+        """
+        Retorna a célula da thread atual, criando-a no primeiro uso.
+
+        O bloqueio só é adquirido uma vez por thread; as gravações
+        seguintes acessam a célula diretamente.
+        """
+        try:
+            return self._local.cell
+        except AttributeError:
+            cell = self._new_cell()
+            with self._cells_lock:
+                self._cells.append(cell)
+            self._local.cell = cell
+            return cell
+
+    def _all_cells(self):
+        """Retorna uma cópia da lista de células de todas as threads."""
+        with self._cells_lock:
+            return list(self._cells)
+
+
+class Counter(_Metric):
+    """Contador monotônico (ex.: amostras analisadas)."""
+
+    kind = "counter"
+
+    def _new_cell(self):
+        return [0.0]
+
+    def inc(self, amount=1.0):
+        """
+        Incrementa o contador.
+
+        Args:
+            amount (float, optional): Valor a somar. Defaults to 1.0.
+        """
+        self._cell()[0] += amount
+
+    def value(self):
+        """Retorna o valor total somando as células de todas as threads."""
+        return sum(cell[0] for cell in self._all_cells())
+
+
+class Gauge(_Metric):
+    """
+    Medidor de valor instantâneo (ex.: amostras na fila).
+
+    Ao contrário do contador, o valor pode ser redefinido por set(),
+    que precisa ser atômico em relação a inc()/dec(): todas as
+    operações usam um único valor protegido pela trava da métrica, em
+    vez das células por thread.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name, help_text="", labels=()):
+        super().__init__(name, help_text, labels)
+        self._value = 0.0
+
+    def set(self, value):
+        """
+        Define o valor do medidor.
+
+        Args:
+            value (float): Novo valor
+        """
+        with self._cells_lock:
+            self._value = float(value)
+
+    def inc(self, amount=1.0):
+        """Incrementa o medidor."""
+        with self._cells_lock:
+            self._value += amount
+
+    def dec(self, amount=1.0):
+        """Decrementa o medidor."""
+        with self._cells_lock:
+            self._value -= amount
+
+    def value(self):
+        """Retorna o valor atual do medidor."""
+        with self._cells_lock:
+            return self._value
+
+
+class _HistogramCell:
+    """Célula de gravação de um histograma para uma única thread."""
+
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self, size):
+        self.counts = [0] * size
+        self.total = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric):
+    """
+    Histograma com faixas fixas definidas na criação.
+
+    Attributes:
+        buckets (tuple): Limites superiores das faixas, em ordem crescente
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text="", labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_cell(self):
+        # Uma posição extra para a faixa +Inf
+        return _HistogramCell(len(self.buckets) + 1)
+
+    def observe(self, value):
+        """
+        Registra uma observação.
+
+        Args:
+            value (float): Valor observado (em segundos, para latências)
+        """
+        cell = self._cell()
+        cell.counts[bisect_left(self.buckets, value)] += 1
+        cell.total += value
+        cell.count += 1
+
+    @contextmanager
+    def time(self):
+        """
+        Mede a duração do bloco e registra como uma observação.
+
+        Exemplo:
+            with histogram.time():
+                processar_amostra()
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def snapshot(self):
+        """
+        Consolida as células de todas as threads.
+
+        Returns:
+            tuple: (contagens por faixa, soma, total de observações)
+        """
+        counts = [0] * (len(self.buckets) + 1)
+        total = 0.0
+        count = 0
+        for cell in self._all_cells():
+            for i, c in enumerate(cell.counts):
+                counts[i] += c
+            total += cell.total
+            count += cell.count
+        return counts, total, count
+
+
+class MetricsRegistry:
+    """
+    Registro de métricas da aplicação.
+
+    As métricas são identificadas pelo nome e pelos rótulos; chamar
+    counter()/gauge()/histogram() novamente com os mesmos argumentos
+    retorna a mesma instância. Em laços internos, guarde a referência
+    retornada em vez de consultar o registro a cada gravação.
+    """
+
+    def __init__(self):
+        """Inicializa um registro vazio."""
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help_text, labels, **kwargs):
+        """Retorna a métrica existente ou cria uma nova."""
+        key = (name, tuple(sorted(labels.items())))
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(key)
+                if metric is None:
+                    metric = cls(name, help_text, key[1], **kwargs)
+                    self._metrics[key] = metric
+        if not isinstance(metric, cls):
+            raise ValueError(f"Métrica '{name}' já registrada como {metric.kind}")
+        return metric
+
+    def counter(self, name, help_text="", **labels):
+        """Retorna o contador com o nome e rótulos informados."""
+        return self._get(Counter, name, help_text, labels)
+
+    def gauge(self, name, help_text="", **labels):
+        """Retorna o medidor com o nome e rótulos informados."""
+        return self._get(Gauge, name, help_text, labels)
+
+    def histogram(self, name, help_text="", buckets=DEFAULT_BUCKETS, **labels):
+        """Retorna o histograma com o nome e rótulos informados."""
+        return self._get(Histogram, name, help_text, labels, buckets=buckets)
+
+    def metrics(self):
+        """Retorna as métricas registradas, ordenadas por nome e rótulos."""
+        with self._lock:
+            return [self._metrics[key] for key in sorted(self._metrics)]
+
+    def to_prometheus(self):
+        """
+        Gera o conteúdo no formato texto de exposição do Prometheus.
+
+        Returns:
+            str: Texto pronto para ser lido por um agente de coleta
+        """
+        lines = []
+        seen = set()
+        for metric in self.metrics():
+            if metric.name not in seen:
+                seen.add(metric.name)
+                if metric.help_text:
+                    lines.append(f"# HELP {metric.name} {metric.help_text}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+
+            if isinstance(metric, Histogram):
+                counts, total, count = metric.snapshot()
+                cumulative = 0
+                for bound, c in zip(metric.buckets + (math.inf,), counts):
+                    cumulative += c
+                    le = "+Inf" if bound == math.inf else _format_value(bound)
+                    labels = _format_labels(metric.labels + (("le", le),))
+                    lines.append(f"{metric.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(metric.labels)
+                lines.append(f"{metric.name}_sum{labels} {_format_value(total)}")
+                lines.append(f"{metric.name}_count{labels} {count}")
+            else:
+                labels = _format_labels(metric.labels)
+                lines.append(f"{metric.name}{labels} {_format_value(metric.value())}")
+        return "\n".join(lines) + "\n"
+
+    def to_json(self, timestamp=None):
+        """
+        Gera um instantâneo do registro como dicionário serializável.
+
+        Args:
+            timestamp (float, optional): Momento do instantâneo. Defaults to time.time().
+
+        Returns:
+            dict: Instantâneo com todas as métricas
+        """
+        entries = []
+        for metric in self.metrics():
+            entry = {"name": metric.name, "type": metric.kind, "labels": dict(metric.labels)}
+            if isinstance(metric, Histogram):
+                counts, total, count = metric.snapshot()
+                entry["buckets"] = dict(zip([_format_value(b) for b in metric.buckets] + ["+Inf"], counts))
+                entry["sum"] = total
+                entry["count"] = count
+            else:
+                entry["value"] = metric.value()
+            entries.append(entry)
+        return {"timestamp": time.time() if timestamp is None else timestamp, "metrics": entries}
+
+    def export(self, path):
+        """
+        Exporta o registro para arquivo, escolhendo o formato pela extensão.
+
+        Arquivos .jsonl recebem uma linha por exportação; os demais são
+        reescritos de forma atômica no formato do Prometheus, para que
+        o agente de coleta nunca leia um arquivo incompleto.
+
+        Args:
+            path (str): Caminho do arquivo de destino
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if path.endswith(".jsonl"):
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(self.to_json(), ensure_ascii=False) + "\n")
+        else:
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(self.to_prometheus())
+            os.replace(tmp_path, path)
+
+
+class MetricsExporter(threading.Thread):
+    """
+    Thread em segundo plano que exporta o registro periodicamente.
+
+    Attributes:
+        registry (MetricsRegistry): Registro exportado
+        path (str): Arquivo de destino
+        interval (float): Intervalo entre exportações, em segundos
+    """
+
+    def __init__(self, registry, path, interval=15.0):
+        """
+        Inicializa o exportador.
+
+        Args:
+            registry (MetricsRegistry): Registro a exportar
+            path (str): Arquivo de destino (.prom ou .jsonl)
+            interval (float, optional): Intervalo em segundos. Defaults to 15.0.
+        """
+        super().__init__(name="metrics-exporter", daemon=True)
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        """Exporta o registro a cada intervalo até que stop() seja chamado."""
+        while not self._stop_event.wait(self.interval):
+            self._export()
+
+    def stop(self):
+        """Interrompe a thread e faz uma última exportação."""
+        self._stop_event.set()
+        self._export()
+
+    def _export(self):
+        """Exporta o registro ignorando falhas de escrita (ex.: disco cheio)."""
+        try:
+            self.registry.export(self.path)
+        except OSError:
+            pass
+
+
+def _format_value(value):
+    """Formata um número no estilo do Prometheus."""
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labels):
+    """Formata os pares (rótulo, valor) como {a="1",b="2"}."""
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+# Registro global utilizado pela aplicação
+REGISTRY = MetricsRegistry()
+
+# Métricas principais do fluxo de trabalho
+SCREEN_TRANSITION_SECONDS = "patologia_screen_transition_seconds"
+ANALYSIS_STAGE_SECONDS = "patologia_analysis_stage_seconds"
+REPORT_SAVE_SECONDS = "patologia_report_save_seconds"
+SAMPLE_QUEUE_WAIT_SECONDS = "patologia_sample_queue_wait_seconds"
+SAMPLES_ANALYZED_TOTAL = "patologia_samples_analyzed_total"
+BACKUP_SECONDS = "patologia_backup_seconds"
+BACKUP_BYTES_WRITTEN_TOTAL = "patologia_backup_bytes_written_total"
+BACKUP_FAILURES_TOTAL = "patologia_backup_failures_total"
+AUDIT_COMMIT_SECONDS = "patologia_audit_commit_seconds"
+ANALYSIS_CACHE_HITS_TOTAL = "patologia_analysis_cache_hits_total"
+ANALYSIS_CACHE_MISSES_TOTAL = "patologia_analysis_cache_misses_total"
+PLUGIN_IMPORT_SECONDS = "patologia_plugin_import_seconds"
+PLUGIN_INIT_SECONDS = "patologia_plugin_init_seconds"
+ANNOTATION_QUERY_SECONDS = "patologia_annotation_query_seconds"
+TERMINOLOGY_SEARCH_SECONDS = "patologia_terminology_search_seconds"
+ARCHIVE_READ_SECONDS = "patologia_archive_read_seconds"
+VERSION_RECONSTRUCT_SECONDS = "patologia_version_reconstruct_seconds"
+SIGNING_BATCH_SECONDS = "patologia_signing_batch_seconds"
+AUDIT_WRITE_FAILURES_TOTAL = "patologia_audit_write_failures_total"
+
+
+def start_exporter(path, interval=15.0, registry=REGISTRY):
+    """
+    Cria e inicia o exportador periódico de métricas.
+
+    Args:
+        path (str): Arquivo de destino (.prom ou .jsonl)
+        interval (float, optional): Intervalo em segundos. Defaults to 15.0.
+        registry (MetricsRegistry, optional): Registro exportado. Defaults to REGISTRY.
+
+    Returns:
+        MetricsExporter: Thread do exportador já iniciada
+    """
+    exporter = MetricsExporter(registry, path, interval)
+    exporter.start()
+    return exporter
@@ -0,0 +1,373 @@
+"""
+Módulo do motor de pipeline de análise.
+
+Este módulo contém um motor de grafo acíclico (DAG) de etapas. Cada
+etapa declara as entradas que consome e as saídas que produz; o motor
+deduz a ordem de execução, executa em paralelo as etapas independentes
+e, com um AnalysisCache, reaproveita o resultado das etapas cujas
+entradas e parâmetros não mudaram.
+
+Cada valor (entrada ou saída) é identificado por um hash: o das
+entradas externas é calculado pelo conteúdo, e o das saídas vem do
+cache. Assim, uma etapa só é recalculada quando o hash de alguma das
+suas entradas muda.
+
+Classes:
+    Stage: Etapa do pipeline.
+    StageRun: Execução de uma etapa (tempo e origem do resultado).
+    PipelineResult: Resultado da execução do pipeline.
+    PipelineError: Erro de definição ou de execução do pipeline.
+    Pipeline: Grafo de etapas.
+
+Funções:
+    value_digest: Hash do conteúdo de um valor.
+"""
+
+import hashlib
+import pickle
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+
+# Hash usado para entradas ausentes (None)
+_NONE_DIGEST = "none"
+
+
+def value_digest(value):
+    """
+    Calcula o hash do conteúdo de um valor.
+
+    Args:
+        value: Texto, bytes, matriz NumPy ou objeto serializável com pickle
+
+    Returns:
+        str: SHA-256 hexadecimal (ou "none" para None)
+    """
+    if value is None:
+        return _NONE_DIGEST
+    digest = hashlib.sha256()
+    if isinstance(value, str):
+        digest.update(b"s" + value.encode("utf-8"))
+    elif isinstance(value, (bytes, bytearray)):
+        digest.update(b"b" + bytes(value))
+    elif isinstance(value, np.ndarray):
+        digest.update(f"a{value.dtype.str}{value.shape}".encode("ascii"))
+        digest.update(np.ascontiguousarray(value).data)
+    else:
+        digest.update(b"p" + pickle.dumps(value, protocol=4))
+    return digest.hexdigest()
+
+
+class PipelineError(Exception):
+    """Erro de definição (ex.: ciclo) ou de execução de uma etapa do pipeline."""
+
+
+class Stage:
+    """
+    Etapa do pipeline.
+
+    A função da etapa recebe as entradas e os parâmetros como
+    argumentos nomeados. Com uma única saída, o valor retornado é a
+    saída; com várias, a função retorna um dicionário saída -> valor.
+
+    Attributes:
+        name (str): Identificador da etapa (usado nas métricas e no cache)
+        func (callable): Função da etapa
+        inputs (tuple[str]): Valores consumidos
+        outputs (tuple[str]): Valores produzidos
+        optional (frozenset[str]): Entradas que podem estar ausentes (None)
+        version (str | int): Versão da implementação; alterá-la invalida o cache
+        params (dict): Parâmetros fixos da etapa (parte da chave do cache)
+        label (str): Mensagem exibida durante a execução
+        cacheable (bool): Se o resultado pode ser guardado no cache
+    """
+
+    __slots__ = ("name", "func", "inputs", "outputs", "optional", "version", "params",
+                 "label", "cacheable")
+
+    def __init__(self, name, func, inputs=(), outputs=None, optional=(), version=1,
+                 params=None, label="", cacheable=True):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs) if outputs else (name,)
+        self.optional = frozenset(optional)
+        self.version = version
+        self.params = dict(params or {})
+        self.label = label or name
+        self.cacheable = cacheable
+
+    def __repr__(self):
+        return f"Stage({self.name!r}, {self.inputs} -> {self.outputs})"
+
+    def call(self, values):
+        """
+        Executa a função da etapa.
+
+        Args:
+            values (dict): Valores das entradas
+
+        Returns:
+            dict: Saída -> valor
+
+        Raises:
+            PipelineError: Se a função não retornar todas as saídas declaradas
+        """
+        result = self.func(**{name: values[name] for name in self.inputs}, **self.params)
+        if len(self.outputs) == 1:
+            return {self.outputs[0]: result}
+        missing = set(self.outputs) - set(result or ())
+        if missing:
+            raise PipelineError(f"A etapa {self.name} não produziu: {', '.join(sorted(missing))}")
+        return {name: result[name] for name in self.outputs}
+
+
+class StageRun:
+    """
+    Execução de uma etapa.
+
+    Attributes:
+        stage (Stage): Etapa executada
+        seconds (float): Duração (leitura do cache ou cálculo)
+        cached (bool): Se o resultado veio do cache
+        skipped (bool): Se a etapa foi pulada por falta de entradas obrigatórias
+    """
+
+    __slots__ = ("stage", "seconds", "cached", "skipped")
+
+    def __init__(self, stage, seconds, cached=False, skipped=False):
+        self.stage = stage
+        self.seconds = seconds
+        self.cached = cached
+        self.skipped = skipped
+
+
+class PipelineResult:
+    """
+    Resultado da execução do pipeline.
+
+    Attributes:
+        values (dict): Entradas e saídas de todas as etapas
+        runs (dict): Nome da etapa -> StageRun, na ordem de conclusão
+        seconds (float): Duração total
+    """
+
+    __slots__ = ("values", "runs", "seconds")
+
+    def __init__(self, values, runs, seconds):
+        self.values = values
+        self.runs = runs
+        self.seconds = seconds
+
+    def get(self, name, default=None):
+        """Retorna um valor do resultado (ou default se ausente)."""
+        value = self.values.get(name)
+        return default if value is None else value
+
+
+class Pipeline:
+    """
+    Grafo acíclico de etapas de análise.
+    """
+
+    def __init__(self, stages=()):
+        """
+        Cria o pipeline.
+
+        Args:
+            stages (Iterable[Stage], optional): Etapas iniciais
+        """
+        self._stages = {}
+        self._producers = {}
+        for stage in stages:
+            self.add_stage(stage)
+
+    def __len__(self):
+        return len(self._stages)
+
+    def __contains__(self, name):
+        return name in self._stages
+
+    def add_stage(self, stage):
+        """
+        Inclui uma etapa.
+
+        Args:
+            stage (Stage): Etapa
+
+        Raises:
+            PipelineError: Se o nome da etapa ou uma das suas saídas já existir
+        """
+        if stage.name in self._stages:
+            raise PipelineError(f"Etapa duplicada: {stage.name}")
+        for output in stage.outputs:
+            if output in self._producers:
+                raise PipelineError(f"A saída {output} já é produzida pela etapa "
+                                    f"{self._producers[output].name}")
+        self._stages[stage.name] = stage
+        for output in stage.outputs:
+            self._producers[output] = stage
+
+    def stage(self, name, **options):
+        """
+        Decorador que inclui a função decorada como etapa.
+
+        Args:
+            name (str): Nome da etapa
+            **options: Demais argumentos de Stage (inputs, outputs, version, ...)
+        """
+        def decorator(func):
+            self.add_stage(Stage(name, func, **options))
+            return func
+        return decorator
+
+    def stages(self):
+        """
+        Retorna as etapas em uma ordem topológica.
+
+        Raises:
+            PipelineError: Se houver um ciclo entre as etapas
+        """
+        order = []
+        state = {}  # 1 = visitando, 2 = concluída
+
+        def visit(stage):
+            if state.get(stage.name) == 2:
+                return
+            if state.get(stage.name) == 1:
+                raise PipelineError(f"Ciclo no pipeline envolvendo a etapa {stage.name}")
+            state[stage.name] = 1
+            for name in stage.inputs:
+                producer = self._producers.get(name)
+                if producer:
+                    visit(producer)
+            state[stage.name] = 2
+            order.append(stage)
+
+        for stage in self._stages.values():
+            visit(stage)
+        return order
+
+    def run(self, sources, digests=None, cache=None, max_workers=4,
+            progress=None, cancelled=None, on_event=None, executor=None):
+        """
+        Executa o pipeline.
+
+        Uma etapa começa assim que todas as suas entradas estão
+        disponíveis; etapas independentes rodam em paralelo. Etapas com
+        uma entrada obrigatória ausente (None) são puladas, e as suas
+        saídas ficam ausentes.
+
+        Args:
+            sources (dict): Entradas externas (nome -> valor)
+            digests (dict, optional): Hashes conhecidos das entradas externas
+                (ex.: hash do arquivo de imagem); as demais são calculadas
+            cache (AnalysisCache, optional): Cache dos resultados
+            max_workers (int, optional): Etapas simultâneas. Defaults to 4.
+            progress (callable, optional): Recebe (etapas concluídas, total)
+            cancelled (callable, optional): Retorna True para interromper
+            on_event (callable, optional): Recebe (evento, Stage, StageRun | None),
+                com evento "started", "finished" ou "skipped" (chamado nas threads de execução)
+            executor (Executor, optional): Pool compartilhado entre execuções simultâneas;
+                sem ele, cada execução cria o seu com max_workers threads
+
+        Returns:
+            PipelineResult | None: Resultado, ou None se interrompido
+
+        Raises:
+            PipelineError: Se uma entrada não for fornecida nem produzida, ou se uma etapa falhar
+        """
+        stages = self.stages()
+        for stage in stages:
+            for name in stage.inputs:
+                if name not in sources and name not in self._producers:
+                    raise PipelineError(f"Entrada {name} da etapa {stage.name} não é fornecida "
+                                        f"nem produzida por outra etapa")
+
+        start = time.perf_counter()
+        values = dict(sources)
+        value_digests = {name: (digests or {}).get(name) or value_digest(value)
+                         for name, value in sources.items()}
+        runs = {}
+        waiting = {stage.name: {name for name in stage.inputs if name in self._producers}
+                   for stage in stages}
+        pending = {}
+
+        owned = executor is None
+        if owned:
+            executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pipeline")
+        try:
+            while waiting or pending:
+                if cancelled and cancelled():
+                    for future in pending:
+                        future.cancel()
+                    return None
+                for stage in stages:
+                    if stage.name in waiting and not waiting[stage.name]:
+                        del waiting[stage.name]
+                        inputs = {name: values[name] for name in stage.inputs}
+                        input_digests = [value_digests[name] for name in stage.inputs]
+                        pending[executor.submit(self._execute, stage, inputs, input_digests,
+                                                cache, on_event)] = stage
+                if not pending:
+                    raise PipelineError("Etapas sem entradas disponíveis: " + ", ".join(waiting))
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = pending.pop(future)
+                    try:
+                        outputs, output_digests, run = future.result()
+                    except PipelineError:
+                        raise
+                    except Exception as exc:
+                        for other in pending:
+                            other.cancel()
+                        raise PipelineError(f"Falha na etapa {stage.name}: {exc}") from exc
+                    values.update(outputs)
+                    value_digests.update(output_digests)
+                    runs[stage.name] = run
+                    for names in waiting.values():
+                        names.difference_update(stage.outputs)
+                    if progress:
+                        progress(len(runs), len(stages))
+        finally:
+            if owned:
+                executor.shutdown()
+
+        return PipelineResult(values, runs, time.perf_counter() - start)
+
+    @staticmethod
+    def _execute(stage, inputs, input_digests, cache, on_event):
+        """
+        Executa uma etapa (na thread do pool), consultando o cache.
+
+        Returns:
+            tuple: (saídas, hashes das saídas, StageRun)
+        """
+        start = time.perf_counter()
+        missing = [name for name in stage.inputs
+                   if inputs[name] is None and name not in stage.optional]
+        if missing:
+            run = StageRun(stage, 0.0, skipped=True)
+            if on_event:
+                on_event("skipped", stage, run)
+            return ({name: None for name in stage.outputs},
+                    {name: _NONE_DIGEST for name in stage.outputs}, run)
+
+        if on_event:
+            on_event("started", stage, None)
+        if cache is not None and stage.cacheable:
+            outputs, digest, cached = cache.run(stage.name, stage.version, stage.params,
+                                                input_digests, lambda: stage.call(inputs))
+        else:
+            outputs = stage.call(inputs)
+            digest = value_digest([stage.name, str(stage.version), repr(sorted(stage.params.items())),
+                                   input_digests])
+            cached = False
+        output_digests = {name: hashlib.sha256(f"{digest}:{name}".encode("utf-8")).hexdigest()
+                          for name in stage.outputs}
+        run = StageRun(stage, time.perf_counter() - start, cached=cached)
+        if on_event:
+            on_event("finished", stage, run)
+        return outputs, output_digests, run
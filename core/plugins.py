@@ -0,0 +1,262 @@
+"""
+Módulo de plugins de análise.
+
+Este módulo contém o registro dos plugins que acrescentam etapas ao
+pipeline de análise (modelos específicos por tipo de tecido) e
+modelos de texto do laudo. Cada plugin é descrito por um manifesto
+JSON no diretório de plugins, lido na abertura da aplicação:
+
+    {
+        "name": "mama",
+        "module": "mama_classifier",
+        "tissue_types": ["Mama"],
+        "material_types": ["TECIDO"],
+        "description": "Classificador de lesões mamárias"
+    }
+
+O módulo (arquivo "<module>.py" ou pacote "<module>/" no mesmo
+diretório) só é importado na primeira análise de uma amostra
+compatível, e permanece carregado até o fim da sessão. Listas vazias
+(ou ausentes) em tissue_types/material_types aceitam qualquer valor.
+
+O módulo do plugin define:
+    stages(): Lista de etapas (core.pipeline.Stage) incluídas no pipeline.
+        Uma etapa que produz "microscopy_text" funciona como modelo de
+        texto da microscopia do laudo.
+    setup() (opcional): Inicialização, chamada uma vez após a importação
+        (ex.: leitura dos pesos de um modelo).
+
+Classes:
+    PluginError: Erro de manifesto ou de carregamento de plugin.
+    PluginInfo: Metadados de um plugin (manifesto).
+    LoadedPlugin: Plugin importado, com os tempos de carregamento.
+    PluginRegistry: Registro dos plugins do diretório de plugins.
+"""
+
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+import unicodedata
+
+from .metrics import REGISTRY, PLUGIN_IMPORT_SECONDS, PLUGIN_INIT_SECONDS
+from .records import MaterialType
+
+# Pacote sob o qual os módulos dos plugins são registrados em sys.modules
+_PACKAGE = "patologia_plugins"
+
+
+def _normalize(text):
+    """Normaliza um texto para comparação (sem acentos, maiúsculas ou espaços extras)."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return " ".join("".join(c for c in decomposed if not unicodedata.combining(c)).casefold().split())
+
+
+class PluginError(Exception):
+    """Erro de manifesto, importação ou inicialização de um plugin."""
+
+
+class PluginInfo:
+    """
+    Metadados de um plugin, lidos do manifesto sem importar o módulo.
+
+    Attributes:
+        name (str): Nome do plugin
+        module (str): Nome do módulo no diretório de plugins
+        directory (str): Diretório do módulo
+        tissue_types (frozenset[str]): Tipos de tecido aceitos (normalizados)
+        material_types (frozenset[MaterialType]): Tipos de material aceitos
+        description (str): Descrição
+    """
+
+    __slots__ = ("name", "module", "directory", "tissue_types", "material_types", "description")
+
+    def __init__(self, name, module, directory, tissue_types=(), material_types=(), description=""):
+        self.name = name
+        self.module = module
+        self.directory = directory
+        self.tissue_types = frozenset(_normalize(t) for t in tissue_types)
+        self.material_types = frozenset(material_types)
+        self.description = description
+
+    @classmethod
+    def from_manifest(cls, path):
+        """
+        Lê um manifesto de plugin.
+
+        Args:
+            path (str): Arquivo JSON do manifesto
+
+        Returns:
+            PluginInfo: Metadados do plugin
+
+        Raises:
+            PluginError: Se o manifesto for inválido
+        """
+        try:
+            with open(path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            materials = [MaterialType[name.upper()] for name in manifest.get("material_types", ())]
+            return cls(manifest["name"], manifest["module"], os.path.dirname(path),
+                       manifest.get("tissue_types", ()), materials,
+                       manifest.get("description", ""))
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as exc:
+            raise PluginError(f"Manifesto inválido {os.path.basename(path)}: {exc}") from exc
+
+    def matches(self, record):
+        """
+        Indica se o plugin se aplica a uma amostra.
+
+        Args:
+            record (PatientRecord): Dados do paciente e amostra
+
+        Returns:
+            bool: True se o tipo de tecido e o tipo de material forem aceitos
+        """
+        if self.tissue_types and _normalize(record.tissue_type) not in self.tissue_types:
+            return False
+        if self.material_types and record.material_type not in self.material_types:
+            return False
+        return True
+
+
+class LoadedPlugin:
+    """
+    Plugin importado e inicializado.
+
+    Attributes:
+        info (PluginInfo): Metadados do plugin
+        module (module): Módulo importado
+        stages (list[Stage]): Etapas de análise do plugin
+        import_seconds (float): Tempo de importação do módulo
+        init_seconds (float): Tempo de inicialização (setup e stages)
+    """
+
+    __slots__ = ("info", "module", "stages", "import_seconds", "init_seconds")
+
+    def __init__(self, info, module, stages, import_seconds, init_seconds):
+        self.info = info
+        self.module = module
+        self.stages = stages
+        self.import_seconds = import_seconds
+        self.init_seconds = init_seconds
+
+
+class PluginRegistry:
+    """
+    Registro dos plugins do diretório de plugins.
+
+    Os manifestos são lidos na criação; os módulos, sob demanda.
+    Pode ser usado a partir de várias threads.
+
+    Attributes:
+        directory (str): Diretório de plugins
+        plugins (list[PluginInfo]): Plugins encontrados
+        errors (list[str]): Manifestos ignorados por erro
+    """
+
+    def __init__(self, directory):
+        """
+        Lê os manifestos do diretório de plugins.
+
+        Args:
+            directory (str): Diretório de plugins (pode não existir)
+        """
+        self.directory = directory
+        self.plugins = []
+        self.errors = []
+        self._loaded = {}
+        self._lock = threading.Lock()
+        self.discover()
+
+    def discover(self):
+        """Relê os manifestos do diretório (plugins já carregados continuam carregados)."""
+        plugins, errors = [], []
+        if os.path.isdir(self.directory):
+            for entry in sorted(os.scandir(self.directory), key=lambda e: e.name):
+                if entry.name.endswith(".json") and entry.is_file():
+                    try:
+                        plugins.append(PluginInfo.from_manifest(entry.path))
+                    except PluginError as exc:
+                        errors.append(str(exc))
+        self.plugins, self.errors = plugins, errors
+
+    def plugins_for(self, record):
+        """Retorna os plugins que se aplicam a uma amostra."""
+        return [info for info in self.plugins if info.matches(record)]
+
+    def load(self, info):
+        """
+        Retorna um plugin carregado, importando-o na primeira chamada.
+
+        Args:
+            info (PluginInfo): Plugin
+
+        Returns:
+            LoadedPlugin: Plugin carregado
+
+        Raises:
+            PluginError: Se o módulo não puder ser importado ou inicializado
+        """
+        with self._lock:
+            loaded = self._loaded.get(info.name)
+            if loaded is None:
+                loaded = self._loaded[info.name] = self._import(info)
+            return loaded
+
+    def _import(self, info):
+        """Importa e inicializa o módulo de um plugin, medindo os tempos."""
+        path = os.path.join(info.directory, info.module, "__init__.py")
+        locations = [os.path.dirname(path)]
+        if not os.path.exists(path):
+            path, locations = os.path.join(info.directory, f"{info.module}.py"), None
+        module_name = f"{_PACKAGE}.{info.module}"
+
+        start = time.perf_counter()
+        try:
+            spec = importlib.util.spec_from_file_location(module_name, path,
+                                                          submodule_search_locations=locations)
+            module = importlib.util.module_from_spec(spec)
+            sys.modules[module_name] = module
+            spec.loader.exec_module(module)
+        except Exception as exc:
+            sys.modules.pop(module_name, None)
+            raise PluginError(f"Falha ao importar o plugin {info.name}: {exc}") from exc
+        import_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        try:
+            if hasattr(module, "setup"):
+                module.setup()
+            stages = list(module.stages()) if hasattr(module, "stages") else []
+        except Exception as exc:
+            raise PluginError(f"Falha ao inicializar o plugin {info.name}: {exc}") from exc
+        init_seconds = time.perf_counter() - start
+
+        REGISTRY.histogram(PLUGIN_IMPORT_SECONDS, "Tempo de importação dos plugins",
+                           plugin=info.name).observe(import_seconds)
+        REGISTRY.histogram(PLUGIN_INIT_SECONDS, "Tempo de inicialização dos plugins",
+                           plugin=info.name).observe(init_seconds)
+        return LoadedPlugin(info, module, stages, import_seconds, init_seconds)
+
+    def stages_for(self, record):
+        """
+        Retorna as etapas dos plugins que se aplicam a uma amostra, carregando-os se necessário.
+
+        Args:
+            record (PatientRecord): Dados do paciente e amostra
+
+        Returns:
+            list[Stage]: Etapas adicionais do pipeline
+        """
+        stages = []
+        for info in self.plugins_for(record):
+            stages.extend(self.load(info).stages)
+        return stages
+
+    def loaded(self):
+        """Retorna os plugins já carregados, na ordem de carregamento."""
+        with self._lock:
+            return list(self._loaded.values())
@@ -0,0 +1,252 @@
+"""
+Módulo de miniaturas e prévias de laudos.
+
+Este módulo contém o cache em disco das imagens exibidas no histórico
+de laudos: miniaturas das lâminas e prévias da primeira página de cada
+laudo, rasterizadas. As imagens são gravadas em PNG no cache LRU em
+disco (DiskLRUCache), com limite de tamanho.
+
+A chave de cada imagem combina o código da amostra e a versão do
+conteúdo: para a miniatura, o nome da imagem da lâmina (o hash do seu
+conteúdo); para a prévia, o hash das seções e dos dados do laudo.
+Regravar um laudo muda a chave da sua prévia, e a versão antiga é
+descartada com o tempo pelo LRU.
+
+A geração (leitura da lâmina, desenho da página) é demorada e deve
+rodar fora da thread da interface; o desenho usa QPainter sobre
+QImage, permitido em qualquer thread.
+
+Classes:
+    PreviewCache: Cache de miniaturas de lâminas e prévias de laudos.
+
+Funções:
+    render_thumbnail: Gera a miniatura de uma lâmina.
+    render_report_preview: Desenha a primeira página de um laudo.
+    report_version: Hash do conteúdo de um laudo.
+"""
+
+import hashlib
+import json
+import time
+
+from PyQt5.QtCore import Qt, QBuffer, QByteArray, QIODevice, QRect
+from PyQt5.QtGui import QImage, QPainter, QColor, QFont
+
+from .disk_cache import DiskLRUCache
+from .images import image_path
+from .imaging import load_rgb
+
+# Maior dimensão das miniaturas das lâminas, em pixels
+THUMBNAIL_SIZE = 160
+
+# Largura das prévias dos laudos (a altura segue a proporção do A4)
+PREVIEW_WIDTH = 420
+
+# Versão do desenho das imagens; alterá-la invalida as imagens em cache
+RENDER_VERSION = 1
+
+_A4_RATIO = 297 / 210
+
+
+def report_version(report):
+    """
+    Calcula o hash do conteúdo de um laudo (dados, seções e patologista).
+
+    Args:
+        report (Report): Laudo
+
+    Returns:
+        str: SHA-256 hexadecimal
+    """
+    content = json.dumps([list(report.record.to_row()), report.macroscopy, report.microscopy,
+                          report.diagnosis, report.pathologist], default=str)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _to_png(image):
+    """Codifica um QImage em PNG."""
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.WriteOnly)
+    image.save(buffer, "PNG")
+    buffer.close()
+    return bytes(data)
+
+
+def render_thumbnail(slide_image, size=THUMBNAIL_SIZE):
+    """
+    Gera a miniatura de uma lâmina.
+
+    Args:
+        slide_image (str): Nome da imagem importada
+        size (int, optional): Maior dimensão. Defaults to THUMBNAIL_SIZE.
+
+    Returns:
+        QImage: Miniatura
+
+    Raises:
+        ValueError: Se a imagem não puder ser lida
+    """
+    rgb = load_rgb(image_path(slide_image), size)
+    height, width = rgb.shape[:2]
+    return QImage(rgb.tobytes(), width, height, width * 3, QImage.Format_RGB888).copy()
+
+
+def render_report_preview(report, width=PREVIEW_WIDTH):
+    """
+    Desenha a primeira página de um laudo, em escala reduzida.
+
+    Args:
+        report (Report): Laudo
+        width (int, optional): Largura da página em pixels. Defaults to PREVIEW_WIDTH.
+
+    Returns:
+        QImage: Página desenhada
+    """
+    height = int(width * _A4_RATIO)
+    margin = width // 16
+    image = QImage(width, height, QImage.Format_RGB32)
+    image.fill(Qt.white)
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.TextAntialiasing)
+
+    # Cabeçalho
+    header_height = width // 8
+    painter.fillRect(0, 0, width, header_height, QColor("#023e8a"))
+    painter.setPen(Qt.white)
+    painter.setFont(_font(width, 0.040, bold=True))
+    painter.drawText(QRect(margin, 0, width - 2 * margin, header_height), Qt.AlignVCenter | Qt.AlignLeft,
+                     "Laudo Anatomopatológico")
+    painter.setFont(_font(width, 0.026))
+    issued = time.strftime("%d/%m/%Y", time.localtime(report.updated_at))
+    painter.drawText(QRect(margin, 0, width - 2 * margin, header_height), Qt.AlignVCenter | Qt.AlignRight,
+                     issued)
+
+    # Identificação e seções, até o fim da página
+    record = report.record
+    y = header_height + margin // 2
+    body = _font(width, 0.024)
+    lines = [
+        ("Paciente", record.label("patient_name")),
+        ("Prontuário", record.label("record_number")),
+        ("Amostra", record.label("sample_code")),
+        ("Material", record.label("material_type")),
+        ("Tecido", record.label("tissue_type")),
+    ]
+    painter.setPen(QColor("#003566"))
+    painter.setFont(body)
+    line_height = painter.fontMetrics().lineSpacing()
+    for label, value in lines:
+        painter.drawText(QRect(margin, y, width - 2 * margin, line_height), Qt.AlignLeft,
+                         f"{label}: {value}")
+        y += line_height
+
+    for title, text in (("Macroscopia", report.macroscopy), ("Microscopia", report.microscopy),
+                        ("Conclusão Diagnóstica", report.diagnosis)):
+        y += line_height // 2
+        if y >= height - margin:
+            break
+        painter.setPen(QColor("#023e8a"))
+        painter.setFont(_font(width, 0.028, bold=True))
+        painter.drawText(QRect(margin, y, width - 2 * margin, line_height * 2), Qt.AlignLeft, title)
+        y += painter.fontMetrics().lineSpacing()
+        painter.setPen(Qt.black)
+        painter.setFont(body)
+        area = QRect(margin, y, width - 2 * margin, height - margin - y)
+        bounds = painter.boundingRect(area, Qt.AlignLeft | Qt.TextWordWrap, text or "—")
+        painter.drawText(area, Qt.AlignLeft | Qt.TextWordWrap, text or "—")
+        y += min(bounds.height(), area.height())
+    painter.end()
+    return image
+
+
+def _font(width, scale, bold=False):
+    """Fonte com tamanho proporcional à largura da página."""
+    font = QFont("Arial")
+    font.setPixelSize(max(6, int(width * scale)))
+    font.setBold(bold)
+    return font
+
+
+class PreviewCache:
+    """
+    Cache de miniaturas de lâminas e prévias de laudos, em disco.
+
+    Os métodos thumbnail e report_preview leem o cache ou geram a
+    imagem; são feitos para rodar em segundo plano (Worker) e aceitam
+    os argumentos progress e cancelled.
+
+    Attributes:
+        disk_cache (DiskLRUCache): Armazenamento das imagens (PNG)
+    """
+
+    def __init__(self, directory, max_bytes):
+        """
+        Abre o cache.
+
+        Args:
+            directory (str): Diretório do cache
+            max_bytes (int): Tamanho máximo, em bytes
+        """
+        self.disk_cache = DiskLRUCache(directory, max_bytes)
+
+    @staticmethod
+    def thumbnail_key(sample_code, slide_image):
+        """Chave da miniatura da lâmina de uma amostra."""
+        return f"miniatura:{sample_code}:{slide_image}:{THUMBNAIL_SIZE}:{RENDER_VERSION}"
+
+    @staticmethod
+    def preview_key(report):
+        """Chave da prévia de um laudo."""
+        return f"previa:{report.record.sample_code}:{report_version(report)}:{PREVIEW_WIDTH}:{RENDER_VERSION}"
+
+    def _get_or_render(self, key, render, cancelled):
+        """Lê uma imagem do cache ou a gera e grava; None se cancelado antes da geração."""
+        data = self.disk_cache.get(key)
+        if data is not None:
+            image = QImage.fromData(data, "PNG")
+            if not image.isNull():
+                return image
+        if cancelled and cancelled():
+            return None
+        image = render()
+        self.disk_cache.put(key, _to_png(image))
+        return image
+
+    def thumbnail(self, sample_code, slide_image, progress=None, cancelled=None):
+        """
+        Retorna a miniatura da lâmina de uma amostra, gerando-a se necessário.
+
+        Args:
+            sample_code (str): Código da amostra
+            slide_image (str): Nome da imagem da lâmina
+            progress (callable, optional): Não usado (compatível com Worker)
+            cancelled (callable, optional): Retorna True para não gerar a imagem
+
+        Returns:
+            QImage | None: Miniatura, ou None se cancelado
+
+        Raises:
+            ValueError: Se a imagem não puder ser lida
+        """
+        return self._get_or_render(self.thumbnail_key(sample_code, slide_image),
+                                   lambda: render_thumbnail(slide_image), cancelled)
+
+    def report_preview(self, report, progress=None, cancelled=None):
+        """
+        Retorna a prévia da primeira página de um laudo, gerando-a se necessário.
+
+        Args:
+            report (Report): Laudo
+            progress (callable, optional): Não usado (compatível com Worker)
+            cancelled (callable, optional): Retorna True para não gerar a imagem
+
+        Returns:
+            QImage | None: Prévia, ou None se cancelado
+        """
+        return self._get_or_render(self.preview_key(report), lambda: render_report_preview(report),
+                                   cancelled)
+
+    def stats(self):
+        """Retorna as estatísticas de uso do cache (ver DiskLRUCache.stats)."""
+        return self.disk_cache.stats()
@@ -0,0 +1,269 @@
+"""
+Módulo do modelo de registro de paciente e amostra.
+
+Este módulo contém a classe tipada que substitui o dicionário livre
+`patient_data`. Os campos categóricos (sexo, procedimento, material e
+meio de conservação) são armazenados como códigos inteiros pequenos e
+convertidos para texto apenas no momento da exibição.
+
+Classes:
+    Gender: Códigos de sexo.
+    ProcedureType: Códigos de tipo de procedimento.
+    MaterialType: Códigos de tipo de material.
+    PreservationMedium: Códigos de meio de conservação.
+    PatientRecord: Registro compacto de paciente e amostra.
+"""
+
+import sys
+from enum import IntEnum
+
+
+class _Categorical(IntEnum):
+    """Base dos códigos categóricos, com conversão entre código e rótulo."""
+
+    @property
+    def label(self):
+        """Rótulo de exibição do código."""
+        return _LABELS[type(self)][self]
+
+    @classmethod
+    def labels(cls):
+        """Retorna os rótulos na ordem dos códigos (para preencher comboboxes)."""
+        return _LABELS[cls]
+
+    @classmethod
+    def from_label(cls, label):
+        """
+        Converte um rótulo de exibição no código correspondente.
+
+        Args:
+            label (str): Rótulo exibido na interface
+
+        Returns:
+            _Categorical: Código correspondente
+
+        Raises:
+            ValueError: Se o rótulo não pertence à categoria
+        """
+        try:
+            return cls(_LABELS[cls].index(label))
+        except ValueError:
+            raise ValueError(f"Rótulo inválido para {cls.__name__}: {label!r}") from None
+
+
+class Gender(_Categorical):
+    MASCULINO = 0
+    FEMININO = 1
+    OUTRO = 2
+
+
+class ProcedureType(_Categorical):
+    BIOPSIA = 0
+    PUNCAO = 1
+    RESSECCAO_CIRURGICA = 2
+    OUTRO = 3
+
+
+class MaterialType(_Categorical):
+    TECIDO = 0
+    CITOLOGIA = 1
+    LIQUIDO = 2
+    OUTRO = 3
+
+
+class PreservationMedium(_Categorical):
+    FORMOL = 0
+    FRESCO = 1
+    FIXADOR_ESPECIAL = 2
+
+
+# Rótulos de exibição, na ordem dos códigos
+_LABELS = {
+    Gender: ("Masculino", "Feminino", "Outro"),
+    ProcedureType: ("Biópsia", "Punção", "Ressecção cirúrgica", "Outro"),
+    MaterialType: ("Tecido", "Citologia", "Líquido", "Outro"),
+    PreservationMedium: ("Formol", "Fresco", "Fixador especial"),
+}
+
+# Tipo de cada campo categórico do registro
+CATEGORICAL_FIELDS = {
+    "gender": Gender,
+    "procedure_type": ProcedureType,
+    "material_type": MaterialType,
+    "preservation_medium": PreservationMedium,
+}
+
+# Campos de texto com poucos valores distintos, internados para compartilhar memória
+INTERNED_FIELDS = ("collection_site", "procedure_other", "material_other", "tissue_type")
+
+# Campo de texto livre associado à opção "Outro" de cada categoria
+OTHER_FIELDS = {
+    "procedure_type": "procedure_other",
+    "material_type": "material_other",
+}
+
+
+class PatientRecord:
+    """
+    Registro compacto de paciente e amostra.
+
+    Usa __slots__ em vez de dicionário por instância, e o construtor
+    aceita apenas argumentos nomeados conhecidos: um nome de campo
+    digitado errado gera TypeError na criação do registro.
+
+    A ordem de __slots__ é a ordem das colunas no armazenamento
+    (ver to_row()/from_row()).
+    """
+
+    __slots__ = (
+        "patient_name",
+        "birth_date",
+        "gender",
+        "record_number",
+        "sample_code",
+        "clinical_suspicion",
+        "collection_site",
+        "procedure_type",
+        "procedure_other",
+        "clinical_history",
+        "material_type",
+        "material_other",
+        "sample_quantity",
+        "preservation_medium",
+        "collection_datetime",
+        "tissue_type",
+        "tissue_measurement",
+        "tissue_weight",
+        "slide_image",
+        "gross_image",
+    )
+
+    def __init__(self, *, patient_name, record_number, sample_code, tissue_type,
+                 birth_date="", gender=Gender.MASCULINO, clinical_suspicion="",
+                 collection_site="", procedure_type=ProcedureType.BIOPSIA,
+                 procedure_other="", clinical_history="",
+                 material_type=MaterialType.TECIDO, material_other="",
+                 sample_quantity="", preservation_medium=PreservationMedium.FORMOL,
+                 collection_datetime="", tissue_measurement="", tissue_weight="",
+                 slide_image="", gross_image=""):
+        """
+        Inicializa o registro.
+
+        Args:
+            patient_name (str): Nome completo do paciente
+            record_number (str): Número de prontuário
+            sample_code (str): Código da amostra
+            tissue_type (str): Tipo/nome do tecido
+            Demais campos opcionais conforme __slots__; os categóricos
+            aceitam o código (int ou enum) correspondente.
+        """
+        self.patient_name = patient_name
+        self.birth_date = birth_date
+        self.gender = Gender(gender)
+        self.record_number = record_number
+        self.sample_code = sample_code
+        self.clinical_suspicion = clinical_suspicion
+        self.collection_site = sys.intern(collection_site)
+        self.procedure_type = ProcedureType(procedure_type)
+        self.procedure_other = sys.intern(procedure_other)
+        self.clinical_history = clinical_history
+        self.material_type = MaterialType(material_type)
+        self.material_other = sys.intern(material_other)
+        self.sample_quantity = sample_quantity
+        self.preservation_medium = PreservationMedium(preservation_medium)
+        self.collection_datetime = collection_datetime
+        self.tissue_type = sys.intern(tissue_type)
+        self.tissue_measurement = tissue_measurement
+        self.tissue_weight = tissue_weight
+        self.slide_image = slide_image
+        self.gross_image = gross_image
+
+    def __repr__(self):
+        return f"PatientRecord(sample_code={self.sample_code!r}, record_number={self.record_number!r})"
+
+    def __eq__(self, other):
+        if not isinstance(other, PatientRecord):
+            return NotImplemented
+        return self.to_row() == other.to_row()
+
+    def label(self, field, default="N/A"):
+        """
+        Retorna o valor de um campo pronto para exibição.
+
+        Campos categóricos são convertidos para o rótulo; a opção
+        "Outro" exibe o texto especificado pelo usuário.
+
+        Args:
+            field (str): Nome do campo
+            default (str, optional): Valor exibido para campos vazios. Defaults to "N/A".
+
+        Returns:
+            str: Texto de exibição
+        """
+        value = getattr(self, field)
+        if field in CATEGORICAL_FIELDS:
+            other_field = OTHER_FIELDS.get(field)
+            if other_field and value.name == "OUTRO" and getattr(self, other_field):
+                return getattr(self, other_field)
+            return value.label
+        return value or default
+
+    def to_row(self):
+        """
+        Serializa o registro como tupla na ordem de __slots__.
+
+        Returns:
+            tuple: Valores prontos para gravação (categóricos como int)
+        """
+        return (
+            self.patient_name, self.birth_date, int(self.gender), self.record_number,
+            self.sample_code, self.clinical_suspicion, self.collection_site,
+            int(self.procedure_type), self.procedure_other, self.clinical_history,
+            int(self.material_type), self.material_other, self.sample_quantity,
+            int(self.preservation_medium), self.collection_datetime, self.tissue_type,
+            self.tissue_measurement, self.tissue_weight, self.slide_image, self.gross_image,
+        )
+
+    @classmethod
+    def from_row(cls, row):
+        """
+        Reconstrói um registro a partir de uma tupla gerada por to_row().
+
+        Args:
+            row (Sequence): Valores na ordem de __slots__
+
+        Returns:
+            PatientRecord: Registro reconstruído
+        """
+        return cls(**dict(zip(cls.__slots__, row)))
+
+    def to_dict(self):
+        """
+        Converte o registro em dicionário com os códigos categóricos como int.
+
+        Returns:
+            dict: Campo -> valor
+        """
+        return dict(zip(self.__slots__, self.to_row()))
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Cria um registro a partir de um dicionário.
+
+        Aceita tanto códigos quanto rótulos nos campos categóricos.
+
+        Args:
+            data (dict): Campo -> valor
+
+        Returns:
+            PatientRecord: Registro criado
+
+        Raises:
+            TypeError: Se houver chaves desconhecidas ou campos obrigatórios ausentes
+        """
+        values = dict(data)
+        for field, enum_cls in CATEGORICAL_FIELDS.items():
+            if isinstance(values.get(field), str):
+                values[field] = enum_cls.from_label(values[field])
+        return cls(**values)
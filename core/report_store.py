@@ -0,0 +1,578 @@
+"""
+Módulo de armazenamento de laudos.
+
+Este módulo contém o armazenamento persistente dos laudos emitidos,
+implementado sobre SQLite. Cada laudo guarda o registro do paciente
+(PatientRecord) em colunas próprias, as seções descritivas do laudo
+e os metadados de emissão. As anotações da lâmina ficam em uma tabela
+à parte, lidas apenas ao abrir o visualizador.
+
+Ao ser assinado, o laudo sai do banco e vai para o arquivo de laudos
+assinados (core.archive), mantendo o banco pequeno. As consultas
+combinam o banco e o arquivo; uma retificação de laudo assinado volta
+ao banco como rascunho, que prevalece sobre a versão arquivada até
+ser assinado novamente. Cada gravação que altera o conteúdo gera
+uma versão no histórico de versões (core.versions).
+
+Classes:
+    Report: Laudo armazenado.
+    ReportStore: Armazenamento de laudos em SQLite.
+"""
+
+import heapq
+import os
+import sqlite3
+import threading
+import time
+
+from .annotations import AnnotationSet
+from .archive import ReportArchive
+from .config import data_path, ARCHIVE_DIR, ARCHIVE_SEGMENT_MB
+from .metrics import REGISTRY, ARCHIVE_READ_SECONDS
+from .records import PatientRecord
+from .versions import VersionLog
+
+# Colunas das seções descritivas e dos metadados, após as colunas do registro
+SECTION_COLUMNS = ("macroscopy", "microscopy", "diagnosis")
+META_COLUMNS = ("pathologist", "created_at", "updated_at")
+# Diagnóstico codificado (sistema de codificação e código, ver core.terminology)
+CODE_COLUMNS = ("diagnosis_system", "diagnosis_code")
+# Assinatura (sign-out): usuário e data; laudos assinados ficam no arquivo
+SIGN_COLUMNS = ("signed_by", "signed_at")
+
+_RECORD_COLUMNS = PatientRecord.__slots__
+_ALL_COLUMNS = ("id",) + _RECORD_COLUMNS + SECTION_COLUMNS + META_COLUMNS + CODE_COLUMNS + SIGN_COLUMNS
+_CATEGORICAL_COLUMNS = ("gender", "procedure_type", "material_type", "preservation_medium")
+
+
+class Report:
+    """
+    Laudo armazenado.
+
+    Attributes:
+        id (int): Identificador interno do laudo
+        record (PatientRecord): Dados do paciente e amostra
+        macroscopy (str): Descrição macroscópica
+        microscopy (str): Descrição microscópica
+        diagnosis (str): Conclusão diagnóstica
+        pathologist (str): Usuário que emitiu o laudo
+        created_at (float): Data de criação (timestamp Unix)
+        updated_at (float): Data da última alteração (timestamp Unix)
+        diagnosis_system (str): Sistema de codificação do diagnóstico (ex.: "CID-10")
+        diagnosis_code (str): Código do diagnóstico ("" se não codificado)
+        signed_by (str): Usuário que assinou o laudo ("" se não assinado)
+        signed_at (float): Data da assinatura (timestamp Unix, 0 se não assinado)
+    """
+
+    __slots__ = ("id", "record") + SECTION_COLUMNS + META_COLUMNS + CODE_COLUMNS + SIGN_COLUMNS
+
+    def __init__(self, id, record, macroscopy="", microscopy="", diagnosis="",
+                 pathologist="", created_at=0.0, updated_at=0.0, diagnosis_system="", diagnosis_code="",
+                 signed_by="", signed_at=0.0):
+        self.id = id
+        self.record = record
+        self.macroscopy = macroscopy
+        self.microscopy = microscopy
+        self.diagnosis = diagnosis
+        self.pathologist = pathologist
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.diagnosis_system = diagnosis_system
+        self.diagnosis_code = diagnosis_code
+        self.signed_by = signed_by
+        self.signed_at = signed_at
+
+    @property
+    def signed(self):
+        """Indica se o laudo foi assinado."""
+        return bool(self.signed_at)
+
+    def __repr__(self):
+        return f"Report(id={self.id!r}, sample_code={self.record.sample_code!r})"
+
+    @classmethod
+    def from_row(cls, row):
+        """
+        Cria um laudo a partir de uma linha com todas as colunas da tabela.
+
+        Args:
+            row (Sequence): Valores na ordem de _ALL_COLUMNS
+
+        Returns:
+            Report: Laudo reconstruído
+        """
+        n = len(_RECORD_COLUMNS)
+        return cls(row[0], PatientRecord.from_row(row[1:n + 1]), *row[n + 1:])
+
+    @classmethod
+    def from_fields(cls, fields):
+        """
+        Cria um laudo a partir dos campos de um laudo arquivado.
+
+        Args:
+            fields (dict): Coluna -> valor (colunas ausentes usam o padrão)
+
+        Returns:
+            Report: Laudo reconstruído
+        """
+        return cls.from_row(_fields_row(fields, _ALL_COLUMNS))
+
+
+def _fields_row(fields, columns):
+    """Linha (na ordem de columns) com os campos de um laudo arquivado."""
+    return tuple(fields.get(name, 0.0 if name == "signed_at" else "") for name in columns)
+
+
+class ReportStore:
+    """
+    Armazenamento de laudos em SQLite.
+
+    Cada thread usa a sua própria conexão, permitindo que exportações
+    e tarefas em segundo plano leiam o banco enquanto a interface
+    grava (modo WAL).
+
+    Attributes:
+        path (str): Caminho do arquivo do banco de dados
+        archive (ReportArchive): Arquivo dos laudos assinados
+        versions (VersionLog): Histórico de versões dos laudos
+    """
+
+    def __init__(self, path=None, archive_dir=None):
+        """
+        Inicializa o armazenamento, criando as tabelas se necessário.
+
+        Args:
+            path (str, optional): Caminho do banco. Defaults to data_path("reports.db").
+            archive_dir (str, optional): Diretório do arquivo de laudos assinados.
+                Defaults to ARCHIVE_DIR (ou "arquivo" ao lado de um banco informado).
+        """
+        self.path = path or data_path("reports.db")
+        if archive_dir is None:
+            archive_dir = ARCHIVE_DIR if path is None else os.path.join(
+                os.path.dirname(os.path.abspath(self.path)), "arquivo")
+        self.archive = ReportArchive(archive_dir, int(ARCHIVE_SEGMENT_MB * 1024 * 1024))
+        self._local = threading.local()
+        self._listeners = []
+        self._create_schema()
+        self.versions = VersionLog(self.connection)
+        self._finish_archiving()
+
+    def connection(self):
+        """Retorna a conexão SQLite da thread atual."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """Fecha a conexão da thread atual."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _create_schema(self):
+        """Cria (ou atualiza) a tabela de laudos e os índices."""
+        columns = []
+        for name in _RECORD_COLUMNS:
+            if name == "sample_code":
+                columns.append("sample_code TEXT NOT NULL UNIQUE")
+            elif name in _CATEGORICAL_COLUMNS:
+                columns.append(f"{name} INTEGER NOT NULL")
+            else:
+                columns.append(f"{name} TEXT NOT NULL DEFAULT ''")
+        columns += [f"{name} TEXT NOT NULL DEFAULT ''" for name in SECTION_COLUMNS]
+        columns += ["pathologist TEXT NOT NULL DEFAULT ''",
+                    "created_at REAL NOT NULL",
+                    "updated_at REAL NOT NULL"]
+        columns += [f"{name} TEXT NOT NULL DEFAULT ''" for name in CODE_COLUMNS]
+        columns += ["signed_by TEXT NOT NULL DEFAULT ''",
+                    "signed_at REAL NOT NULL DEFAULT 0"]
+        conn = self.connection()
+        with conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS reports "
+                         f"(id INTEGER PRIMARY KEY, {', '.join(columns)})")
+            # Bancos criados por versões anteriores: acrescenta os campos novos
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(reports)")}
+            for definition in columns:
+                if definition.split()[0] not in existing:
+                    conn.execute(f"ALTER TABLE reports ADD COLUMN {definition}")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_reports_record_number ON reports(record_number)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_reports_updated_at ON reports(updated_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_reports_created_at ON reports(created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_reports_pathologist "
+                         "ON reports(pathologist, updated_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_reports_diagnosis_code "
+                         "ON reports(diagnosis_system, diagnosis_code)")
+            conn.execute("CREATE TABLE IF NOT EXISTS annotations "
+                         "(sample_code TEXT PRIMARY KEY, data BLOB NOT NULL, updated_at REAL NOT NULL)")
+
+    def add_listener(self, callback):
+        """
+        Registra uma função chamada após cada gravação de laudo.
+
+        Args:
+            callback (callable): Função que recebe o Report gravado
+        """
+        self._listeners.append(callback)
+
+    def save_report(self, record, macroscopy="", microscopy="", diagnosis="", pathologist="",
+                    diagnosis_system="", diagnosis_code=""):
+        """
+        Grava um laudo, substituindo o existente com o mesmo código de amostra.
+
+        Ao regravar uma amostra, a data de criação é preservada e
+        apenas a data de alteração é atualizada. Se o conteúdo mudou,
+        uma nova versão é gravada no histórico.
+
+        Args:
+            record (PatientRecord): Dados do paciente e amostra
+            macroscopy (str, optional): Descrição macroscópica
+            microscopy (str, optional): Descrição microscópica
+            diagnosis (str, optional): Conclusão diagnóstica
+            pathologist (str, optional): Usuário que emitiu o laudo
+            diagnosis_system (str, optional): Sistema de codificação do diagnóstico
+            diagnosis_code (str, optional): Código do diagnóstico
+
+        Returns:
+            Report: Laudo gravado
+        """
+        now = time.time()
+        conn = self.connection()
+        columns = ("id",) + _RECORD_COLUMNS + SECTION_COLUMNS + META_COLUMNS + CODE_COLUMNS
+        updates = ", ".join(f"{name}=excluded.{name}" for name in columns if name not in ("id", "created_at"))
+        with conn:
+            # Trava de escrita antes de ler o laudo anterior e o maior id: duas gravações
+            # simultâneas (de threads diferentes) não podem escolher o mesmo id
+            conn.execute("BEGIN IMMEDIATE")
+            # Retificação de laudo assinado: o rascunho mantém o id e a data de criação
+            # do laudo arquivado; laudos novos recebem um id maior que todos os arquivados
+            report_id, created_at = None, now
+            previous = conn.execute(f"SELECT {', '.join(_ALL_COLUMNS)} FROM reports WHERE sample_code = ?",
+                                    (record.sample_code,)).fetchone()
+            previous = dict(zip(_ALL_COLUMNS, previous)) if previous else None
+            if previous is None:
+                previous = archived = self.archive.get(record.sample_code)
+                if archived:
+                    report_id, created_at = archived["id"], archived["created_at"]
+                else:
+                    live_max = conn.execute("SELECT MAX(id) FROM reports").fetchone()[0] or 0
+                    report_id = max(live_max, self.archive.max_id) + 1
+            values = (report_id,) + record.to_row() + (macroscopy, microscopy, diagnosis, pathologist,
+                                                       created_at, now, diagnosis_system, diagnosis_code)
+            row = conn.execute(
+                f"INSERT INTO reports ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+                f"ON CONFLICT(sample_code) DO UPDATE SET {updates} "
+                f"RETURNING id, created_at",
+                values).fetchone()
+            if previous is not None:
+                self._ensure_history(previous)
+            self.versions.record(record.sample_code, dict(zip(columns, values)), pathologist, now)
+        report = Report(row[0], record, macroscopy, microscopy, diagnosis, pathologist, row[1], now,
+                        diagnosis_system, diagnosis_code)
+        for callback in self._listeners:
+            callback(report)
+        return report
+
+    def sign_report(self, sample_code, user):
+        """
+        Assina um laudo e o transfere para o arquivo de laudos assinados.
+
+        O laudo (com as anotações da lâmina) é anexado ao arquivo e só
+        então removido do banco; alterações posteriores são retificações.
+        A leitura, a anexação e a remoção acontecem com a trava de escrita
+        do banco: uma gravação simultânea (de outra aba ou thread) espera a
+        assinatura terminar, em vez de ser descartada.
+
+        Args:
+            sample_code (str): Código da amostra
+            user (str): Usuário que assina
+
+        Returns:
+            Report: Laudo assinado
+
+        Raises:
+            ValueError: Se não houver laudo não assinado para a amostra, ou se
+                ele mudou durante a assinatura
+        """
+        conn = self.connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(f"SELECT {', '.join(_ALL_COLUMNS)} FROM reports WHERE sample_code = ?",
+                               (sample_code,)).fetchone()
+            if row is None:
+                raise ValueError(f"Não há laudo não assinado da amostra {sample_code}")
+            fields = dict(zip(_ALL_COLUMNS, row))
+            fields["signed_by"] = user
+            fields["signed_at"] = time.time()
+            annotations = conn.execute("SELECT data FROM annotations WHERE sample_code = ?",
+                                       (sample_code,)).fetchone()
+            self.archive.append(fields, annotations[0] if annotations else None)
+            self._ensure_history(fields)
+            self.versions.mark_signed(sample_code, user, fields["signed_at"])
+            # Remove só a versão assinada (a trava garante que ela não mudou desde a leitura)
+            deleted = conn.execute("DELETE FROM reports WHERE sample_code = ? AND updated_at = ?",
+                                   (sample_code, fields["updated_at"])).rowcount
+            if deleted != 1:
+                raise ValueError(f"O laudo da amostra {sample_code} foi alterado durante a assinatura")
+            conn.execute("DELETE FROM annotations WHERE sample_code = ?", (sample_code,))
+        report = Report.from_fields(fields)
+        for callback in self._listeners:
+            callback(report)
+        return report
+
+    def _finish_archiving(self):
+        """
+        Conclui assinaturas interrompidas: remove do banco os laudos cuja
+        versão idêntica (mesma data de alteração) já está no arquivo.
+        """
+        conn = self.connection()
+        updated = dict(conn.execute("SELECT sample_code, updated_at FROM reports"))
+        archived = self.archive.contains_many(updated)
+        done = [fields for fields in (self.archive.get(code) for code in updated if code in archived)
+                if fields["updated_at"] == updated[fields["sample_code"]]]
+        if done:
+            with conn:
+                for fields in done:
+                    self._ensure_history(fields)
+                    self.versions.mark_signed(fields["sample_code"], fields["signed_by"], fields["signed_at"])
+                conn.executemany("DELETE FROM reports WHERE sample_code = ?",
+                                 [(fields["sample_code"],) for fields in done])
+                conn.executemany("DELETE FROM annotations WHERE sample_code = ?",
+                                 [(fields["sample_code"],) for fields in done])
+
+    def _ensure_history(self, fields):
+        """
+        Registra como primeira versão um laudo gravado antes do histórico
+        de versões existir (sem commit).
+        """
+        if not self.versions.latest_number(fields["sample_code"]):
+            self.versions.record(fields["sample_code"], fields, fields["pathologist"], fields["updated_at"])
+            if fields.get("signed_at"):
+                self.versions.mark_signed(fields["sample_code"], fields["signed_by"], fields["signed_at"])
+
+    def _live_sample_codes(self):
+        """Códigos das amostras com laudo no banco (rascunhos e retificações não assinadas)."""
+        return {row[0] for row in self.connection().execute("SELECT sample_code FROM reports")}
+
+    def _read_archived(self, sample_code):
+        """Lê um laudo do arquivo, medindo o tempo de leitura."""
+        with REGISTRY.histogram(ARCHIVE_READ_SECONDS, "Tempo de leitura de um laudo arquivado").time():
+            fields = self.archive.get(sample_code)
+        return Report.from_fields(fields) if fields else None
+
+    def save_annotations(self, sample_code, annotations):
+        """
+        Grava as anotações da lâmina de uma amostra, substituindo as existentes.
+
+        Args:
+            sample_code (str): Código da amostra
+            annotations (AnnotationSet): Anotações
+        """
+        conn = self.connection()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO annotations (sample_code, data, updated_at) "
+                         "VALUES (?, ?, ?)", (sample_code, annotations.to_bytes(), time.time()))
+
+    def get_annotations(self, sample_code):
+        """
+        Busca as anotações da lâmina de uma amostra.
+
+        Args:
+            sample_code (str): Código da amostra
+
+        Returns:
+            AnnotationSet | None: Anotações, ou None se não houver
+        """
+        row = self.connection().execute("SELECT data FROM annotations WHERE sample_code = ?",
+                                        (sample_code,)).fetchone()
+        data = row[0] if row else self.archive.get_annotations(sample_code)
+        return AnnotationSet.from_bytes(data) if data else None
+
+    def get_report(self, sample_code):
+        """
+        Busca um laudo pelo código da amostra (no banco e, na falta, no arquivo).
+
+        Args:
+            sample_code (str): Código da amostra
+
+        Returns:
+            Report | None: Laudo encontrado ou None
+        """
+        row = self.connection().execute(
+            f"SELECT {', '.join(_ALL_COLUMNS)} FROM reports WHERE sample_code = ?",
+            (sample_code,)).fetchone()
+        return Report.from_row(row) if row else self._read_archived(sample_code)
+
+    def find_by_record_number(self, record_number):
+        """
+        Lista os laudos de um prontuário.
+
+        Args:
+            record_number (str): Número de prontuário
+
+        Returns:
+            list[Report]: Laudos do prontuário, do mais recente ao mais antigo
+        """
+        reports = [Report.from_row(row) for row in self.connection().execute(
+            f"SELECT {', '.join(_ALL_COLUMNS)} FROM reports WHERE record_number = ?", (record_number,))]
+        live = {report.record.sample_code for report in reports}
+        reports += [Report.from_fields(fields) for fields in self.archive.find_by_record_number(record_number)
+                    if fields["sample_code"] not in live]
+        return sorted(reports, key=lambda report: report.updated_at, reverse=True)
+
+    def recent_reports(self, pathologist=None, limit=20):
+        """
+        Lista os laudos alterados mais recentemente.
+
+        Args:
+            pathologist (str, optional): Apenas laudos deste usuário
+            limit (int, optional): Quantidade máxima. Defaults to 20.
+
+        Returns:
+            list[Report]: Laudos, do mais recente ao mais antigo
+        """
+        where, params = ("WHERE pathologist = ? ", (pathologist,)) if pathologist else ("", ())
+        rows = self.connection().execute(
+            f"SELECT {', '.join(_ALL_COLUMNS)} FROM reports {where}"
+            f"ORDER BY updated_at DESC LIMIT ?", params + (limit,)).fetchall()
+        reports = [Report.from_row(row) for row in rows]
+        archived = self.archive.select(pathologist=pathologist, exclude=self._live_sample_codes())[::-1][:limit]
+        reports += [Report.from_fields(fields) for fields in self.archive.read_entries(archived)]
+        return sorted(reports, key=lambda report: report.updated_at, reverse=True)[:limit]
+
+    def reported_sample_codes(self, sample_codes, chunk_size=500):
+        """
+        Retorna, dentre os códigos informados, os que já têm laudo (no banco ou no arquivo).
+
+        Args:
+            sample_codes (Iterable[str]): Códigos de amostra
+            chunk_size (int, optional): Códigos por consulta. Defaults to 500.
+
+        Returns:
+            set[str]: Códigos com laudo gravado
+        """
+        codes = list(sample_codes)
+        reported = set()
+        conn = self.connection()
+        for i in range(0, len(codes), chunk_size):
+            chunk = codes[i:i + chunk_size]
+            reported.update(row[0] for row in conn.execute(
+                f"SELECT sample_code FROM reports WHERE sample_code IN ({', '.join('?' * len(chunk))})",
+                chunk))
+        return reported | self.archive.contains_many(set(codes) - reported)
+
+    def count(self, since=None, until=None, date_column="updated_at"):
+        """
+        Conta os laudos armazenados, opcionalmente dentro de um período.
+
+        Args:
+            since (float, optional): Início do período (timestamp, inclusivo)
+            until (float, optional): Fim do período (timestamp, exclusivo)
+            date_column (str, optional): "updated_at" ou "created_at". Defaults to "updated_at".
+
+        Returns:
+            int: Número de laudos
+        """
+        where, params = _date_filter(date_column, since, until)
+        live = self.connection().execute(f"SELECT COUNT(*) FROM reports {where}", params).fetchone()[0]
+        return live + len(self.archive.select(since, until, date_column, exclude=self._live_sample_codes()))
+
+    def iter_batches(self, columns=_ALL_COLUMNS, since=None, until=None, batch_size=1000,
+                     date_column="updated_at"):
+        """
+        Percorre as linhas da tabela e do arquivo em lotes, lendo apenas as colunas pedidas.
+
+        Args:
+            columns (Sequence[str], optional): Colunas lidas. Defaults to todas.
+            since (float, optional): Início do período (timestamp, inclusivo)
+            until (float, optional): Fim do período (timestamp, exclusivo)
+            batch_size (int, optional): Linhas lidas por vez. Defaults to 1000.
+            date_column (str, optional): Coluna usada no período e na ordenação,
+                "updated_at" ou "created_at". Defaults to "updated_at".
+
+        Yields:
+            list[tuple]: Lotes de linhas em ordem crescente de date_column
+        """
+        unknown = set(columns) - set(_ALL_COLUMNS)
+        if unknown:
+            raise ValueError(f"Colunas desconhecidas: {', '.join(sorted(unknown))}")
+        where, params = _date_filter(date_column, since, until)
+        archived = self.archive.select(since, until, date_column, exclude=self._live_sample_codes())
+        # Cursor próprio para não interferir em outras consultas da mesma thread;
+        # a data e o id vão ao final de cada linha para intercalar com o arquivo
+        cursor = self.connection().cursor()
+        cursor.execute(f"SELECT {', '.join(columns)}, {date_column}, id FROM reports {where} "
+                       f"ORDER BY {date_column}, id", params)
+        try:
+            live = iter(lambda: cursor.fetchmany(batch_size), [])
+            live_rows = (row for rows in live for row in rows)
+            archived_rows = (_fields_row(fields, columns) + (fields[date_column], fields["id"])
+                             for fields in self.archive.read_entries(archived))
+            batch = []
+            for row in heapq.merge(live_rows, archived_rows, key=lambda row: (row[-2], row[-1])):
+                batch.append(row[:-2])
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        finally:
+            cursor.close()
+
+    def signed_rows(self, since, columns=_ALL_COLUMNS):
+        """
+        Linhas dos laudos assinados depois de um instante, na versão arquivada vigente.
+
+        Laudos com retificação em andamento (rascunho no banco) ficam de fora.
+
+        Args:
+            since (float): Timestamp da assinatura (exclusivo)
+            columns (Sequence[str], optional): Colunas lidas. Defaults to todas.
+
+        Returns:
+            list[tuple]: Linhas em ordem crescente de (updated_at, id)
+        """
+        codes = self.versions.signed_since(since) - self._live_sample_codes()
+        archived = [fields for fields in map(self.archive.get, codes) if fields]
+        archived.sort(key=lambda fields: (fields["updated_at"], fields["id"]))
+        return [_fields_row(fields, columns) for fields in archived]
+
+    def iter_reports(self, since=None, until=None, batch_size=1000):
+        """
+        Percorre os laudos em ordem de alteração sem carregá-los todos na memória.
+
+        Args:
+            since (float, optional): Apenas laudos alterados a partir deste timestamp
+            until (float, optional): Apenas laudos alterados antes deste timestamp
+            batch_size (int, optional): Linhas lidas por vez. Defaults to 1000.
+
+        Yields:
+            Report: Laudos em ordem crescente de updated_at
+        """
+        for rows in self.iter_batches(_ALL_COLUMNS, since, until, batch_size):
+            for row in rows:
+                yield Report.from_row(row)
+
+
+def _date_filter(date_column, since, until):
+    """
+    Monta a cláusula WHERE de um período sobre uma coluna de data.
+
+    Returns:
+        tuple: (cláusula WHERE ou "", parâmetros)
+    """
+    if date_column not in ("updated_at", "created_at"):
+        raise ValueError(f"Coluna de data inválida: {date_column}")
+    conditions = []
+    params = []
+    if since is not None:
+        conditions.append(f"{date_column} >= ?")
+        params.append(since)
+    if until is not None:
+        conditions.append(f"{date_column} < ?")
+        params.append(until)
+    return (f"WHERE {' AND '.join(conditions)}" if conditions else ""), params
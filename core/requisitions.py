@@ -0,0 +1,462 @@
+"""
+Módulo de ingestão de requisições.
+
+Este módulo contém a leitura das requisições de exame enviadas pelo
+sistema hospitalar (mensagens HL7 v2 ORM ou planilhas CSV) e o índice
+usado para preencher o formulário do paciente a partir do código da
+amostra ou do número de prontuário.
+
+Os arquivos são lidos em blocos e as mensagens são processadas uma a
+uma, de modo que arquivos com dezenas de milhares de mensagens não
+precisam ser carregados inteiros na memória.
+
+Classes:
+    Requisition: Requisição de exame com os dados do formulário.
+    RequisitionIndex: Índice de requisições por amostra e prontuário.
+    DropDirectoryWatcher: Thread que monitora o diretório de entrada.
+"""
+
+import csv
+import io
+import os
+import threading
+import time
+
+from .records import Gender, ProcedureType, MaterialType, OTHER_FIELDS
+
+# Extensões reconhecidas no diretório de entrada
+HL7_EXTENSIONS = (".hl7", ".txt")
+CSV_EXTENSIONS = (".csv",)
+
+# Tamanho dos blocos lidos dos arquivos HL7
+_CHUNK_SIZE = 64 * 1024
+
+# Valores padrão dos campos categóricos de uma requisição
+_DEFAULTS = {
+    "gender": Gender.OUTRO,
+    "procedure_type": ProcedureType.BIOPSIA,
+    "material_type": MaterialType.TECIDO,
+}
+
+
+class Requisition:
+    """
+    Requisição de exame com os dados usados no formulário do paciente.
+
+    Os nomes dos campos são os mesmos de PatientRecord; os campos
+    categóricos guardam o código correspondente.
+    """
+
+    __slots__ = (
+        "patient_name",
+        "birth_date",
+        "gender",
+        "record_number",
+        "sample_code",
+        "clinical_suspicion",
+        "collection_site",
+        "procedure_type",
+        "procedure_other",
+        "clinical_history",
+        "material_type",
+        "material_other",
+        "collection_datetime",
+        "tissue_type",
+        "source",
+    )
+
+    def __init__(self, **values):
+        """
+        Inicializa a requisição.
+
+        Args:
+            **values: Campos da requisição (ver __slots__); os ausentes ficam vazios
+        """
+        for name in self.__slots__:
+            setattr(self, name, values.pop(name, _DEFAULTS.get(name, "")))
+        if values:
+            raise TypeError(f"Campos desconhecidos: {', '.join(sorted(values))}")
+        self.gender = Gender(self.gender)
+        self.procedure_type = ProcedureType(self.procedure_type)
+        self.material_type = MaterialType(self.material_type)
+
+    def __repr__(self):
+        return f"Requisition(sample_code={self.sample_code!r}, record_number={self.record_number!r})"
+
+
+class RequisitionIndex:
+    """
+    Índice em memória das requisições recebidas.
+
+    Permite localizar uma requisição com uma única consulta de
+    dicionário pelo código da amostra ou pelo número de prontuário
+    (neste caso, a requisição mais recente do prontuário).
+    """
+
+    def __init__(self):
+        """Inicializa um índice vazio."""
+        self._by_sample = {}
+        self._by_record = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._by_sample)
+
+    def add(self, requisition):
+        """
+        Inclui ou substitui uma requisição no índice.
+
+        Args:
+            requisition (Requisition): Requisição recebida
+        """
+        if not requisition.sample_code:
+            return
+        with self._lock:
+            self._by_sample[requisition.sample_code] = requisition
+            if requisition.record_number:
+                self._by_record[requisition.record_number] = requisition
+
+    def lookup(self, code):
+        """
+        Busca uma requisição pelo código da amostra ou pelo prontuário.
+
+        Args:
+            code (str): Código lido (código de barras ou digitado)
+
+        Returns:
+            Requisition | None: Requisição encontrada ou None
+        """
+        code = code.strip()
+        return self._by_sample.get(code) or self._by_record.get(code)
+
+    def requisitions(self):
+        """Retorna uma cópia das requisições indexadas, na ordem de chegada."""
+        with self._lock:
+            return list(self._by_sample.values())
+
+
+def iter_hl7_messages(f):
+    """
+    Lê mensagens HL7 v2 de um arquivo de texto em blocos.
+
+    Os segmentos podem ser separados por CR, LF ou CRLF, e cada
+    mensagem começa em um segmento MSH. Envelopes MLLP (0x0b/0x1c)
+    são ignorados.
+
+    Args:
+        f (TextIO): Arquivo aberto em modo texto
+
+    Yields:
+        list[str]: Segmentos de uma mensagem
+    """
+    message = []
+    pending = ""
+    while True:
+        chunk = f.read(_CHUNK_SIZE)
+        if not chunk:
+            break
+        chunk = pending + chunk.replace("\x0b", "").replace("\x1c", "")
+        # O último pedaço pode ser um segmento incompleto: guardar para o próximo bloco
+        lines = chunk.replace("\r\n", "\r").replace("\n", "\r").split("\r")
+        pending = lines.pop()
+        for line in lines:
+            if line.startswith("MSH") and message:
+                yield message
+                message = []
+            if line:
+                message.append(line)
+    if pending:
+        if pending.startswith("MSH") and message:
+            yield message
+            message = []
+        message.append(pending)
+    if message:
+        yield message
+
+
+def parse_hl7_message(segments, source=""):
+    """
+    Converte uma mensagem HL7 v2 (ORM/OML) em requisição.
+
+    Campos utilizados:
+    - PID-3 (prontuário), PID-5 (nome), PID-7 (nascimento), PID-8 (sexo)
+    - SPM-2 / OBR-3 / OBR-2 (código da amostra, nessa ordem de preferência)
+    - OBR-4 (procedimento), OBR-7 ou SPM-17 (coleta), OBR-13 (história clínica)
+    - OBR-15 ou SPM-4 (material), SPM-8 (local da coleta), DG1-4 (suspeita clínica)
+
+    Args:
+        segments (list[str]): Segmentos da mensagem, começando por MSH
+        source (str, optional): Arquivo de origem
+
+    Returns:
+        Requisition | None: Requisição, ou None se a mensagem não tiver código de amostra
+    """
+    if not segments or not segments[0].startswith("MSH") or len(segments[0]) < 5:
+        return None
+    field_sep = segments[0][3]
+    component_sep = segments[0][4]
+
+    fields = {}
+    for segment in segments:
+        parts = segment.split(field_sep)
+        # Guardar apenas a primeira ocorrência de cada segmento
+        fields.setdefault(parts[0], parts)
+
+    def get(segment, index, component=0):
+        parts = fields.get(segment)
+        # No MSH o próprio separador conta como MSH-1
+        if segment == "MSH":
+            index -= 1
+        if not parts or index >= len(parts):
+            return ""
+        components = parts[index].split("~")[0].split(component_sep)
+        return components[component].strip() if component < len(components) else ""
+
+    family, given, middle = get("PID", 5, 0), get("PID", 5, 1), get("PID", 5, 2)
+    patient_name = " ".join(p for p in (given, middle, family) if p)
+
+    sample_code = get("SPM", 2) or get("OBR", 3) or get("OBR", 2)
+    if not sample_code:
+        return None
+
+    procedure_text = get("OBR", 4, 1) or get("OBR", 4, 0)
+    material_text = get("SPM", 4, 1) or get("OBR", 15, 0)
+    procedure_type, procedure_other = _classify(procedure_text, _PROCEDURE_KEYWORDS, ProcedureType)
+    material_type, material_other = _classify(material_text, _MATERIAL_KEYWORDS, MaterialType)
+
+    return Requisition(
+        patient_name=patient_name,
+        birth_date=_hl7_date(get("PID", 7)),
+        gender=_HL7_GENDER.get(get("PID", 8).upper(), Gender.OUTRO),
+        record_number=get("PID", 3),
+        sample_code=sample_code,
+        clinical_suspicion=get("DG1", 4) or get("DG1", 3, 1),
+        collection_site=get("SPM", 8, 1) or get("OBR", 15, 3),
+        procedure_type=procedure_type,
+        procedure_other=procedure_other,
+        clinical_history=get("OBR", 13),
+        material_type=material_type,
+        material_other=material_other,
+        collection_datetime=_hl7_datetime(get("OBR", 7) or get("SPM", 17)),
+        tissue_type=get("SPM", 4, 1) if material_type == MaterialType.TECIDO else "",
+        source=source,
+    )
+
+
+def iter_hl7_file(path):
+    """
+    Lê as requisições de um arquivo HL7 sem carregá-lo inteiro.
+
+    Args:
+        path (str): Caminho do arquivo
+
+    Yields:
+        Requisition: Requisições com código de amostra
+    """
+    with open(path, "r", encoding="utf-8", errors="replace", newline="") as f:
+        for segments in iter_hl7_messages(f):
+            requisition = parse_hl7_message(segments, path)
+            if requisition is not None:
+                yield requisition
+
+
+def iter_csv_file(path):
+    """
+    Lê as requisições de um arquivo CSV linha a linha.
+
+    O cabeçalho usa os nomes dos campos de PatientRecord; os campos
+    categóricos aceitam o rótulo exibido no formulário. O separador
+    (vírgula ou ponto e vírgula) é detectado pela primeira linha.
+
+    Args:
+        path (str): Caminho do arquivo
+
+    Yields:
+        Requisition: Requisições com código de amostra
+    """
+    with open(path, "r", encoding="utf-8-sig", errors="replace", newline="") as f:
+        header = f.readline()
+        delimiter = ";" if header.count(";") > header.count(",") else ","
+        reader = csv.DictReader(f, fieldnames=next(csv.reader(io.StringIO(header), delimiter=delimiter)),
+                                delimiter=delimiter)
+        known = set(Requisition.__slots__)
+        for row in reader:
+            values = {k.strip(): (v or "").strip() for k, v in row.items() if k and k.strip() in known}
+            if not values.get("sample_code"):
+                continue
+            for field, enum_cls in (("gender", Gender), ("procedure_type", ProcedureType),
+                                    ("material_type", MaterialType)):
+                label = values.pop(field, "")
+                if label:
+                    try:
+                        values[field] = enum_cls.from_label(label)
+                    except ValueError:
+                        # Texto fora da lista vai para o campo "Outro", quando existe
+                        if field in OTHER_FIELDS:
+                            values[field] = enum_cls.OUTRO
+                            values[OTHER_FIELDS[field]] = label
+            values["source"] = path
+            yield Requisition(**values)
+
+
+def iter_requisition_file(path):
+    """
+    Lê as requisições de um arquivo conforme a sua extensão.
+
+    Args:
+        path (str): Caminho do arquivo (.hl7/.txt ou .csv)
+
+    Yields:
+        Requisition: Requisições do arquivo
+    """
+    if path.lower().endswith(CSV_EXTENSIONS):
+        return iter_csv_file(path)
+    return iter_hl7_file(path)
+
+
+class DropDirectoryWatcher(threading.Thread):
+    """
+    Thread que monitora o diretório de entrada de requisições.
+
+    Cada arquivo novo é processado quando o seu tamanho para de mudar
+    entre duas verificações (evitando ler arquivos ainda em gravação)
+    e depois movido para a subpasta "processados". Na inicialização,
+    os arquivos já processados são indexados novamente.
+
+    Attributes:
+        directory (str): Diretório monitorado
+        index (RequisitionIndex): Índice alimentado pelas requisições
+        interval (float): Intervalo entre verificações, em segundos
+    """
+
+    PROCESSED_DIR = "processados"
+
+    def __init__(self, directory, index, interval=2.0):
+        """
+        Inicializa o monitor.
+
+        Args:
+            directory (str): Diretório monitorado
+            index (RequisitionIndex): Índice a alimentar
+            interval (float, optional): Intervalo em segundos. Defaults to 2.0.
+        """
+        super().__init__(name="requisition-watcher", daemon=True)
+        self.directory = directory
+        self.index = index
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._sizes = {}
+
+    def stop(self):
+        """Interrompe o monitoramento."""
+        self._stop_event.set()
+
+    def run(self):
+        """Indexa os arquivos já processados e monitora o diretório."""
+        processed_dir = os.path.join(self.directory, self.PROCESSED_DIR)
+        os.makedirs(processed_dir, exist_ok=True)
+        for name in sorted(os.listdir(processed_dir)):
+            self._ingest(os.path.join(processed_dir, name))
+
+        while not self._stop_event.is_set():
+            self.poll()
+            self._stop_event.wait(self.interval)
+
+    def poll(self):
+        """Processa os arquivos do diretório cujo tamanho já se estabilizou."""
+        try:
+            entries = [e for e in os.scandir(self.directory)
+                       if e.is_file() and e.name.lower().endswith(HL7_EXTENSIONS + CSV_EXTENSIONS)]
+        except OSError:
+            return
+        sizes = {}
+        for entry in entries:
+            size = entry.stat().st_size
+            if self._sizes.get(entry.path) == size:
+                if self._ingest(entry.path):
+                    self._move_to_processed(entry)
+            else:
+                sizes[entry.path] = size
+        self._sizes = sizes
+
+    def _ingest(self, path):
+        """
+        Indexa as requisições de um arquivo.
+
+        Returns:
+            bool: True se o arquivo foi lido até o fim
+        """
+        if not path.lower().endswith(HL7_EXTENSIONS + CSV_EXTENSIONS):
+            return False
+        try:
+            for requisition in iter_requisition_file(path):
+                self.index.add(requisition)
+                if self._stop_event.is_set():
+                    return False
+        except (OSError, csv.Error):
+            return False
+        return True
+
+    def _move_to_processed(self, entry):
+        """Move um arquivo já indexado para a subpasta de processados."""
+        target = os.path.join(self.directory, self.PROCESSED_DIR, entry.name)
+        if os.path.exists(target):
+            base, ext = os.path.splitext(entry.name)
+            target = os.path.join(self.directory, self.PROCESSED_DIR,
+                                  f"{base}_{time.strftime('%Y%m%d%H%M%S')}{ext}")
+        try:
+            os.replace(entry.path, target)
+        except OSError:
+            pass
+
+
+# Palavras-chave (sem acentos, minúsculas) usadas para classificar textos livres
+_PROCEDURE_KEYWORDS = (
+    ("biops", ProcedureType.BIOPSIA),
+    ("pun", ProcedureType.PUNCAO),
+    ("paaf", ProcedureType.PUNCAO),
+    ("ressec", ProcedureType.RESSECCAO_CIRURGICA),
+    ("resec", ProcedureType.RESSECCAO_CIRURGICA),
+)
+
+_MATERIAL_KEYWORDS = (
+    ("citolog", MaterialType.CITOLOGIA),
+    ("liquid", MaterialType.LIQUIDO),
+    ("tecid", MaterialType.TECIDO),
+    ("tissue", MaterialType.TECIDO),
+)
+
+_HL7_GENDER = {"M": Gender.MASCULINO, "F": Gender.FEMININO}
+
+_ACCENTS = str.maketrans("áàâãéêíóôõúüç", "aaaaeeiooouuc")
+
+
+def _classify(text, keywords, enum_cls):
+    """
+    Classifica um texto livre em um código categórico.
+
+    Returns:
+        tuple: (código, texto para o campo "Outro")
+    """
+    if not text:
+        return enum_cls(0), ""
+    normalized = text.lower().translate(_ACCENTS)
+    for keyword, code in keywords:
+        if keyword in normalized:
+            return code, ""
+    return enum_cls.OUTRO, text
+
+
+def _hl7_date(value):
+    """Converte uma data HL7 (AAAAMMDD...) para dd/mm/aaaa."""
+    if len(value) >= 8 and value[:8].isdigit():
+        return f"{value[6:8]}/{value[4:6]}/{value[0:4]}"
+    return ""
+
+
+def _hl7_datetime(value):
+    """Converte uma data/hora HL7 (AAAAMMDDHHMM...) para dd/mm/aaaa hh:mm."""
+    date = _hl7_date(value)
+    if date and len(value) >= 12 and value[8:12].isdigit():
+        return f"{date} {value[8:10]}:{value[10:12]}"
+    return date
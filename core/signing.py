@@ -0,0 +1,551 @@
+"""
+Módulo de selo de integridade dos laudos assinados.
+
+Este módulo contém o registro de integridade dos laudos assinados.
+Cada versão assinada do arquivo de laudos (core.archive) tem o seu
+conteúdo canonizado (paciente, amostra, seções e diagnóstico em JSON
+com chaves ordenadas e texto normalizado), resumido com SHA-256 e
+assinado com HMAC-SHA256 usando uma chave local. A assinatura não é
+feita no momento em que o usuário assina o laudo: as versões novas do
+arquivo são seladas em lotes, em segundo plano.
+
+Ao fim de cada dia, os resumos das versões assinadas no dia formam
+uma árvore de Merkle, cuja raiz também é assinada: conferir a raiz
+confere o dia inteiro de uma vez, e qualquer laudo alterado, incluído
+ou removido muda a raiz. A conferência completa do arquivo recalcula
+os resumos em vários processos.
+
+Os selos ficam nas tabelas report_signatures e daily_roots do banco de
+laudos.
+
+Classes:
+    VerificationResult: Resultado de uma conferência.
+    SignatureLedger: Registro dos selos de integridade.
+
+Funções:
+    canonicalize: Representação canônica (bytes) do conteúdo de um laudo.
+    content_hash: Resumo SHA-256 do conteúdo canônico de um laudo.
+    load_key: Lê (ou cria) a chave de assinatura local.
+    key_id: Identificador público de uma chave.
+    merkle_root: Raiz da árvore de Merkle de uma lista de resumos.
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import multiprocessing
+import os
+import time
+import unicodedata
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .config import SIGNING_KEY_PATH
+from .metrics import REGISTRY, SIGNING_BATCH_SECONDS
+from .records import PatientRecord
+from .report_store import ReportStore, SECTION_COLUMNS, CODE_COLUMNS, SIGN_COLUMNS
+
+# Campos cobertos pelo selo: identificação, paciente e amostra, seções,
+# diagnóstico codificado, emissão e assinatura
+CANONICAL_FIELDS = (("id",) + PatientRecord.__slots__ + SECTION_COLUMNS + CODE_COLUMNS
+                    + ("pathologist", "created_at") + SIGN_COLUMNS)
+
+# Prefixo da representação canônica (muda se os campos ou o formato mudarem)
+CANONICAL_VERSION = b"patologia-laudo-v1\n"
+
+# A partir deste número de laudos, os resumos são calculados em vários processos
+POOL_THRESHOLD = 2000
+
+# Laudos por tarefa enviada aos processos
+POOL_BATCH = 500
+
+# Separação de domínio entre folhas e nós internos da árvore de Merkle (RFC 6962)
+_LEAF, _NODE = b"\x00", b"\x01"
+
+
+def _canonical_value(value):
+    """Normaliza um valor: textos em NFC, com quebras de linha "\\n"."""
+    if isinstance(value, str):
+        return unicodedata.normalize("NFC", value.replace("\r\n", "\n").replace("\r", "\n"))
+    return value
+
+
+def canonicalize(fields):
+    """
+    Monta a representação canônica do conteúdo de um laudo.
+
+    Args:
+        fields (dict): Campos do laudo (coluna -> valor), como no arquivo
+
+    Returns:
+        bytes: JSON compacto com chaves ordenadas, em UTF-8
+    """
+    content = {name: _canonical_value(fields.get(name, "")) for name in CANONICAL_FIELDS}
+    return CANONICAL_VERSION + json.dumps(content, ensure_ascii=False, sort_keys=True,
+                                          separators=(",", ":")).encode("utf-8")
+
+
+def content_hash(fields):
+    """
+    Calcula o resumo SHA-256 do conteúdo canônico de um laudo.
+
+    Args:
+        fields (dict): Campos do laudo
+
+    Returns:
+        bytes: Resumo (32 bytes)
+    """
+    return hashlib.sha256(canonicalize(fields)).digest()
+
+
+def _sign(key, digest):
+    """Assina um resumo com HMAC-SHA256."""
+    return hmac.new(key, digest, hashlib.sha256).digest()
+
+
+def _seal_batch(key, records):
+    """
+    Calcula o resumo e a assinatura de um lote de laudos (executado nos processos).
+
+    Args:
+        key (bytes): Chave de assinatura
+        records (list[dict]): Campos dos laudos
+
+    Returns:
+        list[tuple[bytes, bytes]]: (resumo, assinatura) de cada laudo
+    """
+    sealed = []
+    for fields in records:
+        digest = content_hash(fields)
+        sealed.append((digest, _sign(key, digest)))
+    return sealed
+
+
+def load_key(path=SIGNING_KEY_PATH):
+    """
+    Lê a chave de assinatura local, criando-a (aleatória) no primeiro uso.
+
+    Args:
+        path (str, optional): Arquivo da chave. Defaults to SIGNING_KEY_PATH.
+
+    Returns:
+        bytes: Chave (32 bytes)
+    """
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    key = os.urandom(32)
+    # Criação exclusiva e legível apenas pelo usuário; outra instância pode ter criado antes
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        with open(path, "rb") as f:
+            return f.read()
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+        f.flush()
+        os.fsync(f.fileno())
+    return key
+
+
+def key_id(key):
+    """Identificador público de uma chave (início do SHA-256 da chave)."""
+    return hashlib.sha256(key).hexdigest()[:16]
+
+
+def merkle_root(digests):
+    """
+    Calcula a raiz da árvore de Merkle de uma lista de resumos.
+
+    As folhas e os nós internos são resumidos com prefixos diferentes;
+    um nó sem par sobe para o nível seguinte sem ser resumido.
+
+    Args:
+        digests (list[bytes]): Resumos, na ordem das folhas
+
+    Returns:
+        bytes: Raiz (32 bytes); resumo vazio se não houver folhas
+    """
+    if not digests:
+        return hashlib.sha256(b"").digest()
+    level = [hashlib.sha256(_LEAF + digest).digest() for digest in digests]
+    while len(level) > 1:
+        paired = [hashlib.sha256(_NODE + level[i] + level[i + 1]).digest()
+                  for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            paired.append(level[-1])
+        level = paired
+    return level[0]
+
+
+def _day(timestamp):
+    """Dia (data local, AAAA-MM-DD) de um instante."""
+    return time.strftime("%Y-%m-%d", time.localtime(timestamp))
+
+
+class VerificationResult:
+    """
+    Resultado de uma conferência de integridade.
+
+    Attributes:
+        checked (int): Laudos conferidos
+        pending (int): Versões assinadas ainda sem selo
+        days (int): Raízes diárias conferidas
+        problems (list[tuple[str, str]]): (código da amostra ou dia, descrição)
+        seconds (float): Duração da conferência
+    """
+
+    __slots__ = ("checked", "pending", "days", "problems", "seconds")
+
+    def __init__(self):
+        self.checked = 0
+        self.pending = 0
+        self.days = 0
+        self.problems = []
+        self.seconds = 0.0
+
+    @property
+    def ok(self):
+        """Indica se nenhum problema foi encontrado."""
+        return not self.problems
+
+    def __repr__(self):
+        return (f"VerificationResult(checked={self.checked}, days={self.days}, "
+                f"pending={self.pending}, problems={len(self.problems)})")
+
+
+class SignatureLedger:
+    """
+    Registro dos selos de integridade dos laudos assinados.
+
+    Cada selo identifica a versão pela sua posição no arquivo (segmento
+    e sequência), que nunca muda. Usa a conexão da thread atual do
+    armazenamento de laudos.
+
+    Attributes:
+        store (ReportStore): Armazenamento de laudos (banco e arquivo)
+        key_id (str): Identificador da chave de assinatura
+    """
+
+    def __init__(self, store, key=None):
+        """
+        Inicializa o registro, criando as tabelas se necessário.
+
+        Args:
+            store (ReportStore): Armazenamento de laudos
+            key (bytes, optional): Chave de assinatura. Defaults to load_key().
+        """
+        self.store = store
+        self._key = key if key is not None else load_key()
+        self.key_id = key_id(self._key)
+        conn = store.connection()
+        with conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS report_signatures "
+                         "(segment INTEGER NOT NULL, sequence INTEGER NOT NULL, "
+                         "sample_code TEXT NOT NULL, signed_at REAL NOT NULL, day TEXT NOT NULL, "
+                         "content_hash BLOB NOT NULL, signature BLOB NOT NULL, key_id TEXT NOT NULL, "
+                         "PRIMARY KEY (segment, sequence)) WITHOUT ROWID")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_report_signatures_day "
+                         "ON report_signatures(day, signed_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_report_signatures_sample_code "
+                         "ON report_signatures(sample_code)")
+            conn.execute("CREATE TABLE IF NOT EXISTS daily_roots "
+                         "(day TEXT PRIMARY KEY, root BLOB NOT NULL, leaves INTEGER NOT NULL, "
+                         "signature BLOB NOT NULL, key_id TEXT NOT NULL, sealed_at REAL NOT NULL)")
+
+    def _seal_stream(self, records, total, workers=None):
+        """
+        Calcula resumo e assinatura de cada laudo, em vários processos se forem muitos.
+
+        Args:
+            records (Iterable[tuple]): (posição, campos) de cada laudo
+            total (int): Quantidade de laudos (decide o uso dos processos)
+            workers (int, optional): Processos. Defaults to os.cpu_count().
+
+        Yields:
+            tuple: (posição, campos, resumo, assinatura), na ordem de records
+        """
+        if total < POOL_THRESHOLD:
+            for location, fields in records:
+                yield (location, fields) + _seal_batch(self._key, [fields])[0]
+            return
+        workers = workers or os.cpu_count() or 1
+        # "spawn": a aplicação Qt tem threads ativas, o que torna o fork inseguro
+        with ProcessPoolExecutor(max_workers=workers,
+                                 mp_context=multiprocessing.get_context("spawn")) as executor:
+            # Mantém no máximo 2 lotes por processo em andamento (memória limitada)
+            pending = deque()
+            batch = []
+            for item in records:
+                batch.append(item)
+                if len(batch) == POOL_BATCH:
+                    pending.append((batch, executor.submit(_seal_batch, self._key, [f for _, f in batch])))
+                    batch = []
+                while len(pending) >= workers * 2:
+                    yield from _drain_one(pending)
+            if batch:
+                pending.append((batch, executor.submit(_seal_batch, self._key, [f for _, f in batch])))
+            while pending:
+                yield from _drain_one(pending)
+
+    # ===== SELAGEM =====
+
+    def last_location(self):
+        """Posição (segmento, sequência) da última versão selada, ou None."""
+        return self.store.connection().execute(
+            "SELECT segment, sequence FROM report_signatures "
+            "ORDER BY segment DESC, sequence DESC LIMIT 1").fetchone()
+
+    def sign_pending(self, workers=None, progress=None, cancelled=None):
+        """
+        Sela as versões do arquivo gravadas depois da última selada.
+
+        Args:
+            workers (int, optional): Processos usados em lotes grandes. Defaults to os.cpu_count().
+            progress (callable, optional): Recebe (versões seladas, total)
+            cancelled (callable, optional): Retorna True para interromper
+
+        Returns:
+            int: Versões seladas
+        """
+        with REGISTRY.histogram(SIGNING_BATCH_SECONDS, "Duração de um lote de selos de integridade").time():
+            last = self.last_location()
+            pending = list(self.store.archive.iter_records(after=tuple(last) if last else None))
+            if not pending or (cancelled and cancelled()):
+                return 0
+            rows = [(location[0], location[1], fields["sample_code"], fields["signed_at"],
+                     _day(fields["signed_at"]), digest, signature, self.key_id)
+                    for location, fields, digest, signature in self._seal_stream(pending, len(pending), workers)]
+            conn = self.store.connection()
+            with conn:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO report_signatures (segment, sequence, sample_code, signed_at, "
+                    "day, content_hash, signature, key_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        if progress:
+            progress(len(rows), len(rows))
+        return len(rows)
+
+    def _day_leaves(self, day):
+        """Selos de um dia, na ordem das folhas: (posição, amostra, resumo, assinatura)."""
+        return [((segment, sequence), sample_code, bytes(digest), bytes(signature))
+                for segment, sequence, sample_code, digest, signature in self.store.connection().execute(
+                    "SELECT segment, sequence, sample_code, content_hash, signature FROM report_signatures "
+                    "WHERE day = ? ORDER BY signed_at, segment, sequence", (day,))]
+
+    def seal_days(self, today=None):
+        """
+        Grava a raiz de Merkle assinada dos dias encerrados ainda sem raiz.
+
+        O dia corrente só é selado depois de terminar.
+
+        Args:
+            today (str, optional): Dia corrente (AAAA-MM-DD). Defaults to hoje.
+
+        Returns:
+            list[str]: Dias selados
+        """
+        today = today or _day(time.time())
+        conn = self.store.connection()
+        days = [row[0] for row in conn.execute(
+            "SELECT DISTINCT day FROM report_signatures WHERE day < ? "
+            "AND day NOT IN (SELECT day FROM daily_roots) ORDER BY day", (today,))]
+        for day in days:
+            leaves = self._day_leaves(day)
+            root = merkle_root([digest for _, _, digest, _ in leaves])
+            with conn:
+                conn.execute("INSERT OR IGNORE INTO daily_roots (day, root, leaves, signature, key_id, sealed_at) "
+                             "VALUES (?, ?, ?, ?, ?, ?)",
+                             (day, root, len(leaves), _sign(self._key, day.encode("ascii") + root),
+                              self.key_id, time.time()))
+        return days
+
+    def sign_and_seal(self, workers=None, progress=None, cancelled=None):
+        """
+        Sela as versões pendentes e, em seguida, os dias encerrados.
+
+        Args:
+            workers (int, optional): Processos usados em lotes grandes
+            progress (callable, optional): Recebe (versões seladas, total)
+            cancelled (callable, optional): Retorna True para interromper
+
+        Returns:
+            tuple[int, list[str]]: (versões seladas, dias selados)
+        """
+        count = self.sign_pending(workers, progress, cancelled)
+        return count, self.seal_days()
+
+    def seal(self, sample_code):
+        """
+        Retorna o selo da versão mais recente de um laudo.
+
+        Args:
+            sample_code (str): Código da amostra
+
+        Returns:
+            dict | None: content_hash (hex), signed_at, day e key_id; None se ainda não selado
+        """
+        row = self.store.connection().execute(
+            "SELECT content_hash, signed_at, day, key_id FROM report_signatures WHERE sample_code = ? "
+            "ORDER BY segment DESC, sequence DESC LIMIT 1", (sample_code,)).fetchone()
+        if row is None:
+            return None
+        return {"content_hash": bytes(row[0]).hex(), "signed_at": row[1], "day": row[2], "key_id": row[3]}
+
+    def daily_root(self, day):
+        """
+        Retorna a raiz de Merkle de um dia selado.
+
+        Args:
+            day (str): Dia (AAAA-MM-DD)
+
+        Returns:
+            dict | None: root (hex), leaves, key_id e sealed_at; None se o dia não foi selado
+        """
+        row = self.store.connection().execute(
+            "SELECT root, leaves, key_id, sealed_at FROM daily_roots WHERE day = ?", (day,)).fetchone()
+        if row is None:
+            return None
+        return {"root": bytes(row[0]).hex(), "leaves": row[1], "key_id": row[2], "sealed_at": row[3]}
+
+    # ===== CONFERÊNCIA =====
+
+    def _check_signature(self, key_used, message, signature):
+        """Confere uma assinatura feita com a chave local."""
+        return key_used == self.key_id and hmac.compare_digest(_sign(self._key, message), signature)
+
+    def verify_day(self, day):
+        """
+        Confere um dia selado em uma única passada.
+
+        Lê os laudos do dia no arquivo, recalcula os resumos, as
+        assinaturas e a raiz de Merkle e compara com os selos gravados.
+
+        Args:
+            day (str): Dia (AAAA-MM-DD)
+
+        Returns:
+            VerificationResult: Resultado da conferência
+        """
+        start = time.perf_counter()
+        result = VerificationResult()
+        conn = self.store.connection()
+        stored = conn.execute("SELECT root, leaves, signature, key_id FROM daily_roots WHERE day = ?",
+                              (day,)).fetchone()
+        leaves = self._day_leaves(day)
+        records = self.store.archive.read_locations([location for location, _, _, _ in leaves])
+        digests = []
+        for (location, sample_code, digest, signature), fields in zip(leaves, records):
+            result.checked += 1
+            if fields is None:
+                result.problems.append((sample_code, f"Versão selada ausente do arquivo {location}"))
+                continue
+            actual = content_hash(fields)
+            digests.append(actual)
+            if actual != digest:
+                result.problems.append((sample_code, "Conteúdo alterado após a assinatura"))
+            elif not hmac.compare_digest(_sign(self._key, digest), signature):
+                result.problems.append((sample_code, "Assinatura inválida"))
+        if stored is None:
+            result.problems.append((day, "Dia ainda não selado"))
+        else:
+            root, count, signature, key_used = stored
+            result.days = 1
+            if count != len(leaves) or merkle_root(digests) != bytes(root):
+                result.problems.append((day, "Raiz de Merkle diferente da selada"))
+            if not self._check_signature(key_used, day.encode("ascii") + bytes(root), bytes(signature)):
+                result.problems.append((day, "Assinatura da raiz inválida"))
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def verify_all(self, workers=None, progress=None, cancelled=None):
+        """
+        Confere todo o arquivo: recalcula os resumos de todas as versões
+        (em vários processos) e as raízes de todos os dias selados.
+
+        Args:
+            workers (int, optional): Processos. Defaults to os.cpu_count().
+            progress (callable, optional): Recebe (laudos conferidos, total)
+            cancelled (callable, optional): Retorna True para interromper
+
+        Returns:
+            VerificationResult: Resultado da conferência (None se cancelada)
+        """
+        start = time.perf_counter()
+        result = VerificationResult()
+        conn = self.store.connection()
+        seals = {(segment, sequence): (sample_code, bytes(digest), bytes(signature), key_used)
+                 for segment, sequence, sample_code, digest, signature, key_used in conn.execute(
+                     "SELECT segment, sequence, sample_code, content_hash, signature, key_id "
+                     "FROM report_signatures")}
+        total = self.store.archive.stats()["versions"]
+        actual = {}
+        records = self.store.archive.iter_records()
+        for done, (location, _, digest, _) in enumerate(self._seal_stream(records, total, workers), 1):
+            actual[location] = digest
+            seal = seals.pop(location, None)
+            if seal is None:
+                result.pending += 1
+            else:
+                sample_code, stored_digest, signature, key_used = seal
+                result.checked += 1
+                if digest != stored_digest:
+                    result.problems.append((sample_code, "Conteúdo alterado após a assinatura"))
+                elif not self._check_signature(key_used, digest, signature):
+                    result.problems.append((sample_code, "Assinatura inválida"))
+            if done % POOL_BATCH == 0:
+                if cancelled and cancelled():
+                    return None
+                if progress:
+                    progress(done, total)
+        for location, (sample_code, _, _, _) in seals.items():
+            result.problems.append((sample_code, f"Versão selada ausente do arquivo {location}"))
+
+        # Raízes diárias, a partir dos resumos recalculados
+        for day, root, count, signature, key_used in conn.execute(
+                "SELECT day, root, leaves, signature, key_id FROM daily_roots ORDER BY day").fetchall():
+            result.days += 1
+            digests = [actual.get(location) for location, _, _, _ in self._day_leaves(day)]
+            if (count != len(digests) or None in digests
+                    or merkle_root(digests) != bytes(root)):
+                result.problems.append((day, "Raiz de Merkle diferente da selada"))
+            if not self._check_signature(key_used, day.encode("ascii") + bytes(root), bytes(signature)):
+                result.problems.append((day, "Assinatura da raiz inválida"))
+        result.seconds = time.perf_counter() - start
+        return result
+
+
+def _drain_one(pending):
+    """Aguarda o lote mais antigo e devolve os seus laudos com resumo e assinatura."""
+    batch, future = pending.popleft()
+    for (location, fields), (digest, signature) in zip(batch, future.result()):
+        yield location, fields, digest, signature
+
+
+def main(argv=None):
+    """Ponto de entrada da linha de comando."""
+    parser = argparse.ArgumentParser(description="Sela e confere a integridade dos laudos assinados.")
+    parser.add_argument("command", choices=("sign", "verify"),
+                        help="sign: sela as versões pendentes e os dias encerrados; verify: confere")
+    parser.add_argument("--day", default=None, help="Confere apenas um dia (AAAA-MM-DD)")
+    parser.add_argument("--workers", type=int, default=None, help="Processos de cálculo dos resumos")
+    args = parser.parse_args(argv)
+
+    ledger = SignatureLedger(ReportStore())
+    if args.command == "sign":
+        count, days = ledger.sign_and_seal(args.workers)
+        print(f"{count} versões seladas; {len(days)} dias selados.")
+        return
+    result = ledger.verify_day(args.day) if args.day else ledger.verify_all(args.workers)
+    print(f"{result.checked} laudos e {result.days} dias conferidos em {result.seconds:.1f} s; "
+          f"{result.pending} versões aguardando selo.")
+    for subject, problem in result.problems:
+        print(f"  {subject}: {problem}")
+    raise SystemExit(0 if result.ok else 1)
+
+
+if __name__ == "__main__":
+    main()
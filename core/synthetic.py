@@ -0,0 +1,515 @@
+"""
+Módulo de dados sintéticos para testes de carga.
+
+Este módulo gera pacientes, amostras e laudos fictícios, mas
+plausíveis: nomes em português, combinações de tecido, local de
+coleta, procedimento, material e meio de conservação comuns na rotina
+de um laboratório de anatomia patológica, história clínica, seções do
+laudo e diagnóstico codificado (CID-10) coerentes com o tecido. Todos
+os campos de PatientRecord são preenchidos. Parte dos casos é de
+pacientes que já têm outras amostras, como na rotina.
+
+Também gera lâminas sintéticas coradas em H&E (fundo claro, estroma
+róseo e núcleos arroxeados), gravadas no diretório de imagens como as
+lâminas anexadas pelo formulário.
+
+Os dados dependem apenas da semente: a mesma semente gera os mesmos
+casos, o que permite repetir um teste de carga.
+
+Classes:
+    SyntheticCase: Caso sintético (registro, seções do laudo e patologista).
+    CaseGenerator: Gerador de casos sintéticos.
+
+Funções:
+    synthetic_tile: Gera um tile de lâmina corado em H&E.
+    write_slide_tiles: Grava lâminas sintéticas no diretório de imagens.
+"""
+
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from .images import import_image
+from .records import PatientRecord, Gender, ProcedureType, MaterialType, PreservationMedium
+
+# Proporção de casos de pacientes que já têm outra amostra
+RETURNING_FRACTION = 0.25
+
+# Pacientes guardados para os casos de retorno (os mais antigos são substituídos)
+PATIENT_POOL_SIZE = 100000
+
+FEMALE_NAMES = (
+    "Maria", "Ana", "Francisca", "Antônia", "Adriana", "Juliana", "Márcia", "Fernanda", "Patrícia",
+    "Aline", "Sandra", "Camila", "Amanda", "Bruna", "Jéssica", "Letícia", "Júlia", "Luciana", "Vanessa",
+    "Mariana", "Gabriela", "Vera", "Vitória", "Larissa", "Cláudia", "Beatriz", "Rita", "Luana", "Sônia",
+    "Renata", "Eliane", "Josefa", "Simone", "Natália", "Cristiane", "Carla", "Débora", "Rosângela",
+)
+MALE_NAMES = (
+    "José", "João", "Antônio", "Francisco", "Carlos", "Paulo", "Pedro", "Lucas", "Luiz", "Marcos",
+    "Luís", "Gabriel", "Rafael", "Daniel", "Marcelo", "Bruno", "Eduardo", "Felipe", "Raimundo",
+    "Rodrigo", "Manoel", "Mateus", "André", "Fernando", "Fábio", "Leonardo", "Gustavo", "Guilherme",
+    "Leandro", "Tiago", "Anderson", "Ricardo", "Márcio", "Jorge", "Sebastião", "Alexandre", "Roberto",
+)
+SURNAMES = (
+    "Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima",
+    "Gomes", "Costa", "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes", "Soares", "Fernandes",
+    "Vieira", "Barbosa", "Rocha", "Dias", "Nascimento", "Andrade", "Moreira", "Nunes", "Marques",
+    "Machado", "Mendes", "Freitas", "Cardoso", "Ramos", "Gonçalves", "Santana", "Teixeira", "Araújo",
+    "Pinto", "Moura", "Cavalcanti", "Monteiro", "Correia", "Batista", "Campos", "Brito", "Farias",
+)
+
+# Perfis de caso: peso relativo, tecido, sexo ("F", "M" ou None), locais de coleta,
+# procedimentos (código, peso), material, meio de conservação, suspeitas clínicas, exames prévios
+# e diagnósticos (peso, código CID-10, conclusão, microscopia)
+_PROFILES = (
+    (18, "Mama", "F", ("Mama direita", "Mama esquerda", "Quadrante superior externo"),
+     ((ProcedureType.BIOPSIA, 6), (ProcedureType.PUNCAO, 1), (ProcedureType.RESSECCAO_CIRURGICA, 3)),
+     MaterialType.TECIDO, PreservationMedium.FORMOL,
+     ("Nódulo palpável em mama", "Lesão suspeita em mamografia de rastreamento", "Microcalcificações agrupadas"),
+     ("Mamografia BI-RADS 4", "Ultrassonografia com nódulo sólido de contornos irregulares",
+      "Mamografia BI-RADS 5"),
+     ((5, "C50.9", "Carcinoma invasivo de tipo não especial (ductal), grau histológico 2 (Nottingham).",
+       "Neoplasia epitelial maligna formando túbulos e ninhos sólidos, com pleomorfismo nuclear moderado "
+       "e {mitoses} mitoses por 10 campos de grande aumento, infiltrando o estroma."),
+      (3, "D24", "Fibroadenoma.",
+       "Proliferação de estroma e ductos com padrão pericanalicular, sem atipias."),
+      (1, "D05.1", "Carcinoma ductal in situ, grau nuclear intermediário.",
+       "Ductos preenchidos por células atípicas com padrão cribriforme e necrose central focal."),
+      (2, "N60.1", "Alterações fibrocísticas.",
+       "Cistos revestidos por epitélio apócrino, fibrose estromal e adenose, sem atipias."))),
+    (16, "Pele", None, ("Dorso", "Face", "Couro cabeludo", "Antebraço direito", "Perna esquerda"),
+     ((ProcedureType.BIOPSIA, 5), (ProcedureType.RESSECCAO_CIRURGICA, 5)),
+     MaterialType.TECIDO, PreservationMedium.FORMOL,
+     ("Lesão pigmentada de bordas irregulares", "Lesão ulcerada de crescimento lento", "Lesão papulosa"),
+     ("Dermatoscopia com rede pigmentar atípica", "Lesão com sangramento ocasional"),
+     ((4, "C44.9", "Carcinoma basocelular, padrão nodular. Margens livres.",
+       "Ninhos de células basaloides com paliçada periférica e retração estromal na derme."),
+      (3, "D22.9", "Nevo melanocítico intradérmico.",
+       "Ninhos de melanócitos névicos na derme, com maturação em profundidade, sem atipias."),
+      (2, "L82", "Ceratose seborreica.",
+       "Acantose com pseudocistos córneos e células basaloides monótonas."),
+      (1, "C43.9", "Melanoma extensivo superficial, índice de Breslow {breslow} mm.",
+       "Proliferação de melanócitos atípicos em ninhos e isolados na junção, com disseminação pagetoide."),
+      (2, "L57.0", "Ceratose actínica.",
+       "Atipia dos queratinócitos das camadas basais, com paraceratose e elastose solar."))),
+    (12, "Estômago", None, ("Antro gástrico", "Corpo gástrico", "Incisura angular"),
+     ((ProcedureType.BIOPSIA, 1),), MaterialType.TECIDO, PreservationMedium.FORMOL,
+     ("Dispepsia", "Epigastralgia", "Pesquisa de Helicobacter pylori"),
+     ("Endoscopia com enantema de antro", "Endoscopia com úlcera de bordas elevadas"),
+     ((7, "K29.5", "Gastrite crônica moderada, ativa, com Helicobacter pylori.",
+       "Mucosa gástrica com infiltrado linfoplasmocitário e neutrófilos na lâmina própria; "
+       "bacilos curvos na superfície."),
+      (1, "C16.9", "Adenocarcinoma de tipo intestinal (Lauren), moderadamente diferenciado.",
+       "Glândulas irregulares revestidas por epitélio colunar atípico, infiltrando a lâmina própria."))),
+    (12, "Cólon", None, ("Cólon sigmoide", "Cólon ascendente", "Cólon transverso", "Reto"),
+     ((ProcedureType.BIOPSIA, 6), (ProcedureType.RESSECCAO_CIRURGICA, 1)),
+     MaterialType.TECIDO, PreservationMedium.FORMOL,
+     ("Pólipo em colonoscopia de rastreamento", "Alteração do hábito intestinal", "Sangramento retal"),
+     ("Colonoscopia com pólipo séssil de {size} mm", "Sangue oculto nas fezes positivo"),
+     ((4, "D12.6", "Adenoma tubular com displasia de baixo grau.",
+       "Glândulas tubulares com núcleos alongados e pseudoestratificados, sem invasão."),
+      (3, "K63.5", "Pólipo hiperplásico.",
+       "Criptas alongadas com luz serrilhada na superfície, sem displasia."),
+      (1, "C18.9", "Adenocarcinoma moderadamente diferenciado, invasivo até a subserosa.",
+       "Glândulas atípicas com necrose suja, infiltrando a muscular própria e a subserosa."))),
+    (8, "Colo do útero", "F", ("Colo uterino", "Junção escamocolunar"),
+     ((ProcedureType.BIOPSIA, 4), (ProcedureType.RESSECCAO_CIRURGICA, 1)),
+     MaterialType.TECIDO, PreservationMedium.FORMOL,
+     ("Colpocitologia alterada", "Lesão acetobranca em colposcopia"),
+     ("Citologia com lesão intraepitelial de alto grau", "Colposcopia com mosaico grosseiro"),
+     ((4, "N87.9", "Neoplasia intraepitelial cervical grau 2 (NIC 2).",
+       "Epitélio escamoso com atipias nos dois terços inferiores e coilócitos."),
+      (2, "D06.9", "Neoplasia intraepitelial cervical grau 3 (NIC 3 / carcinoma in situ).",
+       "Atipias em toda a espessura do epitélio, sem invasão do estroma."),
+      (1, "C53.9", "Carcinoma epidermoide invasivo.",
+       "Ninhos de células escamosas atípicas com queratinização, invadindo o estroma."))),
+    (7, "Tireoide", None, ("Lobo direito da tireoide", "Lobo esquerdo da tireoide", "Istmo"),
+     ((ProcedureType.PUNCAO, 3), (ProcedureType.RESSECCAO_CIRURGICA, 1)),
+     MaterialType.CITOLOGIA, PreservationMedium.FIXADOR_ESPECIAL,
+     ("Nódulo tireoidiano", "Bócio multinodular"),
+     ("Ultrassonografia TI-RADS 4", "Ultrassonografia com nódulo de {size} mm"),
+     ((5, "E04.1", "Nódulo coloide benigno (Bethesda II).",
+       "Esfregaços com coloide abundante e células foliculares em monocamada, sem atipias."),
+      (1, "E06.3", "Tireoidite linfocítica crônica (Hashimoto).",
+       "Linfócitos em meio a células de Hürthle, com centros germinativos."),
+      (1, "C73", "Carcinoma papilífero (Bethesda VI).",
+       "Células com núcleos em vidro fosco, fendas e pseudoinclusões nucleares."))),
+    (7, "Próstata", "M", ("Lobo direito da próstata", "Lobo esquerdo da próstata"),
+     ((ProcedureType.BIOPSIA, 1),), MaterialType.TECIDO, PreservationMedium.FORMOL,
+     ("PSA elevado", "Toque retal com nódulo endurecido"),
+     ("PSA total de {psa} ng/mL", "Ressonância PI-RADS 4"),
+     ((3, "N40", "Hiperplasia nodular da próstata.",
+       "Proliferação de glândulas e estroma, com dupla camada celular preservada."),
+      (2, "C61", "Adenocarcinoma acinar, Gleason 3 + 4 = 7 (grupo de grau 2).",
+       "Glândulas pequenas e fundidas, com nucléolos proeminentes e ausência de células basais."))),
+    (6, "Vesícula biliar", None, ("Vesícula biliar",),
+     ((ProcedureType.RESSECCAO_CIRURGICA, 1),), MaterialType.TECIDO, PreservationMedium.FORMOL,
+     ("Colelitíase sintomática", "Cólica biliar de repetição"),
+     ("Ultrassonografia com cálculos de até {size} mm",),
+     ((5, "K81.1", "Colecistite crônica calculosa.",
+       "Parede espessada com fibrose, infiltrado linfocitário e seios de Rokitansky-Aschoff."),
+      (1, "K80.2", "Colelitíase sem colecistite.",
+       "Mucosa preservada, sem inflamação significativa."))),
+    (4, "Apêndice cecal", None, ("Apêndice cecal",),
+     ((ProcedureType.RESSECCAO_CIRURGICA, 1),), MaterialType.TECIDO, PreservationMedium.FORMOL,
+     ("Dor em fossa ilíaca direita", "Abdome agudo"),
+     ("Leucocitose", "Tomografia com apêndice espessado"),
+     ((1, "K35.8", "Apendicite aguda supurativa.",
+       "Infiltrado neutrofílico transmural, com necrose focal da mucosa e periapendicite."),)),
+    (6, "Endométrio", "F", ("Cavidade uterina", "Útero"),
+     ((ProcedureType.BIOPSIA, 3), (ProcedureType.OUTRO, 2), (ProcedureType.RESSECCAO_CIRURGICA, 1)),
+     MaterialType.TECIDO, PreservationMedium.FORMOL,
+     ("Sangramento uterino anormal", "Sangramento pós-menopausa", "Espessamento endometrial"),
+     ("Ultrassonografia com endométrio de {size} mm",),
+     ((3, "N84.0", "Pólipo endometrial.",
+       "Fragmento polipoide com glândulas irregulares e estroma fibroso com vasos de parede espessa."),
+      (2, "D25.9", "Leiomioma.",
+       "Feixes entrelaçados de células musculares lisas, sem atipias nem necrose."),
+      (1, "C54.1", "Adenocarcinoma endometrioide, grau 1 (FIGO).",
+       "Glândulas confluentes com atipia nuclear leve e áreas sólidas inferiores a 5%."))),
+    (4, "Líquido cavitário", None, ("Hemitórax direito", "Hemitórax esquerdo", "Cavidade abdominal"),
+     ((ProcedureType.PUNCAO, 1),), MaterialType.LIQUIDO, PreservationMedium.FRESCO,
+     ("Derrame pleural a esclarecer", "Ascite volumosa"),
+     ("Radiografia com derrame volumoso", "Emagrecimento de {weight} kg em 6 meses"),
+     ((3, "", "Negativo para células neoplásicas.",
+       "Células mesoteliais reativas, macrófagos e linfócitos."),
+      (1, "D48.9", "Positivo para células neoplásicas: adenocarcinoma metastático.",
+       "Agrupamentos tridimensionais de células epiteliais atípicas com vacúolos citoplasmáticos."))),
+    (2, "Linfonodo", None, ("Região cervical", "Região axilar", "Região inguinal"),
+     ((ProcedureType.RESSECCAO_CIRURGICA, 2), (ProcedureType.PUNCAO, 1)),
+     MaterialType.OUTRO, PreservationMedium.FORMOL,
+     ("Linfonodomegalia persistente", "Febre e sudorese noturna"),
+     ("Tomografia com conglomerado linfonodal",),
+     ((3, "", "Linfadenite reativa.",
+       "Hiperplasia folicular com centros germinativos reativos e histiócitos nos seios."),
+      (1, "C85.9", "Linfoma não Hodgkin; imuno-histoquímica em andamento.",
+       "Apagamento da arquitetura por proliferação difusa de células linfoides atípicas."))),
+)
+
+# Procedimento e material especificados quando a opção é "Outro"
+_PROCEDURE_OTHER = ("Curetagem uterina", "Histeroscopia", "Aspiração endometrial")
+_MATERIAL_OTHER = ("Linfonodo", "Peça com linfonodos", "Fragmento de linfonodo")
+
+_COLORS = ("pardacento", "esbranquiçado", "acastanhado", "amarelado", "róseo")
+_CONSISTENCIES = ("elástica", "firme", "amolecida", "fibroelástica")
+_LIQUID_ASPECTS = ("citrino", "turvo", "hemorrágico")
+
+
+class SyntheticCase:
+    """
+    Caso sintético.
+
+    Attributes:
+        record (PatientRecord): Dados do paciente e amostra
+        macroscopy (str): Descrição macroscópica
+        microscopy (str): Descrição microscópica
+        diagnosis (str): Conclusão diagnóstica
+        diagnosis_system (str): Sistema de codificação ("" se não codificado)
+        diagnosis_code (str): Código do diagnóstico ("" se não codificado)
+        pathologist (str): Usuário que emite o laudo
+    """
+
+    __slots__ = ("record", "macroscopy", "microscopy", "diagnosis", "diagnosis_system",
+                 "diagnosis_code", "pathologist")
+
+    def __init__(self, record, macroscopy, microscopy, diagnosis, diagnosis_system, diagnosis_code,
+                 pathologist):
+        self.record = record
+        self.macroscopy = macroscopy
+        self.microscopy = microscopy
+        self.diagnosis = diagnosis
+        self.diagnosis_system = diagnosis_system
+        self.diagnosis_code = diagnosis_code
+        self.pathologist = pathologist
+
+    def __repr__(self):
+        return f"SyntheticCase(sample_code={self.record.sample_code!r})"
+
+    def save(self, store):
+        """
+        Grava o caso como laudo.
+
+        Args:
+            store (ReportStore): Armazenamento de laudos
+
+        Returns:
+            Report: Laudo gravado
+        """
+        return store.save_report(self.record, self.macroscopy, self.microscopy, self.diagnosis,
+                                 self.pathologist, self.diagnosis_system, self.diagnosis_code)
+
+
+class CaseGenerator:
+    """
+    Gerador de casos sintéticos.
+
+    Attributes:
+        seed (int): Semente dos dados
+        pathologists (tuple[str]): Usuários que emitem os laudos
+        slide_images (tuple[str]): Lâminas importadas, sorteadas entre os casos
+        year (int): Ano dos códigos de amostra e das coletas
+        first_sequence (int): Número da primeira amostra gerada
+    """
+
+    def __init__(self, seed=0, pathologists=("ana", "bruno", "carla", "diego", "elisa"),
+                 slide_images=(), year=None, first_sequence=1):
+        """
+        Inicializa o gerador.
+
+        Args:
+            seed (int, optional): Semente dos dados. Defaults to 0.
+            pathologists (Sequence[str], optional): Usuários que emitem os laudos
+            slide_images (Sequence[str], optional): Lâminas importadas (ver write_slide_tiles);
+                sem lâminas, os casos não têm imagem
+            year (int, optional): Ano das amostras. Defaults to o ano atual.
+            first_sequence (int, optional): Número da primeira amostra (para continuar
+                um banco já povoado sem regravar as amostras existentes). Defaults to 1.
+        """
+        self.seed = seed
+        self.pathologists = tuple(pathologists)
+        self.slide_images = tuple(slide_images)
+        self.year = year or time.localtime().tm_year
+        self.first_sequence = first_sequence
+        self._random = random.Random(seed)
+        self._weights = [profile[0] for profile in _PROFILES]
+        self._patients = []
+        self._patient_count = 0
+        self._sequence = first_sequence - 1
+
+    def _patient(self):
+        """Sorteia um paciente novo ou, às vezes, um que já tem outra amostra."""
+        rng = self._random
+        if self._patients and rng.random() < RETURNING_FRACTION:
+            return rng.choice(self._patients)
+        gender = rng.choice((Gender.FEMININO, Gender.MASCULINO, Gender.FEMININO, Gender.MASCULINO,
+                             Gender.OUTRO) if rng.random() < 0.02 else (Gender.FEMININO, Gender.MASCULINO))
+        first = FEMALE_NAMES if gender == Gender.FEMININO else MALE_NAMES
+        names = [rng.choice(first)]
+        if rng.random() < 0.4:
+            names.append(rng.choice(first))
+        names += rng.sample(SURNAMES, rng.choice((1, 2, 2, 3)))
+        birth_year = rng.randint(self.year - 90, self.year - 18)
+        patient = (" ".join(names), gender, f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{birth_year}",
+                   self.year - birth_year, f"{rng.randint(1, 9)}{self.first_sequence + self._patient_count:07d}")
+        self._patient_count += 1
+        if len(self._patients) < PATIENT_POOL_SIZE:
+            self._patients.append(patient)
+        else:
+            self._patients[rng.randrange(PATIENT_POOL_SIZE)] = patient
+        return patient
+
+    def case(self):
+        """
+        Gera o próximo caso.
+
+        Returns:
+            SyntheticCase: Caso gerado
+        """
+        rng = self._random
+        profile = rng.choices(_PROFILES, self._weights)[0]
+        _, tissue, sex, sites, procedures, material, medium, suspicions, exams, diagnoses = profile
+        name, gender, birth_date, age, record_number = self._patient()
+        # Perfis restritos a um sexo sorteiam outro paciente quando o primeiro não serve
+        while sex and gender != (Gender.FEMININO if sex == "F" else Gender.MASCULINO):
+            name, gender, birth_date, age, record_number = self._patient()
+        procedure = rng.choices([code for code, _ in procedures], [weight for _, weight in procedures])[0]
+        if material == MaterialType.TECIDO and procedure == ProcedureType.PUNCAO:
+            material, medium = MaterialType.CITOLOGIA, PreservationMedium.FIXADOR_ESPECIAL
+        elif material == MaterialType.CITOLOGIA and procedure == ProcedureType.RESSECCAO_CIRURGICA:
+            material, medium = MaterialType.TECIDO, PreservationMedium.FORMOL
+        _, code, diagnosis, microscopy = rng.choices(diagnoses, [item[0] for item in diagnoses])[0]
+        values = {"size": rng.randint(4, 35), "psa": f"{rng.uniform(4, 30):.1f}".replace(".", ","),
+                  "weight": rng.randint(3, 15), "mitoses": rng.randint(2, 20),
+                  "breslow": f"{rng.uniform(0.2, 3.5):.1f}".replace(".", ",")}
+
+        self._sequence += 1
+        collected = time.time() - rng.uniform(0, 30 * 86400)
+        surgical = procedure == ProcedureType.RESSECCAO_CIRURGICA
+        measurement = weight_text = ""
+        if material in (MaterialType.TECIDO, MaterialType.OUTRO):
+            length, width = sorted((rng.uniform(0.2, 12 if surgical else 2), rng.uniform(0.1, 8 if surgical else 1)),
+                                   reverse=True)
+            measurement = f"{length:.1f} x {width:.1f} cm (área {length * width * 0.8:.1f} cm²)"
+            weight_text = f"{rng.uniform(5, 400) if surgical else rng.uniform(0.01, 2):.2f} g"
+        record = PatientRecord(
+            patient_name=name,
+            birth_date=birth_date,
+            gender=gender,
+            record_number=record_number,
+            sample_code=f"AP{self.year % 100:02d}-{self._sequence:06d}",
+            clinical_suspicion=rng.choice(suspicions),
+            collection_site=rng.choice(sites),
+            procedure_type=procedure,
+            procedure_other=rng.choice(_PROCEDURE_OTHER) if procedure == ProcedureType.OUTRO else "",
+            clinical_history=self._history(age, gender, rng.choice(exams).format(**values)),
+            material_type=material,
+            material_other=rng.choice(_MATERIAL_OTHER) if material == MaterialType.OUTRO else "",
+            sample_quantity=self._quantity(material, surgical),
+            preservation_medium=medium,
+            collection_datetime=time.strftime("%d/%m/%Y %H:%M", time.localtime(collected)),
+            tissue_type=tissue,
+            tissue_measurement=measurement,
+            tissue_weight=weight_text,
+            slide_image=rng.choice(self.slide_images) if self.slide_images else "",
+        )
+        return SyntheticCase(record, self._macroscopy(tissue, material, surgical),
+                             microscopy.format(**values), diagnosis.format(**values),
+                             "CID-10" if code else "", code, rng.choice(self.pathologists))
+
+    def cases(self, count):
+        """
+        Gera uma sequência de casos.
+
+        Args:
+            count (int): Quantidade de casos
+
+        Yields:
+            SyntheticCase: Casos, um por vez
+        """
+        for _ in range(count):
+            yield self.case()
+
+    def amend(self, case):
+        """
+        Gera uma retificação de um caso (adendo ou diagnóstico corrigido).
+
+        Args:
+            case (SyntheticCase): Caso original
+
+        Returns:
+            SyntheticCase: Caso com as seções alteradas (mesmo registro)
+        """
+        rng = self._random
+        diagnosis, microscopy = case.diagnosis, case.microscopy
+        if rng.random() < 0.5:
+            diagnosis += rng.choice((" Adendo: imuno-histoquímica concordante com o diagnóstico.",
+                                     " Adendo: revisão de lâminas sem alteração do diagnóstico.",
+                                     " Adendo: margens cirúrgicas reavaliadas, livres."))
+        else:
+            microscopy += rng.choice((" Cortes adicionais sem achados novos.",
+                                      " Níveis adicionais confirmam os achados.",
+                                      " Colorações especiais negativas para microrganismos."))
+        return SyntheticCase(case.record, case.macroscopy, microscopy, diagnosis, case.diagnosis_system,
+                             case.diagnosis_code, case.pathologist)
+
+    def _history(self, age, gender, exam):
+        """História clínica em texto livre."""
+        rng = self._random
+        patient = "Paciente do sexo feminino" if gender == Gender.FEMININO else "Paciente"
+        parts = [f"{patient}, {age} anos.", f"{exam}."]
+        if rng.random() < 0.4:
+            parts.append(rng.choice(("Hipertensa em uso de losartana.", "Diabético tipo 2.",
+                                     "Tabagista, 30 anos-maço.", "Sem comorbidades.",
+                                     "Nega antecedentes familiares de câncer.",
+                                     "Mãe com neoplasia de mama aos 50 anos.")))
+        if rng.random() < 0.3:
+            parts.append(f"Encaminhado(a) pelo(a) Dr(a). {rng.choice(FEMALE_NAMES + MALE_NAMES)} "
+                         f"{rng.choice(SURNAMES)}.")
+        if rng.random() < 0.2:
+            parts.append(f"Exame anterior em {rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/"
+                         f"{self.year - rng.randint(1, 5)} sem alterações.")
+        return " ".join(parts)
+
+    def _quantity(self, material, surgical):
+        """Quantidade e integridade do material recebido."""
+        rng = self._random
+        if material == MaterialType.LIQUIDO:
+            return f"{rng.randint(20, 500)} mL, frasco íntegro"
+        if material == MaterialType.CITOLOGIA:
+            return f"{rng.randint(2, 6)} lâminas, íntegras"
+        if surgical:
+            return "1 peça cirúrgica, íntegra"
+        return f"{rng.randint(1, 8)} fragmentos, íntegros"
+
+    def _macroscopy(self, tissue, material, surgical):
+        """Descrição macroscópica."""
+        rng = self._random
+        if material == MaterialType.LIQUIDO:
+            return f"Recebidos {rng.randint(20, 500)} mL de líquido {rng.choice(_LIQUID_ASPECTS)}."
+        if material == MaterialType.CITOLOGIA:
+            return f"Recebidas {rng.randint(2, 6)} lâminas de esfregaço, fixadas em álcool."
+        a, b, c = sorted((rng.uniform(0.1, 12 if surgical else 1.5) for _ in range(3)), reverse=True)
+        size = f"{a:.1f} x {b:.1f} x {c:.1f} cm".replace(".", ",")
+        if surgical:
+            lesion = f"{rng.uniform(0.3, 4):.1f}".replace(".", ",")
+            return (f"Peça cirúrgica ({tissue.lower() or 'tecido'}) medindo {size}, de coloração "
+                    f"{rng.choice(_COLORS)} e consistência {rng.choice(_CONSISTENCIES)}. Aos cortes, "
+                    f"lesão {rng.choice(_COLORS)} medindo {lesion} cm. "
+                    f"Representada em {rng.randint(3, 12)} blocos.")
+        return (f"Recebidos {rng.randint(1, 8)} fragmentos de tecido {rng.choice(_COLORS)}, de "
+                f"consistência {rng.choice(_CONSISTENCIES)}, medindo em conjunto {size}. "
+                f"Incluídos integralmente em {rng.randint(1, 3)} bloco(s).")
+
+
+def synthetic_tile(size=512, seed=0):
+    """
+    Gera um tile de lâmina corado em H&E.
+
+    O tecido ocupa uma região irregular sobre o fundo claro, com estroma
+    róseo (eosina) e núcleos arroxeados (hematoxilina) de tamanhos e
+    densidade variáveis.
+
+    Args:
+        size (int, optional): Lado do tile, em pixels. Defaults to 512.
+        seed (int, optional): Semente. Defaults to 0.
+
+    Returns:
+        numpy.ndarray: Imagem RGB (size x size x 3, uint8)
+    """
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:size, 0:size] / size
+    # Contorno do tecido: círculo deformado por algumas ondas de fase aleatória
+    angle = np.arctan2(y - 0.5, x - 0.5)
+    radius = 0.38 + sum(rng.uniform(0.01, 0.05) * np.sin(k * angle + rng.uniform(0, 2 * np.pi))
+                        for k in range(2, 6))
+    tissue = np.hypot(y - 0.5, x - 0.5) < radius
+    rgb = np.empty((size, size, 3), dtype=np.float32)
+    rgb[:] = (242, 240, 244)
+    stroma = np.array((226, 150, 196), dtype=np.float32) + rng.uniform(-15, 15, 3)
+    rgb[tissue] = stroma
+    # Núcleos: discos pequenos, agrupados em parte em torno de alguns centros
+    count = int(size * size * rng.uniform(0.002, 0.006))
+    centers = rng.uniform(0.2, 0.8, size=(rng.integers(2, 6), 2)) * size
+    clustered = centers[rng.integers(0, len(centers), count // 2)] + rng.normal(0, size * 0.06, (count // 2, 2))
+    nuclei = np.vstack([clustered, rng.uniform(0, size, (count - count // 2, 2))]).astype(int)
+    nucleus = np.array((92, 62, 150), dtype=np.float32)
+    for cy, cx in nuclei:
+        r = int(rng.integers(2, 5))
+        y0, y1, x0, x1 = max(cy - r, 0), min(cy + r + 1, size), max(cx - r, 0), min(cx + r + 1, size)
+        if y0 >= y1 or x0 >= x1:
+            continue
+        disk = ((np.arange(y0, y1)[:, None] - cy) ** 2 + (np.arange(x0, x1)[None, :] - cx) ** 2) <= r * r
+        disk &= tissue[y0:y1, x0:x1]
+        rgb[y0:y1, x0:x1][disk] = nucleus
+    rgb += rng.normal(0, 6, rgb.shape)
+    return np.clip(rgb, 0, 255).astype(np.uint8)
+
+
+def write_slide_tiles(count, size=512, seed=0, extension=".png"):
+    """
+    Grava lâminas sintéticas e as importa para o diretório de imagens.
+
+    Args:
+        count (int): Quantidade de lâminas
+        size (int, optional): Lado de cada lâmina, em pixels. Defaults to 512.
+        seed (int, optional): Semente da primeira lâmina. Defaults to 0.
+        extension (str, optional): Formato do arquivo. Defaults to ".png".
+
+    Returns:
+        list[str]: Nomes das imagens importadas (para PatientRecord.slide_image)
+    """
+    from PyQt5.QtGui import QImage
+
+    names = []
+    with tempfile.TemporaryDirectory() as temp:
+        for index in range(count):
+            rgb = np.ascontiguousarray(synthetic_tile(size, seed + index))
+            image = QImage(rgb.data, size, size, 3 * size, QImage.Format_RGB888)
+            path = os.path.join(temp, f"lamina{index}{extension}")
+            if not image.save(path):
+                raise ValueError(f"Não foi possível gravar a lâmina sintética {path}")
+            names.append(import_image(path))
+    return names
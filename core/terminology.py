@@ -0,0 +1,608 @@
+"""
+Módulo de terminologia para codificação do diagnóstico.
+
+Este módulo contém o índice de busca dos conceitos de uma terminologia
+local (subconjunto da CID-10 e da SNOMED-CT) usado para codificar a
+conclusão diagnóstica. A busca tolera acentos e erros de digitação:
+
+- cada termo é normalizado (minúsculas, sem acentos nem pontuação);
+- um índice de trigramas (listas de postagem em formato CSR) mede a
+  semelhança entre a consulta e cada termo (coeficiente de Jaccard);
+- um índice de prefixos (palavras ordenadas, busca binária) favorece
+  os termos cujas palavras começam pelas palavras digitadas, inclusive
+  o código (ex.: "c50" encontra C50.9).
+
+A terminologia é um arquivo TSV em UTF-8 com as colunas sistema,
+código e descrição; linhas com o mesmo sistema e código são sinônimos
+do conceito. Sem arquivo, é usado um subconjunto de referência da
+CID-10. O índice construído é gravado em disco como arquivos .npy,
+identificado pelo hash do arquivo de origem, e reaberto mapeado em
+memória nas execuções seguintes, sem reconstrução.
+
+Classes:
+    TermMatch: Conceito encontrado na busca.
+    TerminologyIndex: Índice de trigramas e prefixos dos conceitos.
+
+Funções:
+    normalize: Normaliza um texto para a busca.
+    read_terminology: Lê um arquivo de terminologia.
+    benchmark: Mede a construção e as buscas com uma terminologia sintética.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+import unicodedata
+
+import numpy as np
+
+# Versão do formato do índice em disco; alterá-la força a reconstrução
+INDEX_VERSION = 1
+
+# Quantidade de conceitos retornados por padrão
+TOP_K = 10
+
+# Peso das palavras encontradas por prefixo na pontuação (o Jaccard dos trigramas vai de 0 a 1)
+PREFIX_WEIGHT = 0.5
+
+# Pontuação mínima de um conceito para aparecer nos resultados
+MIN_SCORE = 0.2
+
+# Bytes guardados de cada palavra no índice de prefixos
+WORD_BYTES = 24
+
+# Sistemas de codificação e as suas URIs (FHIR)
+SYSTEM_URIS = {
+    "CID-10": "http://www.saude.gov.br/fhir/r4/CodeSystem/BRCID10",
+    "SNOMED-CT": "http://snomed.info/sct",
+}
+
+# Subconjunto de referência da CID-10 (diagnósticos frequentes em anatomia patológica)
+REFERENCE_TERMS = (
+    ("CID-10", "C15.9", "Neoplasia maligna do esôfago, não especificado"),
+    ("CID-10", "C16.9", "Neoplasia maligna do estômago, não especificado"),
+    ("CID-10", "C18.9", "Neoplasia maligna do cólon, não especificado"),
+    ("CID-10", "C20", "Neoplasia maligna do reto"),
+    ("CID-10", "C22.0", "Carcinoma de células hepáticas"),
+    ("CID-10", "C25.9", "Neoplasia maligna do pâncreas, não especificado"),
+    ("CID-10", "C34.9", "Neoplasia maligna dos brônquios ou pulmões, não especificado"),
+    ("CID-10", "C43.9", "Melanoma maligno de pele, não especificado"),
+    ("CID-10", "C44.9", "Neoplasia maligna da pele, não especificada"),
+    ("CID-10", "C50.9", "Neoplasia maligna da mama, não especificada"),
+    ("CID-10", "C53.9", "Neoplasia maligna do colo do útero, não especificado"),
+    ("CID-10", "C54.1", "Neoplasia maligna do endométrio"),
+    ("CID-10", "C56", "Neoplasia maligna do ovário"),
+    ("CID-10", "C61", "Neoplasia maligna da próstata"),
+    ("CID-10", "C64", "Neoplasia maligna do rim, exceto pelve renal"),
+    ("CID-10", "C67.9", "Neoplasia maligna da bexiga, não especificada"),
+    ("CID-10", "C73", "Neoplasia maligna da glândula tireoide"),
+    ("CID-10", "C85.9", "Linfoma não-Hodgkin de tipo não especificado"),
+    ("CID-10", "D05.1", "Carcinoma intraductal in situ da mama"),
+    ("CID-10", "D06.9", "Carcinoma in situ do colo do útero, não especificado"),
+    ("CID-10", "D12.6", "Neoplasia benigna do cólon, não especificada"),
+    ("CID-10", "D17.9", "Neoplasia lipomatosa benigna de localização não especificada"),
+    ("CID-10", "D17.9", "Lipoma"),
+    ("CID-10", "D22.9", "Nevo melanocítico, não especificado"),
+    ("CID-10", "D23.9", "Neoplasia benigna da pele, de localização não especificada"),
+    ("CID-10", "D24", "Neoplasia benigna da mama"),
+    ("CID-10", "D24", "Fibroadenoma da mama"),
+    ("CID-10", "D25.9", "Leiomioma do útero, sem outra especificação"),
+    ("CID-10", "D34", "Neoplasia benigna da glândula tireoide"),
+    ("CID-10", "D48.9", "Neoplasia de comportamento incerto ou desconhecido, não especificada"),
+    ("CID-10", "E04.1", "Nódulo tireoidiano solitário não-tóxico"),
+    ("CID-10", "E06.3", "Tireoidite autoimune"),
+    ("CID-10", "K22.7", "Esôfago de Barrett"),
+    ("CID-10", "K29.5", "Gastrite crônica, sem outra especificação"),
+    ("CID-10", "K29.7", "Gastrite não especificada"),
+    ("CID-10", "K35.8", "Apendicite aguda, outras e as não especificadas"),
+    ("CID-10", "K63.5", "Pólipo do cólon"),
+    ("CID-10", "K74.6", "Outras formas de cirrose hepática e as não especificadas"),
+    ("CID-10", "K76.0", "Degeneração gordurosa do fígado não classificada em outra parte"),
+    ("CID-10", "K80.2", "Calculose da vesícula biliar sem colecistite"),
+    ("CID-10", "K81.1", "Colecistite crônica"),
+    ("CID-10", "L57.0", "Ceratose actínica"),
+    ("CID-10", "L82", "Ceratose seborreica"),
+    ("CID-10", "N40", "Hiperplasia da próstata"),
+    ("CID-10", "N60.1", "Mastopatia cística difusa"),
+    ("CID-10", "N84.0", "Pólipo do corpo do útero"),
+    ("CID-10", "N87.9", "Displasia do colo do útero, não especificada"),
+)
+
+_NON_WORD = re.compile(r"[\W_]+")
+_COMBINING = re.compile("[\u0300-\u036f]")  # acentos e cedilha, separados da letra pelo NFKD
+
+# Arquivos do índice em disco
+_ARRAYS = ("trigram_keys", "trigram_starts", "postings", "entry_trigrams", "entry_concept",
+           "word_keys", "word_entries", "text", "text_offsets")
+
+
+def normalize(text):
+    """
+    Normaliza um texto para a busca: minúsculas, sem acentos e sem pontuação.
+
+    Args:
+        text (str): Texto original
+
+    Returns:
+        str: Palavras normalizadas separadas por um espaço
+    """
+    stripped = _COMBINING.sub("", unicodedata.normalize("NFKD", text.casefold()))
+    return _NON_WORD.sub(" ", stripped).strip()
+
+
+def _code_word(code):
+    """Forma compacta de um código, indexada como palavra (ex.: C50.9 -> c509)."""
+    return normalize(code).replace(" ", "")
+
+
+def _trigrams(words, open_end=False):
+    """
+    Calcula os trigramas de uma lista de palavras, codificados como inteiros.
+
+    Cada palavra é cercada por espaços; com open_end, a última palavra
+    não recebe o espaço final (palavra ainda sendo digitada).
+
+    Returns:
+        np.ndarray: Códigos dos trigramas (int64, sem repetição)
+    """
+    codes = []
+    for i, word in enumerate(words):
+        padded = f" {word}" if open_end and i == len(words) - 1 else f" {word} "
+        points = [ord(char) for char in padded]
+        codes.extend((a << 42) | (b << 21) | c for a, b, c in zip(points, points[1:], points[2:]))
+    return np.unique(np.array(codes, dtype=np.int64))
+
+
+def read_terminology(path):
+    """
+    Lê um arquivo de terminologia (TSV: sistema, código, descrição).
+
+    Linhas vazias, comentários (#) e o cabeçalho são ignorados.
+
+    Args:
+        path (str): Caminho do arquivo
+
+    Returns:
+        list[tuple]: (sistema, código, descrição) de cada linha
+
+    Raises:
+        ValueError: Se uma linha não tiver as três colunas
+    """
+    terms = []
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            line = line.rstrip("\n\r")
+            if not line.strip() or line.startswith("#"):
+                continue
+            columns = line.split("\t")
+            if len(columns) < 3:
+                raise ValueError(f"Linha {number} de {path}: esperadas as colunas sistema, código e descrição")
+            if number == 1 and columns[0].strip().lower() == "sistema":
+                continue
+            terms.append(tuple(column.strip() for column in columns[:3]))
+    return terms
+
+
+class TermMatch:
+    """
+    Conceito encontrado na busca.
+
+    Attributes:
+        system (str): Sistema de codificação (ex.: "CID-10")
+        code (str): Código do conceito
+        display (str): Descrição preferida do conceito
+        score (float): Pontuação da busca (maior é melhor)
+    """
+
+    __slots__ = ("system", "code", "display", "score")
+
+    def __init__(self, system, code, display, score=0.0):
+        self.system = system
+        self.code = code
+        self.display = display
+        self.score = score
+
+    def __repr__(self):
+        return f"TermMatch({self.system!r}, {self.code!r}, {self.display!r}, score={self.score:.2f})"
+
+
+class TerminologyIndex:
+    """
+    Índice de trigramas e prefixos dos conceitos de uma terminologia.
+
+    Cada termo (descrição ou sinônimo) é uma entrada, associada ao seu
+    conceito. Todas as estruturas são arrays NumPy, gravados em disco
+    e reabertos mapeados em memória (ver open).
+
+    Attributes:
+        concepts (int): Quantidade de conceitos
+        entries (int): Quantidade de termos indexados
+        source (str): Arquivo de origem ("" para o subconjunto de referência)
+        build_seconds (float): Tempo de construção (0 se lido do disco)
+    """
+
+    def __init__(self, arrays, source="", build_seconds=0.0):
+        """
+        Cria o índice a partir dos arrays já construídos (ver build e load).
+
+        Args:
+            arrays (dict): Arrays do índice, por nome
+            source (str, optional): Arquivo de origem
+            build_seconds (float, optional): Tempo de construção
+        """
+        for name in _ARRAYS:
+            setattr(self, f"_{name}", arrays[name])
+        self.concepts = (len(self._text_offsets) - 1) // 3
+        self.entries = len(self._entry_concept)
+        self.source = source
+        self.build_seconds = build_seconds
+
+    def __len__(self):
+        return self.concepts
+
+    @classmethod
+    def build(cls, terms, source=""):
+        """
+        Constrói o índice a partir dos termos da terminologia.
+
+        Args:
+            terms (Iterable[tuple]): (sistema, código, descrição); termos com o
+                mesmo sistema e código são sinônimos
+            source (str, optional): Arquivo de origem
+
+        Returns:
+            TerminologyIndex: Índice construído
+        """
+        start = time.perf_counter()
+        concept_ids = {}
+        texts = []
+        entry_concept = []
+        entry_words = []
+        for system, code, display in terms:
+            key = (system, code)
+            concept = concept_ids.get(key)
+            if concept is None:
+                concept = concept_ids[key] = len(concept_ids)
+                texts += [system, code, display]
+            words = normalize(display).split()
+            code_word = _code_word(code)
+            if code_word:
+                words.append(code_word)
+            entry_concept.append(concept)
+            entry_words.append(list(dict.fromkeys(words)))
+
+        # Trigramas de todas as entradas de uma vez: cada palavra vira " palavra ",
+        # separada da seguinte por \0; trigramas com \0 são descartados
+        word_entry = np.repeat(np.arange(len(entry_words), dtype=np.int32),
+                               [len(words) for words in entry_words])
+        flat_words = [word for words in entry_words for word in words]
+        joined = "".join(f" {word} \0" for word in flat_words)
+        points = np.frombuffer(joined.encode("utf-32-le"), dtype=np.uint32).astype(np.int64)
+        char_entry = np.repeat(word_entry, [len(word) + 3 for word in flat_words])
+        codes = (points[:-2] << 42) | (points[1:-1] << 21) | points[2:]
+        valid = (points[:-2] != 0) & (points[1:-1] != 0) & (points[2:] != 0)
+        codes, owners = codes[valid], char_entry[:-2][valid]
+        order = np.lexsort((owners, codes))
+        codes, owners = codes[order], owners[order]
+        unique = np.ones(len(codes), dtype=bool)
+        unique[1:] = (codes[1:] != codes[:-1]) | (owners[1:] != owners[:-1])
+        codes, owners = codes[unique], owners[unique]
+        trigram_keys, trigram_starts = np.unique(codes, return_index=True)
+
+        # Prefixos: palavras ordenadas, com a entrada de cada uma
+        word_keys = np.array([word.encode("utf-8")[:WORD_BYTES] for word in flat_words],
+                             dtype=f"S{WORD_BYTES}")
+        order = np.argsort(word_keys, kind="stable")
+
+        encoded = [text.encode("utf-8") for text in texts]
+        text_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(data) for data in encoded], out=text_offsets[1:])
+        arrays = {
+            "trigram_keys": trigram_keys,
+            "trigram_starts": np.append(trigram_starts, len(codes)).astype(np.int64),
+            "postings": owners.astype(np.int32),
+            "entry_trigrams": np.bincount(owners, minlength=len(entry_words)).astype(np.int32),
+            "entry_concept": np.array(entry_concept, dtype=np.int32),
+            "word_keys": word_keys[order],
+            "word_entries": word_entry[order],
+            "text": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            "text_offsets": text_offsets,
+        }
+        return cls(arrays, source, time.perf_counter() - start)
+
+    def save(self, directory):
+        """
+        Grava o índice em um diretório, de forma atômica.
+
+        Args:
+            directory (str): Diretório de destino (substituído se existir)
+        """
+        parent = os.path.dirname(os.path.abspath(directory))
+        os.makedirs(parent, exist_ok=True)
+        temp = tempfile.mkdtemp(dir=parent, prefix=".tmp-")
+        try:
+            for name in _ARRAYS:
+                np.save(os.path.join(temp, f"{name}.npy"), np.asarray(getattr(self, f"_{name}")))
+            with open(os.path.join(temp, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump({"version": INDEX_VERSION, "source": self.source}, f)
+            if os.path.isdir(directory):
+                shutil.rmtree(directory)
+            os.replace(temp, directory)
+        except BaseException:
+            shutil.rmtree(temp, ignore_errors=True)
+            raise
+
+    @classmethod
+    def load(cls, directory):
+        """
+        Abre um índice gravado, mapeando os arrays em memória.
+
+        Args:
+            directory (str): Diretório do índice
+
+        Returns:
+            TerminologyIndex: Índice aberto
+
+        Raises:
+            ValueError: Se o diretório não contiver um índice desta versão
+        """
+        try:
+            with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("version") != INDEX_VERSION:
+                raise ValueError(f"Versão do índice incompatível: {meta.get('version')}")
+            arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+                      for name in _ARRAYS}
+        except (OSError, json.JSONDecodeError) as e:
+            raise ValueError(f"Índice de terminologia inválido em {directory}: {e}") from None
+        return cls(arrays, meta.get("source", ""))
+
+    @classmethod
+    def open(cls, path, cache_dir):
+        """
+        Abre o índice de um arquivo de terminologia, reaproveitando o índice gravado.
+
+        O índice é identificado pelo hash do arquivo; se o arquivo mudou
+        (ou não há índice gravado), ele é reconstruído e gravado, e os
+        índices de versões anteriores do arquivo são apagados.
+
+        Args:
+            path (str): Arquivo de terminologia (sem arquivo, usa REFERENCE_TERMS)
+            cache_dir (str): Diretório dos índices gravados
+
+        Returns:
+            TerminologyIndex: Índice aberto
+
+        Raises:
+            ValueError: Se o arquivo de terminologia for inválido
+        """
+        if not path or not os.path.exists(path):
+            return cls.build(REFERENCE_TERMS)
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        name = f"{digest.hexdigest()[:24]}-v{INDEX_VERSION}"
+        directory = os.path.join(cache_dir, name)
+        if os.path.isdir(directory):
+            try:
+                return cls.load(directory)
+            except ValueError:
+                pass  # índice corrompido: reconstrói
+        built = cls.build(read_terminology(path), source=path)
+        built.save(directory)
+        for stale in os.listdir(cache_dir):
+            if stale != name:
+                shutil.rmtree(os.path.join(cache_dir, stale), ignore_errors=True)
+        index = cls.load(directory)
+        index.build_seconds = built.build_seconds
+        return index
+
+    def concept(self, concept):
+        """
+        Retorna o sistema, o código e a descrição preferida de um conceito.
+
+        Args:
+            concept (int): Número do conceito
+
+        Returns:
+            TermMatch: Conceito (com pontuação 0)
+        """
+        offsets = self._text_offsets
+        text = self._text
+        system, code, display = (bytes(text[offsets[i]:offsets[i + 1]]).decode("utf-8")
+                                 for i in range(3 * concept, 3 * concept + 3))
+        return TermMatch(system, code, display)
+
+    def search(self, query, k=TOP_K):
+        """
+        Busca os conceitos mais próximos de um texto ou código.
+
+        A pontuação de cada termo é o coeficiente de Jaccard entre os
+        seus trigramas e os da consulta, somado a PREFIX_WEIGHT vezes a
+        fração das palavras da consulta que iniciam alguma palavra do
+        termo. A última palavra da consulta é tratada como incompleta.
+        Cada conceito aparece uma vez, com a pontuação do seu melhor termo.
+
+        Args:
+            query (str): Texto digitado (descrição ou código)
+            k (int, optional): Quantidade máxima de conceitos. Defaults to TOP_K.
+
+        Returns:
+            list[TermMatch]: Conceitos, do mais ao menos semelhante
+        """
+        words = list(dict.fromkeys(normalize(query).split()))
+        if not words or not self.entries:
+            return []
+        entries = self.entries
+
+        # Trigramas em comum com cada entrada
+        query_trigrams = _trigrams(words, open_end=True)
+        keys = self._trigram_keys
+        positions = np.searchsorted(keys, query_trigrams)
+        inside = positions < len(keys)
+        positions = positions[inside]
+        positions = positions[keys[positions] == query_trigrams[inside]]
+        starts = self._trigram_starts
+        postings = [self._postings[starts[p]:starts[p + 1]] for p in positions]
+        shared = np.bincount(np.concatenate(postings), minlength=entries) if postings \
+            else np.zeros(entries, dtype=np.int64)
+        scores = shared / (len(query_trigrams) + np.asarray(self._entry_trigrams) - shared)
+
+        # Palavras da consulta que iniciam alguma palavra da entrada
+        word_keys = self._word_keys
+        word_entries = self._word_entries
+        prefix_hits = np.zeros(entries, dtype=np.int32)
+        for word in words:
+            prefix = word.encode("utf-8")[:WORD_BYTES]
+            low = np.searchsorted(word_keys, prefix, side="left")
+            high = np.searchsorted(word_keys, prefix + b"\xff", side="left")
+            if high > low:
+                hit = np.zeros(entries, dtype=bool)
+                hit[word_entries[low:high]] = True
+                prefix_hits += hit
+        scores += PREFIX_WEIGHT * prefix_hits / len(words)
+
+        # Melhores entradas, uma por conceito
+        candidates = np.flatnonzero(scores >= MIN_SCORE)
+        if not len(candidates):
+            return []
+        # Ordena apenas as melhores entradas; sinônimos de um mesmo conceito raramente
+        # ocupam mais do que algumas posições, e na falta de conceitos ordena todas
+        for limit in (k * 8, len(candidates)):
+            top = candidates
+            if limit < len(candidates):
+                top = candidates[np.argpartition(-scores[candidates], limit)[:limit]]
+            top = top[np.lexsort((top, -scores[top]))]
+            _, first = np.unique(np.asarray(self._entry_concept)[top], return_index=True)
+            if len(first) >= k or limit >= len(candidates):
+                break
+        best = top[np.sort(first)[:k]]
+        matches = []
+        for entry in best:
+            match = self.concept(int(self._entry_concept[entry]))
+            match.score = float(scores[entry])
+            matches.append(match)
+        return matches
+
+
+_SYNTHETIC_WORDS = (
+    "neoplasia", "maligna", "benigna", "carcinoma", "adenocarcinoma", "adenoma", "linfoma",
+    "sarcoma", "melanoma", "displasia", "hiperplasia", "metaplasia", "inflamação", "crônica",
+    "aguda", "gastrite", "colite", "hepatite", "cirrose", "fibrose", "necrose", "úlcera",
+    "pólipo", "cisto", "nódulo", "estômago", "cólon", "reto", "fígado", "pâncreas", "pulmão",
+    "brônquio", "mama", "útero", "endométrio", "ovário", "próstata", "bexiga", "rim", "tireoide",
+    "pele", "linfonodo", "esôfago", "vesícula", "biliar", "apêndice", "ductal", "lobular",
+    "invasivo", "in", "situ", "grau", "alto", "baixo", "bem", "moderadamente", "pouco",
+    "diferenciado", "células", "escamosas", "claras", "basais", "transicionais", "mucinoso",
+    "seroso", "papilífero", "folicular", "medular", "anaplásico", "não", "especificado",
+)
+
+
+def _synthetic_terms(count, seed):
+    """Gera uma terminologia sintética (descrições com 3 a 8 palavras do vocabulário médico)."""
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array(_SYNTHETIC_WORDS)
+    terms = []
+    for i in range(count):
+        words = vocabulary[rng.integers(0, len(vocabulary), rng.integers(3, 9))]
+        system = "CID-10" if i % 2 else "SNOMED-CT"
+        code = f"{chr(65 + i % 26)}{i // 26 % 100:02d}.{i // 2600}" if i % 2 else str(100000000 + i)
+        terms.append((system, code, " ".join(words)))
+    return terms
+
+
+def _typo(text, rng):
+    """Introduz um erro de digitação (troca, omissão ou repetição de uma letra)."""
+    if len(text) < 4:
+        return text
+    i = int(rng.integers(1, len(text) - 2))
+    kind = rng.integers(0, 3)
+    if kind == 0:
+        return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+    if kind == 1:
+        return text[:i] + text[i + 1:]
+    return text[:i] + text[i] + text[i:]
+
+
+def benchmark(count=100000, queries=500, seed=0):
+    """
+    Mede a construção, a abertura do índice gravado e o tempo das buscas.
+
+    As buscas simulam a digitação das descrições sintéticas (com a
+    última palavra incompleta, com erros de digitação ou sem acentos) e
+    dos códigos.
+
+    Args:
+        count (int, optional): Conceitos sintéticos. Defaults to 100000.
+        queries (int, optional): Buscas. Defaults to 500.
+        seed (int, optional): Semente dos dados. Defaults to 0.
+
+    Returns:
+        dict: concepts, entries, build_seconds, load_seconds, (p50, p95, máximo) do
+            tempo das buscas em segundos e a fração das buscas com o conceito
+            procurado entre os TOP_K primeiros
+    """
+    rng = np.random.default_rng(seed)
+    terms = _synthetic_terms(count, seed)
+    with tempfile.TemporaryDirectory() as temp:
+        path = os.path.join(temp, "terminologia.tsv")
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(f"{system}\t{code}\t{display}\n" for system, code, display in terms)
+        built = TerminologyIndex.open(path, os.path.join(temp, "indice"))
+        start = time.perf_counter()
+        index = TerminologyIndex.open(path, os.path.join(temp, "indice"))
+        load_seconds = time.perf_counter() - start
+
+        latencies, found = [], 0
+        for i in range(queries):
+            system, code, display = terms[int(rng.integers(0, count))]
+            if i % 4 == 3:
+                query = code
+            else:
+                query = display
+                if i % 4 == 1:
+                    query = _typo(query, rng)
+                elif i % 4 == 2:
+                    query = normalize(query)
+                query = query[:len(query) - int(rng.integers(0, 3))]
+            start = time.perf_counter()
+            matches = index.search(query)
+            latencies.append(time.perf_counter() - start)
+            found += any(match.code == code for match in matches)
+        result = {"concepts": index.concepts, "entries": index.entries,
+                  "build_seconds": built.build_seconds, "load_seconds": load_seconds,
+                  "latency": (float(np.percentile(latencies, 50)), float(np.percentile(latencies, 95)),
+                              float(max(latencies))),
+                  "recall": found / queries}
+        del built, index  # libera os arquivos mapeados antes de apagar o diretório
+    return result
+
+
+def main(argv=None):
+    """Ponto de entrada da linha de comando."""
+    parser = argparse.ArgumentParser(description="Mede o desempenho da busca na terminologia.")
+    parser.add_argument("--benchmark", action="store_true", help="Executa o benchmark")
+    parser.add_argument("--count", type=int, default=100000, help="Conceitos sintéticos")
+    parser.add_argument("--queries", type=int, default=500, help="Buscas")
+    args = parser.parse_args(argv)
+    if not args.benchmark:
+        parser.print_help()
+        return
+
+    result = benchmark(args.count, args.queries)
+    p50, p95, worst = result["latency"]
+    print(f"{result['concepts']} conceitos, {result['entries']} termos, "
+          f"construção em {result['build_seconds']:.2f} s, abertura do índice gravado em "
+          f"{result['load_seconds'] * 1000:.1f} ms")
+    print(f"busca: p50 {p50 * 1000:.2f} ms, p95 {p95 * 1000:.2f} ms, máx. {worst * 1000:.2f} ms; "
+          f"conceito procurado entre os {TOP_K} primeiros em {result['recall']:.0%} das buscas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+"""
+Módulo de usuários e perfis.
+
+Este módulo contém o cadastro local de usuários (SQLite) com senhas
+protegidas por scrypt (ou PBKDF2-SHA256, quando o scrypt não estiver
+disponível no OpenSSL), os perfis de acesso e a limitação de
+tentativas de login.
+
+A verificação de uma senha leva de propósito algumas centenas de
+milissegundos; por isso a tela de login a executa em segundo plano.
+
+Não há cadastro implícito no login: todos os usuários, inclusive o
+primeiro, são cadastrados pela linha de comando.
+
+Uso pela linha de comando:
+    python -m core.users add USUARIO --role patologista --name "Nome Completo"
+    python -m core.users passwd USUARIO
+    python -m core.users list
+
+Classes:
+    Role: Perfis de acesso.
+    User: Usuário cadastrado.
+    AuthenticationError: Falha de autenticação.
+    LoginThrottle: Limitação de tentativas de login por usuário.
+    UserStore: Cadastro de usuários.
+
+Funções:
+    hash_password: Gera o hash de uma senha.
+    verify_password: Confere uma senha com o hash armazenado.
+"""
+
+import argparse
+import base64
+import getpass
+import hashlib
+import hmac
+import os
+import sqlite3
+import threading
+import time
+from enum import IntEnum
+
+from .config import data_path
+
+# Parâmetros do scrypt (~100 ms e 32 MiB por verificação)
+SCRYPT_N = 2 ** 15
+SCRYPT_R = 8
+SCRYPT_P = 1
+_SCRYPT_MAXMEM = 64 * 1024 * 1024
+
+# Iterações do PBKDF2-SHA256 (alternativa ao scrypt)
+PBKDF2_ITERATIONS = 600000
+
+# Limitação de tentativas: bloqueio após MAX_FAILURES falhas seguidas,
+# dobrando a cada nova falha até LOCKOUT_MAX_SECONDS
+MAX_FAILURES = 5
+LOCKOUT_SECONDS = 30.0
+LOCKOUT_MAX_SECONDS = 900.0
+
+# Aviso exibido enquanto o cadastro está vazio
+NO_USERS_MESSAGE = ("Nenhum usuário cadastrado. Cadastre o primeiro pela linha de comando: "
+                    "python -m core.users add USUARIO --role patologista")
+
+
+class Role(IntEnum):
+    """Perfis de acesso."""
+    PATHOLOGIST = 0
+    RESIDENT = 1
+    TECHNICIAN = 2
+
+    @property
+    def label(self):
+        """Rótulo de exibição do perfil."""
+        return _ROLE_LABELS[self]
+
+    @property
+    def can_issue_reports(self):
+        """Indica se o perfil pode salvar laudos."""
+        return self in (Role.PATHOLOGIST, Role.RESIDENT)
+
+    @property
+    def can_sign_reports(self):
+        """Indica se o perfil pode assinar laudos (liberação final)."""
+        return self == Role.PATHOLOGIST
+
+    @classmethod
+    def from_name(cls, name):
+        """
+        Converte um nome de perfil (ex.: "patologista") no perfil.
+
+        Raises:
+            ValueError: Se o nome não corresponde a um perfil
+        """
+        for role, label in _ROLE_LABELS.items():
+            if name.lower() in (label.lower(), role.name.lower()):
+                return role
+        raise ValueError(f"Perfil inválido: {name!r}")
+
+
+_ROLE_LABELS = {
+    Role.PATHOLOGIST: "Patologista",
+    Role.RESIDENT: "Residente",
+    Role.TECHNICIAN: "Técnico",
+}
+
+
+class User:
+    """
+    Usuário cadastrado.
+
+    Attributes:
+        username (str): Nome de usuário (login)
+        full_name (str): Nome completo
+        role (Role): Perfil de acesso
+    """
+
+    __slots__ = ("username", "full_name", "role")
+
+    def __init__(self, username, full_name, role):
+        self.username = username
+        self.full_name = full_name
+        self.role = Role(role)
+
+    def __repr__(self):
+        return f"User({self.username!r}, {self.role.label})"
+
+
+class AuthenticationError(Exception):
+    """Falha de autenticação (credenciais inválidas ou bloqueio temporário)."""
+
+
+def _b64(data):
+    return base64.b64encode(data).decode("ascii")
+
+
+def hash_password(password):
+    """
+    Gera o hash de uma senha com sal aleatório.
+
+    Args:
+        password (str): Senha em texto
+
+    Returns:
+        str: Hash no formato "scrypt$N$r$p$sal$hash" ou "pbkdf2_sha256$iterações$sal$hash"
+    """
+    salt = os.urandom(16)
+    if hasattr(hashlib, "scrypt"):
+        digest = hashlib.scrypt(password.encode("utf-8"), salt=salt, n=SCRYPT_N, r=SCRYPT_R,
+                                p=SCRYPT_P, maxmem=_SCRYPT_MAXMEM, dklen=32)
+        return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_b64(salt)}${_b64(digest)}"
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, PBKDF2_ITERATIONS)
+    return f"pbkdf2_sha256${PBKDF2_ITERATIONS}${_b64(salt)}${_b64(digest)}"
+
+
+def verify_password(password, stored_hash):
+    """
+    Confere uma senha com o hash armazenado, em tempo constante.
+
+    Args:
+        password (str): Senha informada
+        stored_hash (str): Hash gerado por hash_password
+
+    Returns:
+        bool: True se a senha confere
+    """
+    try:
+        scheme, *params = stored_hash.split("$")
+        if scheme == "scrypt":
+            n, r, p, salt, expected = params
+            digest = hashlib.scrypt(password.encode("utf-8"), salt=base64.b64decode(salt),
+                                    n=int(n), r=int(r), p=int(p), maxmem=_SCRYPT_MAXMEM, dklen=32)
+        elif scheme == "pbkdf2_sha256":
+            iterations, salt, expected = params
+            digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"),
+                                         base64.b64decode(salt), int(iterations))
+        else:
+            return False
+    except (ValueError, AttributeError):
+        return False
+    return hmac.compare_digest(digest, base64.b64decode(expected))
+
+
+# Hash de uma senha aleatória, conferido quando o usuário não existe, para que
+# o tempo de resposta não revele quais usuários estão cadastrados
+_DUMMY_HASH = None
+
+
+class LoginThrottle:
+    """
+    Limitação de tentativas de login por usuário (em memória).
+
+    Após MAX_FAILURES falhas seguidas, o usuário fica bloqueado por
+    LOCKOUT_SECONDS, tempo que dobra a cada nova falha.
+    """
+
+    def __init__(self):
+        self._failures = {}  # usuário -> (falhas seguidas, bloqueado até)
+        self._lock = threading.Lock()
+
+    def remaining_lockout(self, username):
+        """Retorna os segundos restantes de bloqueio (0 se liberado)."""
+        with self._lock:
+            _, locked_until = self._failures.get(username.lower(), (0, 0.0))
+        return max(0.0, locked_until - time.monotonic())
+
+    def record_failure(self, username):
+        """Registra uma tentativa malsucedida."""
+        key = username.lower()
+        with self._lock:
+            failures, _ = self._failures.get(key, (0, 0.0))
+            failures += 1
+            locked_until = 0.0
+            if failures >= MAX_FAILURES:
+                lockout = min(LOCKOUT_SECONDS * 2 ** (failures - MAX_FAILURES), LOCKOUT_MAX_SECONDS)
+                locked_until = time.monotonic() + lockout
+            self._failures[key] = (failures, locked_until)
+
+    def record_success(self, username):
+        """Zera as falhas do usuário após um login bem-sucedido."""
+        with self._lock:
+            self._failures.pop(username.lower(), None)
+
+
+class UserStore:
+    """
+    Cadastro local de usuários em SQLite.
+
+    Attributes:
+        path (str): Caminho do arquivo do banco de dados
+        throttle (LoginThrottle): Limitação de tentativas de login
+    """
+
+    def __init__(self, path=None):
+        """
+        Abre (ou cria) o cadastro de usuários.
+
+        Args:
+            path (str, optional): Arquivo do banco. Defaults to data_path("users.db").
+        """
+        self.path = path or data_path("users.db")
+        self.throttle = LoginThrottle()
+        self._local = threading.local()
+        with self.connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS users ("
+                "username TEXT PRIMARY KEY COLLATE NOCASE, "
+                "full_name TEXT NOT NULL DEFAULT '', "
+                "role INTEGER NOT NULL, "
+                "password_hash TEXT NOT NULL, "
+                "created_at REAL NOT NULL)")
+
+    def connection(self):
+        """Retorna a conexão da thread atual (uma por thread)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            self._local.conn = conn
+        return conn
+
+    def is_empty(self):
+        """Indica se ainda não há usuários cadastrados."""
+        return self.connection().execute("SELECT 1 FROM users LIMIT 1").fetchone() is None
+
+    def add_user(self, username, password, role, full_name=""):
+        """
+        Cadastra um usuário.
+
+        Args:
+            username (str): Nome de usuário
+            password (str): Senha em texto
+            role (Role): Perfil de acesso
+            full_name (str, optional): Nome completo
+
+        Returns:
+            User: Usuário cadastrado
+
+        Raises:
+            ValueError: Se o usuário já existir ou os dados forem inválidos
+        """
+        username = username.strip()
+        if not username or not password:
+            raise ValueError("Usuário e senha são obrigatórios.")
+        try:
+            with self.connection() as conn:
+                conn.execute("INSERT INTO users (username, full_name, role, password_hash, created_at) "
+                             "VALUES (?, ?, ?, ?, ?)",
+                             (username, full_name, int(role), hash_password(password), time.time()))
+        except sqlite3.IntegrityError:
+            raise ValueError(f"Usuário já cadastrado: {username}") from None
+        return User(username, full_name, role)
+
+    def set_password(self, username, password):
+        """
+        Altera a senha de um usuário.
+
+        Raises:
+            ValueError: Se o usuário não existir
+        """
+        with self.connection() as conn:
+            updated = conn.execute("UPDATE users SET password_hash = ? WHERE username = ?",
+                                   (hash_password(password), username)).rowcount
+        if not updated:
+            raise ValueError(f"Usuário não encontrado: {username}")
+
+    def get_user(self, username):
+        """Retorna o usuário, ou None se não existir."""
+        row = self.connection().execute(
+            "SELECT username, full_name, role FROM users WHERE username = ?", (username,)).fetchone()
+        return User(*row) if row else None
+
+    def list_users(self):
+        """Retorna todos os usuários, em ordem alfabética."""
+        return [User(*row) for row in self.connection().execute(
+            "SELECT username, full_name, role FROM users ORDER BY username")]
+
+    def authenticate(self, username, password):
+        """
+        Autentica um usuário (operação lenta: chamar fora da thread da interface).
+
+        Args:
+            username (str): Nome de usuário
+            password (str): Senha
+
+        Returns:
+            User: Usuário autenticado
+
+        Raises:
+            AuthenticationError: Se as credenciais forem inválidas, o usuário estiver
+                bloqueado ou não houver usuários cadastrados
+        """
+        global _DUMMY_HASH
+        remaining = self.throttle.remaining_lockout(username)
+        if remaining:
+            raise AuthenticationError(f"Muitas tentativas sem sucesso. Aguarde {remaining:.0f} s.")
+
+        if self.is_empty():
+            raise AuthenticationError(NO_USERS_MESSAGE)
+
+        row = self.connection().execute(
+            "SELECT username, full_name, role, password_hash FROM users WHERE username = ?",
+            (username,)).fetchone()
+        if row is None:
+            if _DUMMY_HASH is None:
+                _DUMMY_HASH = hash_password(os.urandom(16).hex())
+            verify_password(password, _DUMMY_HASH)
+            valid = False
+        else:
+            valid = verify_password(password, row[3])
+        if not valid:
+            self.throttle.record_failure(username)
+            raise AuthenticationError("Usuário ou senha inválidos.")
+        self.throttle.record_success(username)
+        return User(*row[:3])
+
+
+def main(argv=None):
+    """Ponto de entrada da linha de comando."""
+    parser = argparse.ArgumentParser(description="Gerencia os usuários do sistema de patologia.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="Cadastra um usuário")
+    add.add_argument("username")
+    add.add_argument("--role", default="patologista", help="patologista, residente ou técnico")
+    add.add_argument("--name", default="", help="Nome completo")
+    passwd = commands.add_parser("passwd", help="Altera a senha de um usuário")
+    passwd.add_argument("username")
+    commands.add_parser("list", help="Lista os usuários")
+    args = parser.parse_args(argv)
+
+    store = UserStore()
+    try:
+        if args.command == "list":
+            for user in store.list_users():
+                print(f"{user.username}\t{user.role.label}\t{user.full_name}")
+            return
+        password = getpass.getpass("Senha: ")
+        if password != getpass.getpass("Confirme a senha: "):
+            parser.error("As senhas não conferem.")
+        if args.command == "add":
+            store.add_user(args.username, password, Role.from_name(args.role), args.name)
+        else:
+            store.set_password(args.username, password)
+    except ValueError as e:
+        parser.error(str(e))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,441 @@
+"""
+Módulo de validação do formulário de paciente e amostra.
+
+Este módulo contém um motor de regras de validação. Cada regra declara
+os campos que lê e o campo em que o erro é exibido; as regras são
+compiladas uma vez em um índice campo -> regras, e a cada edição só as
+regras que leem os campos alterados são reavaliadas.
+
+Também contém o dígito verificador (Luhn) do código da amostra, que
+acusa erros de leitura do código de barras e de digitação.
+
+Classes:
+    Rule: Regra de validação.
+    RuleSet: Regras compiladas, indexadas pelos campos que leem.
+    FormValidator: Estado da validação de um formulário.
+
+Funções:
+    check_digit: Dígito verificador de um código.
+    with_check_digit: Acrescenta o dígito verificador a um código.
+    has_valid_check_digit: Confere o dígito verificador de um código.
+    parse_datetime: Converte uma data "dd/mm/aaaa" ou "dd/mm/aaaa hh:mm".
+    patient_form_rules: Regras do formulário de paciente e amostra.
+    benchmark: Mede o custo da validação por tecla digitada.
+"""
+
+import argparse
+import datetime
+import random
+import re
+import time
+
+from .config import RECORD_NUMBER_PATTERN, SAMPLE_CODE_PATTERN, SAMPLE_CODE_CHECK_DIGIT
+
+# Tolerância para uma coleta registrada no futuro (relógios fora de sincronia), em minutos
+FUTURE_TOLERANCE_MINUTES = 10
+
+_DATETIME = re.compile(r"(\d{2})/(\d{2})/(\d{4})(?: (\d{2}):(\d{2}))?")
+
+
+def check_digit(code):
+    """
+    Calcula o dígito verificador de um código pelo algoritmo de Luhn.
+
+    Apenas os algarismos do código entram no cálculo; o dígito acusa a
+    troca de um algarismo e a inversão de dois algarismos vizinhos.
+
+    Args:
+        code (str): Código sem o dígito verificador (ex.: "AP26-000123")
+
+    Returns:
+        str: Dígito verificador
+    """
+    total = 0
+    for position, char in enumerate(reversed([c for c in code if c.isdigit()])):
+        digit = int(char)
+        if position % 2 == 0:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total += digit
+    return str(-total % 10)
+
+
+def with_check_digit(code):
+    """
+    Acrescenta o dígito verificador a um código.
+
+    Args:
+        code (str): Código sem o dígito (ex.: "AP26-000123")
+
+    Returns:
+        str: Código com o dígito após um hífen (ex.: "AP26-000123-5")
+    """
+    return f"{code}-{check_digit(code)}"
+
+
+def has_valid_check_digit(code):
+    """
+    Confere o dígito verificador de um código gerado por with_check_digit.
+
+    Args:
+        code (str): Código com o dígito verificador
+
+    Returns:
+        bool: Se o dígito confere
+    """
+    base, separator, digit = code.rpartition("-")
+    return bool(separator) and digit == check_digit(base)
+
+
+def parse_datetime(text):
+    """
+    Converte uma data "dd/mm/aaaa" ou uma data e hora "dd/mm/aaaa hh:mm".
+
+    Args:
+        text (str): Texto digitado
+
+    Returns:
+        datetime.datetime | None: Data e hora, ou None se o texto for inválido
+    """
+    match = _DATETIME.fullmatch(text.strip())
+    if not match:
+        return None
+    day, month, year, hour, minute = match.groups()
+    try:
+        return datetime.datetime(int(year), int(month), int(day), int(hour or 0), int(minute or 0))
+    except ValueError:
+        return None
+
+
+class Rule:
+    """
+    Regra de validação.
+
+    Attributes:
+        target (str): Campo em que o erro é exibido
+        fields (tuple): Campos lidos pela regra, na ordem dos argumentos de check
+        check (callable): Recebe os valores dos campos e retorna True se válidos
+        message (str): Mensagem exibida quando a regra falha
+    """
+
+    __slots__ = ("target", "fields", "check", "message")
+
+    def __init__(self, target, fields, check, message):
+        self.target = target
+        self.fields = tuple(fields)
+        self.check = check
+        self.message = message
+
+    def __repr__(self):
+        return f"Rule(target={self.target!r}, fields={self.fields!r})"
+
+
+class RuleSet:
+    """
+    Regras compiladas: para cada campo, as regras que o leem.
+
+    Compilado uma vez e compartilhado pelos formulários abertos; o estado
+    de cada formulário fica no seu FormValidator.
+
+    Attributes:
+        rules (tuple): Regras, na ordem de prioridade das mensagens
+        fields (tuple): Campos lidos pelas regras
+    """
+
+    __slots__ = ("rules", "fields", "_by_field", "_by_target", "_targets")
+
+    def __init__(self, rules):
+        """
+        Compila as regras.
+
+        Args:
+            rules (iterable): Regras (Rule); para um mesmo campo, vale a
+                mensagem da primeira regra que falhar
+        """
+        self.rules = tuple(rules)
+        by_field, by_target = {}, {}
+        for index, rule in enumerate(self.rules):
+            for field in rule.fields:
+                by_field.setdefault(field, []).append(index)
+            by_target.setdefault(rule.target, []).append(index)
+        self._by_field = {field: tuple(indices) for field, indices in by_field.items()}
+        self._by_target = {target: tuple(indices) for target, indices in by_target.items()}
+        self._targets = {field: tuple(dict.fromkeys(self.rules[index].target for index in indices))
+                         for field, indices in self._by_field.items()}
+        self.fields = tuple(by_field)
+
+    def affected(self, fields):
+        """
+        Regras que leem algum dos campos.
+
+        Args:
+            fields (iterable): Campos alterados
+
+        Returns:
+            set: Posições das regras
+        """
+        indices = set()
+        for field in fields:
+            indices.update(self._by_field.get(field, ()))
+        return indices
+
+    def targets(self, field):
+        """Campos em que aparecem os erros das regras que leem o campo."""
+        return self._targets.get(field, ())
+
+    def for_target(self, target):
+        """Posições das regras exibidas no campo, em ordem de prioridade."""
+        return self._by_target.get(target, ())
+
+
+class FormValidator:
+    """
+    Estado da validação de um formulário.
+
+    Os valores alterados são apenas anotados; validate() reavalia só as
+    regras que leem os campos alterados desde a última chamada.
+
+    Attributes:
+        rule_set (RuleSet): Regras compiladas
+        values (dict): Valor atual de cada campo
+    """
+
+    __slots__ = ("rule_set", "values", "_dirty", "_failed", "_errors")
+
+    def __init__(self, rule_set, values=None):
+        """
+        Cria o estado da validação; a primeira chamada de validate() avalia todas as regras.
+
+        Args:
+            rule_set (RuleSet): Regras compiladas
+            values (dict, optional): Valores iniciais (campos ausentes ficam em branco)
+        """
+        self.rule_set = rule_set
+        self.values = dict.fromkeys(rule_set.fields, "")
+        self.values.update(values or {})
+        self._dirty = set(rule_set.fields)
+        self._failed = [False] * len(rule_set.rules)
+        self._errors = {}
+
+    @property
+    def pending(self):
+        """Indica se há campos alterados ainda não validados."""
+        return bool(self._dirty)
+
+    def set(self, field, value):
+        """
+        Anota o novo valor de um campo.
+
+        Args:
+            field (str): Campo
+            value (str): Valor
+        """
+        if self.values.get(field) != value:
+            self.values[field] = value
+            self._dirty.add(field)
+
+    def validate(self):
+        """
+        Reavalia as regras dos campos alterados.
+
+        Returns:
+            dict: Campo -> mensagem ("" se passou a ser válido), apenas
+                para os campos cuja situação mudou
+        """
+        if not self._dirty:
+            return {}
+        rules, values, failed = self.rule_set.rules, self.values, self._failed
+        targets = set()
+        for index in self.rule_set.affected(self._dirty):
+            rule = rules[index]
+            result = not rule.check(*[values[field] for field in rule.fields])
+            if result != failed[index]:
+                failed[index] = result
+                targets.add(rule.target)
+        self._dirty.clear()
+
+        changed = {}
+        for target in targets:
+            message = next((rules[index].message for index in self.rule_set.for_target(target)
+                            if failed[index]), "")
+            if message != self._errors.get(target, ""):
+                changed[target] = message
+                if message:
+                    self._errors[target] = message
+                else:
+                    self._errors.pop(target, None)
+        return changed
+
+    def error(self, field):
+        """
+        Erro atual de um campo.
+
+        Args:
+            field (str): Campo
+
+        Returns:
+            str: Mensagem, ou "" se o campo é válido
+        """
+        return self._errors.get(field, "")
+
+    def errors(self):
+        """
+        Erros atuais (chame validate() antes para incluir as últimas alterações).
+
+        Returns:
+            dict: Campo -> mensagem, na ordem das regras
+        """
+        return {rule.target: self._errors[rule.target] for rule in self.rule_set.rules
+                if rule.target in self._errors}
+
+    def is_valid(self):
+        """Valida as alterações pendentes e indica se o formulário não tem erros."""
+        self.validate()
+        return not self._errors
+
+
+def _required(field, label):
+    """Regra de campo obrigatório."""
+    return Rule(field, (field,), lambda value: bool(value.strip()), f"{label}: campo obrigatório.")
+
+
+def _matches(pattern):
+    """Verificação de formato (campos em branco são deixados para a regra de obrigatório)."""
+    compiled = re.compile(pattern)
+    return lambda value: not value.strip() or compiled.fullmatch(value.strip()) is not None
+
+
+def _not_future(value):
+    """A data, se válida, não está no futuro."""
+    moment = parse_datetime(value)
+    limit = datetime.datetime.now() + datetime.timedelta(minutes=FUTURE_TOLERANCE_MINUTES)
+    return moment is None or moment <= limit
+
+
+def _collected_after_birth(birth_date, collection_datetime):
+    """A coleta, se as duas datas forem válidas, não é anterior ao nascimento."""
+    birth, collected = parse_datetime(birth_date), parse_datetime(collection_datetime)
+    return birth is None or collected is None or collected.date() >= birth.date()
+
+
+def _other_specified(choice, other):
+    """O campo "Outro" é preenchido quando a opção escolhida é "Outro"."""
+    return choice != "Outro" or bool(other.strip())
+
+
+def patient_form_rules(record_pattern=RECORD_NUMBER_PATTERN, sample_pattern=SAMPLE_CODE_PATTERN,
+                       sample_check_digit=SAMPLE_CODE_CHECK_DIGIT):
+    """
+    Regras do formulário de paciente e amostra.
+
+    Os campos têm os nomes dos atributos de PatientRecord; datas vêm como
+    texto ("dd/mm/aaaa" ou "dd/mm/aaaa hh:mm") e as opções dos combos,
+    pelo texto exibido.
+
+    Args:
+        record_pattern (str, optional): Formato do prontuário ("" não confere).
+            Defaults to RECORD_NUMBER_PATTERN.
+        sample_pattern (str, optional): Formato do código da amostra ("" não confere).
+            Defaults to SAMPLE_CODE_PATTERN.
+        sample_check_digit (bool, optional): Se o código da amostra tem dígito verificador.
+            Defaults to SAMPLE_CODE_CHECK_DIGIT.
+
+    Returns:
+        list: Regras (Rule), em ordem de prioridade
+    """
+    sample_format = _matches(sample_pattern or ".*")
+    rules = [
+        _required("patient_name", "Nome completo"),
+        Rule("birth_date", ("birth_date",), _not_future, "Data de nascimento no futuro."),
+        _required("record_number", "Nº de prontuário"),
+    ]
+    if record_pattern:
+        rules.append(Rule("record_number", ("record_number",), _matches(record_pattern),
+                          "Nº de prontuário fora do formato do hospital."))
+    rules.append(_required("sample_code", "Código da amostra"))
+    if sample_pattern:
+        rules.append(Rule("sample_code", ("sample_code",), sample_format,
+                          "Código da amostra fora do formato do hospital."))
+    if sample_check_digit:
+        rules.append(Rule(
+            "sample_code", ("sample_code",),
+            lambda value: not value.strip() or not sample_format(value) or has_valid_check_digit(value.strip()),
+            "Dígito verificador do código da amostra não confere: confira a leitura ou a digitação."))
+    rules += [
+        Rule("procedure_other", ("procedure_type", "procedure_other"), _other_specified,
+             "Especifique o tipo de procedimento."),
+        Rule("material_other", ("material_type", "material_other"), _other_specified,
+             "Especifique o tipo de material."),
+        Rule("collection_datetime", ("collection_datetime",),
+             lambda value: not value.strip() or parse_datetime(value) is not None,
+             "Data e hora de coleta inválida (use dd/mm/aaaa hh:mm)."),
+        Rule("collection_datetime", ("collection_datetime",), _not_future,
+             "Data e hora de coleta no futuro."),
+        Rule("collection_datetime", ("birth_date", "collection_datetime"), _collected_after_birth,
+             "Coleta anterior à data de nascimento."),
+        _required("tissue_type", "Tipo/Nome do tecido"),
+    ]
+    return rules
+
+
+# Regras do formulário, compiladas uma vez para todas as abas
+PATIENT_FORM_RULES = RuleSet(patient_form_rules())
+
+
+def benchmark(forms=200, seed=0):
+    """
+    Mede o custo da validação a cada tecla, simulando o preenchimento de formulários.
+
+    Cada caractere digitado é anotado e validado na hora (o pior caso,
+    sem a espera entre as teclas usada pelo formulário).
+
+    Args:
+        forms (int, optional): Formulários preenchidos. Defaults to 200.
+        seed (int, optional): Semente dos dados. Defaults to 0.
+
+    Returns:
+        dict: keystrokes, rules e (p50, p99, máximo) do tempo por tecla em segundos
+    """
+    rng = random.Random(seed)
+    latencies = []
+    for _ in range(forms):
+        validator = FormValidator(PATIENT_FORM_RULES)
+        validator.validate()
+        typed = {
+            "patient_name": "Maria " + rng.choice(("Souza", "Oliveira", "Pereira")),
+            "record_number": str(rng.randint(1000000, 99999999)),
+            "sample_code": with_check_digit(f"AP26-{rng.randint(1, 999999):06d}"),
+            "collection_datetime": time.strftime("%d/%m/%Y %H:%M"),
+            "tissue_type": rng.choice(("Pele", "Mama", "Próstata")),
+        }
+        for field, text in typed.items():
+            for end in range(1, len(text) + 1):
+                start = time.perf_counter()
+                validator.set(field, text[:end])
+                validator.validate()
+                latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    count = len(latencies)
+    return {"keystrokes": count, "rules": len(PATIENT_FORM_RULES.rules),
+            "latency": (latencies[count // 2], latencies[int(count * 0.99)], latencies[-1])}
+
+
+def main(argv=None):
+    """Ponto de entrada da linha de comando."""
+    parser = argparse.ArgumentParser(description="Mede o custo da validação do formulário por tecla.")
+    parser.add_argument("--benchmark", action="store_true", help="Executa o benchmark")
+    parser.add_argument("--forms", type=int, default=200, help="Formulários preenchidos")
+    args = parser.parse_args(argv)
+    if not args.benchmark:
+        parser.print_help()
+        return
+
+    result = benchmark(args.forms)
+    p50, p99, worst = result["latency"]
+    print(f"{result['keystrokes']} teclas, {result['rules']} regras: p50 {p50 * 1e6:.1f} µs, "
+          f"p99 {p99 * 1e6:.1f} µs, máx. {worst * 1e6:.1f} µs por tecla")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,394 @@
+"""
+Módulo de versões dos laudos.
+
+Este módulo contém o histórico de versões dos laudos: cada gravação
+que altera o conteúdo do laudo (retificação, adendo, diagnóstico
+corrigido) gera uma nova versão. Em vez de uma cópia completa, cada
+versão guarda apenas as diferenças em relação à anterior: os campos
+curtos são regravados inteiros e os textos das seções, como uma lista
+de operações sobre as palavras do texto anterior. A cada
+SNAPSHOT_INTERVAL versões (ou quando a diferença não compensa) é
+gravada uma cópia completa, limitando o número de diferenças aplicadas
+para reconstruir qualquer versão.
+
+As versões ficam na tabela report_versions do banco de laudos.
+
+Classes:
+    ReportVersion: Versão de um laudo.
+    VersionLog: Histórico de versões em SQLite.
+
+Funções:
+    text_delta: Calcula as operações que transformam um texto em outro.
+    apply_text_delta: Aplica as operações de text_delta a um texto.
+    diff_html: Destaca em HTML as diferenças entre dois textos.
+"""
+
+import difflib
+import html
+import json
+import re
+import time
+import zlib
+
+from .metrics import REGISTRY, VERSION_RECONSTRUCT_SECONDS
+
+# Campos versionados: seções descritivas e diagnóstico codificado
+VERSIONED_FIELDS = ("macroscopy", "microscopy", "diagnosis", "diagnosis_system", "diagnosis_code")
+# Campos de texto livre, guardados como diferença de palavras
+TEXT_FIELDS = ("macroscopy", "microscopy", "diagnosis")
+
+# Intervalo entre cópias completas: no máximo SNAPSHOT_INTERVAL - 1 diferenças por reconstrução
+SNAPSHOT_INTERVAL = 8
+
+# Palavra com o espaço que a segue (ou espaço no início do texto): "".join(tokens) == texto
+_TOKEN = re.compile(r"\S+\s*|\s+")
+
+
+def _tokenize(text):
+    """Divide o texto em palavras, mantendo os espaços para reconstruí-lo exatamente."""
+    return _TOKEN.findall(text)
+
+
+def text_delta(old, new):
+    """
+    Calcula as operações que transformam um texto em outro.
+
+    Cada operação é um inteiro positivo (copiar n palavras do texto
+    anterior), um inteiro negativo (pular n palavras) ou um texto
+    (inserir).
+
+    Args:
+        old (str): Texto anterior
+        new (str): Texto novo
+
+    Returns:
+        list: Operações, na ordem
+    """
+    a, b = _tokenize(old), _tokenize(new)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, a, b, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append(i2 - i1)
+            continue
+        if i2 > i1:
+            ops.append(i1 - i2)
+        if j2 > j1:
+            ops.append("".join(b[j1:j2]))
+    return ops
+
+
+def apply_text_delta(old, ops):
+    """
+    Aplica as operações de text_delta a um texto.
+
+    Args:
+        old (str): Texto anterior (o mesmo usado em text_delta)
+        ops (list): Operações
+
+    Returns:
+        str: Texto novo
+    """
+    tokens = _tokenize(old)
+    parts = []
+    position = 0
+    for op in ops:
+        if isinstance(op, str):
+            parts.append(op)
+        elif op > 0:
+            parts.extend(tokens[position:position + op])
+            position += op
+        else:
+            position -= op
+    return "".join(parts)
+
+
+def _field_delta(parent, fields):
+    """Campos alterados: operações de palavras para os textos, valor novo para os demais."""
+    delta = {}
+    for name in VERSIONED_FIELDS:
+        old, new = parent.get(name, ""), fields.get(name, "")
+        if old == new:
+            continue
+        delta[name] = text_delta(old, new) if name in TEXT_FIELDS and old else new
+    return delta
+
+
+def _apply_field_delta(parent, delta):
+    """Aplica a diferença de _field_delta aos campos da versão anterior."""
+    fields = dict(parent)
+    for name, value in delta.items():
+        fields[name] = apply_text_delta(parent.get(name, ""), value) if isinstance(value, list) else value
+    return fields
+
+
+def _encode(payload):
+    return zlib.compress(json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def _decode(data):
+    return json.loads(zlib.decompress(data))
+
+
+def diff_html(old, new):
+    """
+    Destaca em HTML as diferenças entre dois textos, palavra a palavra.
+
+    Args:
+        old (str): Texto anterior
+        new (str): Texto novo
+
+    Returns:
+        str: HTML com os trechos removidos riscados e os inseridos realçados
+    """
+    a, b = _tokenize(old), _tokenize(new)
+    parts = []
+    matcher = difflib.SequenceMatcher(None, a, b, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            parts.append(html.escape("".join(a[i1:i2])))
+            continue
+        if i2 > i1:
+            parts.append('<span style="background-color: #ffd6d6; color: #9d0208; '
+                         'text-decoration: line-through;">'
+                         f'{html.escape("".join(a[i1:i2]))}</span>')
+        if j2 > j1:
+            parts.append('<span style="background-color: #d8f3dc; color: #1b4332;">'
+                         f'{html.escape("".join(b[j1:j2]))}</span>')
+    return "".join(parts).replace("\n", "<br>")
+
+
+class ReportVersion:
+    """
+    Versão de um laudo.
+
+    Attributes:
+        number (int): Número da versão (1 = primeira gravação)
+        pathologist (str): Usuário que gravou a versão
+        saved_at (float): Data da gravação (timestamp Unix)
+        signed_by (str): Usuário que assinou a versão ("" se não assinada)
+        signed_at (float): Data da assinatura (timestamp Unix, 0 se não assinada)
+        fields (dict): Campos versionados (VERSIONED_FIELDS) -> valor
+    """
+
+    __slots__ = ("number", "pathologist", "saved_at", "signed_by", "signed_at", "fields")
+
+    def __init__(self, number, pathologist, saved_at, signed_by="", signed_at=0.0, fields=None):
+        self.number = number
+        self.pathologist = pathologist
+        self.saved_at = saved_at
+        self.signed_by = signed_by
+        self.signed_at = signed_at
+        self.fields = fields or {}
+
+    @property
+    def signed(self):
+        """Indica se a versão foi assinada."""
+        return bool(self.signed_at)
+
+    def __repr__(self):
+        return f"ReportVersion(number={self.number!r}, pathologist={self.pathologist!r})"
+
+
+class VersionLog:
+    """
+    Histórico de versões dos laudos em SQLite.
+
+    Usa a conexão da thread atual do armazenamento de laudos, para que
+    a versão seja gravada na mesma transação do laudo.
+
+    Attributes:
+        snapshot_interval (int): Intervalo entre cópias completas
+    """
+
+    def __init__(self, connection, snapshot_interval=SNAPSHOT_INTERVAL):
+        """
+        Inicializa o histórico, criando a tabela se necessário.
+
+        Args:
+            connection (callable): Retorna a conexão SQLite da thread atual
+            snapshot_interval (int, optional): Intervalo entre cópias completas.
+                Defaults to SNAPSHOT_INTERVAL.
+        """
+        self._connection = connection
+        self.snapshot_interval = snapshot_interval
+        conn = connection()
+        with conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS report_versions "
+                         "(sample_code TEXT NOT NULL, version INTEGER NOT NULL, "
+                         "snapshot INTEGER NOT NULL, data BLOB NOT NULL, "
+                         "pathologist TEXT NOT NULL DEFAULT '', saved_at REAL NOT NULL, "
+                         "signed_by TEXT NOT NULL DEFAULT '', signed_at REAL NOT NULL DEFAULT 0, "
+                         "PRIMARY KEY (sample_code, version)) WITHOUT ROWID")
+
+    def latest_number(self, sample_code):
+        """
+        Retorna o número da versão mais recente de um laudo.
+
+        Args:
+            sample_code (str): Código da amostra
+
+        Returns:
+            int: Número da versão (0 se o laudo não tem histórico)
+        """
+        row = self._connection().execute(
+            "SELECT MAX(version) FROM report_versions WHERE sample_code = ?", (sample_code,)).fetchone()
+        return row[0] or 0
+
+    def record(self, sample_code, fields, pathologist="", saved_at=None):
+        """
+        Grava uma nova versão, se o conteúdo mudou em relação à anterior.
+
+        Não faz commit: chamado dentro da transação que grava o laudo.
+
+        Args:
+            sample_code (str): Código da amostra
+            fields (dict): Campos do laudo (ao menos VERSIONED_FIELDS)
+            pathologist (str, optional): Usuário que gravou
+            saved_at (float, optional): Data da gravação. Defaults to agora.
+
+        Returns:
+            int: Número da versão gravada (ou da atual, se nada mudou)
+        """
+        number = self.latest_number(sample_code)
+        fields = {name: fields.get(name, "") for name in VERSIONED_FIELDS}
+        snapshot_data = _encode(fields)
+        snapshot, data = True, snapshot_data
+        if number:
+            parent = self.reconstruct(sample_code, number)
+            delta = _field_delta(parent, fields)
+            if not delta:
+                return number
+            # Cópia completa a cada intervalo ou quando a diferença ficaria maior que ela
+            if number % self.snapshot_interval:
+                delta_data = _encode(delta)
+                if len(delta_data) < len(snapshot_data):
+                    snapshot, data = False, delta_data
+        number += 1
+        self._connection().execute(
+            "INSERT INTO report_versions (sample_code, version, snapshot, data, pathologist, saved_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (sample_code, number, int(snapshot), data, pathologist,
+             time.time() if saved_at is None else saved_at))
+        return number
+
+    def mark_signed(self, sample_code, signed_by, signed_at):
+        """
+        Marca a versão mais recente como assinada (sem commit).
+
+        Args:
+            sample_code (str): Código da amostra
+            signed_by (str): Usuário que assinou
+            signed_at (float): Data da assinatura
+        """
+        self._connection().execute(
+            "UPDATE report_versions SET signed_by = ?, signed_at = ? "
+            "WHERE sample_code = ? AND version = "
+            "(SELECT MAX(version) FROM report_versions WHERE sample_code = ?)",
+            (signed_by, signed_at, sample_code, sample_code))
+
+    def signed_counts(self, sample_codes, chunk_size=500):
+        """
+        Conta as versões assinadas de cada laudo.
+
+        Um laudo com mais de uma versão assinada foi retificado depois
+        de emitido.
+
+        Args:
+            sample_codes (Iterable[str]): Códigos de amostra
+            chunk_size (int, optional): Códigos por consulta. Defaults to 500.
+
+        Returns:
+            dict[str, int]: Código -> versões assinadas (apenas laudos com alguma)
+        """
+        codes = list(sample_codes)
+        counts = {}
+        conn = self._connection()
+        for i in range(0, len(codes), chunk_size):
+            chunk = codes[i:i + chunk_size]
+            counts.update(conn.execute(
+                f"SELECT sample_code, COUNT(*) FROM report_versions WHERE signed_at > 0 "
+                f"AND sample_code IN ({', '.join('?' * len(chunk))}) GROUP BY sample_code", chunk))
+        return counts
+
+    def signed_since(self, since):
+        """
+        Lista os laudos assinados depois de um instante.
+
+        Args:
+            since (float): Timestamp (exclusivo)
+
+        Returns:
+            set[str]: Códigos das amostras
+        """
+        return {row[0] for row in self._connection().execute(
+            "SELECT DISTINCT sample_code FROM report_versions WHERE signed_at > ?", (since,))}
+
+    def last_signed_at(self):
+        """
+        Retorna a data da assinatura mais recente.
+
+        Returns:
+            float: Timestamp (0 se nenhum laudo foi assinado)
+        """
+        return self._connection().execute(
+            "SELECT COALESCE(MAX(signed_at), 0) FROM report_versions").fetchone()[0]
+
+    def reconstruct(self, sample_code, number):
+        """
+        Reconstrói os campos de uma versão a partir da cópia completa anterior.
+
+        Args:
+            sample_code (str): Código da amostra
+            number (int): Número da versão
+
+        Returns:
+            dict: Campos versionados da versão, ou None se ela não existe
+        """
+        with REGISTRY.histogram(VERSION_RECONSTRUCT_SECONDS, "Tempo de reconstrução de uma versão").time():
+            rows = self._connection().execute(
+                "SELECT snapshot, data FROM report_versions WHERE sample_code = ? AND version <= ? "
+                "AND version >= (SELECT MAX(version) FROM report_versions "
+                "WHERE sample_code = ? AND version <= ? AND snapshot = 1) ORDER BY version",
+                (sample_code, number, sample_code, number)).fetchall()
+            if not rows:
+                return None
+            fields = _decode(rows[0][1])
+            for _, data in rows[1:]:
+                fields = _apply_field_delta(fields, _decode(data))
+            return fields
+
+    def history(self, sample_code):
+        """
+        Lista todas as versões de um laudo, com os campos reconstruídos.
+
+        As versões são reconstruídas em uma única passada, aplicando
+        cada diferença sobre a versão anterior.
+
+        Args:
+            sample_code (str): Código da amostra
+
+        Returns:
+            list[ReportVersion]: Versões, da primeira à mais recente
+        """
+        versions = []
+        fields = {}
+        for number, snapshot, data, pathologist, saved_at, signed_by, signed_at in self._connection().execute(
+                "SELECT version, snapshot, data, pathologist, saved_at, signed_by, signed_at "
+                "FROM report_versions WHERE sample_code = ? ORDER BY version", (sample_code,)):
+            payload = _decode(data)
+            fields = payload if snapshot else _apply_field_delta(fields, payload)
+            versions.append(ReportVersion(number, pathologist, saved_at, signed_by, signed_at, fields))
+        return versions
+
+    def stats(self):
+        """
+        Resume o espaço ocupado pelo histórico.
+
+        Returns:
+            dict: versions, snapshots e bytes (dados comprimidos)
+        """
+        versions, snapshots, size = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(snapshot), 0), COALESCE(SUM(LENGTH(data)), 0) "
+            "FROM report_versions").fetchone()
+        return {"versions": versions, "snapshots": snapshots, "bytes": size}
@@ -0,0 +1,91 @@
+"""
+Módulo de tarefas em segundo plano.
+
+Este módulo contém um executor genérico para rodar funções demoradas
+no pool de threads do Qt (QThreadPool), sem travar a interface. O
+resultado, o progresso e os erros chegam à interface por sinais, que
+o Qt entrega na thread principal.
+
+Classes:
+    WorkerSignals: Sinais emitidos por uma tarefa.
+    Worker: Tarefa executada no pool de threads.
+"""
+
+import threading
+import traceback
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class WorkerSignals(QObject):
+    """
+    Sinais emitidos por uma tarefa em segundo plano.
+
+    Attributes:
+        progress (pyqtSignal): (concluído, total)
+        finished (pyqtSignal): Resultado da função
+        error (pyqtSignal): Mensagem de erro
+    """
+
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(object)
+    error = pyqtSignal(str)
+
+
+class Worker(QRunnable):
+    """
+    Tarefa que executa uma função no pool de threads do Qt.
+
+    A função recebe, além dos argumentos informados, os argumentos
+    nomeados `progress` (callable(concluído, total)) e `cancelled`
+    (callable() -> bool), para reportar o andamento e interromper o
+    trabalho quando o usuário cancelar.
+
+    Attributes:
+        signals (WorkerSignals): Sinais de progresso, término e erro
+    """
+
+    def __init__(self, fn, *args, **kwargs):
+        """
+        Inicializa a tarefa.
+
+        Args:
+            fn (callable): Função a executar
+            *args: Argumentos posicionais da função
+            **kwargs: Argumentos nomeados da função
+        """
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+        self._cancel_event = threading.Event()
+
+    def start(self):
+        """
+        Inicia a tarefa no pool global de threads.
+
+        Conecte os sinais antes de chamar este método, para não perder
+        o término de tarefas muito rápidas.
+        """
+        QThreadPool.globalInstance().start(self)
+
+    def cancel(self):
+        """Solicita a interrupção da tarefa."""
+        self._cancel_event.set()
+
+    def is_cancelled(self):
+        """Indica se a interrupção foi solicitada."""
+        return self._cancel_event.is_set()
+
+    def run(self):
+        """Executa a função e emite o sinal correspondente ao resultado."""
+        try:
+            result = self.fn(*self.args, progress=self.signals.progress.emit,
+                             cancelled=self.is_cancelled, **self.kwargs)
+        except Exception as exc:
+            traceback.print_exc()
+            self.signals.error.emit(str(exc))
+        else:
+            self.signals.finished.emit(result)
+
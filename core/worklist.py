@@ -0,0 +1,66 @@
+"""
+Módulo da fila de trabalho.
+
+Este módulo contém a montagem da fila de trabalho do usuário: as
+requisições recebidas que ainda não têm laudo e os laudos recentes do
+usuário. A fila é carregada em segundo plano logo após o login, para
+que a primeira tela já abra preenchida.
+
+Classes:
+    Worklist: Fila de trabalho de um usuário.
+
+Funções:
+    load_worklist: Monta a fila de trabalho.
+"""
+
+
+class Worklist:
+    """
+    Fila de trabalho de um usuário.
+
+    Attributes:
+        username (str): Usuário dono da fila
+        pending (list[Requisition]): Requisições ainda sem laudo, da mais antiga à mais recente
+        recent_reports (list[Report]): Laudos recentes do usuário, do mais recente ao mais antigo
+        recent_limit (int): Quantidade máxima de laudos recentes
+    """
+
+    __slots__ = ("username", "pending", "recent_reports", "recent_limit")
+
+    def __init__(self, username, pending=(), recent_reports=(), recent_limit=20):
+        self.username = username
+        self.pending = list(pending)
+        self.recent_reports = list(recent_reports)
+        self.recent_limit = recent_limit
+
+    def report_saved(self, report):
+        """
+        Atualiza a fila após a gravação de um laudo (ouvinte do ReportStore).
+
+        Args:
+            report (Report): Laudo gravado
+        """
+        sample_code = report.record.sample_code
+        self.pending = [r for r in self.pending if r.sample_code != sample_code]
+        if report.pathologist == self.username:
+            recent = [r for r in self.recent_reports if r.record.sample_code != sample_code]
+            self.recent_reports = [report] + recent[:self.recent_limit - 1]
+
+
+def load_worklist(report_store, requisition_index, username, recent_limit=20):
+    """
+    Monta a fila de trabalho (consulta o banco: chamar fora da thread da interface).
+
+    Args:
+        report_store (ReportStore): Armazenamento de laudos
+        requisition_index (RequisitionIndex): Requisições recebidas
+        username (str): Usuário logado
+        recent_limit (int, optional): Quantidade de laudos recentes. Defaults to 20.
+
+    Returns:
+        Worklist: Fila de trabalho
+    """
+    requisitions = requisition_index.requisitions()
+    reported = report_store.reported_sample_codes(r.sample_code for r in requisitions)
+    pending = [r for r in requisitions if r.sample_code not in reported]
+    return Worklist(username, pending, report_store.recent_reports(username, recent_limit), recent_limit)
@@ -13,14 +13,23 @@ Data: 09/2025
 import sys
 from PyQt5.QtWidgets import QApplication
 from main_window import MainWindow
+from core.config import METRICS_PATH, METRICS_INTERVAL
+from core.metrics import start_exporter
 
 if __name__ == '__main__':
     # Inicializa a aplicação Qt
     app = QApplication(sys.argv)
     
+    # Exporta as métricas periodicamente para coleta por um agente local
+    metrics_exporter = start_exporter(METRICS_PATH, METRICS_INTERVAL)
+    app.aboutToQuit.connect(metrics_exporter.stop)
+    
     # Cria e exibe a janela principal
     window = MainWindow()
     window.show()
     
+    # Grava os eventos de auditoria pendentes ao sair
+    app.aboutToQuit.connect(window.audit_log.close)
+    
     # Executa o loop de eventos da aplicação
     sys.exit(app.exec_())
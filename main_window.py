@@ -2,18 +2,42 @@
 Módulo da janela principal.
 
 Este módulo contém a implementação da janela principal que
-gerencia todas as telas da aplicação.
+gerencia todas as telas da aplicação e o espaço de trabalho com
+os casos abertos em abas.
 
 Classes:
     MainWindow: Janela principal que gerencia todas as telas.
 """
 
-from PyQt5.QtWidgets import QMainWindow, QWidget, QVBoxLayout
+import time
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QTabWidget, QPushButton, QMessageBox
+from PyQt5.QtCore import QTimer, QThreadPool
 from PyQt5.QtGui import QFont
+from core.metrics import REGISTRY, SCREEN_TRANSITION_SECONDS
+from core.report_store import ReportStore
+from core.case_index import CaseIndex
+from core.config import (REQUISITIONS_DIR, IMAGES_DIR, BACKUP_DIR, BACKUP_INTERVAL_HOURS,
+                         BACKUP_IO_LIMIT_MB, AUDIT_DIR, ANALYSIS_CACHE_DIR, ANALYSIS_CACHE_MAX_MB,
+                         PLUGINS_DIR, PREVIEW_CACHE_DIR, PREVIEW_CACHE_MAX_MB, TERMINOLOGY_PATH,
+                         TERMINOLOGY_CACHE_DIR, ANALYSIS_STAGE_WORKERS, WORKER_THREADS)
+from core.audit import AuditLog
+from core.requisitions import RequisitionIndex, DropDirectoryWatcher
+from core.backup import BackupRepository, BackupScheduler
+from core.users import UserStore
+from core.analysis_cache import AnalysisCache
+from core.plugins import PluginRegistry
+from core.previews import PreviewCache
+from core.terminology import TerminologyIndex, REFERENCE_TERMS
+from core.signing import SignatureLedger
+from core.workers import Worker
 from widgets.login_window import LoginWindow
-from widgets.patient_info_window import PatientInfoWindow
-from widgets.loading_window import LoadingWindow
-from widgets.results_window import ResultsWindow
+from widgets.case_tab import CaseTab
+from widgets.statistics_window import StatisticsWindow
+from widgets.history_window import HistoryWindow
+
+# Espera após a última assinatura antes de selar o lote, em milissegundos
+SIGNING_DELAY_MS = 2000
 
 
 class MainWindow(QMainWindow):
@@ -22,18 +46,66 @@ class MainWindow(QMainWindow):
     
     Attributes:
         logged_in_user (str): Nome do usuário autenticado
-        patient_data (dict): Dados do paciente e amostra
+        current_user (User): Usuário autenticado, com o seu perfil de acesso
+        user_store (UserStore): Cadastro de usuários
+        worklist (Worklist): Fila de trabalho carregada no login
+        report_store (ReportStore): Armazenamento persistente dos laudos
+        case_index (CaseIndex): Índice colunar de casos para estatísticas
+        requisition_index (RequisitionIndex): Requisições recebidas do sistema hospitalar
+        backup_scheduler (BackupScheduler): Backup automático em segundo plano
+        audit_log (AuditLog): Trilha de auditoria das ações dos usuários
+        analysis_cache (AnalysisCache): Cache dos resultados das etapas de análise
+        stage_executor (ThreadPoolExecutor): Pool das etapas de análise, compartilhado pelas abas
+        plugin_registry (PluginRegistry): Plugins de análise, carregados sob demanda
+        preview_cache (PreviewCache): Miniaturas das lâminas e prévias dos laudos do histórico
+        terminology (TerminologyIndex): Terminologia para codificar o diagnóstico (None enquanto carrega)
+        terminology_error (str): Falha ao abrir a terminologia configurada ("" se não houve)
+        signature_ledger (SignatureLedger): Selos de integridade dos laudos assinados
         login_screen (LoginWindow): Tela de login
-        patient_info_screen (PatientInfoWindow): Tela de informações do paciente
-        loading_screen (LoadingWindow): Tela de carregamento
-        results_screen (ResultsWindow): Tela de resultados
+        workspace (QTabWidget): Casos abertos, um por aba (CaseTab)
+        statistics_screen (StatisticsWindow): Tela de estatísticas
+        history_screen (HistoryWindow): Tela de histórico de laudos
     """
     
     def __init__(self):
         """Inicializa a janela principal e configura a interface."""
         super().__init__()
         self.logged_in_user = ""
-        self.patient_data = {}
+        self.current_user = None
+        self.user_store = UserStore()
+        self.worklist = None
+        self.report_store = ReportStore()
+        self.case_index = CaseIndex()
+        self._case_index_worker = None
+        self.report_store.add_listener(self.case_index.add_report)
+        self.report_store.add_listener(self._on_report_saved)
+        self.requisition_index = RequisitionIndex()
+        self.requisition_watcher = DropDirectoryWatcher(REQUISITIONS_DIR, self.requisition_index)
+        self.requisition_watcher.start()
+        self.backup_scheduler = BackupScheduler(
+            BackupRepository(BACKUP_DIR, io_limit=BACKUP_IO_LIMIT_MB * 1024 * 1024),
+            self.report_store.path, IMAGES_DIR, interval=BACKUP_INTERVAL_HOURS * 3600,
+            archive_dir=self.report_store.archive.directory)
+        self.backup_scheduler.start()
+        self.audit_log = AuditLog(AUDIT_DIR)
+        self.analysis_cache = AnalysisCache(ANALYSIS_CACHE_DIR, int(ANALYSIS_CACHE_MAX_MB * 1024 * 1024))
+        # As análises das abas rodam ao mesmo tempo: cada uma ocupa uma thread do pool
+        # do Qt esperando as suas etapas, que dividem um único pool de etapas
+        self.stage_executor = ThreadPoolExecutor(ANALYSIS_STAGE_WORKERS, thread_name_prefix="pipeline")
+        pool = QThreadPool.globalInstance()
+        pool.setMaxThreadCount(max(pool.maxThreadCount(), WORKER_THREADS))
+        self.plugin_registry = PluginRegistry(PLUGINS_DIR)
+        self.preview_cache = PreviewCache(PREVIEW_CACHE_DIR, int(PREVIEW_CACHE_MAX_MB * 1024 * 1024))
+        self.terminology = None
+        self.terminology_error = ""
+        self._terminology_worker = None
+        self.signature_ledger = SignatureLedger(self.report_store)
+        self._signing_worker = None
+        # Laudos assinados são selados em lote, pouco depois da última assinatura
+        self._signing_timer = QTimer(self)
+        self._signing_timer.setSingleShot(True)
+        self._signing_timer.setInterval(SIGNING_DELAY_MS)
+        self._signing_timer.timeout.connect(self.seal_signed_reports)
         self.initUI()
         
     def initUI(self):
@@ -59,66 +131,265 @@ class MainWindow(QMainWindow):
         
         # Inicializar as telas (apenas login inicialmente)
         self.login_screen = LoginWindow(self)
-        self.patient_info_screen = None
-        self.loading_screen = None
-        self.results_screen = None
+        self.statistics_screen = None
+        self.history_screen = None
         
         self.layout.addWidget(self.login_screen)
         
+        # Espaço de trabalho: um caso por aba
+        self.workspace = QTabWidget()
+        self.workspace.setTabsClosable(True)
+        self.workspace.setMovable(True)
+        self.workspace.setDocumentMode(True)
+        self.workspace.tabCloseRequested.connect(self.close_case)
+        self.workspace.currentChanged.connect(self._on_case_changed)
+        new_case_btn = QPushButton("+ Novo caso")
+        new_case_btn.setShortcut("Ctrl+T")
+        new_case_btn.setToolTip("Abre um novo caso em outra aba (Ctrl+T)")
+        new_case_btn.clicked.connect(self.new_case)
+        self.workspace.setCornerWidget(new_case_btn)
+        self.layout.addWidget(self.workspace)
+        
         # Mostrar tela de login inicialmente
         self.show_login_screen()
+        self.load_terminology()
+        self.seal_signed_reports()
+    
+    def _track_transition(self, screen):
+        """
+        Registra a duração da troca de tela nas métricas.
+        
+        A medição termina no próximo ciclo do loop de eventos, para
+        incluir a criação e o layout da tela exibida.
+        
+        Args:
+            screen (str): Identificador da tela de destino
+        """
+        start = time.perf_counter()
+        histogram = REGISTRY.histogram(SCREEN_TRANSITION_SECONDS,
+                                       "Tempo de troca entre telas", screen=screen)
+        QTimer.singleShot(0, lambda: histogram.observe(time.perf_counter() - start))
+    
+    def audit(self, action, sample_code="", **details):
+        """
+        Registra uma ação do usuário logado na trilha de auditoria.
+        
+        Args:
+            action (str): Ação (ver core.audit)
+            sample_code (str, optional): Amostra afetada
+            **details: Informações adicionais
+        """
+        self.audit_log.log(action, self.logged_in_user, sample_code, **details)
+    
+    def _on_report_saved(self, report):
+        """Mantém a fila de trabalho atualizada a cada laudo salvo e agenda o selo dos assinados."""
+        if self.worklist:
+            self.worklist.report_saved(report)
+        if report.signed:
+            self._signing_timer.start()
+    
+    def seal_signed_reports(self):
+        """
+        Sela em segundo plano os laudos assinados ainda sem selo de
+        integridade e grava a raiz de Merkle dos dias encerrados.
+        """
+        if self._signing_worker:
+            self._signing_timer.start()
+            return
+        self._signing_worker = worker = Worker(self.signature_ledger.sign_and_seal)
+        worker.signals.finished.connect(self._on_signing_done)
+        worker.signals.error.connect(self._on_signing_done)
+        worker.start()
+    
+    def _on_signing_done(self, result):
+        """Libera a próxima selagem; falhas são refeitas na próxima assinatura."""
+        self._signing_worker = None
+    
+    def load_terminology(self):
+        """
+        Abre a terminologia em segundo plano.
+
+        Com o índice já gravado em disco a abertura é imediata; se o
+        arquivo de terminologia mudou, o índice é reconstruído.
+        """
+        self._terminology_worker = worker = Worker(
+            lambda progress, cancelled: TerminologyIndex.open(TERMINOLOGY_PATH, TERMINOLOGY_CACHE_DIR))
+        worker.signals.finished.connect(self._on_terminology_loaded)
+        worker.signals.error.connect(self._on_terminology_error)
+        worker.start()
+
+    def _on_terminology_loaded(self, index):
+        """Disponibiliza a terminologia para as telas de resultados dos casos abertos."""
+        self._terminology_worker = None
+        self.terminology = index
+        for case in self.cases():
+            case.set_terminology(index)
+
+    def _on_terminology_error(self, message):
+        """Usa o subconjunto de referência quando a terminologia configurada não abre."""
+        self.terminology_error = message
+        self._on_terminology_loaded(TerminologyIndex.build(REFERENCE_TERMS))
+
+    def cases(self):
+        """
+        Casos abertos no espaço de trabalho, na ordem das abas.
+
+        Returns:
+            list: CaseTab de cada aba
+        """
+        return [self.workspace.widget(i) for i in range(self.workspace.count())]
+
+    def current_case(self):
+        """
+        Caso da aba selecionada.
+
+        Returns:
+            CaseTab | None: Caso, ou None sem abas
+        """
+        return self.workspace.currentWidget()
+
+    def new_case(self):
+        """
+        Abre um caso em branco em uma nova aba e a seleciona.
+
+        Returns:
+            CaseTab: Caso aberto
+        """
+        case = CaseTab(self)
+        case.title_changed.connect(
+            lambda title, case=case: self.workspace.setTabText(self.workspace.indexOf(case), title))
+        self.workspace.setCurrentIndex(self.workspace.addTab(case, case.title()))
+        return case
+
+    def close_case(self, index):
+        """
+        Fecha a aba de um caso, interrompendo a sua análise.
+
+        Pede confirmação se houver análise em andamento ou laudo aberto;
+        o espaço de trabalho mantém sempre ao menos um caso.
+
+        Args:
+            index (int): Posição da aba
+        """
+        case = self.workspace.widget(index)
+        if case.busy():
+            answer = QMessageBox.question(
+                self, "Fechar caso",
+                f"Fechar o caso {case.title()}? A análise em andamento ou o laudo não salvo serão descartados.",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+            if answer != QMessageBox.Yes:
+                return
+        self.workspace.removeTab(index)
+        case.close_case()
+        if not self.workspace.count():
+            self.new_case()
+
+    def _on_case_changed(self, index):
+        """Libera os recursos das abas que saíram de vista e recria os da aba selecionada."""
+        self._track_transition("case")
+        self._activate_case(None if self.workspace.isHidden() else self.workspace.widget(index))
+
+    def _activate_case(self, current):
+        """
+        Marca a aba à vista; as demais liberam os recursos pesados.
+
+        Args:
+            current (CaseTab): Caso à vista, ou None se o espaço de trabalho está oculto
+        """
+        # Primeiro libera as ocultas, para não somar a memória da aba que abre
+        for case in self.cases():
+            if case is not current:
+                case.set_active(False)
+        if current:
+            current.set_active(True)
+
+    def _hide_screens(self):
+        """Esconde todas as telas já criadas."""
+        for screen in (self.login_screen, self.workspace, self.statistics_screen, self.history_screen):
+            if screen:
+                screen.hide()
+        self._activate_case(None)
     
     def show_login_screen(self):
-        """Exibe a tela de login e esconde as demais."""
+        """Encerra a sessão do usuário, exibe a tela de login e esconde as demais."""
+        self._track_transition("login")
+        self._hide_screens()
+        self._end_session()
+        self.login_screen.show_user_store_status()
         self.login_screen.show()
-        if self.patient_info_screen:
-            self.patient_info_screen.hide()
-        if self.loading_screen:
-            self.loading_screen.hide()
-        if self.results_screen:
-            self.results_screen.hide()
+    
+    def _end_session(self):
+        """
+        Fecha os casos abertos (interrompendo as análises e descartando os
+        laudos não salvos) e esquece o usuário, para que o próximo login
+        comece com o espaço de trabalho vazio.
+        """
+        while self.workspace.count():
+            case = self.workspace.widget(0)
+            self.workspace.removeTab(0)
+            case.close_case()
+        self.current_user = None
+        self.logged_in_user = ""
+        self.worklist = None
     
     def show_patient_info_screen(self):
-        """Exibe a tela de informações do paciente."""
-        self.login_screen.hide()
-        if self.loading_screen:
-            self.loading_screen.hide()
-        if self.results_screen:
-            self.results_screen.hide()
-            
-        # Criar tela se não existir
-        if not self.patient_info_screen:
-            self.patient_info_screen = PatientInfoWindow(self)
-            self.layout.addWidget(self.patient_info_screen)
-        
-        self.patient_info_screen.show()
-    
-    def show_loading_screen(self):
-        """Exibe a tela de carregamento durante a análise."""
-        self.login_screen.hide()
-        if self.patient_info_screen:
-            self.patient_info_screen.hide()
-        if self.results_screen:
-            self.results_screen.hide()
-            
+        """Exibe o espaço de trabalho com os casos abertos (um caso em branco no primeiro acesso)."""
+        self._track_transition("patient_info")
+        self._hide_screens()
+        
+        if not self.workspace.count():
+            self.new_case()
+        
+        self.workspace.show()
+        self._activate_case(self.current_case())
+    
+    def show_statistics_screen(self):
+        """Exibe a tela de estatísticas do laboratório."""
+        self._track_transition("statistics")
+        self._hide_screens()
+        
         # Criar tela se não existir
-        if not self.loading_screen:
-            self.loading_screen = LoadingWindow(self)
-            self.layout.addWidget(self.loading_screen)
-        
-        self.loading_screen.show()
-    
-    def show_results_screen(self):
-        """Exibe a tela de resultados com o laudo completo."""
-        self.login_screen.hide()
-        if self.patient_info_screen:
-            self.patient_info_screen.hide()
-        if self.loading_screen:
-            self.loading_screen.hide()
-            
+        if not self.statistics_screen:
+            self.statistics_screen = StatisticsWindow(self)
+            self.layout.addWidget(self.statistics_screen)
+        
+        # O índice de casos é carregado no primeiro acesso, em segundo plano;
+        # depois ele é mantido atualizado a cada laudo salvo
+        self.load_case_index()
+        self.statistics_screen.refresh()
+        self.statistics_screen.show()
+    
+    def load_case_index(self):
+        """Carrega o índice de casos em segundo plano, se ainda não foi carregado."""
+        if self.case_index.loaded or self._case_index_worker:
+            return
+        self._case_index_worker = worker = Worker(
+            lambda progress, cancelled: self.case_index.load(self.report_store))
+        worker.signals.finished.connect(self._on_case_index_loaded)
+        worker.signals.error.connect(self._on_case_index_error)
+        worker.start()
+    
+    def _on_case_index_loaded(self, result):
+        """Atualiza a tela de estatísticas com o índice carregado."""
+        self._case_index_worker = None
+        if self.statistics_screen:
+            self.statistics_screen.refresh()
+    
+    def _on_case_index_error(self, message):
+        """Informa a falha na tela de estatísticas; o carregamento é refeito no próximo acesso."""
+        self._case_index_worker = None
+        if self.statistics_screen:
+            self.statistics_screen.summary_label.setText(f"Não foi possível carregar o índice de casos: {message}")
+    
+    def show_history_screen(self):
+        """Exibe a tela de histórico de laudos."""
+        self._track_transition("history")
+        self._hide_screens()
+        
         # Criar tela se não existir
-        if not self.results_screen:
-            self.results_screen = ResultsWindow(self)
-            self.layout.addWidget(self.results_screen)
+        if not self.history_screen:
+            self.history_screen = HistoryWindow(self)
+            self.layout.addWidget(self.history_screen)
         
-        self.results_screen.show()
\ No newline at end of file
+        self.history_screen.show()
+        self.history_screen.refresh()
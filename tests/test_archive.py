@@ -0,0 +1,64 @@
+"""
+Testes do arquivo de laudos assinados: anexação, encerramento de
+segmentos, reabertura e busca por códigos longos.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.archive import KEY_BYTES, ReportArchive
+
+
+def _fields(report_id, sample_code, record_number="PR-1", diagnosis=""):
+    """Campos mínimos de um laudo arquivado."""
+    return {"id": report_id, "sample_code": sample_code, "record_number": record_number,
+            "pathologist": "ana", "created_at": float(report_id), "updated_at": float(report_id),
+            "diagnosis": diagnosis}
+
+
+def test_append_seal_and_reopen(tmp_path):
+    directory = str(tmp_path / "arquivo")
+    archive = ReportArchive(directory, segment_size=1024)
+    for i in range(1, 61):
+        archive.append(_fields(i, f"AP-{i % 20:03d}", f"PR-{i % 7}", f"versão {i}"))
+    assert archive.stats()["segments"] > 1
+    assert len(archive) == 20
+    assert archive.max_id == 60
+    assert archive.get("AP-005")["diagnosis"] == "versão 45"
+    archive.close()
+
+    reopened = ReportArchive(directory, segment_size=1024)
+    try:
+        assert len(reopened) == 20
+        assert reopened.get("AP-005")["diagnosis"] == "versão 45"
+        assert sorted(f["id"] for f in reopened.find_by_record_number("PR-3")) == [45, 52, 59]
+        # A anexação atualiza as versões vigentes já calculadas
+        reopened.append(_fields(61, "AP-005", "PR-3", "versão 61"))
+        reopened.append(_fields(62, "AP-999", "PR-3", "nova"))
+        assert reopened.get("AP-005")["diagnosis"] == "versão 61"
+        assert len(reopened) == 21
+        assert sorted(f["id"] for f in reopened.find_by_record_number("PR-3")) == [52, 59, 61, 62]
+        assert "AP-000" in reopened and "AP-998" not in reopened
+    finally:
+        reopened.close()
+
+
+def test_long_keys_are_not_confused(tmp_path):
+    directory = str(tmp_path / "arquivo")
+    prefix = "X" * KEY_BYTES
+    archive = ReportArchive(directory, segment_size=512)
+    for i in range(1, 31):
+        archive.append(_fields(i, f"{prefix}-{i % 10}", f"{prefix}-prontuário-{i % 3}", f"versão {i}"))
+    archive.close()
+
+    reopened = ReportArchive(directory, segment_size=512)
+    try:
+        assert len(reopened) == 10
+        for n in range(10):
+            assert reopened.get(f"{prefix}-{n}")["diagnosis"] == f"versão {n + 20 if n else 30}"
+        assert reopened.get(prefix) is None
+        assert sorted(f["id"] for f in reopened.find_by_record_number(f"{prefix}-prontuário-1")) == [22, 25, 28]
+    finally:
+        reopened.close()
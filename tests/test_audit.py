@@ -0,0 +1,48 @@
+"""
+Testes do registro de auditoria: lotes com falha de gravação são
+mantidos e gravados na tentativa seguinte.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core.audit as audit
+from core.audit import AuditLog
+
+
+def test_failed_batch_is_kept_and_retried(tmp_path, monkeypatch):
+    monkeypatch.setattr(audit, "RETRY_DELAY", 0.02)
+    real_fsync = os.fsync
+    failures = [3]
+
+    def flaky_fsync(fd):
+        if failures[0]:
+            failures[0] -= 1
+            raise OSError(28, "No space left on device")
+        real_fsync(fd)
+
+    directory = str(tmp_path / "auditoria")
+    log = AuditLog(directory, segment_size=300, flush_interval=0.01)
+    monkeypatch.setattr(audit.os, "fsync", flaky_fsync)
+    try:
+        for i in range(12):
+            log.log("view", "ana", f"AP-{i % 3}")
+        assert log.flush(timeout=10)
+        assert not failures[0]
+        assert log.last_error is None
+    finally:
+        log.close()
+        monkeypatch.setattr(audit.os, "fsync", real_fsync)
+
+    reopened = AuditLog(directory)
+    try:
+        lines = 0
+        for number in reopened.segments():
+            with open(reopened._segment_path(number), encoding="utf-8") as f:
+                lines += sum(1 for _ in f)
+        assert lines == 12
+        assert [len(reopened.events_for_sample(f"AP-{i}")) for i in range(3)] == [4, 4, 4]
+    finally:
+        reopened.close()
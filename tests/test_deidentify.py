@@ -0,0 +1,46 @@
+"""
+Testes da exportação anonimizada: nenhum nome dos casos sintéticos
+pode aparecer no conjunto de dados exportado.
+"""
+
+import csv
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.deidentify import COMMON_NAMES, Deidentifier, export_deidentified
+from core.report_store import ReportStore
+from core.synthetic import FEMALE_NAMES, MALE_NAMES, SURNAMES, CaseGenerator
+
+
+def _exported_text(tmp_path, cases):
+    """Grava os casos, exporta para CSV e retorna o conteúdo do arquivo."""
+    store = ReportStore(str(tmp_path / "laudos.db"), str(tmp_path / "arquivo"))
+    try:
+        for case in cases:
+            case.save(store)
+        path = str(tmp_path / "pesquisa.csv")
+        rules = Deidentifier(b"\x00" * 32, COMMON_NAMES)
+        assert export_deidentified(store, path, "teste", workers=2, rules=rules) == len(cases)
+    finally:
+        store.close()
+    with open(path, encoding="utf-8", newline="") as f:
+        return "\n".join(",".join(row) for row in csv.reader(f))
+
+
+def test_synthetic_names_are_removed(tmp_path):
+    cases = list(CaseGenerator(seed=1).cases(300))
+    text = _exported_text(tmp_path, cases)
+    names = set(FEMALE_NAMES + MALE_NAMES + SURNAMES)
+    names.update(word for case in cases for word in case.record.patient_name.split())
+    leaked = sorted(name for name in names if re.search(rf"\b{re.escape(name)}\b", text))
+    assert not leaked
+
+
+def test_names_after_honorifics_are_removed():
+    rules = Deidentifier(b"\x00" * 32)
+    text = "Encaminhado(a) pelo(a) Dr(a). Xavier Quintela. Avaliada pela Dra. Ana de Souza e pelo Sr. Zé."
+    assert rules.scrub(text, 1) == ("Encaminhado(a) pelo(a) Dr(a). [NOME]. Avaliada pela Dra. [NOME] "
+                                    "e pelo Sr. [NOME].")
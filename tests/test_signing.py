@@ -0,0 +1,75 @@
+"""
+Testes dos selos de integridade: a conferência acusa laudos assinados
+alterados no arquivo depois da selagem.
+"""
+
+import os
+import sys
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.archive import _HEADER, _decode, _encode
+from core.report_store import ReportStore
+from core.signing import SignatureLedger
+from core.synthetic import CaseGenerator
+
+KEY = b"\x01" * 32
+
+
+def _open_store(tmp_path):
+    return ReportStore(str(tmp_path / "laudos.db"), str(tmp_path / "arquivo"))
+
+
+def _rewrite_diagnosis(directory, sample_code, diagnosis):
+    """Altera o diagnóstico de um laudo diretamente nos segmentos, com CRC válido."""
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".seg"):
+            continue
+        path = os.path.join(directory, name)
+        with open(path, "rb") as f:
+            data = f.read()
+        records, offset = [], 0
+        while offset < len(data):
+            size, _ = _HEADER.unpack_from(data, offset)
+            fields, annotations = _decode(data[offset + _HEADER.size:offset + _HEADER.size + size])
+            if fields["sample_code"] == sample_code:
+                fields["diagnosis"] = diagnosis
+            payload = _encode(fields, annotations)
+            records.append(_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+            offset += _HEADER.size + size
+        with open(path, "wb") as f:
+            f.write(b"".join(records))
+
+
+def test_verify_detects_tampering(tmp_path):
+    store = _open_store(tmp_path)
+    cases = list(CaseGenerator(seed=5).cases(20))
+    try:
+        for case in cases:
+            case.save(store)
+            store.sign_report(case.record.sample_code, "ana")
+        ledger = SignatureLedger(store, key=KEY)
+        count, _ = ledger.sign_and_seal()
+        assert count == len(cases)
+        (day,) = ledger.seal_days(today="9999-12-31")
+        assert ledger.verify_all().ok
+        assert ledger.verify_day(day).ok
+    finally:
+        store.close()
+
+    tampered = cases[7].record.sample_code
+    _rewrite_diagnosis(str(tmp_path / "arquivo"), tampered, "Ausência de neoplasia.")
+
+    store = _open_store(tmp_path)
+    try:
+        ledger = SignatureLedger(store, key=KEY)
+        for result in (ledger.verify_all(), ledger.verify_day(day)):
+            assert (tampered, "Conteúdo alterado após a assinatura") in result.problems
+            assert (day, "Raiz de Merkle diferente da selada") in result.problems
+            assert result.checked == len(cases)
+        # Chave diferente: nenhuma assinatura confere
+        result = SignatureLedger(store, key=b"\x02" * 32).verify_day(day)
+        assert sum(problem == "Assinatura inválida" for _, problem in result.problems) == len(cases) - 1
+    finally:
+        store.close()
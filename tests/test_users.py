@@ -0,0 +1,61 @@
+"""
+Testes do cadastro de usuários: bloqueio após tentativas de login sem
+sucesso.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core.users as users
+from core.users import MAX_FAILURES, AuthenticationError, LoginThrottle, Role, UserStore
+
+
+class _Clock:
+    """Relógio controlado pelo teste (substitui time.monotonic)."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lockout_blocks_correct_password(tmp_path, monkeypatch):
+    # Hash mais barato: o teste confere o bloqueio, não o custo do scrypt
+    monkeypatch.setattr(users, "SCRYPT_N", 2 ** 10)
+    clock = _Clock()
+    monkeypatch.setattr(users.time, "monotonic", clock)
+    store = UserStore(str(tmp_path / "usuarios.db"))
+    store.add_user("ana", "segredo", Role.PATHOLOGIST)
+
+    for _ in range(MAX_FAILURES):
+        with pytest.raises(AuthenticationError, match="inválidos"):
+            store.authenticate("ana", "errada")
+    # Bloqueado: nem a senha correta é conferida, inclusive com outra grafia do usuário
+    with pytest.raises(AuthenticationError, match="Aguarde"):
+        store.authenticate("ANA", "segredo")
+
+    clock.now += users.LOCKOUT_SECONDS
+    assert store.authenticate("ana", "segredo").username == "ana"
+    # O login bem-sucedido zera as falhas
+    with pytest.raises(AuthenticationError, match="inválidos"):
+        store.authenticate("ana", "errada")
+    assert store.throttle.remaining_lockout("ana") == 0
+
+
+def test_lockout_doubles_up_to_the_limit(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(users.time, "monotonic", clock)
+    throttle = LoginThrottle()
+    lockouts = []
+    for _ in range(MAX_FAILURES + 8):
+        throttle.record_failure("ana")
+        lockouts.append(throttle.remaining_lockout("ana"))
+    assert lockouts[:MAX_FAILURES - 1] == [0] * (MAX_FAILURES - 1)
+    assert lockouts[MAX_FAILURES - 1:MAX_FAILURES + 2] == [users.LOCKOUT_SECONDS * f for f in (1, 2, 4)]
+    assert lockouts[-1] == users.LOCKOUT_MAX_SECONDS
+    assert throttle.remaining_lockout("outro") == 0
@@ -0,0 +1,46 @@
+"""
+Testes do histórico de versões: reconstrução das versões gravadas como
+diferença, antes e depois de uma cópia completa.
+"""
+
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.versions import VersionLog
+
+
+def _versions():
+    """Campos de versões sucessivas de um laudo, com pequenas alterações."""
+    fields = {"macroscopy": "Fragmento irregular de tecido pardacento medindo 1,0 cm.",
+              "microscopy": "Cortes histológicos mostram mucosa gástrica com gastrite crônica.",
+              "diagnosis": "Gastrite crônica leve.", "diagnosis_system": "CID-10",
+              "diagnosis_code": "K29.5"}
+    versions = []
+    for i in range(1, 12):
+        fields = dict(fields)
+        fields["diagnosis"] = f"Gastrite crônica leve. Revisão {i}."
+        if i % 4 == 0:
+            fields["microscopy"] += f" Pesquisa de H. pylori: {'positiva' if i % 8 else 'negativa'}."
+        versions.append(fields)
+    return versions
+
+
+def test_reconstruct_across_snapshots():
+    conn = sqlite3.connect(":memory:")
+    log = VersionLog(lambda: conn, snapshot_interval=4)
+    versions = _versions()
+    for number, fields in enumerate(versions, 1):
+        assert log.record("AP-1", fields, "ana", saved_at=float(number)) == number
+    # Conteúdo igual ao da versão atual não gera versão nova
+    assert log.record("AP-1", versions[-1], "ana") == len(versions)
+
+    stats = log.stats()
+    assert stats["versions"] == len(versions)
+    assert 1 < stats["snapshots"] < len(versions)
+    for number, fields in enumerate(versions, 1):
+        assert log.reconstruct("AP-1", number) == fields
+    assert [version.fields for version in log.history("AP-1")] == versions
+    assert log.reconstruct("AP-2", 1) is None
@@ -7,7 +7,13 @@ personalizados utilizados no sistema de patologia digital.
 Módulos:
     animated_button: Botão com efeitos de animação
     login_window: Tela de autenticação
+    case_tab: Aba de um caso no espaço de trabalho
     patient_info_window: Tela de informações do paciente
     loading_window: Tela de carregamento
     results_window: Tela de resultados
+    statistics_window: Tela de estatísticas do laboratório
+    export_dialog: Diálogo de exportação de laudos
+    slide_viewer: Visualizador de lâminas com anotações
+    history_window: Tela de histórico de laudos
+    version_history: Diálogo de versões do laudo com as diferenças
 """
\ No newline at end of file
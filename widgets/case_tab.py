@@ -0,0 +1,200 @@
+"""
+Módulo da aba de caso.
+
+Este módulo contém a aba do espaço de trabalho com vários pacientes:
+cada aba tem o seu formulário, a sua análise e o seu laudo, e libera
+os recursos pesados enquanto não está à vista.
+
+Classes:
+    CaseTab: Aba de um caso no espaço de trabalho.
+"""
+
+from PyQt5.QtWidgets import QWidget, QVBoxLayout
+from PyQt5.QtCore import pyqtSignal
+from core.audit import ACTION_VIEW
+from core.pipeline import PipelineResult
+from .patient_info_window import PatientInfoWindow
+from .loading_window import LoadingWindow
+from .results_window import ResultsWindow
+
+# Valores do resultado da análise usados pelo laudo; os demais (imagem da
+# lâmina, características da imagem) são descartados quando a aba sai de vista
+RESULT_VALUES = ("microscopy_text", "analysis_summary", "diagnosis_suggestion", "annotations")
+
+
+class CaseTab(QWidget):
+    """
+    Aba de um caso: formulário, análise e laudo próprios.
+
+    Guarda os dados do paciente e o resultado da análise e troca as
+    telas dentro da aba. As telas do caso recebem a aba e usam a janela
+    principal (case.main_window) para os serviços compartilhados
+    (armazenamento, terminologia, auditoria...) e a navegação para as
+    demais telas.
+
+    Só a aba à vista mantém a tela de resultados e o resultado completo
+    da análise. Ao sair da aba, o laudo em edição é guardado, a tela é
+    destruída e o resultado fica só com os valores usados pelo laudo; a
+    tela é recriada quando a aba volta a ser aberta. A análise de uma
+    aba oculta continua em andamento.
+
+    Attributes:
+        main_window (MainWindow): Janela principal
+        patient_data (PatientRecord): Dados do paciente e amostra do caso
+        analysis_requested_at (float): Instante (perf_counter) em que a análise foi solicitada
+        analysis_result (PipelineResult): Resultado da análise do caso
+        patient_info_screen (PatientInfoWindow): Formulário do caso
+        loading_screen (LoadingWindow): Andamento da análise (None antes da primeira)
+        results_screen (ResultsWindow): Laudo (None fora da tela de resultados ou com a aba oculta)
+        results_draft (dict): Laudo em edição guardado ao sair da aba
+        screen (str): Tela atual do caso ("patient_info", "loading" ou "results")
+        active (bool): Se a aba está à vista
+        title_changed (pyqtSignal): Novo título da aba
+    """
+
+    title_changed = pyqtSignal(str)
+
+    def __init__(self, main_window):
+        """
+        Inicializa a aba com o formulário em branco.
+
+        Args:
+            main_window (MainWindow): Instância da janela principal
+        """
+        super().__init__()
+        self.main_window = main_window
+        self.patient_data = None
+        self.analysis_requested_at = None
+        self.analysis_result = None
+        self.results_draft = None
+        self.screen = "patient_info"
+        self.active = False
+        self._view_pending = False
+
+        self.screens_layout = QVBoxLayout(self)
+        self.screens_layout.setContentsMargins(0, 0, 0, 0)
+        self.loading_screen = None
+        self.results_screen = None
+        self.patient_info_screen = PatientInfoWindow(self)
+        self.screens_layout.addWidget(self.patient_info_screen)
+
+    def title(self):
+        """
+        Título da aba: código da amostra e nome do paciente.
+
+        Returns:
+            str: Título
+        """
+        record = self.patient_data
+        if record is None:
+            return "Novo caso"
+        title = f"{record.sample_code} · {record.patient_name.split()[0]}"
+        return title + " (analisando)" if self.screen == "loading" else title
+
+    def busy(self):
+        """Indica se o caso tem uma análise em andamento ou um laudo aberto, que seriam perdidos ao fechar."""
+        return self.screen in ("loading", "results")
+
+    def set_active(self, active):
+        """
+        Exibe ou oculta a aba, criando ou liberando a tela de resultados.
+
+        Args:
+            active (bool): Se a aba passa a estar à vista
+        """
+        if active == self.active:
+            return
+        self.active = active
+        if active:
+            self.patient_info_screen.set_worklist(self.main_window.worklist)
+            if self.screen == "results" and self.results_screen is None:
+                self._show_results()
+            return
+        if self.results_screen:
+            self.results_draft = self.results_screen.draft()
+            self._discard_results()
+        self._release_result()
+
+    def close_case(self):
+        """Interrompe a análise em andamento e libera as telas do caso."""
+        if self.loading_screen and self.loading_screen.worker:
+            self.loading_screen.worker.cancel()
+        self._discard_results()
+        self.analysis_result = None
+        self.deleteLater()
+
+    def set_terminology(self, index):
+        """Repassa a terminologia carregada à tela de resultados."""
+        if self.results_screen:
+            self.results_screen.set_terminology(index)
+
+    def _show(self, screen):
+        """Esconde as telas do caso e exibe a indicada."""
+        for widget in (self.patient_info_screen, self.loading_screen, self.results_screen):
+            if widget:
+                widget.hide()
+        screen.show()
+        self.title_changed.emit(self.title())
+
+    def _show_results(self):
+        """Cria a tela de resultados, com o laudo em edição guardado ao sair da aba."""
+        self.results_screen = ResultsWindow(self)
+        self.results_screen.restore_draft(self.results_draft)
+        self.results_draft = None
+        self.screens_layout.addWidget(self.results_screen)
+        self._show(self.results_screen)
+        # A visualização é auditada quando o laudo aparece, não ao fim da análise
+        if self._view_pending:
+            self._view_pending = False
+            self.main_window.audit(ACTION_VIEW, self.patient_data.sample_code)
+
+    def _discard_results(self):
+        """Destrói a tela de resultados."""
+        if self.results_screen:
+            self.screens_layout.removeWidget(self.results_screen)
+            self.results_screen.deleteLater()
+            self.results_screen = None
+
+    def _release_result(self):
+        """Mantém do resultado da análise só os valores usados pelo laudo."""
+        result = self.analysis_result
+        if result is None:
+            return
+        self.analysis_result = PipelineResult({name: result.values[name] for name in RESULT_VALUES
+                                               if name in result.values}, result.runs, result.seconds)
+
+    def show_patient_info_screen(self):
+        """Exibe o formulário do caso, descartando o laudo anterior."""
+        self.main_window._track_transition("patient_info")
+        self.screen = "patient_info"
+        self._discard_results()
+        self.results_draft = None
+        self.patient_info_screen.set_worklist(self.main_window.worklist)
+        self._show(self.patient_info_screen)
+
+    def show_loading_screen(self):
+        """Exibe o andamento e inicia a análise do caso."""
+        self.main_window._track_transition("loading")
+        self.screen = "loading"
+        if not self.loading_screen:
+            self.loading_screen = LoadingWindow(self)
+            self.screens_layout.addWidget(self.loading_screen)
+        self._show(self.loading_screen)
+        self.loading_screen.start_analysis()
+
+    def show_results_screen(self):
+        """
+        Exibe o laudo ao fim da análise.
+
+        Com a aba oculta, a tela só é criada quando a aba for aberta.
+        """
+        self.screen = "results"
+        self._discard_results()
+        self.results_draft = None
+        self._view_pending = True
+        if self.active:
+            self.main_window._track_transition("results")
+            self._show_results()
+        else:
+            self._release_result()
+            self.title_changed.emit(self.title())
@@ -0,0 +1,261 @@
+"""
+Módulo do diálogo de exportação de laudos.
+
+Este módulo contém a implementação do diálogo que exporta o arquivo
+de laudos para CSV ou Excel, com seleção de colunas, filtro por
+período de emissão e barra de progresso. A exportação roda em
+segundo plano, sem travar a interface.
+
+Classes:
+    ExportDialog: Diálogo de exportação de laudos.
+"""
+
+from PyQt5.QtWidgets import (QDialog, QLabel, QPushButton, QVBoxLayout, QHBoxLayout,
+                             QListWidget, QListWidgetItem, QDateEdit, QComboBox,
+                             QProgressBar, QFileDialog, QMessageBox)
+from PyQt5.QtCore import Qt, QDate, QDateTime, QTime
+from PyQt5.QtGui import QFont
+from core.exporter import EXPORT_COLUMNS, export_reports
+from core.workers import Worker
+from .animated_button import AnimatedButton
+
+
+class ExportDialog(QDialog):
+    """
+    Diálogo de exportação do arquivo de laudos.
+
+    Attributes:
+        main_window (MainWindow): Referência à janela principal
+        columns_list (QListWidget): Colunas disponíveis, marcáveis
+        start_date (QDateEdit): Início do período de emissão
+        end_date (QDateEdit): Fim do período de emissão (inclusivo)
+        format_combo (QComboBox): Formato do arquivo (CSV ou Excel)
+        progress (QProgressBar): Progresso da exportação
+        worker (Worker): Tarefa de exportação em andamento, se houver
+    """
+
+    FORMATS = [
+        ("CSV (*.csv)", ".csv"),
+        ("Excel (*.xlsx)", ".xlsx"),
+    ]
+
+    def __init__(self, main_window, parent=None):
+        """
+        Inicializa o diálogo de exportação.
+
+        Args:
+            main_window (MainWindow): Instância da janela principal
+            parent (QWidget, optional): Widget pai. Defaults to None.
+        """
+        super().__init__(parent)
+        self.main_window = main_window
+        self.worker = None
+        self.initUI()
+
+    def initUI(self):
+        """
+        Configura a interface gráfica do diálogo.
+
+        Cria:
+        - Lista de colunas marcáveis
+        - Período de emissão
+        - Formato do arquivo
+        - Barra de progresso e botões
+        """
+        self.setWindowTitle("Exportar Laudos")
+        self.setMinimumWidth(480)
+        layout = QVBoxLayout()
+        layout.setSpacing(12)
+
+        title = QLabel("Exportar Laudos")
+        title.setFont(QFont("Arial", 14, QFont.Bold))
+        title.setStyleSheet("color: #023e8a;")
+        layout.addWidget(title)
+
+        # Colunas
+        layout.addWidget(QLabel("Colunas:"))
+        self.columns_list = QListWidget()
+        self.columns_list.setFont(QFont("Arial", 10))
+        for name, header in EXPORT_COLUMNS:
+            item = QListWidgetItem(header)
+            item.setData(Qt.UserRole, name)
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked)
+            self.columns_list.addItem(item)
+        layout.addWidget(self.columns_list)
+
+        # Período de emissão
+        date_style = "padding: 6px; border: 1px solid #ddd; border-radius: 5px; background-color: white;"
+        period_layout = QHBoxLayout()
+        period_layout.addWidget(QLabel("Emitidos de:"))
+        self.start_date = QDateEdit()
+        self.start_date.setCalendarPopup(True)
+        self.start_date.setDate(QDate(QDate.currentDate().year(), 1, 1))
+        self.start_date.setStyleSheet(date_style)
+        period_layout.addWidget(self.start_date)
+        period_layout.addWidget(QLabel("até:"))
+        self.end_date = QDateEdit()
+        self.end_date.setCalendarPopup(True)
+        self.end_date.setDate(QDate.currentDate())
+        self.end_date.setStyleSheet(date_style)
+        period_layout.addWidget(self.end_date)
+        layout.addLayout(period_layout)
+
+        # Formato
+        format_layout = QHBoxLayout()
+        format_layout.addWidget(QLabel("Formato:"))
+        self.format_combo = QComboBox()
+        self.format_combo.addItems([label for label, _ in self.FORMATS])
+        self.format_combo.setStyleSheet(date_style)
+        format_layout.addWidget(self.format_combo)
+        format_layout.addStretch()
+        layout.addLayout(format_layout)
+
+        # Progresso
+        self.progress = QProgressBar()
+        self.progress.setStyleSheet("""
+            QProgressBar {
+                border: 2px solid #023e8a;
+                border-radius: 8px;
+                text-align: center;
+                background-color: white;
+            }
+            QProgressBar::chunk {
+                background-color: #023e8a;
+                border-radius: 6px;
+            }
+        """)
+        self.progress.setValue(0)
+        layout.addWidget(self.progress)
+
+        # Botões
+        button_layout = QHBoxLayout()
+        self.cancel_btn = QPushButton("Fechar")
+        self.cancel_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #6c757d;
+                color: white;
+                padding: 10px 20px;
+                border-radius: 8px;
+                border: none;
+            }
+            QPushButton:hover {
+                background-color: #5a6268;
+            }
+        """)
+        self.cancel_btn.clicked.connect(self.cancel_or_close)
+        button_layout.addWidget(self.cancel_btn)
+        button_layout.addStretch()
+
+        self.export_btn = AnimatedButton("Exportar")
+        self.export_btn.setFont(QFont("Arial", 10, QFont.Bold))
+        self.export_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #023e8a;
+                color: white;
+                padding: 10px 25px;
+                border-radius: 8px;
+                border: none;
+            }
+            QPushButton:hover {
+                background-color: #003566;
+            }
+        """)
+        self.export_btn.clicked.connect(self.start_export)
+        button_layout.addWidget(self.export_btn)
+        layout.addLayout(button_layout)
+
+        self.setLayout(layout)
+
+    def selected_columns(self):
+        """Retorna os nomes das colunas marcadas, na ordem da lista."""
+        columns = []
+        for i in range(self.columns_list.count()):
+            item = self.columns_list.item(i)
+            if item.checkState() == Qt.Checked:
+                columns.append(item.data(Qt.UserRole))
+        return columns
+
+    def start_export(self):
+        """
+        Pede o arquivo de destino e inicia a exportação em segundo plano.
+        """
+        columns = self.selected_columns()
+        if not columns:
+            QMessageBox.warning(self, "Exportação", "Selecione ao menos uma coluna.")
+            return
+
+        file_filter, extension = self.FORMATS[self.format_combo.currentIndex()]
+        path, _ = QFileDialog.getSaveFileName(self, "Salvar exportação", f"laudos{extension}", file_filter)
+        if not path:
+            return
+        if not path.lower().endswith(extension):
+            path += extension
+
+        # Período inclusivo: do início do primeiro dia ao início do dia seguinte ao último
+        since = QDateTime(self.start_date.date(), QTime(0, 0)).toSecsSinceEpoch()
+        until = QDateTime(self.end_date.date().addDays(1), QTime(0, 0)).toSecsSinceEpoch()
+
+        self.worker = Worker(export_reports, self.main_window.report_store, path,
+                             columns=columns, since=since, until=until)
+        self.worker.signals.progress.connect(self.on_progress)
+        self.worker.signals.finished.connect(self.on_finished)
+        self.worker.signals.error.connect(self.on_error)
+        self.export_btn.setEnabled(False)
+        self.cancel_btn.setText("Cancelar")
+        self.progress.setValue(0)
+        self.worker.start()
+
+    def cancel_or_close(self):
+        """Cancela a exportação em andamento ou fecha o diálogo."""
+        if self.worker:
+            self.worker.cancel()
+        else:
+            self.reject()
+
+    def reject(self):
+        """Fecha o diálogo, cancelando a exportação em andamento."""
+        if self.worker:
+            self.worker.cancel()
+        super().reject()
+
+    def on_progress(self, done, total):
+        """
+        Atualiza a barra de progresso.
+
+        Args:
+            done (int): Linhas exportadas
+            total (int): Total de linhas do período
+        """
+        self.progress.setMaximum(max(total, 1))
+        self.progress.setValue(done)
+
+    def on_finished(self, count):
+        """
+        Informa o resultado da exportação.
+
+        Args:
+            count (int): Linhas exportadas (0 se cancelada)
+        """
+        cancelled = self.worker.is_cancelled()
+        self._reset()
+        if cancelled:
+            QMessageBox.information(self, "Exportação", "Exportação cancelada.")
+        else:
+            QMessageBox.information(self, "Exportação", f"{count} laudo(s) exportado(s) com sucesso!")
+
+    def on_error(self, message):
+        """
+        Exibe o erro ocorrido na exportação.
+
+        Args:
+            message (str): Mensagem de erro
+        """
+        self._reset()
+        QMessageBox.warning(self, "Erro na exportação", message)
+
+    def _reset(self):
+        """Restaura os botões após o término da exportação."""
+        self.worker = None
+        self.export_btn.setEnabled(True)
+        self.cancel_btn.setText("Fechar")
@@ -0,0 +1,312 @@
+"""
+Módulo da tela de histórico de laudos.
+
+Este módulo contém a lista dos laudos emitidos, com a miniatura da
+lâmina em cada linha e a prévia da primeira página do laudo
+selecionado. As imagens vêm do cache de prévias (core.previews) e são
+geradas em segundo plano apenas para as linhas visíveis; enquanto não
+ficam prontas, a linha exibe uma imagem provisória, de modo que a
+rolagem nunca espera pela leitura de uma lâmina.
+
+Classes:
+    HistoryWindow: Tela de histórico de laudos.
+"""
+
+import time
+
+from PyQt5.QtWidgets import (QWidget, QLabel, QPushButton, QVBoxLayout, QHBoxLayout, QFrame,
+                             QListWidget, QListWidgetItem, QCheckBox, QScrollArea)
+from PyQt5.QtCore import Qt, QSize, QTimer
+from PyQt5.QtGui import QFont, QPixmap, QIcon, QColor, QPainter
+from core.workers import Worker
+
+# Laudos exibidos no histórico (os mais recentes)
+HISTORY_LIMIT = 500
+
+# Lado das miniaturas na lista
+ICON_SIZE = 96
+
+
+def _placeholder(text):
+    """Imagem provisória das linhas sem miniatura."""
+    pixmap = QPixmap(ICON_SIZE, ICON_SIZE)
+    pixmap.fill(QColor("#e9ecef"))
+    painter = QPainter(pixmap)
+    painter.setPen(QColor("#6c757d"))
+    painter.setFont(QFont("Arial", 8))
+    painter.drawText(pixmap.rect(), Qt.AlignCenter | Qt.TextWordWrap, text)
+    painter.end()
+    return QIcon(pixmap)
+
+
+class HistoryWindow(QWidget):
+    """
+    Tela de histórico de laudos com miniaturas e prévias.
+
+    Attributes:
+        main_window (MainWindow): Referência à janela principal
+        report_list (QListWidget): Laudos, do mais recente ao mais antigo
+        preview_label (QLabel): Prévia do laudo selecionado
+        mine_check (QCheckBox): Exibe apenas os laudos do usuário logado
+        status_label (QLabel): Quantidade de laudos e uso do cache de prévias
+    """
+
+    def __init__(self, main_window):
+        """
+        Inicializa a tela de histórico.
+
+        Args:
+            main_window (MainWindow): Instância da janela principal
+        """
+        super().__init__()
+        self.main_window = main_window
+        self.reports = {}      # código da amostra -> Report
+        self._icons = {}       # chave do cache -> QIcon já carregado
+        self._workers = {}     # chave do cache -> Worker em andamento
+        self._selected_key = None
+        self._preview_worker = None
+        self._loading_icon = _placeholder("Carregando...")
+        self._no_slide_icon = _placeholder("Sem lâmina")
+        # Agrupa os eventos de rolagem em uma única verificação das linhas visíveis
+        self._visible_timer = QTimer(self)
+        self._visible_timer.setSingleShot(True)
+        self._visible_timer.setInterval(50)
+        self._visible_timer.timeout.connect(self.request_visible)
+        self.initUI()
+
+    def initUI(self):
+        """
+        Configura a interface gráfica da tela de histórico.
+
+        Cria:
+        - Cabeçalho com título e botão de voltar
+        - Lista de laudos com miniaturas
+        - Prévia do laudo selecionado
+        """
+        main_layout = QVBoxLayout()
+        main_layout.setContentsMargins(20, 20, 20, 20)
+
+        # ===== CABEÇALHO =====
+        header = QFrame()
+        header.setStyleSheet("background-color: #023e8a; border-radius: 10px; padding: 15px;")
+        header_layout = QHBoxLayout()
+
+        self.user_info = user_info = QLabel(f"Dr. {self.main_window.logged_in_user}")
+        user_info.setFont(QFont("Arial", 12, QFont.Bold))
+        user_info.setStyleSheet("color: white;")
+
+        title = QLabel("Histórico de Laudos")
+        title.setFont(QFont("Arial", 16, QFont.Bold))
+        title.setAlignment(Qt.AlignCenter)
+        title.setStyleSheet("color: white;")
+
+        back_btn = QPushButton("Voltar")
+        back_btn.setFont(QFont("Arial", 10))
+        back_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #ffffff;
+                color: #023e8a;
+                padding: 8px 15px;
+                border-radius: 5px;
+                border: none;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background-color: #f0f0f0;
+            }
+        """)
+        back_btn.clicked.connect(self.main_window.show_patient_info_screen)
+
+        header_layout.addWidget(user_info)
+        header_layout.addWidget(title)
+        header_layout.addWidget(back_btn)
+        header.setLayout(header_layout)
+        main_layout.addWidget(header)
+
+        # ===== CONTEÚDO =====
+        content = QFrame()
+        content.setStyleSheet("background-color: white; border-radius: 10px;")
+        layout = QHBoxLayout()
+        layout.setContentsMargins(20, 20, 20, 20)
+        layout.setSpacing(20)
+
+        list_layout = QVBoxLayout()
+        self.mine_check = QCheckBox("Apenas meus laudos")
+        self.mine_check.setFont(QFont("Arial", 10))
+        self.mine_check.toggled.connect(self.refresh)
+        list_layout.addWidget(self.mine_check)
+
+        self.report_list = QListWidget()
+        self.report_list.setFont(QFont("Arial", 10))
+        self.report_list.setIconSize(QSize(ICON_SIZE, ICON_SIZE))
+        self.report_list.setUniformItemSizes(True)
+        self.report_list.setStyleSheet("border: 1px solid #ddd; border-radius: 5px; background-color: white;")
+        self.report_list.verticalScrollBar().valueChanged.connect(self._visible_timer.start)
+        self.report_list.currentItemChanged.connect(self.on_report_selected)
+        list_layout.addWidget(self.report_list)
+
+        self.status_label = QLabel("")
+        self.status_label.setFont(QFont("Arial", 9))
+        self.status_label.setStyleSheet("color: #666666;")
+        list_layout.addWidget(self.status_label)
+        layout.addLayout(list_layout, 1)
+
+        # Prévia do laudo selecionado
+        preview_scroll = QScrollArea()
+        preview_scroll.setWidgetResizable(True)
+        preview_scroll.setStyleSheet("border: 1px solid #ddd; border-radius: 5px; background-color: #f8f9fa;")
+        self.preview_label = QLabel("Selecione um laudo para ver a prévia.")
+        self.preview_label.setAlignment(Qt.AlignCenter)
+        self.preview_label.setFont(QFont("Arial", 10))
+        self.preview_label.setStyleSheet("color: #6c757d;")
+        preview_scroll.setWidget(self.preview_label)
+        layout.addWidget(preview_scroll, 1)
+
+        content.setLayout(layout)
+        main_layout.addWidget(content)
+        self.setLayout(main_layout)
+
+    def refresh(self):
+        """Recarrega a lista de laudos, com imagens provisórias nas linhas ainda sem miniatura."""
+        self.user_info.setText(f"Dr. {self.main_window.logged_in_user}")
+        self.cancel_pending()
+        pathologist = self.main_window.logged_in_user if self.mine_check.isChecked() else None
+        reports = self.main_window.report_store.recent_reports(pathologist, HISTORY_LIMIT)
+        self.reports = {report.record.sample_code: report for report in reports}
+
+        self.report_list.blockSignals(True)
+        self.report_list.clear()
+        for report in reports:
+            record = report.record
+            issued = time.strftime("%d/%m/%Y %H:%M", time.localtime(report.updated_at))
+            status = "assinado" if report.signed else "aguardando assinatura"
+            item = QListWidgetItem(f"{record.sample_code} — {record.patient_name}\n"
+                                   f"{record.label('tissue_type')} · {report.pathologist} · {issued} · {status}")
+            item.setData(Qt.UserRole, record.sample_code)
+            if not record.slide_image:
+                item.setIcon(self._no_slide_icon)
+            else:
+                key = self.main_window.preview_cache.thumbnail_key(record.sample_code, record.slide_image)
+                item.setIcon(self._icons.get(key, self._loading_icon))
+            self.report_list.addItem(item)
+        self.report_list.blockSignals(False)
+        self.update_status()
+        self._visible_timer.start()
+
+    def update_status(self):
+        """Exibe a quantidade de laudos e o uso do cache de prévias."""
+        stats = self.main_window.preview_cache.stats()
+        self.status_label.setText(f"{self.report_list.count()} laudo(s) · cache de prévias: "
+                                  f"{stats['entries']} imagens, {stats['bytes'] / 1024 / 1024:.1f} MB, "
+                                  f"acertos {stats['hit_rate']:.0%}")
+
+    def visible_rows(self):
+        """Retorna as linhas atualmente visíveis na lista."""
+        viewport = self.report_list.viewport().rect()
+        first = self.report_list.indexAt(viewport.topLeft()).row()
+        if first < 0:
+            return range(0)
+        last = self.report_list.indexAt(viewport.bottomLeft()).row()
+        return range(first, (last if last >= 0 else self.report_list.count() - 1) + 1)
+
+    def request_visible(self):
+        """
+        Pede em segundo plano as miniaturas das linhas visíveis.
+
+        Pedidos de linhas que saíram da área visível são cancelados.
+        """
+        cache = self.main_window.preview_cache
+        wanted = set()
+        for row in self.visible_rows():
+            report = self.reports.get(self.report_list.item(row).data(Qt.UserRole))
+            if report is None or not report.record.slide_image:
+                continue
+            key = cache.thumbnail_key(report.record.sample_code, report.record.slide_image)
+            wanted.add(key)
+            if key in self._icons or key in self._workers:
+                continue
+            worker = Worker(cache.thumbnail, report.record.sample_code, report.record.slide_image)
+            worker.signals.finished.connect(lambda image, key=key: self.on_thumbnail_ready(key, image))
+            worker.signals.error.connect(lambda message, key=key: self.on_thumbnail_error(key))
+            self._workers[key] = worker
+            worker.start()
+        for key in list(self._workers):
+            if key not in wanted:
+                self._workers.pop(key).cancel()
+
+    def cancel_pending(self):
+        """Cancela a geração das imagens ainda não iniciadas."""
+        for worker in self._workers.values():
+            worker.cancel()
+        self._workers.clear()
+
+    def _set_row_icon(self, key, icon):
+        """Aplica um ícone às linhas com a miniatura de chave key."""
+        cache = self.main_window.preview_cache
+        for row in self.visible_rows():
+            item = self.report_list.item(row)
+            report = self.reports.get(item.data(Qt.UserRole))
+            if report and report.record.slide_image and \
+                    cache.thumbnail_key(report.record.sample_code, report.record.slide_image) == key:
+                item.setIcon(icon)
+
+    def on_thumbnail_ready(self, key, image):
+        """Exibe a miniatura gerada ou lida do cache."""
+        self._workers.pop(key, None)
+        if image is None:  # cancelado antes da geração
+            return
+        icon = QIcon(QPixmap.fromImage(image))
+        self._icons[key] = icon
+        self._set_row_icon(key, icon)
+        self.update_status()
+
+    def on_thumbnail_error(self, key):
+        """Marca a linha cuja lâmina não pôde ser lida."""
+        self._workers.pop(key, None)
+        icon = _placeholder("Lâmina indisponível")
+        self._icons[key] = icon
+        self._set_row_icon(key, icon)
+
+    def on_report_selected(self, current, previous=None):
+        """
+        Pede em segundo plano a prévia do laudo selecionado.
+
+        Args:
+            current (QListWidgetItem): Linha selecionada
+            previous (QListWidgetItem, optional): Linha anterior
+        """
+        report = self.reports.get(current.data(Qt.UserRole)) if current else None
+        if report is None:
+            return
+        key = self.main_window.preview_cache.preview_key(report)
+        self._selected_key = key
+        self.preview_label.setPixmap(QPixmap())
+        self.preview_label.setText("Gerando prévia...")
+        if self._preview_worker:
+            self._preview_worker.cancel()
+        self._preview_worker = worker = Worker(self.main_window.preview_cache.report_preview, report)
+        worker.signals.finished.connect(lambda image, key=key: self.on_preview_ready(key, image))
+        worker.signals.error.connect(lambda message, key=key: self.on_preview_error(key, message))
+        worker.start()
+
+    def on_preview_ready(self, key, image):
+        """Exibe a prévia, se o laudo ainda estiver selecionado."""
+        if key != self._selected_key or image is None:
+            return
+        self.preview_label.setPixmap(QPixmap.fromImage(image))
+        self.update_status()
+
+    def on_preview_error(self, key, message):
+        """Informa a falha na geração da prévia."""
+        if key == self._selected_key:
+            self.preview_label.setText(f"Prévia indisponível: {message}")
+
+    def resizeEvent(self, event):
+        """Verifica as linhas visíveis após redimensionar."""
+        super().resizeEvent(event)
+        self._visible_timer.start()
+
+    def hideEvent(self, event):
+        """Cancela a geração de imagens ao sair da tela."""
+        super().hideEvent(event)
+        self.cancel_pending()
@@ -2,47 +2,62 @@
 Módulo da tela de carregamento.
 
 Este módulo contém a implementação da tela de progresso durante
-a análise simulada da amostra.
+a análise da amostra, com o andamento real das etapas do pipeline
+de análise.
 
 Classes:
     LoadingWindow: Tela de carregamento durante a análise.
 """
 
-from PyQt5.QtWidgets import QWidget, QLabel, QProgressBar, QVBoxLayout
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtWidgets import QWidget, QLabel, QProgressBar, QVBoxLayout, QMessageBox
+from PyQt5.QtCore import Qt, QObject, pyqtSignal
 from PyQt5.QtGui import QFont
+import time
+from core.analysis import run_analysis, fill_macroscopy
+from core.workers import Worker
+from core.metrics import (REGISTRY, ANALYSIS_STAGE_SECONDS, SAMPLE_QUEUE_WAIT_SECONDS,
+                          SAMPLES_ANALYZED_TOTAL)
+
+
+class _StageSignals(QObject):
+    """Sinal dos eventos das etapas, emitido nas threads do pipeline e entregue na thread da interface."""
+    
+    stage_event = pyqtSignal(str, object, object)
 
 
 class LoadingWindow(QWidget):
     """
     Tela de carregamento durante a análise da amostra.
     
-    Simula o processo de análise com uma barra de progresso
-    e mensagens de status.
+    Executa o pipeline de análise em segundo plano e exibe a etapa
+    em andamento e a fração de etapas concluídas.
     
     Attributes:
-        main_window (MainWindow): Referência à janela principal
+        case (CaseTab): Aba do caso (dados do paciente, resultado da análise e troca de telas)
+        main_window (MainWindow): Janela principal (serviços compartilhados e demais telas)
         progress (QProgressBar): Barra de progresso da análise
         status_label (QLabel): Label para mensagens de status
-        timer (QTimer): Timer para controlar a animação do progresso
+        worker (Worker): Análise em andamento
+        stage_signals (_StageSignals): Eventos das etapas do pipeline
     """
     
-    def __init__(self, main_window):
+    def __init__(self, case):
         """
         Inicializa a tela de carregamento.
         
         Args:
-            main_window (MainWindow): Instância da janela principal
+            case (CaseTab): Aba do caso
         """
         super().__init__()
-        self.main_window = main_window
+        self.case = case
+        self.main_window = case.main_window
         self.initUI()
         
     def initUI(self):
         """
         Configura a interface gráfica da tela de carregamento.
         
-        Cria elementos visuais para simular o processo de análise:
+        Cria elementos visuais para acompanhar o processo de análise:
         - Título
         - Ícone
         - Barra de progresso
@@ -100,36 +115,74 @@ class LoadingWindow(QWidget):
         
         self.setLayout(layout)
         
-        # Configurar timer para simular progresso
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_progress)
-        self.progress_value = 0
-        self.status_messages = [
-            "Preparando amostra...",
-            "Analisando estrutura celular...",
-            "Processando imagens microscópicas...",
-            "Gerando relatório preliminar...",
-            "Finalizando análise..."
-        ]
-        self.current_status = 0
-        self.timer.start(100)  # Atualizar a cada 100ms
+        self.worker = None
+        self.stage_signals = _StageSignals()
+        self.stage_signals.stage_event.connect(self.on_stage_event)
     
-    def update_progress(self):
+    def start_analysis(self):
         """
-        Atualiza a barra de progresso и mensagens de status.
+        Reinicia o progresso e inicia a análise da amostra atual.
         
-        Este método é chamado periodicamente pelo timer para
-        simular o avanço do processo de análise.
+        Registra nas métricas o tempo de espera entre a solicitação
+        da análise e o seu início efetivo.
         """
-        self.progress_value += 2
-        self.progress.setValue(self.progress_value)
+        now = time.perf_counter()
+        requested_at = self.case.analysis_requested_at
+        if requested_at is not None:
+            REGISTRY.histogram(SAMPLE_QUEUE_WAIT_SECONDS,
+                               "Espera entre a solicitação e o início da análise").observe(now - requested_at)
+            self.case.analysis_requested_at = None
+        
+        self.progress.setValue(0)
+        self.status_label.setText("Inicializando sistema...")
+        self.case.analysis_result = None
         
-        # Atualizar mensagem de status a cada 20%
-        if self.progress_value // 20 > self.current_status and self.current_status < len(self.status_messages):
-            self.current_status = self.progress_value // 20
-            self.status_label.setText(self.status_messages[self.current_status - 1])
+        self.worker = Worker(run_analysis, self.case.patient_data, self.main_window.analysis_cache,
+                             self.main_window.plugin_registry, on_event=self.stage_signals.stage_event.emit,
+                             executor=self.main_window.stage_executor)
+        self.worker.signals.progress.connect(self.update_progress)
+        self.worker.signals.finished.connect(self.on_analysis_finished)
+        self.worker.signals.error.connect(self.on_analysis_error)
+        self.worker.start()
+    
+    def on_stage_event(self, event, stage, run):
+        """
+        Exibe a etapa em andamento e registra a duração das etapas concluídas.
         
-        # Quando completar, avançar para tela de resultados
-        if self.progress_value >= 100:
-            self.timer.stop()
-            self.main_window.show_results_screen()
\ No newline at end of file
+        Args:
+            event (str): "started", "finished" ou "skipped"
+            stage (Stage): Etapa do pipeline
+            run (StageRun): Execução da etapa (None em "started")
+        """
+        if event == "started":
+            self.status_label.setText(stage.label)
+        elif event == "finished":
+            REGISTRY.histogram(ANALYSIS_STAGE_SECONDS, "Duração das etapas de análise",
+                               stage=stage.name).observe(run.seconds)
+    
+    def update_progress(self, done, total):
+        """
+        Atualiza a barra de progresso com as etapas concluídas.
+        
+        Args:
+            done (int): Etapas concluídas
+            total (int): Total de etapas
+        """
+        self.progress.setValue(int(done * 100 / total) if total else 100)
+    
+    def on_analysis_finished(self, result):
+        """Guarda o resultado da análise e avança para a tela de resultados."""
+        self.worker = None
+        if result is None:
+            return
+        self.progress.setValue(100)
+        self.case.analysis_result = result
+        fill_macroscopy(self.case.patient_data, result)
+        REGISTRY.counter(SAMPLES_ANALYZED_TOTAL, "Amostras analisadas").inc()
+        self.case.show_results_screen()
+    
+    def on_analysis_error(self, message):
+        """Informa a falha da análise e volta para o formulário da amostra."""
+        self.worker = None
+        QMessageBox.warning(self, "Erro na análise", f"Não foi possível analisar a amostra:\n{message}")
+        self.case.show_patient_info_screen()
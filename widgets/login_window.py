@@ -13,6 +13,10 @@ from PyQt5.QtWidgets import (QWidget, QLabel, QLineEdit, QPushButton,
                              QSpacerItem, QSizePolicy)
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont
+from core.audit import ACTION_LOGIN, ACTION_LOGIN_FAILED
+from core.users import AuthenticationError, NO_USERS_MESSAGE
+from core.worklist import load_worklist
+from core.workers import Worker
 from .animated_button import AnimatedButton
 
 
@@ -27,6 +31,9 @@ class LoginWindow(QWidget):
         main_window (MainWindow): Referência à janela principal
         username_input (QLineEdit): Campo de entrada para o nome de usuário
         password_input (QLineEdit): Campo de entrada para a senha
+        login_btn (AnimatedButton): Botão de entrada
+        status_label (QLabel): Mensagem de andamento ou de cadastro vazio
+        worker (Worker): Verificação de credenciais em andamento, se houver
     """
     
     def __init__(self, main_window):
@@ -38,6 +45,7 @@ class LoginWindow(QWidget):
         """
         super().__init__()
         self.main_window = main_window
+        self.worker = None
         self.initUI()
         
     def initUI(self):
@@ -158,7 +166,7 @@ class LoginWindow(QWidget):
         right_layout.addSpacerItem(QSpacerItem(20, 40, QSizePolicy.Minimum, QSizePolicy.Expanding))
         
         # Botão de login
-        login_btn = AnimatedButton("Entrar no Sistema")
+        self.login_btn = login_btn = AnimatedButton("Entrar no Sistema")
         login_btn.setFont(QFont("Arial", 12, QFont.Bold))
         login_btn.setStyleSheet("""
             QPushButton {
@@ -177,8 +185,18 @@ class LoginWindow(QWidget):
             }
         """)
         login_btn.clicked.connect(self.login)
+        self.password_input.returnPressed.connect(self.login)
         right_layout.addWidget(login_btn)
         
+        # Andamento da verificação / aviso de cadastro vazio
+        self.status_label = QLabel()
+        self.status_label.setFont(QFont("Arial", 9))
+        self.status_label.setAlignment(Qt.AlignCenter)
+        self.status_label.setWordWrap(True)
+        self.status_label.setStyleSheet("color: #666666;")
+        right_layout.addWidget(self.status_label)
+        self.show_user_store_status()
+        
         # Espaçamento adicional
         right_layout.addSpacerItem(QSpacerItem(20, 20, QSizePolicy.Minimum, QSizePolicy.Expanding))
         
@@ -201,18 +219,80 @@ class LoginWindow(QWidget):
         """
         Processa a tentativa de login do usuário.
         
-        Verifica se os campos foram preenchidos e, em caso positivo,
-        redireciona para a tela de informações do paciente.
-        
-        Em uma implementação real, aqui seria feita a validação
-        contra um banco de dados ou serviço de autenticação.
+        Verifica se os campos foram preenchidos e inicia a verificação
+        das credenciais em segundo plano (o hash da senha é lento de
+        propósito). Em caso de sucesso, a fila de trabalho do usuário é
+        carregada na mesma tarefa, antes de abrir a tela do paciente.
         """
-        username = self.username_input.text()
+        username = self.username_input.text().strip()
         password = self.password_input.text()
         
         # Verificação básica de campos preenchidos
-        if username and password:
-            self.main_window.logged_in_user = username
-            self.main_window.show_patient_info_screen()
+        if not (username and password):
+            QMessageBox.warning(self, "Erro", "Por favor, preencha todos os campos.")
+            return
+        if self.worker:
+            return
+        
+        self.login_btn.setEnabled(False)
+        self.status_label.setText("Verificando credenciais...")
+        self.worker = Worker(self._authenticate, username, password)
+        self.worker.signals.finished.connect(self.on_login_finished)
+        self.worker.signals.error.connect(self.on_login_error)
+        self.worker.start()
+    
+    def _authenticate(self, username, password, progress=None, cancelled=None):
+        """
+        Autentica o usuário e carrega a sua fila de trabalho (executado em segundo plano).
+        
+        Returns:
+            tuple[User, Worklist]: Usuário autenticado e fila de trabalho
+        """
+        main_window = self.main_window
+        try:
+            user = main_window.user_store.authenticate(username, password)
+        except AuthenticationError:
+            main_window.audit_log.log(ACTION_LOGIN_FAILED, username)
+            raise
+        worklist = load_worklist(main_window.report_store, main_window.requisition_index, user.username)
+        return user, worklist
+    
+    def on_login_finished(self, result):
+        """
+        Conclui o login e abre a tela do paciente.
+        
+        Args:
+            result (tuple[User, Worklist]): Usuário autenticado e fila de trabalho
+        """
+        user, worklist = result
+        self._reset()
+        self.password_input.clear()
+        self.main_window.current_user = user
+        self.main_window.logged_in_user = user.username
+        self.main_window.worklist = worklist
+        self.main_window.audit(ACTION_LOGIN)
+        self.main_window.show_patient_info_screen()
+    
+    def on_login_error(self, message):
+        """
+        Informa a falha de autenticação.
+        
+        Args:
+            message (str): Mensagem de erro
+        """
+        self._reset()
+        self.password_input.clear()
+        QMessageBox.warning(self, "Erro", message)
+    
+    def show_user_store_status(self):
+        """Avisa, enquanto o cadastro estiver vazio, que não há usuários cadastrados."""
+        if self.main_window.user_store.is_empty():
+            self.status_label.setText(NO_USERS_MESSAGE)
         else:
-            QMessageBox.warning(self, "Erro", "Por favor, preencha todos os campos.")
\ No newline at end of file
+            self.status_label.clear()
+
+    def _reset(self):
+        """Libera o botão de entrada após a verificação."""
+        self.worker = None
+        self.login_btn.setEnabled(True)
+        self.show_user_store_status()
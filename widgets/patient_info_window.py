@@ -11,12 +11,22 @@ Classes:
 from PyQt5.QtWidgets import (QWidget, QLabel, QLineEdit, QPushButton, 
                              QVBoxLayout, QHBoxLayout, QGridLayout, QTextEdit, 
                              QComboBox, QDateEdit, QGroupBox, QScrollArea,
-                             QFrame, QSpacerItem, QSizePolicy, QMessageBox)
-from PyQt5.QtCore import Qt, QDate
+                             QFrame, QSpacerItem, QSizePolicy, QMessageBox, QListWidget,
+                             QFileDialog)
+from PyQt5.QtCore import Qt, QDate, QTimer
 from PyQt5.QtGui import QFont
+import os
 import time
+from core.records import (PatientRecord, Gender, ProcedureType, MaterialType,
+                          PreservationMedium)
+from core.images import IMAGE_FILTER, import_image
+from core.workers import Worker
+from core.validation import FormValidator, PATIENT_FORM_RULES
 from .animated_button import AnimatedButton
 
+# Pausa na digitação antes de validar os campos alterados, em milissegundos
+VALIDATION_DELAY_MS = 250
+
 
 class PatientInfoWindow(QWidget):
     """
@@ -26,20 +36,38 @@ class PatientInfoWindow(QWidget):
     todas as informações necessárias para gerar o laudo.
     
     Attributes:
-        main_window (MainWindow): Referência à janela principal
+        case (CaseTab): Aba do caso (dados do paciente, resultado da análise e troca de telas)
+        main_window (MainWindow): Janela principal (serviços compartilhados e demais telas)
+        validator (FormValidator): Validação dos campos, refeita a cada pausa na digitação
+        validated_fields (dict): Campo do registro -> widget validado
+        validation_label (QLabel): Erros dos campos destacados
         Vários campos de entrada para dados do paciente e amostra
     """
     
-    def __init__(self, main_window):
+    def __init__(self, case):
         """
         Inicializa a tela de informações do paciente.
         
         Args:
-            main_window (MainWindow): Instância da janela principal
+            case (CaseTab): Aba do caso
         """
         super().__init__()
-        self.main_window = main_window
+        self.case = case
+        self.main_window = case.main_window
+        self.slide_image = ""
+        self.gross_image = ""
+        self.image_worker = None
+        self.validator = FormValidator(PATIENT_FORM_RULES)
+        # Erros aparecem nos campos editados (e nos que dependem deles) ou após tentar analisar
+        self._touched = set()
+        self._submitted = False
+        self._shown = {}
+        self._validation_timer = QTimer(self)
+        self._validation_timer.setSingleShot(True)
+        self._validation_timer.setInterval(VALIDATION_DELAY_MS)
+        self._validation_timer.timeout.connect(self.run_validation)
         self.initUI()
+        self.connect_validation()
         
     def initUI(self):
         """
@@ -61,7 +89,7 @@ class PatientInfoWindow(QWidget):
         header_layout = QHBoxLayout()
         
         # Informações do usuário logado
-        user_info = QLabel(f"Dr. {self.main_window.logged_in_user}")
+        self.user_info = user_info = QLabel(f"Dr. {self.main_window.logged_in_user}")
         user_info.setFont(QFont("Arial", 12, QFont.Bold))
         user_info.setStyleSheet("color: white;")
         
@@ -89,9 +117,23 @@ class PatientInfoWindow(QWidget):
         """)
         logout_btn.clicked.connect(self.main_window.show_login_screen)
         
+        # Botão de estatísticas
+        stats_btn = QPushButton("Estatísticas")
+        stats_btn.setFont(QFont("Arial", 10))
+        stats_btn.setStyleSheet(logout_btn.styleSheet())
+        stats_btn.clicked.connect(self.main_window.show_statistics_screen)
+        
+        # Botão de histórico de laudos
+        history_btn = QPushButton("Histórico")
+        history_btn.setFont(QFont("Arial", 10))
+        history_btn.setStyleSheet(logout_btn.styleSheet())
+        history_btn.clicked.connect(self.main_window.show_history_screen)
+        
         # Organizar cabeçalho
         header_layout.addWidget(user_info)
         header_layout.addWidget(title)
+        header_layout.addWidget(history_btn)
+        header_layout.addWidget(stats_btn)
         header_layout.addWidget(logout_btn)
         header.setLayout(header_layout)
         
@@ -206,6 +248,29 @@ class PatientInfoWindow(QWidget):
             }
         """
         
+        # ===== FILA DE TRABALHO =====
+        worklist_group = QGroupBox("Fila de Trabalho")
+        worklist_group.setFont(QFont("Arial", 12, QFont.Bold))
+        worklist_layout = QGridLayout()
+        worklist_layout.setHorizontalSpacing(20)
+        
+        worklist_layout.addWidget(QLabel("Requisições pendentes:"), 0, 0)
+        self.pending_combo = QComboBox()
+        self.pending_combo.setFont(QFont("Arial", 10))
+        self.pending_combo.setStyleSheet(combo_style)
+        self.pending_combo.activated.connect(self.on_pending_selected)
+        worklist_layout.addWidget(self.pending_combo, 0, 1)
+        
+        worklist_layout.addWidget(QLabel("Meus laudos recentes:"), 1, 0, Qt.AlignTop)
+        self.recent_list = QListWidget()
+        self.recent_list.setFont(QFont("Arial", 10))
+        self.recent_list.setMaximumHeight(110)
+        self.recent_list.setStyleSheet("border: 1px solid #ddd; border-radius: 5px; background-color: white;")
+        worklist_layout.addWidget(self.recent_list, 1, 1)
+        
+        worklist_group.setLayout(worklist_layout)
+        layout.addWidget(worklist_group)
+        
         # ===== SEÇÃO 1: IDENTIFICAÇÃO DO PACIENTE =====
         patient_group = QGroupBox("Identificação do Paciente")
         patient_group.setFont(QFont("Arial", 12, QFont.Bold))
@@ -245,7 +310,7 @@ class PatientInfoWindow(QWidget):
         
         patient_layout.addWidget(QLabel("Sexo:"), 1, 0)
         self.gender = QComboBox()
-        self.gender.addItems(["Masculino", "Feminino", "Outro"])
+        self.gender.addItems(Gender.labels())
         self.gender.setFont(QFont("Arial", 10))
         self.gender.setStyleSheet(combo_style)
         patient_layout.addWidget(self.gender, 1, 1)
@@ -262,6 +327,14 @@ class PatientInfoWindow(QWidget):
         self.sample_code.setStyleSheet("padding: 8px; border: 1px solid #ddd; border-radius: 5px; background-color: white;")
         patient_layout.addWidget(self.sample_code, 2, 1)
         
+        # Leitura do código de barras (ou digitação) busca a requisição recebida
+        self.sample_code.setPlaceholderText("Digite ou leia o código de barras")
+        self.sample_code.editingFinished.connect(self.on_sample_code_entered)
+        self.requisition_status = QLabel()
+        self.requisition_status.setFont(QFont("Arial", 9))
+        self.requisition_status.setStyleSheet("color: #2a9d8f;")
+        patient_layout.addWidget(self.requisition_status, 2, 2, 1, 2)
+        
         patient_group.setLayout(patient_layout)
         layout.addWidget(patient_group)
         
@@ -301,7 +374,7 @@ class PatientInfoWindow(QWidget):
         
         clinical_layout.addWidget(QLabel("Tipo de procedimento:"))
         self.procedure_type = QComboBox()
-        self.procedure_type.addItems(["Biópsia", "Punção", "Ressecção cirúrgica", "Outro"])
+        self.procedure_type.addItems(ProcedureType.labels())
         self.procedure_type.setFont(QFont("Arial", 10))
         self.procedure_type.setStyleSheet(combo_style)
         self.procedure_type.currentTextChanged.connect(self.on_procedure_type_changed)
@@ -358,7 +431,7 @@ class PatientInfoWindow(QWidget):
         
         sample_layout.addWidget(QLabel("Tipo de material:"), 0, 0)
         self.material_type = QComboBox()
-        self.material_type.addItems(["Tecido", "Citologia", "Líquido", "Outro"])
+        self.material_type.addItems(MaterialType.labels())
         self.material_type.setFont(QFont("Arial", 10))
         self.material_type.setStyleSheet(combo_style)
         self.material_type.currentTextChanged.connect(self.on_material_type_changed)
@@ -389,7 +462,7 @@ class PatientInfoWindow(QWidget):
         
         sample_layout.addWidget(QLabel("Meio de conservação:"), 2, 2)
         self.preservation_medium = QComboBox()
-        self.preservation_medium.addItems(["Formol", "Fresco", "Fixador especial"])
+        self.preservation_medium.addItems(PreservationMedium.labels())
         self.preservation_medium.setFont(QFont("Arial", 10))
         self.preservation_medium.setStyleSheet(combo_style)
         sample_layout.addWidget(self.preservation_medium, 2, 3)
@@ -430,6 +503,54 @@ class PatientInfoWindow(QWidget):
         self.tissue_type.setStyleSheet("padding: 8px; border: 1px solid #ddd; border-radius: 5px; background-color: white;")
         tissue_layout.addWidget(self.tissue_type)
         
+        # Imagem da lâmina digitalizada (copiada para o diretório de imagens)
+        tissue_layout.addWidget(QLabel("Lâmina digitalizada:"))
+        image_layout = QHBoxLayout()
+        self.slide_image_input = QLineEdit()
+        self.slide_image_input.setFont(QFont("Arial", 10))
+        self.slide_image_input.setReadOnly(True)
+        self.slide_image_input.setPlaceholderText("Nenhuma imagem selecionada")
+        self.slide_image_input.setStyleSheet("padding: 8px; border: 1px solid #ddd; border-radius: 5px; background-color: #f8f9fa;")
+        image_layout.addWidget(self.slide_image_input)
+        image_btn = QPushButton("Selecionar...")
+        image_btn.setFont(QFont("Arial", 10))
+        image_btn.setStyleSheet("padding: 8px 15px; border: 1px solid #023e8a; border-radius: 5px; color: #023e8a; background-color: white;")
+        image_btn.clicked.connect(self.choose_slide_image)
+        image_layout.addWidget(image_btn)
+        tissue_layout.addLayout(image_layout)
+        
+        # Foto da bancada de macroscopia, com a referência de escala
+        tissue_layout.addWidget(QLabel("Foto da macroscopia (com referência de escala):"))
+        gross_layout = QHBoxLayout()
+        self.gross_image_input = QLineEdit()
+        self.gross_image_input.setFont(QFont("Arial", 10))
+        self.gross_image_input.setReadOnly(True)
+        self.gross_image_input.setPlaceholderText("Nenhuma foto selecionada")
+        self.gross_image_input.setStyleSheet(self.slide_image_input.styleSheet())
+        gross_layout.addWidget(self.gross_image_input)
+        gross_btn = QPushButton("Selecionar...")
+        gross_btn.setFont(QFont("Arial", 10))
+        gross_btn.setStyleSheet(image_btn.styleSheet())
+        gross_btn.clicked.connect(self.choose_gross_image)
+        gross_layout.addWidget(gross_btn)
+        tissue_layout.addLayout(gross_layout)
+        
+        # Medidas e peso: em branco, são preenchidos pela foto e pela balança
+        measures_layout = QHBoxLayout()
+        measures_layout.addWidget(QLabel("Medidas:"))
+        self.tissue_measurement = QLineEdit()
+        self.tissue_measurement.setFont(QFont("Arial", 10))
+        self.tissue_measurement.setPlaceholderText("Automático (foto da macroscopia)")
+        self.tissue_measurement.setStyleSheet("padding: 8px; border: 1px solid #ddd; border-radius: 5px; background-color: white;")
+        measures_layout.addWidget(self.tissue_measurement)
+        measures_layout.addWidget(QLabel("Peso:"))
+        self.tissue_weight = QLineEdit()
+        self.tissue_weight.setFont(QFont("Arial", 10))
+        self.tissue_weight.setPlaceholderText("Automático (balança)")
+        self.tissue_weight.setStyleSheet(self.tissue_measurement.styleSheet())
+        measures_layout.addWidget(self.tissue_weight)
+        tissue_layout.addLayout(measures_layout)
+        
         tissue_group.setLayout(tissue_layout)
         layout.addWidget(tissue_group)
         
@@ -474,6 +595,12 @@ class PatientInfoWindow(QWidget):
         analyze_btn.clicked.connect(self.analyze_sample)
         button_layout.addWidget(analyze_btn)
         
+        self.validation_label = QLabel()
+        self.validation_label.setFont(QFont("Arial", 10))
+        self.validation_label.setWordWrap(True)
+        self.validation_label.setStyleSheet("color: #d9534f;")
+        self.validation_label.hide()
+        layout.addWidget(self.validation_label)
         layout.addLayout(button_layout)
         
         # Finalizar configuração do conteúdo
@@ -482,6 +609,169 @@ class PatientInfoWindow(QWidget):
         main_layout.addWidget(scroll)
         
         self.setLayout(main_layout)
+        worklist_group.setStyleSheet(patient_group.styleSheet())
+    
+    def connect_validation(self):
+        """
+        Liga os campos validados ao validador.
+
+        Cada alteração só anota o novo valor; a validação roda após uma
+        pausa na digitação e reavalia apenas as regras dos campos alterados.
+        """
+        self.validated_fields = {
+            "patient_name": self.patient_name,
+            "birth_date": self.birth_date,
+            "record_number": self.record_number,
+            "sample_code": self.sample_code,
+            "procedure_type": self.procedure_type,
+            "procedure_other": self.other_procedure_input,
+            "material_type": self.material_type,
+            "material_other": self.other_material_input,
+            "collection_datetime": self.collection_datetime,
+            "tissue_type": self.tissue_type,
+        }
+        self._field_styles = {name: widget.styleSheet() for name, widget in self.validated_fields.items()}
+        for name, widget in self.validated_fields.items():
+            if isinstance(widget, QLineEdit):
+                widget.textChanged.connect(lambda text, name=name: self.on_field_edited(name, text))
+                self.validator.set(name, widget.text())
+            elif isinstance(widget, QDateEdit):
+                widget.dateChanged.connect(
+                    lambda date, name=name: self.on_field_edited(name, date.toString("dd/MM/yyyy")))
+                self.validator.set(name, widget.date().toString("dd/MM/yyyy"))
+            else:
+                widget.currentTextChanged.connect(lambda text, name=name: self.on_field_edited(name, text))
+                self.validator.set(name, widget.currentText())
+
+    def on_field_edited(self, name, value):
+        """
+        Anota a alteração de um campo e adia a validação para a pausa na digitação.
+
+        Args:
+            name (str): Campo do registro
+            value (str): Novo valor
+        """
+        self.validator.set(name, value)
+        self._touched.update(self.validator.rule_set.targets(name))
+        self._validation_timer.start()
+
+    def run_validation(self):
+        """Valida os campos alterados e atualiza a situação dos campos afetados."""
+        changed = self.validator.validate()
+        names = set(changed) | self._touched if not self._submitted else self.validated_fields
+        for name in names:
+            shown = self._submitted or name in self._touched
+            message = self.validator.error(name) if shown else ""
+            if self._shown.get(name, "") != message:
+                self.show_field_status(name, message)
+        messages = [self._shown[name] for name in self.validated_fields if name in self._shown]
+        self.validation_label.setText("\n".join(messages))
+        self.validation_label.setVisible(bool(messages))
+
+    def show_field_status(self, name, message):
+        """
+        Destaca o campo inválido, com a mensagem na dica do campo.
+
+        Args:
+            name (str): Campo do registro
+            message (str): Erro ("" se o campo é válido)
+        """
+        widget = self.validated_fields[name]
+        style = self._field_styles[name]
+        widget.setStyleSheet(style.replace("1px solid #ddd", "1px solid #d9534f") if message else style)
+        widget.setToolTip(message)
+        if message:
+            self._shown[name] = message
+        else:
+            self._shown.pop(name, None)
+
+    def set_worklist(self, worklist):
+        """
+        Exibe a fila de trabalho carregada no login.
+        
+        Args:
+            worklist (Worklist): Fila de trabalho (None para limpar)
+        """
+        self.user_info.setText(f"Dr. {self.main_window.logged_in_user}")
+        self.pending_combo.clear()
+        self.recent_list.clear()
+        if worklist is None:
+            return
+        
+        self.pending_combo.addItem(f"{len(worklist.pending)} requisição(ões) sem laudo", None)
+        for requisition in worklist.pending:
+            self.pending_combo.addItem(f"{requisition.sample_code} — {requisition.patient_name}",
+                                       requisition.sample_code)
+        for report in worklist.recent_reports:
+            issued = time.strftime("%d/%m/%Y %H:%M", time.localtime(report.updated_at))
+            self.recent_list.addItem(f"{report.record.sample_code} — {report.record.patient_name} ({issued})")
+    
+    def on_pending_selected(self, index):
+        """
+        Preenche o formulário com a requisição escolhida na fila de trabalho.
+        
+        Args:
+            index (int): Posição escolhida no combo
+        """
+        sample_code = self.pending_combo.itemData(index)
+        requisition = sample_code and self.main_window.requisition_index.lookup(sample_code)
+        if requisition:
+            self.fill_from_requisition(requisition)
+            self.requisition_status.setText("✔ Dados preenchidos a partir da requisição")
+    
+    def on_sample_code_entered(self):
+        """
+        Busca a requisição do código informado e preenche o formulário.
+        
+        O código pode ser o da amostra ou o número de prontuário; a
+        busca é uma única consulta ao índice de requisições.
+        """
+        code = self.sample_code.text().strip()
+        if not code:
+            self.requisition_status.clear()
+            return
+        requisition = self.main_window.requisition_index.lookup(code)
+        if requisition is None:
+            self.requisition_status.setText("")
+            return
+        self.fill_from_requisition(requisition)
+        self.requisition_status.setText("✔ Dados preenchidos a partir da requisição")
+    
+    def fill_from_requisition(self, requisition):
+        """
+        Preenche o formulário com os dados de uma requisição.
+        
+        Campos vazios na requisição não sobrescrevem o que já foi digitado.
+        
+        Args:
+            requisition (Requisition): Requisição recebida do sistema hospitalar
+        """
+        def set_text(widget, value):
+            if value:
+                widget.setText(value)
+        
+        def set_plain_text(widget, value):
+            if value:
+                widget.setPlainText(value)
+        
+        set_text(self.patient_name, requisition.patient_name)
+        set_text(self.record_number, requisition.record_number)
+        set_text(self.sample_code, requisition.sample_code)
+        set_text(self.collection_site, requisition.collection_site)
+        set_text(self.collection_datetime, requisition.collection_datetime)
+        set_text(self.tissue_type, requisition.tissue_type)
+        set_plain_text(self.clinical_suspicion, requisition.clinical_suspicion)
+        set_plain_text(self.clinical_history, requisition.clinical_history)
+        
+        if requisition.birth_date:
+            self.birth_date.setDate(QDate.fromString(requisition.birth_date, "dd/MM/yyyy"))
+        
+        # Os combos seguem a ordem dos códigos; "Outro" exibe o campo de especificação
+        self.gender.setCurrentIndex(int(requisition.gender))
+        self.procedure_type.setCurrentIndex(int(requisition.procedure_type))
+        set_text(self.other_procedure_input, requisition.procedure_other)
+        self.material_type.setCurrentIndex(int(requisition.material_type))
+        set_text(self.other_material_input, requisition.material_other)
     
     def on_procedure_type_changed(self, text):
         """
@@ -515,64 +805,110 @@ class PatientInfoWindow(QWidget):
             self.other_material_input.hide()
             self.other_material_input.clear()
     
-    def analyze_sample(self):
+    def choose_slide_image(self):
         """
-        Valida e processa os dados do formulário.
+        Pede a imagem da lâmina e a importa em segundo plano.
         
-        Verifica se os campos obrigatórios foram preenchidos e,
-        em case positivo, salva os dados e avança para a tela de carregamento.
+        A imagem é copiada para o diretório de imagens com o hash do
+        conteúdo como nome, que também identifica a imagem no cache
+        de análise.
+        """
+        self.choose_image("slide_image", "Selecionar lâmina digitalizada")
+    
+    def choose_gross_image(self):
+        """Pede a foto da macroscopia e a importa em segundo plano."""
+        self.choose_image("gross_image", "Selecionar foto da macroscopia")
+    
+    def choose_image(self, target, title):
+        """
+        Pede uma imagem e a importa em segundo plano.
         
-        Em uma implementação real, aqui seria feita validação
-        mais robusta dos dados inseridos.
+        Args:
+            target (str): Atributo que recebe a imagem ("slide_image" ou "gross_image")
+            title (str): Título do diálogo de seleção
         """
-        # Validar campos obrigatórios
-        if not all([self.patient_name.text(), self.record_number.text(), 
-                   self.sample_code.text(), self.tissue_type.text()]):
-            QMessageBox.warning(self, "Campos obrigatórios", 
-                               "Por favor, preencha todos os campos obrigatórios.")
+        path, _ = QFileDialog.getOpenFileName(self, title, "", IMAGE_FILTER)
+        if not path or self.image_worker:
             return
+        getattr(self, f"{target}_input").setText(f"Importando {os.path.basename(path)}...")
+        self.image_worker = Worker(import_image, path)
+        self.image_worker.signals.finished.connect(
+            lambda name: self.on_image_imported(name, os.path.basename(path), target))
+        self.image_worker.signals.error.connect(lambda message: self.on_image_error(message, target))
+        self.image_worker.start()
+    
+    def on_image_imported(self, name, original_name, target):
+        """
+        Registra a imagem importada.
         
-        # Validar campo "Outro" do procedimento se necessário
-        if self.procedure_type.currentText() == "Outro" and not self.other_procedure_input.text().strip():
-            QMessageBox.warning(self, "Campo obrigatório", 
-                               "Por favor, especifique o tipo de procedimento.")
+        Args:
+            name (str): Nome da imagem no diretório de imagens
+            original_name (str): Nome do arquivo escolhido
+            target (str): Atributo que recebe a imagem
+        """
+        self.image_worker = None
+        setattr(self, target, name)
+        getattr(self, f"{target}_input").setText(original_name)
+    
+    def on_image_error(self, message, target):
+        """
+        Informa a falha na importação da imagem.
+        
+        Args:
+            message (str): Mensagem de erro
+            target (str): Atributo que receberia a imagem
+        """
+        self.image_worker = None
+        getattr(self, f"{target}_input").setText(getattr(self, target) and "Imagem anterior mantida")
+        QMessageBox.warning(self, "Imagem", message)
+    
+    def analyze_sample(self):
+        """
+        Valida e processa os dados do formulário.
+        
+        Com todos os campos válidos, salva os dados e avança para a
+        tela de carregamento; caso contrário, destaca os campos inválidos.
+        """
+        # Valida na hora o que ainda esperava a pausa na digitação, sem diálogos:
+        # os erros ficam nos campos e o primeiro campo inválido recebe o foco
+        self._validation_timer.stop()
+        self._submitted = True
+        self.run_validation()
+        errors = self.validator.errors()
+        if errors:
+            self.validated_fields[next(iter(errors))].setFocus()
             return
         
-        # Validar campo "Outro" do material se necessário
-        if self.material_type.currentText() == "Outro" and not self.other_material_input.text().strip():
-            QMessageBox.warning(self, "Campo obrigatório", 
-                               "Por favor, especifique o tipo de material.")
+        if self.image_worker:
+            self.validation_label.setText("Aguarde o término da importação da imagem.")
+            self.validation_label.show()
             return
         
-        # Obter o tipo de procedimento (tratamento especial para "Outro")
-        procedure_type = self.procedure_type.currentText()
-        if procedure_type == "Outro":
-            procedure_type = self.other_procedure_input.text().strip()
-        
-        # Obter o tipo de material (tratamento especial para "Outro")
-        material_type = self.material_type.currentText()
-        if material_type == "Outro":
-            material_type = self.other_material_input.text().strip()
-        
-        # Salvar dados na janela principal
-        self.main_window.patient_data = {
-            "patient_name": self.patient_name.text(),
-            "birth_date": self.birth_date.date().toString("dd/MM/yyyy"),
-            "gender": self.gender.currentText(),
-            "record_number": self.record_number.text(),
-            "sample_code": self.sample_code.text(),
-            "clinical_suspicion": self.clinical_suspicion.toPlainText(),
-            "collection_site": self.collection_site.text(),
-            "procedure_type": procedure_type,  # Usar o valor tratado
-            "clinical_history": self.clinical_history.toPlainText(),
-            "material_type": material_type,  # Usar o valor tratado
-            "sample_quantity": self.sample_quantity.text(),
-            "preservation_medium": self.preservation_medium.currentText(),
-            "collection_datetime": self.collection_datetime.text(),
-            "tissue_type": self.tissue_type.text(),
-            "tissue_measurement": "2.5 x 1.8 x 0.5 cm",  # Valor simulado
-            "tissue_weight": "0.8 g"  # Valor simulado
-        }
+        # Salvar dados na janela principal (os combos seguem a ordem dos códigos)
+        self.case.patient_data = PatientRecord(
+            patient_name=self.patient_name.text(),
+            birth_date=self.birth_date.date().toString("dd/MM/yyyy"),
+            gender=Gender(self.gender.currentIndex()),
+            record_number=self.record_number.text(),
+            sample_code=self.sample_code.text(),
+            clinical_suspicion=self.clinical_suspicion.toPlainText(),
+            collection_site=self.collection_site.text(),
+            procedure_type=ProcedureType(self.procedure_type.currentIndex()),
+            procedure_other=self.other_procedure_input.text().strip(),
+            clinical_history=self.clinical_history.toPlainText(),
+            material_type=MaterialType(self.material_type.currentIndex()),
+            material_other=self.other_material_input.text().strip(),
+            sample_quantity=self.sample_quantity.text(),
+            preservation_medium=PreservationMedium(self.preservation_medium.currentIndex()),
+            collection_datetime=self.collection_datetime.text(),
+            tissue_type=self.tissue_type.text(),
+            # Em branco, preenchidos pela análise com a foto e a balança
+            tissue_measurement=self.tissue_measurement.text().strip(),
+            tissue_weight=self.tissue_weight.text().strip(),
+            slide_image=self.slide_image,
+            gross_image=self.gross_image
+        )
         
         # Avançar para tela de carregamento
-        self.main_window.show_loading_screen()
\ No newline at end of file
+        self.case.analysis_requested_at = time.perf_counter()
+        self.case.show_loading_screen()
\ No newline at end of file
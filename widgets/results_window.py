@@ -10,11 +10,19 @@ Classes:
 
 from PyQt5.QtWidgets import (QWidget, QLabel, QTextEdit, QPushButton, 
                              QVBoxLayout, QHBoxLayout, QGridLayout, QGroupBox, 
-                             QScrollArea, QFrame, QMessageBox)
+                             QScrollArea, QFrame, QMessageBox, QLineEdit, QListWidget,
+                             QListWidgetItem)
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont
 import time
+from core.metrics import REGISTRY, REPORT_SAVE_SECONDS, TERMINOLOGY_SEARCH_SECONDS
+from core.audit import ACTION_SAVE, ACTION_AMEND, ACTION_SIGN, ACTION_PRINT
+from core.annotations import AnnotationSet
+from core.images import image_path
+from core.terminology import TermMatch
 from .animated_button import AnimatedButton
+from .slide_viewer import SlideViewer
+from .version_history import VersionHistoryDialog
 
 
 class ResultsWindow(QWidget):
@@ -25,18 +33,32 @@ class ResultsWindow(QWidget):
     descrições macroscópica e microscópica, e diagnóstico.
     
     Attributes:
-        main_window (MainWindow): Referência à janela principal
+        case (CaseTab): Aba do caso (dados do paciente, resultado da análise e troca de telas)
+        main_window (MainWindow): Janela principal (serviços compartilhados e demais telas)
+        macro_text (QTextEdit): Descrição macroscópica
+        micro_text (QTextEdit): Descrição microscópica
+        diagnosis_text (QTextEdit): Conclusão diagnóstica (editável, pré-preenchida com a sugestão automática)
+        code_search (QLineEdit): Busca na terminologia para codificar o diagnóstico
+        code_list (QListWidget): Conceitos encontrados na busca
+        diagnosis_match (TermMatch): Código escolhido para o diagnóstico (None se não codificado)
+        stored_report (Report): Laudo já gravado da amostra, se houver
+        sign_label (QLabel): Situação da assinatura do laudo
+        versions_btn (QPushButton): Abre o histórico de versões (habilitado após salvar)
     """
     
-    def __init__(self, main_window):
+    def __init__(self, case):
         """
         Inicializa a tela de resultados.
         
         Args:
-            main_window (MainWindow): Instância da janela principal
+            case (CaseTab): Aba do caso
         """
         super().__init__()
-        self.main_window = main_window
+        self.case = case
+        self.main_window = case.main_window
+        self.diagnosis_match = None
+        self.code_search = None
+        self.stored_report = None
         self.initUI()
         
     def initUI(self):
@@ -114,7 +136,7 @@ class ResultsWindow(QWidget):
         layout.setSpacing(20)
         
         # Verificar se existem dados do paciente
-        if not hasattr(self.main_window, 'patient_data') or not self.main_window.patient_data:
+        if self.case.patient_data is None:
             self.show_error_message(layout)
         else:
             self.show_patient_report(layout)
@@ -153,7 +175,7 @@ class ResultsWindow(QWidget):
                 background-color: #003566;
             }
         """)
-        back_btn.clicked.connect(self.main_window.show_patient_info_screen)
+        back_btn.clicked.connect(self.case.show_patient_info_screen)
         layout.addWidget(back_btn, alignment=Qt.AlignCenter)
     
     def show_patient_report(self, layout):
@@ -163,7 +185,8 @@ class ResultsWindow(QWidget):
         Args:
             layout (QVBoxLayout): Layout onde o laudo será exibido
         """
-        patient_data = self.main_window.patient_data
+        patient_data = self.case.patient_data
+        self.stored_report = self.main_window.report_store.get_report(patient_data.sample_code)
         
         # ===== SEÇÃO 1: IDENTIFICAÇÃO DO PACIENTE =====
         patient_group = QGroupBox("Identificação do Paciente")
@@ -200,11 +223,11 @@ class ResultsWindow(QWidget):
             patient_layout.addWidget(value_widget, row, 1)
         
         # Adicionar informações do paciente
-        add_patient_info("Nome:", patient_data.get("patient_name", "N/A"), 0)
-        add_patient_info("Data de nascimento:", patient_data.get("birth_date", "N/A"), 1)
-        add_patient_info("Sexo:", patient_data.get("gender", "N/A"), 2)
-        add_patient_info("Nº de prontuário:", patient_data.get("record_number", "N/A"), 3)
-        add_patient_info("Código da amostra:", patient_data.get("sample_code", "N/A"), 4)
+        add_patient_info("Nome:", patient_data.label("patient_name"), 0)
+        add_patient_info("Data de nascimento:", patient_data.label("birth_date"), 1)
+        add_patient_info("Sexo:", patient_data.label("gender"), 2)
+        add_patient_info("Nº de prontuário:", patient_data.label("record_number"), 3)
+        add_patient_info("Código da amostra:", patient_data.label("sample_code"), 4)
         
         patient_group.setLayout(patient_layout)
         layout.addWidget(patient_group)
@@ -243,14 +266,14 @@ class ResultsWindow(QWidget):
             sample_layout.addWidget(value_widget, row, 1)
         
         # Adicionar informações da amostra
-        add_sample_info("Material recebido:", patient_data.get("material_type", "N/A"), 0)
-        add_sample_info("Local da coleta:", patient_data.get("collection_site", "N/A"), 1)
-        add_sample_info("Tipo de procedimento:", patient_data.get("procedure_type", "N/A"), 2)
-        add_sample_info("Tipo de tecido:", patient_data.get("t tissue_type", "N/A"), 3)
-        add_sample_info("Medidas do tecido:", patient_data.get("tissue_measurement", "N/A"), 4)
-        add_sample_info("Peso do tecido:", patient_data.get("tissue_weight", "N/A"), 5)
-        add_sample_info("Meio de conservação:", patient_data.get("preservation_medium", "N/A"), 6)
-        add_sample_info("Data/hora coleta:", patient_data.get("collection_datetime", "N/A"), 7)
+        add_sample_info("Material recebido:", patient_data.label("material_type"), 0)
+        add_sample_info("Local da coleta:", patient_data.label("collection_site"), 1)
+        add_sample_info("Tipo de procedimento:", patient_data.label("procedure_type"), 2)
+        add_sample_info("Tipo de tecido:", patient_data.label("tissue_type"), 3)
+        add_sample_info("Medidas do tecido:", patient_data.label("tissue_measurement"), 4)
+        add_sample_info("Peso do tecido:", patient_data.label("tissue_weight"), 5)
+        add_sample_info("Meio de conservação:", patient_data.label("preservation_medium"), 6)
+        add_sample_info("Data/hora coleta:", patient_data.label("collection_datetime"), 7)
         
         sample_group.setLayout(sample_layout)
         layout.addWidget(sample_group)
@@ -274,11 +297,11 @@ class ResultsWindow(QWidget):
             }
         """)
         macro_layout = QVBoxLayout()
-        macro_text = QTextEdit()
+        self.macro_text = macro_text = QTextEdit()
         macro_text.setFont(QFont("Arial", 10))
-        macro_text.setText(f"Amostra recebida em {patient_data.get('preservation_medium', 'N/A').lower()}, "
-                          f"consistindo de fragmento(s) de tecido {patient_data.get('tissue_type', 'N/A').lower()} "
-                          f"medindo {patient_data.get('tissue_measurement', 'N/A')} e pesando {patient_data.get('tissue_weight', 'N/A')}. "
+        macro_text.setText(f"Amostra recebida em {patient_data.label('preservation_medium').lower()}, "
+                          f"consistindo de fragmento(s) de tecido {patient_data.label('tissue_type').lower()} "
+                          f"medindo {patient_data.label('tissue_measurement')} e pesando {patient_data.label('tissue_weight')}. "
                           "Superfície externa irregular. Corte com aspecto homogêneo, cor esbranquiçada.")
         macro_text.setReadOnly(True)
         macro_text.setStyleSheet("border: 1px solid #ddd; border-radius: 5px; padding: 10px; background-color: white;")
@@ -305,12 +328,18 @@ class ResultsWindow(QWidget):
             }
         """)
         micro_layout = QVBoxLayout()
-        micro_text = QTextEdit()
+        self.micro_text = micro_text = QTextEdit()
         micro_text.setFont(QFont("Arial", 10))
         micro_text.setText("Os cortes histológicos corados pela hematoxilina-eosina mostram fragmentos de tecido "
                           "com arquitetura preservada. Observa-se presença de células com núcleos hipercromáticos "
                           "e moderado pleomorfismo. Mitoses são raras. Não há evidência de invasão vascular ou "
                           "perineural. Margens cirúrgicas livres de comprometimento neoplásico.")
+        analysis_result = self.case.analysis_result
+        if analysis_result and analysis_result.get("microscopy_text"):
+            # Modelo de texto fornecido por um plugin para o tipo de tecido
+            micro_text.setText(analysis_result.get("microscopy_text"))
+        if analysis_result and analysis_result.get("analysis_summary"):
+            micro_text.append("\n" + analysis_result.get("analysis_summary"))
         micro_text.setReadOnly(True)
         micro_text.setStyleSheet("border: 1px solid #ddd; border-radius: 5px; padding: 10px; background-color: white;")
         micro_layout.addWidget(micro_text)
@@ -336,13 +365,26 @@ class ResultsWindow(QWidget):
             }
         """)
         diagnosis_layout = QVBoxLayout()
-        diagnosis_text = QTextEdit()
+        self.diagnosis_text = diagnosis_text = QTextEdit()
         diagnosis_text.setFont(QFont("Arial", 10, QFont.Bold))
         diagnosis_text.setText("Fragmentos de tecido compatíveis com lesão benigna.\n"
                               "Sugere-se acompanhamento clínico conforme orientação médica.")
-        diagnosis_text.setReadOnly(True)
+        suggestion = analysis_result.get("diagnosis_suggestion") if analysis_result else None
+        if suggestion:
+            # Sugestão do classificador: texto pré-preenchido, revisado pelo patologista
+            suggestion_label = QLabel(f"Sugestão automática: {suggestion.label} "
+                                      f"(confiança {suggestion.confidence:.0%}, {suggestion.tiles} regiões "
+                                      f"analisadas). Revise o texto antes de salvar.")
+            suggestion_label.setFont(QFont("Arial", 9))
+            suggestion_label.setWordWrap(True)
+            suggestion_label.setStyleSheet("color: #666666; padding: 0;")
+            diagnosis_layout.addWidget(suggestion_label)
+            diagnosis_text.setText(suggestion.diagnosis)
         diagnosis_text.setStyleSheet("border: 1px solid #ddd; border-radius: 5px; padding: 10px; color: #023e8a; background-color: white;")
-        diagnosis_layout.addWidget(diagnosis_text)
+        coding_layout = QHBoxLayout()
+        coding_layout.addWidget(diagnosis_text, 3)
+        coding_layout.addLayout(self.create_coding_panel(), 2)
+        diagnosis_layout.addLayout(coding_layout)
         diagnosis_group.setLayout(diagnosis_layout)
         layout.addWidget(diagnosis_group)
         
@@ -364,9 +406,53 @@ class ResultsWindow(QWidget):
                 background-color: #5a6268;
             }
         """)
-        back_btn.clicked.connect(self.main_window.show_patient_info_screen)
+        back_btn.clicked.connect(self.case.show_patient_info_screen)
         button_layout.addWidget(back_btn)
         
+        # Botão Visualizar Lâmina (imagem com as anotações da análise)
+        viewer_btn = QPushButton("Visualizar Lâmina")
+        viewer_btn.setFont(QFont("Arial", 11))
+        viewer_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #0077b6;
+                color: white;
+                padding: 12px 20px;
+                border-radius: 8px;
+                border: none;
+            }
+            QPushButton:hover {
+                background-color: #023e8a;
+            }
+            QPushButton:disabled {
+                background-color: #adb5bd;
+            }
+        """)
+        viewer_btn.clicked.connect(self.open_slide_viewer)
+        viewer_btn.setEnabled(bool(patient_data.slide_image))
+        button_layout.addWidget(viewer_btn)
+        
+        # Botão Versões (histórico de retificações do laudo gravado)
+        self.versions_btn = QPushButton("Versões")
+        self.versions_btn.setFont(QFont("Arial", 11))
+        self.versions_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #0077b6;
+                color: white;
+                padding: 12px 20px;
+                border-radius: 8px;
+                border: none;
+            }
+            QPushButton:hover {
+                background-color: #023e8a;
+            }
+            QPushButton:disabled {
+                background-color: #adb5bd;
+            }
+        """)
+        self.versions_btn.clicked.connect(self.open_version_history)
+        self.versions_btn.setEnabled(self.stored_report is not None)
+        button_layout.addWidget(self.versions_btn)
+        
         button_layout.addStretch()
         
         # Botão Salvar Laudo
@@ -385,8 +471,38 @@ class ResultsWindow(QWidget):
             }
         """)
         save_btn.clicked.connect(self.save_report)
+        # Apenas patologistas e residentes emitem laudos
+        user = self.main_window.current_user
+        if user and not user.role.can_issue_reports:
+            save_btn.setEnabled(False)
+            save_btn.setToolTip(f"O perfil {user.role.label} não pode salvar laudos.")
         button_layout.addWidget(save_btn)
         
+        # Botão Assinar Laudo (liberação final; o laudo vai para o arquivo)
+        sign_btn = QPushButton("Assinar Laudo")
+        sign_btn.setFont(QFont("Arial", 11, QFont.Bold))
+        sign_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #2a9d8f;
+                color: white;
+                padding: 12px 25px;
+                border-radius: 8px;
+                border: none;
+            }
+            QPushButton:hover {
+                background-color: #21867a;
+            }
+            QPushButton:disabled {
+                background-color: #adb5bd;
+            }
+        """)
+        sign_btn.clicked.connect(self.sign_report)
+        # Apenas patologistas assinam laudos
+        if user and not user.role.can_sign_reports:
+            sign_btn.setEnabled(False)
+            sign_btn.setToolTip(f"O perfil {user.role.label} não pode assinar laudos.")
+        button_layout.addWidget(sign_btn)
+        
         # Botão Imprimir Laudo
         print_btn = QPushButton("Imprimir Laudo")
         print_btn.setFont(QFont("Arial", 11))
@@ -405,17 +521,246 @@ class ResultsWindow(QWidget):
         print_btn.clicked.connect(self.print_report)
         button_layout.addWidget(print_btn)
         
+        self.sign_label = QLabel()
+        self.sign_label.setFont(QFont("Arial", 9))
+        self.sign_label.setStyleSheet("color: #666666;")
+        self.update_sign_label(self.stored_report)
+        layout.addWidget(self.sign_label)
         layout.addLayout(button_layout)
     
+    def update_sign_label(self, report):
+        """
+        Exibe a situação da assinatura do laudo.
+
+        Args:
+            report (Report): Laudo gravado da amostra, ou None
+        """
+        if report is None:
+            self.sign_label.setText("Laudo ainda não salvo.")
+        elif report.signed:
+            signed_at = time.strftime("%d/%m/%Y %H:%M", time.localtime(report.signed_at))
+            seal = self.main_window.signature_ledger.seal(report.record.sample_code)
+            if seal and seal["signed_at"] == report.signed_at:
+                integrity = f"Selo de integridade SHA-256 {seal['content_hash'][:16]}…"
+            else:
+                integrity = "Selo de integridade em processamento."
+            self.sign_label.setText(f"Laudo assinado por {report.signed_by} em {signed_at}. {integrity} "
+                                    f"Alterações serão registradas como retificação e exigem nova assinatura.")
+        else:
+            self.sign_label.setText("Laudo salvo, aguardando assinatura.")
+
+    def create_coding_panel(self):
+        """
+        Cria o painel de codificação do diagnóstico (CID-10 / SNOMED-CT).
+
+        A busca roda a cada tecla digitada, no próprio índice da
+        terminologia (alguns milissegundos), sem esperar o fim da digitação.
+
+        Returns:
+            QVBoxLayout: Layout do painel
+        """
+        panel = QVBoxLayout()
+        title = QLabel("Codificação (CID-10 / SNOMED-CT)")
+        title.setFont(QFont("Arial", 10, QFont.Bold))
+        title.setStyleSheet("color: #023e8a; padding: 0;")
+        panel.addWidget(title)
+
+        self.code_search = QLineEdit()
+        self.code_search.setFont(QFont("Arial", 10))
+        self.code_search.setPlaceholderText("Buscar por termo ou código...")
+        self.code_search.setStyleSheet("border: 1px solid #ddd; border-radius: 5px; padding: 6px; background-color: white;")
+        self.code_search.textChanged.connect(self.search_codes)
+        panel.addWidget(self.code_search)
+
+        self.code_list = QListWidget()
+        self.code_list.setFont(QFont("Arial", 9))
+        self.code_list.setStyleSheet("border: 1px solid #ddd; border-radius: 5px; background-color: white;")
+        self.code_list.setMaximumHeight(140)
+        self.code_list.itemActivated.connect(self.select_code)
+        self.code_list.itemClicked.connect(self.select_code)
+        panel.addWidget(self.code_list)
+
+        self.code_label = QLabel()
+        self.code_label.setFont(QFont("Arial", 9))
+        self.code_label.setWordWrap(True)
+        self.code_label.setStyleSheet("color: #003566; padding: 0;")
+        panel.addWidget(self.code_label)
+
+        # Laudo já emitido para a amostra: mantém o código gravado
+        report = self.stored_report
+        if report and report.diagnosis_code:
+            self.diagnosis_match = TermMatch(report.diagnosis_system, report.diagnosis_code, "")
+        self.set_terminology(self.main_window.terminology)
+        return panel
+
+    def set_terminology(self, index):
+        """
+        Define a terminologia usada na busca (carregada em segundo plano pela janela principal).
+
+        Args:
+            index (TerminologyIndex): Terminologia, ou None se ainda carregando
+        """
+        if self.code_search is None:
+            return
+        self.code_search.setEnabled(index is not None)
+        match = self.diagnosis_match
+        if index is not None and match and not match.display:
+            # Código lido do laudo gravado: busca a descrição na terminologia
+            found = [m for m in index.search(match.code) if (m.system, m.code) == (match.system, match.code)]
+            if found:
+                self.diagnosis_match = found[0]
+        if index is not None and self.code_search.text():
+            self.search_codes(self.code_search.text())
+        self.update_code_label()
+
+    def search_codes(self, text):
+        """Atualiza a lista de conceitos a cada alteração da busca."""
+        index = self.main_window.terminology
+        self.code_list.clear()
+        if index is None:
+            return
+        with REGISTRY.histogram(TERMINOLOGY_SEARCH_SECONDS, "Tempo de busca na terminologia").time():
+            matches = index.search(text)
+        for match in matches:
+            item = QListWidgetItem(f"{match.code} — {match.display} ({match.system})")
+            item.setData(Qt.UserRole, match)
+            self.code_list.addItem(item)
+
+    def select_code(self, item):
+        """Codifica o diagnóstico com o conceito escolhido na lista."""
+        self.diagnosis_match = item.data(Qt.UserRole)
+        self.update_code_label()
+
+    def update_code_label(self):
+        """Exibe o código escolhido ou o estado da terminologia."""
+        match = self.diagnosis_match
+        if match:
+            description = f" — {match.display}" if match.display else ""
+            self.code_label.setText(f"Código: {match.code} ({match.system}){description}")
+        elif self.main_window.terminology is None:
+            self.code_label.setText("Carregando terminologia...")
+        elif self.main_window.terminology_error:
+            self.code_label.setText(f"Terminologia indisponível ({self.main_window.terminology_error}); "
+                                    f"usando o subconjunto de referência da CID-10.")
+        else:
+            self.code_label.setText("Diagnóstico não codificado. Escolha um conceito na lista.")
+
+    def draft(self):
+        """
+        Guarda o laudo em edição, para recriar a tela quando a aba do caso voltar a ser aberta.
+
+        Returns:
+            dict | None: Textos do laudo, código escolhido e busca na terminologia
+                (None se não há laudo na tela)
+        """
+        if self.code_search is None:
+            return None
+        return {"macroscopy": self.macro_text.toPlainText(),
+                "microscopy": self.micro_text.toPlainText(),
+                "diagnosis": self.diagnosis_text.toPlainText(),
+                "diagnosis_match": self.diagnosis_match,
+                "code_search": self.code_search.text()}
+
+    def restore_draft(self, draft):
+        """
+        Restaura o laudo em edição guardado por draft().
+
+        Args:
+            draft (dict): Laudo em edição
+        """
+        if self.code_search is None or not draft:
+            return
+        self.macro_text.setPlainText(draft["macroscopy"])
+        self.micro_text.setPlainText(draft["microscopy"])
+        self.diagnosis_text.setPlainText(draft["diagnosis"])
+        self.diagnosis_match = draft["diagnosis_match"]
+        self.code_search.setText(draft["code_search"])
+        self.update_code_label()
+
+    def annotations(self):
+        """
+        Retorna as anotações da lâmina: as da análise atual ou, na falta delas, as salvas com o laudo.
+
+        Returns:
+            AnnotationSet | None: Anotações, ou None se não houver
+        """
+        analysis_result = self.case.analysis_result
+        annotations = analysis_result.get("annotations") if analysis_result else None
+        if annotations is None:
+            annotations = self.main_window.report_store.get_annotations(
+                self.case.patient_data.sample_code)
+        return annotations
+    
+    def open_slide_viewer(self):
+        """Abre o visualizador da lâmina com as anotações."""
+        slide_image = self.case.patient_data.slide_image
+        annotations = self.annotations() or AnnotationSet()
+        SlideViewer(image_path(slide_image), annotations, self).exec_()
+    
+    def open_version_history(self):
+        """Abre o histórico de versões do laudo, com as diferenças entre elas."""
+        VersionHistoryDialog(self.main_window.report_store,
+                             self.case.patient_data.sample_code, self).exec_()
+    
+    def _store_report(self):
+        """
+        Grava o laudo com as anotações da lâmina e registra a ação na auditoria.
+
+        Returns:
+            Report: Laudo gravado
+        """
+        analysis_result = self.case.analysis_result
+        annotations = analysis_result.get("annotations") if analysis_result else None
+        with REGISTRY.histogram(REPORT_SAVE_SECONDS, "Latência de salvamento do laudo").time():
+            report = self.main_window.report_store.save_report(
+                self.case.patient_data,
+                macroscopy=self.macro_text.toPlainText(),
+                microscopy=self.micro_text.toPlainText(),
+                diagnosis=self.diagnosis_text.toPlainText(),
+                pathologist=self.main_window.logged_in_user,
+                diagnosis_system=self.diagnosis_match.system if self.diagnosis_match else "",
+                diagnosis_code=self.diagnosis_match.code if self.diagnosis_match else "")
+            if annotations is not None:
+                self.main_window.report_store.save_annotations(report.record.sample_code, annotations)
+        # Só é retificação regravar um laudo que já tem versão assinada (no arquivo);
+        # regravar um rascunho continua sendo gravação
+        amended = report.record.sample_code in self.main_window.report_store.archive
+        self.main_window.audit(ACTION_AMEND if amended else ACTION_SAVE, report.record.sample_code)
+        self.stored_report = report
+        self.update_sign_label(report)
+        self.versions_btn.setEnabled(True)
+        return report
+    
     def save_report(self):
         """
-        Simula o salvamento do laudo no sistema.
+        Salva o laudo no armazenamento de laudos, com as anotações da lâmina.
         
-        Em uma implementação real, aqui seria feita a persistência
-        dos dados em banco de dados ou sistema de arquivos.
+        Regravar a mesma amostra substitui o laudo anterior; em um laudo
+        assinado, cria uma retificação que precisa ser assinada.
         """
+        self._store_report()
         QMessageBox.information(self, "Sucesso", "Laudo salvo com sucesso no sistema!")
     
+    def sign_report(self):
+        """
+        Salva e assina o laudo, transferindo-o para o arquivo de laudos assinados.
+        
+        Após a assinatura, o laudo só muda por retificação.
+        """
+        answer = QMessageBox.question(
+            self, "Assinar Laudo",
+            "Após a assinatura, o laudo só poderá ser alterado por retificação. Deseja assinar?",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if answer != QMessageBox.Yes:
+            return
+        report = self._store_report()
+        report = self.main_window.report_store.sign_report(report.record.sample_code,
+                                                          self.main_window.logged_in_user)
+        self.main_window.audit(ACTION_SIGN, report.record.sample_code)
+        self.stored_report = report
+        self.update_sign_label(report)
+        QMessageBox.information(self, "Sucesso", "Laudo assinado com sucesso!")
+    
     def print_report(self):
         """
         Simula a impressão do laudo.
@@ -423,4 +768,5 @@ class ResultsWindow(QWidget):
         Em uma implementação real, aqui seria gerado um PDF
         ou enviado o documento para impressão.
         """
+        self.main_window.audit(ACTION_PRINT, self.case.patient_data.sample_code)
         QMessageBox.information(self, "Impressão", "Laudo enviado para impressão!")
\ No newline at end of file
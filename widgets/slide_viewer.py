@@ -0,0 +1,266 @@
+"""
+Módulo do visualizador de lâminas.
+
+Este módulo contém o visualizador da imagem da lâmina com as
+anotações da análise (núcleos e regiões classificadas), com zoom pela
+roda do mouse e deslocamento por arrasto. A camada de anotações
+desenha apenas o que cruza a área exposta, consultando o índice
+espacial (core.annotations); com a imagem afastada, regiões densas
+aparecem como agrupamentos.
+
+Classes:
+    AnnotationLayer: Camada de anotações da cena.
+    SlideView: Vista com zoom e arrasto.
+    SlideViewer: Diálogo do visualizador de lâminas.
+"""
+
+import math
+import time
+
+from PyQt5.QtWidgets import (QDialog, QLabel, QPushButton, QVBoxLayout, QHBoxLayout, QCheckBox,
+                             QGraphicsItem, QGraphicsScene, QGraphicsView, QGraphicsPixmapItem)
+from PyQt5.QtCore import Qt, QRectF, QPointF
+from PyQt5.QtGui import QFont, QPixmap, QPainter, QPen, QColor, QPolygonF
+from core.annotations import AnnotationIndex, POLYGON
+from core.metrics import REGISTRY, ANNOTATION_QUERY_SECONDS
+from core.workers import Worker
+
+# Cores dos rótulos conhecidos; os demais usam a paleta, pelo código do rótulo
+LABEL_COLORS = {
+    "núcleo": "#03045e",
+    "benigno": "#2a9d8f",
+    "atipico": "#f4a261",
+    "maligno": "#e63946",
+}
+_PALETTE = ("#0077b6", "#8338ec", "#ff006e", "#3a86ff", "#fb5607")
+
+# Nós da quadtree menores que isto na tela (pixels) são desenhados como agrupamentos
+LOD_PIXELS = 24
+
+# Fator de zoom de cada passo da roda do mouse
+ZOOM_STEP = 1.25
+
+
+class AnnotationLayer(QGraphicsItem):
+    """
+    Camada de anotações da cena, desenhada a partir do índice espacial.
+
+    As coordenadas do item são as das anotações (pixels da imagem
+    analisada); a escala do item ajusta-as à imagem exibida.
+
+    Attributes:
+        annotations (AnnotationSet): Anotações
+        index (AnnotationIndex): Índice espacial (None enquanto é construído)
+        on_query (callable): Recebe (anotações, agrupamentos, segundos) a cada desenho
+    """
+
+    def __init__(self, annotations, parent=None):
+        """
+        Cria a camada.
+
+        Args:
+            annotations (AnnotationSet): Anotações
+            parent (QGraphicsItem, optional): Item pai. Defaults to None.
+        """
+        super().__init__(parent)
+        self.annotations = annotations
+        self.index = None
+        self.on_query = None
+        self._colors = [QColor(LABEL_COLORS.get(label, _PALETTE[code % len(_PALETTE)]))
+                        for code, label in enumerate(annotations.labels)]
+        # exposedRect com a área realmente exposta, e não o retângulo inteiro do item
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption)
+
+    def set_index(self, index):
+        """Define o índice espacial e redesenha a camada."""
+        self.index = index
+        self.update()
+
+    def boundingRect(self):
+        width, height = self.annotations.image_size
+        return QRectF(0, 0, width, height)
+
+    def paint(self, painter, option, widget=None):
+        """Desenha as anotações e os agrupamentos que cruzam a área exposta."""
+        if self.index is None:
+            return
+        lod = option.levelOfDetailFromTransform(painter.worldTransform())
+        exposed = option.exposedRect
+        start = time.perf_counter()
+        items, clusters = self.index.query(exposed.left(), exposed.top(), exposed.right(),
+                                           exposed.bottom(), LOD_PIXELS / lod)
+        seconds = time.perf_counter() - start
+        REGISTRY.histogram(ANNOTATION_QUERY_SECONDS, "Tempo de consulta das anotações visíveis").observe(seconds)
+
+        annotations = self.annotations
+        codes = annotations.label_codes[items]
+        polygons = annotations.kinds[items] == POLYGON
+        painter.setBrush(Qt.NoBrush)
+        for code in set(codes[polygons].tolist()):
+            pen = QPen(self._colors[code], 2)
+            pen.setCosmetic(True)
+            painter.setPen(pen)
+            for i in items[polygons & (codes == code)]:
+                painter.drawPolygon(QPolygonF([QPointF(x, y) for x, y in annotations.polygon(i)]))
+        for code in set(codes[~polygons].tolist()):
+            pen = QPen(self._colors[code], 4)
+            pen.setCosmetic(True)
+            painter.setPen(pen)
+            points = annotations.bounds[items[~polygons & (codes == code)]]
+            painter.drawPoints(QPolygonF([QPointF(x, y) for x, y, _, _ in points]))
+
+        # Agrupamentos: círculo no centro médio, maior quanto mais anotações
+        painter.setPen(Qt.NoPen)
+        index = self.index
+        for node in clusters:
+            color = QColor(self._colors[index.node_label[node]])
+            color.setAlpha(140)
+            painter.setBrush(color)
+            radius = min(LOD_PIXELS / 2, 3 + math.sqrt(index.node_count[node])) / lod
+            x, y = index.node_center[node]
+            painter.drawEllipse(QPointF(x, y), radius, radius)
+
+        if self.on_query:
+            self.on_query(len(items), len(clusters), seconds)
+
+
+class SlideView(QGraphicsView):
+    """
+    Vista da lâmina com zoom pela roda do mouse e deslocamento por arrasto.
+    """
+
+    def __init__(self, scene, parent=None):
+        super().__init__(scene, parent)
+        self.setDragMode(QGraphicsView.ScrollHandDrag)
+        self.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
+        self.setRenderHint(QPainter.SmoothPixmapTransform)
+        self.setViewportUpdateMode(QGraphicsView.SmartViewportUpdate)
+        self.setBackgroundBrush(QColor("#f0f0f0"))
+
+    def wheelEvent(self, event):
+        """Aproxima ou afasta a imagem em torno do cursor."""
+        factor = ZOOM_STEP if event.angleDelta().y() > 0 else 1 / ZOOM_STEP
+        self.scale(factor, factor)
+
+    def fit(self):
+        """Ajusta a lâmina inteira à vista."""
+        self.fitInView(self.scene().sceneRect(), Qt.KeepAspectRatio)
+
+
+class SlideViewer(QDialog):
+    """
+    Diálogo do visualizador de lâminas com anotações.
+
+    Attributes:
+        view (SlideView): Vista da lâmina
+        layer (AnnotationLayer): Camada de anotações
+        status_label (QLabel): Quantidades e tempo da última consulta
+        worker (Worker): Construção do índice em andamento, se houver
+    """
+
+    def __init__(self, slide_path, annotations, parent=None):
+        """
+        Abre o visualizador.
+
+        Args:
+            slide_path (str): Arquivo da imagem da lâmina (pode não existir)
+            annotations (AnnotationSet): Anotações da lâmina
+            parent (QWidget, optional): Widget pai. Defaults to None.
+        """
+        super().__init__(parent)
+        self.annotations = annotations
+        self.worker = None
+        self.initUI(slide_path)
+        self.build_index()
+
+    def initUI(self, slide_path):
+        """
+        Configura a interface gráfica do diálogo.
+
+        Cria:
+        - Cena com a imagem da lâmina e a camada de anotações
+        - Legenda com a quantidade de anotações por rótulo
+        - Controles de exibição
+        """
+        self.setWindowTitle("Visualizador de Lâmina")
+        self.resize(1000, 750)
+        layout = QVBoxLayout()
+
+        scene = QGraphicsScene(self)
+        pixmap = QPixmap(slide_path) if slide_path else QPixmap()
+        width, height = self.annotations.image_size
+        if not pixmap.isNull():
+            scene.addItem(QGraphicsPixmapItem(pixmap))
+            scene.setSceneRect(QRectF(pixmap.rect()))
+        else:
+            scene.setSceneRect(QRectF(0, 0, width, height))
+        self.layer = AnnotationLayer(self.annotations)
+        if not pixmap.isNull() and width:
+            self.layer.setScale(pixmap.width() / width)
+        self.layer.on_query = self.on_query
+        scene.addItem(self.layer)
+        self.view = SlideView(scene)
+        layout.addWidget(self.view)
+
+        legend = ", ".join(f"{label}: {count}" for label, count in self.annotations.counts().items())
+        legend_label = QLabel(legend or "Nenhuma anotação.")
+        legend_label.setFont(QFont("Arial", 10))
+        legend_label.setStyleSheet("color: #003566;")
+        layout.addWidget(legend_label)
+
+        controls = QHBoxLayout()
+        annotations_check = QCheckBox("Exibir anotações")
+        annotations_check.setChecked(True)
+        annotations_check.toggled.connect(self.layer.setVisible)
+        controls.addWidget(annotations_check)
+        self.status_label = QLabel("Indexando anotações...")
+        self.status_label.setFont(QFont("Arial", 9))
+        self.status_label.setStyleSheet("color: #666666;")
+        controls.addWidget(self.status_label)
+        controls.addStretch()
+
+        fit_btn = QPushButton("Ajustar à Tela")
+        fit_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #023e8a;
+                color: white;
+                padding: 8px 16px;
+                border-radius: 8px;
+                border: none;
+            }
+            QPushButton:hover {
+                background-color: #003566;
+            }
+        """)
+        fit_btn.clicked.connect(self.view.fit)
+        controls.addWidget(fit_btn)
+        layout.addLayout(controls)
+        self.setLayout(layout)
+
+    def showEvent(self, event):
+        """Ajusta a lâmina à vista ao abrir."""
+        super().showEvent(event)
+        self.view.fit()
+
+    def build_index(self):
+        """Constrói o índice espacial em segundo plano (centenas de milhares de anotações levam ~1 s)."""
+        annotations = self.annotations
+        self.worker = Worker(lambda progress, cancelled: AnnotationIndex(annotations))
+        self.worker.signals.finished.connect(self.on_index_built)
+        self.worker.signals.error.connect(self.on_index_error)
+        self.worker.start()
+
+    def on_index_built(self, index):
+        """Passa o índice para a camada de anotações."""
+        self.worker = None
+        self.layer.set_index(index)
+
+    def on_index_error(self, message):
+        """Informa a falha na construção do índice."""
+        self.worker = None
+        self.status_label.setText(f"Falha ao indexar as anotações: {message}")
+
+    def on_query(self, items, clusters, seconds):
+        """Exibe o resultado da última consulta de área visível."""
+        self.status_label.setText(f"{items} anotações e {clusters} agrupamentos visíveis "
+                                  f"(consulta em {seconds * 1000:.2f} ms)")
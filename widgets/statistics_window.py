@@ -0,0 +1,236 @@
+"""
+Módulo da tela de estatísticas.
+
+Este módulo contém a implementação do painel de estatísticas do
+laboratório, com contagens de casos e tempos de liberação agrupados
+por tecido, procedimento, material e mês.
+
+Classes:
+    StatisticsWindow: Tela de estatísticas do laboratório.
+"""
+
+from PyQt5.QtWidgets import (QWidget, QLabel, QPushButton, QVBoxLayout, QHBoxLayout,
+                             QComboBox, QFrame, QTableWidget, QTableWidgetItem,
+                             QHeaderView, QAbstractItemView)
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QFont
+import time
+from .export_dialog import ExportDialog
+
+
+class StatisticsWindow(QWidget):
+    """
+    Tela de estatísticas do laboratório.
+
+    Consulta o índice colunar de casos (CaseIndex) da janela principal
+    e exibe os agrupamentos escolhidos pelo usuário em uma tabela.
+
+    Attributes:
+        main_window (MainWindow): Referência à janela principal
+        primary_combo (QComboBox): Primeira dimensão do agrupamento
+        secondary_combo (QComboBox): Segunda dimensão do agrupamento (opcional)
+        table (QTableWidget): Tabela de resultados
+        summary_label (QLabel): Resumo com total de casos e tempo da consulta
+    """
+
+    # Dimensões disponíveis: (rótulo exibido, nome no índice)
+    DIMENSIONS = [
+        ("Tipo de tecido", "tissue_type"),
+        ("Tipo de procedimento", "procedure_type"),
+        ("Tipo de material", "material_type"),
+        ("Mês de emissão", "month"),
+    ]
+
+    def __init__(self, main_window):
+        """
+        Inicializa a tela de estatísticas.
+
+        Args:
+            main_window (MainWindow): Instância da janela principal
+        """
+        super().__init__()
+        self.main_window = main_window
+        self.initUI()
+
+    def initUI(self):
+        """
+        Configura a interface gráfica da tela de estatísticas.
+
+        Cria:
+        - Cabeçalho com título e botão de voltar
+        - Seletores de agrupamento
+        - Tabela com contagens e percentis do tempo de liberação
+        """
+        main_layout = QVBoxLayout()
+        main_layout.setContentsMargins(20, 20, 20, 20)
+
+        # ===== CABEÇALHO =====
+        header = QFrame()
+        header.setStyleSheet("background-color: #023e8a; border-radius: 10px; padding: 15px;")
+        header_layout = QHBoxLayout()
+
+        user_info = QLabel(f"Dr. {self.main_window.logged_in_user}")
+        user_info.setFont(QFont("Arial", 12, QFont.Bold))
+        user_info.setStyleSheet("color: white;")
+
+        title = QLabel("Estatísticas do Laboratório")
+        title.setFont(QFont("Arial", 16, QFont.Bold))
+        title.setAlignment(Qt.AlignCenter)
+        title.setStyleSheet("color: white;")
+
+        back_btn = QPushButton("Voltar")
+        back_btn.setFont(QFont("Arial", 10))
+        back_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #ffffff;
+                color: #023e8a;
+                padding: 8px 15px;
+                border-radius: 5px;
+                border: none;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background-color: #f0f0f0;
+            }
+        """)
+        back_btn.clicked.connect(self.main_window.show_patient_info_screen)
+
+        header_layout.addWidget(user_info)
+        header_layout.addWidget(title)
+        header_layout.addWidget(back_btn)
+        header.setLayout(header_layout)
+        main_layout.addWidget(header)
+
+        # ===== CONTEÚDO =====
+        content = QFrame()
+        content.setStyleSheet("background-color: white; border-radius: 10px;")
+        layout = QVBoxLayout()
+        layout.setContentsMargins(20, 20, 20, 20)
+        layout.setSpacing(15)
+
+        # Seletores de agrupamento
+        combo_style = "padding: 8px; border: 1px solid #ddd; border-radius: 5px; background-color: white;"
+        selector_layout = QHBoxLayout()
+        selector_layout.addWidget(QLabel("Agrupar por:"))
+        self.primary_combo = QComboBox()
+        self.primary_combo.setFont(QFont("Arial", 10))
+        self.primary_combo.setStyleSheet(combo_style)
+        for label, _ in self.DIMENSIONS:
+            self.primary_combo.addItem(label)
+        selector_layout.addWidget(self.primary_combo)
+
+        selector_layout.addWidget(QLabel("e por:"))
+        self.secondary_combo = QComboBox()
+        self.secondary_combo.setFont(QFont("Arial", 10))
+        self.secondary_combo.setStyleSheet(combo_style)
+        self.secondary_combo.addItem("—")
+        for label, _ in self.DIMENSIONS:
+            self.secondary_combo.addItem(label)
+        selector_layout.addWidget(self.secondary_combo)
+        selector_layout.addStretch()
+
+        export_btn = QPushButton("Exportar Laudos")
+        export_btn.setFont(QFont("Arial", 10, QFont.Bold))
+        export_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #48cae4;
+                color: white;
+                padding: 8px 20px;
+                border-radius: 8px;
+                border: none;
+            }
+            QPushButton:hover {
+                background-color: #0096c7;
+            }
+        """)
+        export_btn.clicked.connect(self.open_export_dialog)
+        selector_layout.addWidget(export_btn)
+        layout.addLayout(selector_layout)
+
+        self.primary_combo.currentIndexChanged.connect(self.refresh)
+        self.secondary_combo.currentIndexChanged.connect(self.refresh)
+
+        # Tabela de resultados
+        self.table = QTableWidget()
+        self.table.setFont(QFont("Arial", 10))
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.verticalHeader().hide()
+        self.table.setStyleSheet("border: 1px solid #ddd; border-radius: 5px;")
+        layout.addWidget(self.table)
+
+        # Resumo
+        self.summary_label = QLabel()
+        self.summary_label.setFont(QFont("Arial", 10))
+        self.summary_label.setStyleSheet("color: #666666;")
+        layout.addWidget(self.summary_label)
+
+        content.setLayout(layout)
+        main_layout.addWidget(content)
+        self.setLayout(main_layout)
+
+    def open_export_dialog(self):
+        """Abre o diálogo de exportação do arquivo de laudos."""
+        ExportDialog(self.main_window, self).exec_()
+
+    def selected_dimensions(self):
+        """
+        Retorna as dimensões escolhidas nos seletores, sem repetições.
+
+        Returns:
+            list[tuple]: Pares (rótulo exibido, nome no índice)
+        """
+        dimensions = [self.DIMENSIONS[self.primary_combo.currentIndex()]]
+        secondary = self.secondary_combo.currentIndex() - 1
+        if secondary >= 0 and self.DIMENSIONS[secondary] not in dimensions:
+            dimensions.append(self.DIMENSIONS[secondary])
+        return dimensions
+
+    def refresh(self):
+        """
+        Executa a consulta no índice de casos e atualiza a tabela.
+
+        Cada linha mostra a contagem de casos do grupo e os percentis
+        50/90/95 do tempo entre a coleta e a emissão do laudo.
+        """
+        case_index = self.main_window.case_index
+        if not case_index.loaded:
+            # Carregado em segundo plano pela janela principal, que chama refresh() ao terminar
+            self.table.clear()
+            self.table.setRowCount(0)
+            self.summary_label.setText("Carregando o índice de casos...")
+            return
+        dimensions = self.selected_dimensions()
+        names = [name for _, name in dimensions]
+
+        start = time.perf_counter()
+        counts = case_index.group_counts(names)
+        percentiles = {row[:len(names)]: row[len(names) + 1:]
+                       for row in case_index.turnaround_percentiles(names)}
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        headers = [label for label, _ in dimensions] + ["Casos", "P50 (h)", "P90 (h)", "P95 (h)"]
+        self.table.clear()
+        self.table.setColumnCount(len(headers))
+        self.table.setHorizontalHeaderLabels(headers)
+        self.table.setRowCount(len(counts))
+        for row, values in enumerate(counts):
+            labels, count = values[:-1], values[-1]
+            cells = list(labels) + [str(count)]
+            cells += [f"{p:.1f}" for p in percentiles.get(labels, ())] or ["—"] * 3
+            for column, text in enumerate(cells):
+                item = QTableWidgetItem(text)
+                if column >= len(labels):
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row, column, item)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+
+        cache = self.main_window.analysis_cache.stats()
+        plugins = "".join(f" • plugin {plugin.info.name}: importação {plugin.import_seconds * 1000:.0f} ms, "
+                          f"inicialização {plugin.init_seconds * 1000:.0f} ms"
+                          for plugin in self.main_window.plugin_registry.loaded())
+        self.summary_label.setText(f"{case_index.size} casos indexados • "
+                                   f"{len(counts)} grupos • consulta em {elapsed_ms:.1f} ms • "
+                                   f"cache de análise: {cache['hit_rate']:.0%} de acertos "
+                                   f"({cache['hits']}/{cache['hits'] + cache['misses']}), "
+                                   f"{cache['bytes'] / 1048576:.1f} MB{plugins}")
@@ -0,0 +1,180 @@
+"""
+Módulo do diálogo de versões do laudo.
+
+Este módulo contém o diálogo que lista as versões de um laudo (core.versions)
+e exibe, para a versão selecionada, as diferenças em relação à anterior
+nas seções de macroscopia, microscopia e diagnóstico. O histórico é
+reconstruído de uma vez ao abrir o diálogo; as diferenças são calculadas
+apenas para a versão selecionada e guardadas para as próximas seleções.
+
+Classes:
+    VersionHistoryDialog: Diálogo de versões do laudo.
+"""
+
+import html
+import time
+
+from PyQt5.QtWidgets import (QDialog, QLabel, QPushButton, QVBoxLayout, QHBoxLayout,
+                             QListWidget, QListWidgetItem, QTextBrowser)
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QFont
+from core.versions import diff_html
+
+# Seções comparadas, na ordem do laudo
+SECTIONS = [
+    ("macroscopy", "Descrição Macroscópica"),
+    ("microscopy", "Descrição Microscópica"),
+    ("diagnosis", "Diagnóstico"),
+]
+
+
+class VersionHistoryDialog(QDialog):
+    """
+    Diálogo de versões do laudo.
+
+    Attributes:
+        sample_code (str): Código da amostra
+        versions (list[ReportVersion]): Versões, da primeira à mais recente
+        version_list (QListWidget): Versões, da mais recente à primeira
+        diff_view (QTextBrowser): Diferenças da versão selecionada
+    """
+
+    def __init__(self, report_store, sample_code, parent=None):
+        """
+        Inicializa o diálogo e carrega o histórico da amostra.
+
+        Args:
+            report_store (ReportStore): Armazenamento de laudos
+            sample_code (str): Código da amostra
+            parent (QWidget, optional): Widget pai. Defaults to None.
+        """
+        super().__init__(parent)
+        self.sample_code = sample_code
+        self.versions = report_store.versions.history(sample_code)
+        self._diffs = {}
+        self.initUI()
+
+    def initUI(self):
+        """
+        Configura a interface gráfica do diálogo.
+
+        Cria:
+        - Lista de versões (autor, data e assinatura)
+        - Área com as diferenças por seção
+        - Botão de fechar
+        """
+        self.setWindowTitle(f"Versões do Laudo {self.sample_code}")
+        self.resize(900, 600)
+        layout = QVBoxLayout()
+        layout.setSpacing(12)
+
+        title = QLabel(f"Versões do Laudo {self.sample_code}")
+        title.setFont(QFont("Arial", 14, QFont.Bold))
+        title.setStyleSheet("color: #023e8a;")
+        layout.addWidget(title)
+
+        content_layout = QHBoxLayout()
+        self.version_list = QListWidget()
+        self.version_list.setFont(QFont("Arial", 10))
+        self.version_list.setMinimumWidth(300)
+        self.version_list.setStyleSheet("""
+            QListWidget {
+                border: 1px solid #ddd;
+                border-radius: 5px;
+                background-color: white;
+            }
+            QListWidget::item {
+                padding: 6px;
+            }
+            QListWidget::item:selected {
+                background-color: #caf0f8;
+                color: #023e8a;
+            }
+        """)
+        for index in range(len(self.versions) - 1, -1, -1):
+            version = self.versions[index]
+            saved_at = time.strftime("%d/%m/%Y %H:%M", time.localtime(version.saved_at))
+            status = f"assinada por {version.signed_by}" if version.signed else "não assinada"
+            item = QListWidgetItem(f"Versão {version.number}\n{version.pathologist} · {saved_at} · {status}")
+            item.setData(Qt.UserRole, index)
+            self.version_list.addItem(item)
+        self.version_list.currentItemChanged.connect(self.show_version)
+        content_layout.addWidget(self.version_list, 1)
+
+        self.diff_view = QTextBrowser()
+        self.diff_view.setFont(QFont("Arial", 10))
+        self.diff_view.setStyleSheet("border: 1px solid #ddd; border-radius: 5px; background-color: white;")
+        content_layout.addWidget(self.diff_view, 3)
+        layout.addLayout(content_layout)
+
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        close_btn = QPushButton("Fechar")
+        close_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #6c757d;
+                color: white;
+                padding: 10px 20px;
+                border-radius: 8px;
+                border: none;
+            }
+            QPushButton:hover {
+                background-color: #5a6268;
+            }
+        """)
+        close_btn.clicked.connect(self.accept)
+        button_layout.addWidget(close_btn)
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+        if self.versions:
+            self.version_list.setCurrentRow(0)
+        else:
+            self.diff_view.setHtml("<p>Este laudo ainda não tem versões gravadas.</p>")
+
+    def show_version(self, item, previous=None):
+        """
+        Exibe as diferenças da versão selecionada em relação à anterior.
+
+        Args:
+            item (QListWidgetItem): Linha selecionada
+            previous (QListWidgetItem, optional): Linha selecionada antes
+        """
+        if item is None:
+            return
+        index = item.data(Qt.UserRole)
+        if index not in self._diffs:
+            self._diffs[index] = self.version_html(index)
+        self.diff_view.setHtml(self._diffs[index])
+
+    def version_html(self, index):
+        """
+        Monta o HTML das diferenças de uma versão.
+
+        Args:
+            index (int): Posição da versão em versions
+
+        Returns:
+            str: HTML com uma seção por parte do laudo (e o código, se mudou)
+        """
+        version = self.versions[index]
+        parent = self.versions[index - 1].fields if index else {}
+        parts = []
+        if index:
+            parts.append(f"<p style='color: #666666;'>Alterações em relação à versão "
+                         f"{self.versions[index - 1].number}.</p>")
+        code = " ".join(filter(None, (version.fields.get("diagnosis_system"),
+                                      version.fields.get("diagnosis_code"))))
+        old_code = " ".join(filter(None, (parent.get("diagnosis_system"), parent.get("diagnosis_code"))))
+        if code != old_code:
+            parts.append(f"<h3 style='color: #023e8a;'>Código do Diagnóstico</h3>"
+                         f"<p>{diff_html(old_code, code)}</p>")
+        for name, label in SECTIONS:
+            old, new = parent.get(name, ""), version.fields.get(name, "")
+            if index and old == new:
+                parts.append(f"<h3 style='color: #023e8a;'>{label}</h3>"
+                             f"<p style='color: #666666;'>Sem alterações.</p>")
+            else:
+                body = diff_html(old, new) if index else html.escape(new).replace("\n", "<br>")
+                parts.append(f"<h3 style='color: #023e8a;'>{label}</h3><p>{body or '—'}</p>")
+        return "".join(parts)